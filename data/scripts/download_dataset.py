@@ -12,19 +12,18 @@ import argparse
 import zipfile
 import shutil
 from pathlib import Path
-import yaml
 
 # Add project root to path
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
+from data.scripts.manifest import open_manifest
+from ml.config_registry import get_data_config, thaw
+
 
 def load_config():
-    """Load data configuration from YAML file."""
-    config_path = project_root / "data" / "configs" / "data_config.yaml"
-    with open(config_path, 'r') as f:
-        config = yaml.safe_load(f)
-    return config
+    """Load data configuration (a mutable copy of the cached config)."""
+    return thaw(get_data_config())
 
 
 def setup_kaggle_credentials(colab_mode=False):
@@ -241,19 +240,18 @@ def validate_dataset(config, raw_dir):
     print(f"  Tomato classes: {len(tomato_classes)}")
     print(f"  Potato classes: {len(potato_classes)}")
 
-    # Count images per class
+    # Count images per class from the manifest (only new or changed files are hashed)
+    with open_manifest(config, project_root) as manifest:
+        changes = manifest.sync(raw_dir, config['validation']['allowed_extensions'])
+        class_counts = manifest.class_counts(raw_dir)
+
+    print(f"  Manifest: {changes['new']} new, {changes['changed']} changed, "
+          f"{changes['unchanged']} unchanged, {changes['removed']} removed")
+
     total_images = 0
-    for class_dir in tomato_classes + potato_classes:
-        if class_dir.is_dir():
-            # Case-insensitive glob for common image extensions
-            image_files = (
-                list(class_dir.glob("*.jpg")) + list(class_dir.glob("*.JPG")) +
-                list(class_dir.glob("*.jpeg")) + list(class_dir.glob("*.JPEG")) +
-                list(class_dir.glob("*.png")) + list(class_dir.glob("*.PNG"))
-            )
-            num_images = len(image_files)
-            total_images += num_images
-            print(f"  {class_dir.name}: {num_images} images")
+    for (crop, class_name), num_images in class_counts.items():
+        total_images += num_images
+        print(f"  {class_name}: {num_images} images")
 
     print(f"\nTotal images: {total_images:,}")
 
@@ -261,14 +259,9 @@ def validate_dataset(config, raw_dir):
     min_images = config['validation']['min_images_per_class']
     for class_dir in tomato_classes + potato_classes:
         if class_dir.is_dir():
-            # Case-insensitive glob for common image extensions
-            image_files = (
-                list(class_dir.glob("*.jpg")) + list(class_dir.glob("*.JPG")) +
-                list(class_dir.glob("*.jpeg")) + list(class_dir.glob("*.JPEG")) +
-                list(class_dir.glob("*.png")) + list(class_dir.glob("*.PNG"))
-            )
-            if len(image_files) < min_images:
-                print(f"✗ Warning: {class_dir.name} has only {len(image_files)} images (minimum: {min_images})")
+            num_images = class_counts.get((class_dir.parent.name, class_dir.name), 0)
+            if num_images < min_images:
+                print(f"✗ Warning: {class_dir.name} has only {num_images} images (minimum: {min_images})")
 
     print("\n✓ Dataset validation completed")
     return True
@@ -288,6 +281,11 @@ def main():
         default=None,
         help='Custom output directory (default: data/raw)'
     )
+    parser.add_argument(
+        '--force-download',
+        action='store_true',
+        help='Download again even if an organized dataset is already present'
+    )
 
     args = parser.parse_args()
 
@@ -309,11 +307,18 @@ def main():
     print(f"Output Directory: {output_dir}")
     print(f"{'='*60}\n")
 
-    # Setup Kaggle credentials
-    setup_kaggle_credentials(colab_mode=args.colab_mode)
+    # Skip the multi-GB download when an organized dataset already exists;
+    # the manifest sync in validate_dataset picks up any local changes
+    already_present = (output_dir / "tomato").exists() and (output_dir / "potato").exists()
 
-    # Download dataset
-    download_dataset(config, output_dir, colab_mode=args.colab_mode)
+    if already_present and not args.force_download:
+        print("✓ Organized dataset found, skipping download (use --force-download to refresh)")
+    else:
+        # Setup Kaggle credentials
+        setup_kaggle_credentials(colab_mode=args.colab_mode)
+
+        # Download dataset
+        download_dataset(config, output_dir, colab_mode=args.colab_mode)
 
     # Organize dataset
     organize_dataset(config, output_dir)
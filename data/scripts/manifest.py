@@ -0,0 +1,281 @@
+"""
+Dataset Manifest
+Author: Peter Maina (136532)
+Project: AI-Based Tomato & Potato Disease Classification
+
+Persistent SQLite manifest shared by the data scripts so that re-runs only
+touch new or changed images.
+
+Every image is tracked per directory root (e.g. data/raw, data/processed)
+with its size, mtime, content hash, validation status and split assignment.
+Each stage records the hash it last exported, so a file only needs work again
+when its content changes.
+"""
+
+import hashlib
+import sqlite3
+import time
+from pathlib import Path
+
+CROP_DIRS = ['tomato', 'potato']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    root TEXT NOT NULL,
+    relpath TEXT NOT NULL,
+    crop TEXT NOT NULL,
+    class_name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    split TEXT,
+    exported_sha256 TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (root, relpath)
+);
+CREATE INDEX IF NOT EXISTS idx_images_class ON images (root, class_name);
+"""
+
+
+def hash_file(path, chunk_size=1024 * 1024):
+    """
+    Compute the SHA-256 hash of a file.
+
+    Args:
+        path (Path): File to hash
+        chunk_size (int): Read size in bytes
+
+    Returns:
+        str: Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DatasetManifest:
+    """SQLite-backed record of every image seen by the data pipeline."""
+
+    def __init__(self, db_path):
+        """
+        Open (or create) the manifest database.
+
+        Args:
+            db_path (Path): Path to the SQLite file
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        """Commit pending changes and close the database."""
+        self.conn.commit()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @staticmethod
+    def _root_key(root):
+        """Normalise a directory root into the key stored in the manifest."""
+        return str(Path(root).resolve())
+
+    def sync(self, root, allowed_extensions):
+        """
+        Scan a crop/class/image directory tree and record changes.
+
+        Files whose size and mtime match the manifest are not re-hashed.
+        Files whose content hash changed are reset to 'pending' so that
+        downstream stages pick them up again.
+
+        Args:
+            root (Path): Directory containing tomato/ and potato/ subfolders
+            allowed_extensions (list): Image extensions, e.g. ['.jpg', '.png']
+
+        Returns:
+            dict: Counts of new, changed, unchanged and removed files, plus
+                the relpaths of removed files under 'removed_paths'
+        """
+        root = Path(root)
+        root_key = self._root_key(root)
+        extensions = {ext.lower() for ext in allowed_extensions}
+
+        existing = {
+            row['relpath']: row
+            for row in self.conn.execute(
+                "SELECT relpath, size, mtime_ns, sha256 FROM images WHERE root = ?",
+                (root_key,)
+            )
+        }
+
+        counts = {'new': 0, 'changed': 0, 'unchanged': 0, 'removed': 0}
+        seen = set()
+        now = time.time()
+
+        for crop in CROP_DIRS:
+            crop_dir = root / crop
+            if not crop_dir.exists():
+                continue
+
+            for class_dir in sorted(crop_dir.iterdir()):
+                if not class_dir.is_dir():
+                    continue
+
+                for image_path in class_dir.iterdir():
+                    if image_path.suffix.lower() not in extensions:
+                        continue
+
+                    relpath = f"{crop}/{class_dir.name}/{image_path.name}"
+                    seen.add(relpath)
+                    stat = image_path.stat()
+                    row = existing.get(relpath)
+
+                    if row is not None and row['size'] == stat.st_size \
+                            and row['mtime_ns'] == stat.st_mtime_ns:
+                        counts['unchanged'] += 1
+                        continue
+
+                    sha256 = hash_file(image_path)
+
+                    if row is None:
+                        self.conn.execute(
+                            "INSERT INTO images (root, relpath, crop, class_name, size, "
+                            "mtime_ns, sha256, status, updated_at) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?, 'pending', ?)",
+                            (root_key, relpath, crop, class_dir.name,
+                             stat.st_size, stat.st_mtime_ns, sha256, now)
+                        )
+                        counts['new'] += 1
+                    elif row['sha256'] == sha256:
+                        # Touched but identical content: keep status and split
+                        self.conn.execute(
+                            "UPDATE images SET size = ?, mtime_ns = ?, updated_at = ? "
+                            "WHERE root = ? AND relpath = ?",
+                            (stat.st_size, stat.st_mtime_ns, now, root_key, relpath)
+                        )
+                        counts['unchanged'] += 1
+                    else:
+                        # Content changed: revalidate, but keep split assignment
+                        self.conn.execute(
+                            "UPDATE images SET size = ?, mtime_ns = ?, sha256 = ?, "
+                            "status = 'pending', updated_at = ? "
+                            "WHERE root = ? AND relpath = ?",
+                            (stat.st_size, stat.st_mtime_ns, sha256, now,
+                             root_key, relpath)
+                        )
+                        counts['changed'] += 1
+
+        removed = [relpath for relpath in existing if relpath not in seen]
+        self.conn.executemany(
+            "DELETE FROM images WHERE root = ? AND relpath = ?",
+            [(root_key, relpath) for relpath in removed]
+        )
+        counts['removed'] = len(removed)
+        counts['removed_paths'] = removed
+
+        self.conn.commit()
+        return counts
+
+    def records(self, root, class_name=None):
+        """
+        Get manifest rows for a directory root.
+
+        Args:
+            root (Path): Directory root
+            class_name (str): Restrict to a single class (optional)
+
+        Returns:
+            list: sqlite3.Row objects ordered by relpath
+        """
+        query = "SELECT * FROM images WHERE root = ?"
+        params = [self._root_key(root)]
+        if class_name is not None:
+            query += " AND class_name = ?"
+            params.append(class_name)
+        query += " ORDER BY relpath"
+        return self.conn.execute(query, params).fetchall()
+
+    def class_counts(self, root):
+        """
+        Count images per class for a directory root.
+
+        Args:
+            root (Path): Directory root
+
+        Returns:
+            dict: Mapping of (crop, class_name) to image count
+        """
+        rows = self.conn.execute(
+            "SELECT crop, class_name, COUNT(*) AS n FROM images "
+            "WHERE root = ? GROUP BY crop, class_name ORDER BY crop, class_name",
+            (self._root_key(root),)
+        )
+        return {(row['crop'], row['class_name']): row['n'] for row in rows}
+
+    def set_status(self, root, relpath, status):
+        """Record the validation status ('valid' or 'invalid') of an image."""
+        self.conn.execute(
+            "UPDATE images SET status = ?, updated_at = ? WHERE root = ? AND relpath = ?",
+            (status, time.time(), self._root_key(root), relpath)
+        )
+
+    def set_exported(self, root, relpath, sha256):
+        """Record the content hash that a stage last exported downstream."""
+        self.conn.execute(
+            "UPDATE images SET exported_sha256 = ?, updated_at = ? "
+            "WHERE root = ? AND relpath = ?",
+            (sha256, time.time(), self._root_key(root), relpath)
+        )
+
+    def set_split(self, root, relpath, split):
+        """Assign an image to 'train', 'validation' or 'test'."""
+        self.conn.execute(
+            "UPDATE images SET split = ?, updated_at = ? WHERE root = ? AND relpath = ?",
+            (split, time.time(), self._root_key(root), relpath)
+        )
+
+    def reset_stage(self, root, clear_splits=False):
+        """
+        Forget exported hashes under root so the next run redoes all work.
+
+        Args:
+            root (Path): Directory root
+            clear_splits (bool): Also drop train/validation/test assignments
+        """
+        self.conn.execute(
+            "UPDATE images SET exported_sha256 = NULL, status = 'pending' WHERE root = ?",
+            (self._root_key(root),)
+        )
+        if clear_splits:
+            self.conn.execute(
+                "UPDATE images SET split = NULL WHERE root = ?",
+                (self._root_key(root),)
+            )
+        self.conn.commit()
+
+    def commit(self):
+        """Commit pending changes."""
+        self.conn.commit()
+
+
+def open_manifest(config, project_root):
+    """
+    Open the manifest configured in data_config.yaml.
+
+    Args:
+        config (dict): Data configuration
+        project_root (Path): Project root directory
+
+    Returns:
+        DatasetManifest: Open manifest
+    """
+    db_path = config.get('manifest', {}).get('path', 'data/manifest.sqlite')
+    return DatasetManifest(project_root / db_path)
@@ -9,7 +9,6 @@ This script preprocesses images for model training.
 import os
 import sys
 import argparse
-import yaml
 from pathlib import Path
 from PIL import Image
 import numpy as np
@@ -20,13 +19,13 @@ import shutil
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
+from data.scripts.manifest import CROP_DIRS, open_manifest
+from ml.config_registry import get_data_config, thaw
+
 
 def load_config():
-    """Load data configuration from YAML file."""
-    config_path = project_root / "data" / "configs" / "data_config.yaml"
-    with open(config_path, 'r') as f:
-        config = yaml.safe_load(f)
-    return config
+    """Load data configuration (a mutable copy of the cached config)."""
+    return thaw(get_data_config())
 
 
 def preprocess_image(image_path, target_size, normalize=True):
@@ -98,14 +97,59 @@ def validate_image(image_path, max_size_mb=10):
         return False
 
 
-def preprocess_dataset(raw_dir, processed_dir, config):
+def remove_stale_outputs(raw_records, processed_dir, allowed_extensions):
+    """
+    Delete processed images whose raw image is no longer in the manifest.
+
+    Compares the processed tree with the raw manifest rows instead of the
+    `removed_paths` of one sync: download_dataset.py syncs the raw root
+    first, so by the time preprocessing runs the removal has already been
+    recorded and would otherwise be missed.
+
+    Args:
+        raw_records (list): Manifest rows of the raw root
+        processed_dir (Path): Processed data directory
+        allowed_extensions (list): Image extensions
+
+    Returns:
+        int: Number of deleted files
+    """
+    expected = {record['relpath'] for record in raw_records}
+    extensions = {ext.lower() for ext in allowed_extensions}
+    removed = 0
+
+    for crop in CROP_DIRS:
+        crop_dir = processed_dir / crop
+        if not crop_dir.exists():
+            continue
+
+        for class_dir in crop_dir.iterdir():
+            if not class_dir.is_dir():
+                continue
+
+            for image_path in class_dir.iterdir():
+                if image_path.suffix.lower() not in extensions:
+                    continue
+                if f"{crop}/{class_dir.name}/{image_path.name}" not in expected:
+                    image_path.unlink()
+                    removed += 1
+
+    return removed
+
+
+def preprocess_dataset(raw_dir, processed_dir, config, full=False):
     """
     Preprocess entire dataset.
 
+    Only images that are new or whose content changed since the last run
+    (according to the dataset manifest) are validated and copied. Processed
+    copies of images that were removed from the raw directory are deleted.
+
     Args:
         raw_dir (Path): Raw data directory
         processed_dir (Path): Output directory for processed data
         config (dict): Data configuration
+        full (bool): Ignore the manifest and reprocess every image
     """
     print(f"\n{'='*60}")
     print("Data Preprocessing Pipeline")
@@ -114,82 +158,106 @@ def preprocess_dataset(raw_dir, processed_dir, config):
     print(f"Output Directory: {processed_dir}")
     print(f"Target Size: {config['preprocessing']['target_size']}")
     print(f"Normalize: {config['preprocessing']['normalize']}")
+    print(f"Mode: {'Full' if full else 'Incremental'}")
     print(f"{'='*60}\n")
 
     # Get preprocessing parameters
-    target_size = tuple(config['preprocessing']['target_size'])
-    normalize = config['preprocessing']['normalize']
     max_size_mb = config['validation']['max_image_size_mb']
 
     # Create processed directory
     processed_dir.mkdir(parents=True, exist_ok=True)
 
-    # Get all class directories
-    crop_dirs = ['tomato', 'potato']
-
     total_processed = 0
     total_failed = 0
-
-    for crop in crop_dirs:
-        crop_raw_dir = raw_dir / crop
-        crop_processed_dir = processed_dir / crop
-
-        if not crop_raw_dir.exists():
-            print(f"Warning: {crop_raw_dir} not found, skipping...")
-            continue
-
-        print(f"\nProcessing {crop.upper()} images...")
-
-        # Process each disease class
-        for class_dir in crop_raw_dir.iterdir():
-            if not class_dir.is_dir():
-                continue
-
-            class_name = class_dir.name
-            output_class_dir = crop_processed_dir / class_name
+    total_skipped = 0
+
+    with open_manifest(config, project_root) as manifest:
+        if full:
+            manifest.reset_stage(raw_dir)
+
+        # Detect new, changed and removed raw images
+        changes = manifest.sync(raw_dir, config['validation']['allowed_extensions'])
+        print(f"Manifest: {changes['new']} new, {changes['changed']} changed, "
+              f"{changes['unchanged']} unchanged, {changes['removed']} removed")
+
+        # Drop processed copies of raw images that no longer exist
+        raw_records = manifest.records(raw_dir)
+        stale = remove_stale_outputs(raw_records, processed_dir, config['validation']['allowed_extensions'])
+        if stale:
+            print(f"Removed {stale} processed images whose raw image was deleted")
+
+        # Group manifest records by class
+        records_by_class = {}
+        for record in raw_records:
+            key = (record['crop'], record['class_name'])
+            records_by_class.setdefault(key, []).append(record)
+
+        for (crop, class_name), records in records_by_class.items():
+            output_class_dir = processed_dir / crop / class_name
             output_class_dir.mkdir(parents=True, exist_ok=True)
 
-            # Get all images in class
-            image_files = []
-            for ext in config['validation']['allowed_extensions']:
-                image_files.extend(list(class_dir.glob(f"*{ext}")))
-                image_files.extend(list(class_dir.glob(f"*{ext.upper()}")))
+            # Skip images whose current content was already handled
+            pending = []
+            for record in records:
+                output_path = processed_dir / record['relpath']
+                up_to_date = record['exported_sha256'] == record['sha256'] and (
+                    record['status'] == 'invalid' or output_path.exists()
+                )
+                if up_to_date:
+                    total_skipped += 1
+                else:
+                    pending.append(record)
+
+            if not pending:
+                continue
 
-            print(f"\n  Processing {class_name}: {len(image_files)} images")
+            print(f"\n  Processing {class_name}: {len(pending)} of {len(records)} images")
 
             # Process images with progress bar
             processed_count = 0
             failed_count = 0
 
-            for image_path in tqdm(image_files, desc=f"  {class_name}"):
+            for record in tqdm(pending, desc=f"  {class_name}"):
+                image_path = raw_dir / record['relpath']
+                output_path = processed_dir / record['relpath']
+
                 # Validate image
                 if not validate_image(image_path, max_size_mb):
+                    manifest.set_status(raw_dir, record['relpath'], 'invalid')
+                    manifest.set_exported(raw_dir, record['relpath'], record['sha256'])
+                    if output_path.exists():
+                        output_path.unlink()
                     failed_count += 1
                     continue
 
-                # Output path
-                output_path = output_class_dir / image_path.name
-
                 # Simply copy the file (preprocessing will be done during training)
                 # This is more efficient and flexible
                 try:
                     shutil.copy2(image_path, output_path)
+                    manifest.set_status(raw_dir, record['relpath'], 'valid')
+                    manifest.set_exported(raw_dir, record['relpath'], record['sha256'])
                     processed_count += 1
                 except Exception as e:
                     print(f"\n  Error copying {image_path.name}: {str(e)}")
                     failed_count += 1
 
+            manifest.commit()
+
             total_processed += processed_count
             total_failed += failed_count
 
             print(f"  ✓ Processed: {processed_count}, Failed: {failed_count}")
 
+    total_attempted = total_processed + total_failed
+
     print(f"\n{'='*60}")
     print("Preprocessing Summary")
     print(f"{'='*60}")
     print(f"Total Processed: {total_processed}")
     print(f"Total Failed: {total_failed}")
-    print(f"Success Rate: {(total_processed/(total_processed+total_failed)*100):.2f}%")
+    print(f"Total Skipped (unchanged): {total_skipped}")
+    if total_attempted:
+        print(f"Success Rate: {(total_processed/total_attempted*100):.2f}%")
     print(f"{'='*60}\n")
 
 
@@ -261,6 +329,11 @@ def main():
         default=None,
         help='Output directory (default: data/processed)'
     )
+    parser.add_argument(
+        '--full',
+        action='store_true',
+        help='Reprocess every image instead of only new or changed ones'
+    )
 
     args = parser.parse_args()
 
@@ -272,7 +345,7 @@ def main():
     processed_dir = Path(args.output_dir) if args.output_dir else project_root / "data" / "processed"
 
     # Preprocess dataset
-    preprocess_dataset(raw_dir, processed_dir, config)
+    preprocess_dataset(raw_dir, processed_dir, config, full=args.full)
 
     # Generate report
     generate_preprocessing_report(processed_dir, config)
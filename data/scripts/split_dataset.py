@@ -9,7 +9,6 @@ This script splits the dataset into train, validation, and test sets.
 import os
 import sys
 import argparse
-import yaml
 from pathlib import Path
 import shutil
 import random
@@ -19,13 +18,15 @@ from collections import defaultdict
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
+from data.scripts.manifest import open_manifest
+from ml.config_registry import get_data_config, thaw
+
+SPLITS = ['train', 'validation', 'test']
+
 
 def load_config():
-    """Load data configuration from YAML file."""
-    config_path = project_root / "data" / "configs" / "data_config.yaml"
-    with open(config_path, 'r') as f:
-        config = yaml.safe_load(f)
-    return config
+    """Load data configuration (a mutable copy of the cached config)."""
+    return thaw(get_data_config())
 
 
 def split_class_data(class_images, train_ratio, val_ratio, test_ratio, random_seed=42):
@@ -60,6 +61,39 @@ def split_class_data(class_images, train_ratio, val_ratio, test_ratio, random_se
     return train_images, val_images, test_images
 
 
+def assign_new_images(new_images, existing_counts, ratios, random_seed=42):
+    """
+    Assign newly added images of a class to splits without moving old ones.
+
+    Each new image goes to the split that is furthest below its target share,
+    so the class converges to the configured ratios while every image that
+    already has a split keeps it.
+
+    Args:
+        new_images (list): Images without a split assignment
+        existing_counts (dict): Current number of images per split
+        ratios (dict): Target ratio per split
+        random_seed (int): Random seed for reproducibility
+
+    Returns:
+        dict: Mapping of split name to list of newly assigned images
+    """
+    random.seed(random_seed)
+    shuffled_images = new_images.copy()
+    random.shuffle(shuffled_images)
+
+    counts = dict(existing_counts)
+    assignments = {split: [] for split in SPLITS}
+
+    for image in shuffled_images:
+        total = sum(counts.values()) + 1
+        split = max(SPLITS, key=lambda name: ratios[name] * total - counts[name])
+        assignments[split].append(image)
+        counts[split] += 1
+
+    return assignments
+
+
 def copy_images(image_list, dest_dir):
     """
     Copy images to destination directory.
@@ -75,13 +109,18 @@ def copy_images(image_list, dest_dir):
         shutil.copy2(img_path, dest_path)
 
 
-def split_dataset(processed_dir, config):
+def split_dataset(processed_dir, config, full=False):
     """
     Split dataset into train, validation, and test sets.
 
+    Split assignments are stored in the dataset manifest. Images that were
+    already assigned keep their split; only new images are assigned and only
+    new or changed files are copied.
+
     Args:
         processed_dir (Path): Processed data directory
         config (dict): Data configuration
+        full (bool): Discard existing assignments and re-split from scratch
     """
     print(f"\n{'='*60}")
     print("Dataset Splitting Pipeline")
@@ -92,6 +131,7 @@ def split_dataset(processed_dir, config):
     print(f"Test Ratio: {config['split']['test']}")
     print(f"Stratified: {config['split']['stratified']}")
     print(f"Random Seed: {config['split']['random_seed']}")
+    print(f"Mode: {'Full' if full else 'Incremental'}")
     print(f"{'='*60}\n")
 
     # Get split ratios
@@ -99,76 +139,112 @@ def split_dataset(processed_dir, config):
     val_ratio = config['split']['validation']
     test_ratio = config['split']['test']
     random_seed = config['split']['random_seed']
+    ratios = {'train': train_ratio, 'validation': val_ratio, 'test': test_ratio}
 
     # Create output directories
-    train_dir = project_root / config['paths']['train']
-    val_dir = project_root / config['paths']['validation']
-    test_dir = project_root / config['paths']['test']
+    split_dirs = {
+        'train': project_root / config['paths']['train'],
+        'validation': project_root / config['paths']['validation'],
+        'test': project_root / config['paths']['test'],
+    }
 
-    for dir_path in [train_dir, val_dir, test_dir]:
+    for dir_path in split_dirs.values():
         dir_path.mkdir(parents=True, exist_ok=True)
 
-    # Process each crop type
-    crop_dirs = ['tomato', 'potato']
-
     split_statistics = defaultdict(lambda: {'train': 0, 'val': 0, 'test': 0})
 
-    for crop in crop_dirs:
-        crop_dir = processed_dir / crop
-
-        if not crop_dir.exists():
-            print(f"Warning: {crop_dir} not found, skipping...")
-            continue
-
-        print(f"\nSplitting {crop.upper()} dataset...")
-
-        # Process each class
-        for class_dir in sorted(crop_dir.iterdir()):
-            if not class_dir.is_dir():
-                continue
-
-            class_name = class_dir.name
-            print(f"\n  Processing {class_name}...")
-
-            # Get all images
-            image_files = []
-            for ext in config['validation']['allowed_extensions']:
-                image_files.extend(list(class_dir.glob(f"*{ext}")))
-                image_files.extend(list(class_dir.glob(f"*{ext.upper()}")))
-
-            total_images = len(image_files)
-
-            if total_images == 0:
-                print(f"    Warning: No images found in {class_name}")
-                continue
-
-            # Split images
-            train_images, val_images, test_images = split_class_data(
-                image_files,
-                train_ratio,
-                val_ratio,
-                test_ratio,
-                random_seed
-            )
-
-            # Copy to respective directories
-            train_class_dir = train_dir / class_name
-            val_class_dir = val_dir / class_name
-            test_class_dir = test_dir / class_name
-
-            copy_images(train_images, train_class_dir)
-            copy_images(val_images, val_class_dir)
-            copy_images(test_images, test_class_dir)
+    with open_manifest(config, project_root) as manifest:
+        if full:
+            manifest.reset_stage(processed_dir, clear_splits=True)
+
+        # Detect new, changed and removed processed images
+        changes = manifest.sync(processed_dir, config['validation']['allowed_extensions'])
+        print(f"Manifest: {changes['new']} new, {changes['changed']} changed, "
+              f"{changes['unchanged']} unchanged, {changes['removed']} removed")
+
+        for relpath in changes['removed_paths']:
+            class_name, image_name = relpath.split('/')[1:]
+            for split_dir in split_dirs.values():
+                stale_path = split_dir / class_name / image_name
+                if stale_path.exists():
+                    stale_path.unlink()
+
+        # Group manifest records by class
+        records_by_class = defaultdict(list)
+        for record in manifest.records(processed_dir):
+            records_by_class[(record['crop'], record['class_name'])].append(record)
+
+        for (crop, class_name), records in records_by_class.items():
+            print(f"\n  Processing {crop}/{class_name}...")
+
+            assigned = {split: [] for split in SPLITS}
+            new_records = []
+            for record in records:
+                if record['split'] in assigned:
+                    assigned[record['split']].append(record)
+                else:
+                    new_records.append(record)
+
+            # Assign new images; a class without history gets the classic split
+            if new_records:
+                if not any(assigned.values()):
+                    train_new, val_new, test_new = split_class_data(
+                        new_records,
+                        train_ratio,
+                        val_ratio,
+                        test_ratio,
+                        random_seed
+                    )
+                    new_assignments = {
+                        'train': train_new, 'validation': val_new, 'test': test_new
+                    }
+                else:
+                    new_assignments = assign_new_images(
+                        new_records,
+                        {split: len(assigned[split]) for split in SPLITS},
+                        ratios,
+                        random_seed
+                    )
+
+                for split, split_records in new_assignments.items():
+                    for record in split_records:
+                        manifest.set_split(processed_dir, record['relpath'], split)
+                    assigned[split].extend(split_records)
+
+            # Copy only images whose content changed or whose copy is missing
+            copied = 0
+            for split, split_records in assigned.items():
+                dest_dir = split_dirs[split] / class_name
+                dest_dir.mkdir(parents=True, exist_ok=True)
+
+                for record in split_records:
+                    image_name = record['relpath'].split('/')[-1]
+                    dest_path = dest_dir / image_name
+                    if record['exported_sha256'] == record['sha256'] and dest_path.exists():
+                        continue
+
+                    # Drop copies left in other splits by a previous full re-split
+                    for other_split, other_dir in split_dirs.items():
+                        stale_path = other_dir / class_name / image_name
+                        if other_split != split and stale_path.exists():
+                            stale_path.unlink()
+
+                    shutil.copy2(processed_dir / record['relpath'], dest_path)
+                    manifest.set_exported(processed_dir, record['relpath'], record['sha256'])
+                    copied += 1
+
+            manifest.commit()
 
             # Update statistics
-            split_statistics[class_name]['train'] = len(train_images)
-            split_statistics[class_name]['val'] = len(val_images)
-            split_statistics[class_name]['test'] = len(test_images)
+            total_images = len(records)
+            split_statistics[class_name]['train'] = len(assigned['train'])
+            split_statistics[class_name]['val'] = len(assigned['validation'])
+            split_statistics[class_name]['test'] = len(assigned['test'])
 
-            print(f"    Total: {total_images}")
-            print(f"    Train: {len(train_images)} ({len(train_images)/total_images*100:.1f}%)")
-            print(f"    Val: {len(val_images)} ({len(val_images)/total_images*100:.1f}%)")
-            print(f"    Test: {len(test_images)} ({len(test_images)/total_images*100:.1f}%)")
+            print(f"    Total: {total_images} ({len(new_records)} new, {copied} copied)")
+            print(f"    Train: {len(assigned['train'])} ({len(assigned['train'])/total_images*100:.1f}%)")
+            print(f"    Val: {len(assigned['validation'])} ({len(assigned['validation'])/total_images*100:.1f}%)")
+            print(f"    Test: {len(assigned['test'])} ({len(assigned['test'])/total_images*100:.1f}%)")
 
     # Print summary
     print(f"\n{'='*60}")
@@ -180,6 +256,10 @@ def split_dataset(processed_dir, config):
     total_test = sum(stats['test'] for stats in split_statistics.values())
     total_all = total_train + total_val + total_test
 
+    if total_all == 0:
+        print("Warning: No images found to split")
+        return
+
     print(f"Training Set: {total_train} images ({total_train/total_all*100:.1f}%)")
     print(f"Validation Set: {total_val} images ({total_val/total_all*100:.1f}%)")
     print(f"Test Set: {total_test} images ({total_test/total_all*100:.1f}%)")
@@ -255,6 +335,11 @@ def main():
         default=None,
         help='Processed data directory (default: data/processed)'
     )
+    parser.add_argument(
+        '--full',
+        action='store_true',
+        help='Discard existing split assignments and re-split every image'
+    )
 
     args = parser.parse_args()
 
@@ -268,7 +353,7 @@ def main():
         processed_dir = project_root / "data" / "processed"
 
     # Split dataset
-    split_dataset(processed_dir, config)
+    split_dataset(processed_dir, config, full=args.full)
 
     print(f"\n{'='*60}")
     print("✓ Dataset splitting completed successfully!")
@@ -0,0 +1,616 @@
+"""
+Model Benchmark Suite for Plant Disease Classification
+Author: Peter Maina (136532)
+Project: AI-Based Tomato & Potato Disease Classification
+
+This script compares trained models across formats (Keras, TFLite with each
+quantization mode) and thread counts. For every combination it measures:
+1. Model load time
+2. Single-image latency (p50/p95/p99)
+3. Throughput at several batch sizes
+4. Peak resident memory (RSS)
+5. Test accuracy
+
+Each combination runs in a fresh process so memory and thread settings do
+not leak between runs. Results are appended to a JSON/CSV leaderboard.
+"""
+
+import os
+import sys
+import argparse
+import csv
+import json
+import resource
+import subprocess
+import time
+from datetime import datetime
+from multiprocessing import get_context
+from pathlib import Path
+import numpy as np
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+FORMATS = ['keras', 'tflite-float32', 'tflite-float16', 'tflite-dynamic', 'tflite-int8']
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png'}
+
+LEADERBOARD_FIELDS = [
+    'timestamp', 'git_commit', 'model', 'format', 'backend', 'threads',
+    'model_size_mb', 'load_time_ms', 'latency_p50_ms', 'latency_p95_ms',
+    'latency_p99_ms', 'best_throughput_ips', 'best_batch_size', 'peak_rss_mb',
+    'accuracy', 'accuracy_samples'
+]
+
+
+class KerasRunner:
+    """Runs a Keras model with TensorFlow."""
+
+    backend = 'tensorflow'
+
+    def __init__(self, model_path, threads=None, model=None):
+        self.model_path = model_path
+        self.threads = threads
+        self.model = model
+
+    def load(self):
+        if self.model is not None:
+            return  # Wraps an in-memory model
+
+        import tensorflow as tf
+
+        if self.threads:
+            tf.config.threading.set_intra_op_parallelism_threads(self.threads)
+            tf.config.threading.set_inter_op_parallelism_threads(1)
+
+        self.model = tf.keras.models.load_model(self.model_path, compile=False)
+
+    @property
+    def input_shape(self):
+        return tuple(self.model.input_shape[1:])
+
+    def predict(self, batch):
+        return np.asarray(self.model(batch, training=False))
+
+
+class TFLiteRunner:
+    """Runs a TFLite model, resizing the input tensor for each batch size."""
+
+    backend = 'tflite'
+
+    def __init__(self, model_path, threads=None):
+        self.model_path = model_path
+        self.threads = threads
+        self.interpreter = None
+        self._batch_size = None
+
+    def load(self):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+            self.backend = 'tflite_runtime'
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+
+        self.interpreter = Interpreter(model_path=str(self.model_path), num_threads=self.threads)
+        self.interpreter.allocate_tensors()
+        self.input_details = self.interpreter.get_input_details()[0]
+        self.output_details = self.interpreter.get_output_details()[0]
+        self._batch_size = int(self.input_details['shape'][0])
+
+    @property
+    def input_shape(self):
+        return tuple(int(dim) for dim in self.input_details['shape'][1:])
+
+    def _prepare(self, batch):
+        # Quantized (int8) inputs need the model's scale and zero point
+        dtype = self.input_details['dtype']
+        if dtype != np.float32:
+            scale, zero_point = self.input_details['quantization']
+            batch = np.round(batch / scale + zero_point).astype(dtype)
+        return batch
+
+    def predict(self, batch):
+        if len(batch) != self._batch_size:
+            self.interpreter.resize_tensor_input(self.input_details['index'], batch.shape)
+            self.interpreter.allocate_tensors()
+            self.input_details = self.interpreter.get_input_details()[0]
+            self.output_details = self.interpreter.get_output_details()[0]
+            self._batch_size = len(batch)
+
+        self.interpreter.set_tensor(self.input_details['index'], self._prepare(batch))
+        self.interpreter.invoke()
+        output = self.interpreter.get_tensor(self.output_details['index'])
+
+        if self.output_details['dtype'] != np.float32:
+            scale, zero_point = self.output_details['quantization']
+            output = (output.astype(np.float32) - zero_point) * scale
+        return output
+
+
+class ONNXRunner:
+    """Runs an ONNX model with onnxruntime on the CPU."""
+
+    backend = 'onnxruntime'
+
+    def __init__(self, model_path, threads=None):
+        self.model_path = model_path
+        self.threads = threads
+        self.session = None
+
+    def load(self):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if self.threads:
+            options.intra_op_num_threads = self.threads
+            options.inter_op_num_threads = 1
+
+        self.session = ort.InferenceSession(str(self.model_path), options,
+                                            providers=['CPUExecutionProvider'])
+        self.input = self.session.get_inputs()[0]
+
+    @property
+    def input_shape(self):
+        return tuple(int(dim) for dim in self.input.shape[1:])
+
+    def predict(self, batch):
+        return self.session.run(None, {self.input.name: batch.astype(np.float32)})[0]
+
+
+def create_runner(model_path, model_format, threads=None):
+    """
+    Create a runner for a model file.
+
+    Args:
+        model_path (str): Path to .h5, SavedModel, .tflite or .onnx model
+        model_format (str): One of FORMATS, 'saved_model' or 'onnx'
+        threads (int): CPU threads for inference (optional)
+
+    Returns:
+        KerasRunner, TFLiteRunner or ONNXRunner: Unloaded runner
+    """
+    if model_format in ('keras', 'saved_model'):
+        return KerasRunner(model_path, threads)
+    if model_format == 'onnx':
+        return ONNXRunner(model_path, threads)
+    return TFLiteRunner(model_path, threads)
+
+
+def percentile_summary(latencies_ms):
+    """
+    Summarise latencies in milliseconds.
+
+    Args:
+        latencies_ms (list): Latency samples
+
+    Returns:
+        dict: mean, p50, p95, p99 and max
+    """
+    values = np.asarray(latencies_ms)
+    return {
+        'mean': float(values.mean()),
+        'p50': float(np.percentile(values, 50)),
+        'p95': float(np.percentile(values, 95)),
+        'p99': float(np.percentile(values, 99)),
+        'max': float(values.max())
+    }
+
+
+def measure_latency(runner, images, iterations=100, warmup=10):
+    """
+    Measure single-image latency.
+
+    Args:
+        runner: Loaded runner
+        images (numpy.ndarray): Sample images (N, H, W, C)
+        iterations (int): Timed predictions
+        warmup (int): Untimed predictions first
+
+    Returns:
+        dict: Latency percentiles in milliseconds
+    """
+    for i in range(warmup):
+        runner.predict(images[i % len(images)][np.newaxis])
+
+    latencies = []
+    for i in range(iterations):
+        batch = images[i % len(images)][np.newaxis]
+        start = time.perf_counter()
+        runner.predict(batch)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    return percentile_summary(latencies)
+
+
+def measure_throughput(runner, images, batch_size, min_seconds=2.0):
+    """
+    Measure steady-state throughput for a batch size.
+
+    Args:
+        runner: Loaded runner
+        images (numpy.ndarray): Sample images
+        batch_size (int): Images per call
+        min_seconds (float): Minimum timed duration
+
+    Returns:
+        float: Images per second
+    """
+    repeats = int(np.ceil(batch_size / len(images)))
+    batch = np.concatenate([images] * repeats)[:batch_size]
+
+    runner.predict(batch)  # Warm-up (and tensor resize for TFLite)
+
+    processed = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < min_seconds:
+        runner.predict(batch)
+        processed += batch_size
+
+    return processed / (time.perf_counter() - start)
+
+
+def list_test_images(test_dir, class_names, limit=None, seed=42):
+    """
+    List labelled test images, sampled evenly across the directory tree.
+
+    Args:
+        test_dir (Path): Test directory with one subfolder per class
+        class_names (list): Class names in model output order
+        limit (int): Maximum number of images (optional)
+        seed (int): Random seed for sampling
+
+    Returns:
+        list: (image_path, class_index) tuples
+    """
+    samples = []
+    for class_index, class_name in enumerate(class_names):
+        class_dir = Path(test_dir) / class_name
+        if not class_dir.exists():
+            continue
+        samples.extend(
+            (path, class_index) for path in sorted(class_dir.iterdir())
+            if path.suffix.lower() in IMAGE_EXTENSIONS
+        )
+
+    if limit and len(samples) > limit:
+        rng = np.random.default_rng(seed)
+        indices = rng.choice(len(samples), size=limit, replace=False)
+        samples = [samples[i] for i in sorted(indices)]
+
+    return samples
+
+
+def load_images(paths, input_shape):
+    """Load and preprocess images into a single array."""
+    from ml.utils import load_and_preprocess_image
+
+    target_size = (input_shape[1], input_shape[0])
+    return np.concatenate([load_and_preprocess_image(str(path), target_size) for path in paths])
+
+
+def measure_accuracy(runner, samples, batch_size=32):
+    """
+    Measure top-1 accuracy on labelled samples.
+
+    Args:
+        runner: Loaded runner
+        samples (list): (image_path, class_index) tuples
+        batch_size (int): Batch size
+
+    Returns:
+        float: Accuracy, or None without samples
+    """
+    if not samples:
+        return None
+
+    correct = 0
+    for start in range(0, len(samples), batch_size):
+        chunk = samples[start:start + batch_size]
+        images = load_images([path for path, _ in chunk], runner.input_shape)
+        predictions = np.argmax(runner.predict(images), axis=1)
+        correct += int(np.sum(predictions == np.array([label for _, label in chunk])))
+
+    return correct / len(samples)
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (Linux reports KB)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def benchmark_combination(task):
+    """
+    Benchmark one model/format/thread combination (runs in a child process).
+
+    Args:
+        task (dict): Combination and benchmark settings
+
+    Returns:
+        dict: Measurements
+    """
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+
+    runner = create_runner(task['model_path'], task['format'], task['threads'])
+
+    start = time.perf_counter()
+    runner.load()
+    load_time_ms = (time.perf_counter() - start) * 1000
+
+    samples = task['samples']
+    if samples:
+        images = load_images([path for path, _ in samples[:16]], runner.input_shape)
+    else:
+        rng = np.random.default_rng(0)
+        images = rng.random((16,) + runner.input_shape, dtype=np.float32)
+
+    latency = measure_latency(runner, images, task['iterations'])
+
+    throughput = {
+        str(batch_size): measure_throughput(runner, images, batch_size, task['min_seconds'])
+        for batch_size in task['batch_sizes']
+    }
+    best_batch_size = max(throughput, key=throughput.get)
+
+    accuracy = measure_accuracy(runner, samples)
+
+    return {
+        'model': task['model_name'],
+        'format': task['format'],
+        'backend': runner.backend,
+        'threads': task['threads'] or 0,
+        'model_size_mb': os.path.getsize(task['model_path']) / (1024 * 1024),
+        'load_time_ms': load_time_ms,
+        'latency_ms': latency,
+        'throughput_ips': throughput,
+        'best_throughput_ips': throughput[best_batch_size],
+        'best_batch_size': int(best_batch_size),
+        'peak_rss_mb': peak_rss_mb(),
+        'accuracy': accuracy,
+        'accuracy_samples': len(samples)
+    }
+
+
+def prepare_model_file(model_path, model_format, output_dir, representative_data=None):
+    """
+    Get (converting if needed) the model file for a format.
+
+    Args:
+        model_path (Path): Keras model (.h5)
+        model_format (str): One of FORMATS
+        output_dir (Path): Directory for converted models
+        representative_data (numpy.ndarray): Calibration images for int8
+
+    Returns:
+        Path: Model file to benchmark
+    """
+    if model_format == 'keras':
+        return model_path
+
+    from ml.utils import convert_to_tflite, model_name_from_path
+
+    quantization = model_format.split('-', 1)[1]
+    output_path = output_dir / f"{model_name_from_path(model_path)}_{quantization}.tflite"
+
+    # Reuse conversions that are newer than the source model
+    if output_path.exists() and output_path.stat().st_mtime >= model_path.stat().st_mtime:
+        return output_path
+
+    convert_to_tflite(
+        str(model_path),
+        str(output_path),
+        quantization=None if quantization == 'float32' else quantization,
+        representative_data=representative_data if quantization == 'int8' else None
+    )
+    return output_path
+
+
+def get_git_commit():
+    """Short git commit of the working tree (empty if unavailable)."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=project_root,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def update_leaderboard(results, output_dir):
+    """
+    Append results to the JSON and CSV leaderboards.
+
+    Args:
+        results (list): Measurements from benchmark_combination
+        output_dir (Path): Leaderboard directory
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    json_path = output_dir / "leaderboard.json"
+    csv_path = output_dir / "leaderboard.csv"
+
+    history = []
+    if json_path.exists():
+        with open(json_path, 'r') as f:
+            history = json.load(f)
+    history.extend(results)
+    with open(json_path, 'w') as f:
+        json.dump(history, f, indent=4)
+
+    write_header = not csv_path.exists()
+    with open(csv_path, 'a', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=LEADERBOARD_FIELDS)
+        if write_header:
+            writer.writeheader()
+        for result in results:
+            writer.writerow({
+                'timestamp': result['timestamp'],
+                'git_commit': result['git_commit'],
+                'model': result['model'],
+                'format': result['format'],
+                'backend': result['backend'],
+                'threads': result['threads'],
+                'model_size_mb': f"{result['model_size_mb']:.2f}",
+                'load_time_ms': f"{result['load_time_ms']:.1f}",
+                'latency_p50_ms': f"{result['latency_ms']['p50']:.2f}",
+                'latency_p95_ms': f"{result['latency_ms']['p95']:.2f}",
+                'latency_p99_ms': f"{result['latency_ms']['p99']:.2f}",
+                'best_throughput_ips': f"{result['best_throughput_ips']:.1f}",
+                'best_batch_size': result['best_batch_size'],
+                'peak_rss_mb': f"{result['peak_rss_mb']:.1f}",
+                'accuracy': '' if result['accuracy'] is None else f"{result['accuracy']:.4f}",
+                'accuracy_samples': result['accuracy_samples']
+            })
+
+    print(f"✓ Leaderboard updated: {json_path}")
+    print(f"✓ Leaderboard updated: {csv_path}")
+
+
+def print_results(results):
+    """Print a summary table of benchmark results."""
+    print(f"\n{'='*100}")
+    print("Benchmark Results")
+    print(f"{'='*100}")
+    print(f"{'Model':<32} {'Format':<15} {'Thr':>3} {'MB':>6} {'Load ms':>8} "
+          f"{'p50 ms':>7} {'p99 ms':>7} {'img/s':>7} {'RSS MB':>7} {'Acc':>6}")
+    for r in sorted(results, key=lambda r: r['latency_ms']['p50']):
+        accuracy = '-' if r['accuracy'] is None else f"{r['accuracy']*100:.1f}"
+        print(f"{r['model'][:32]:<32} {r['format']:<15} {r['threads']:>3} "
+              f"{r['model_size_mb']:>6.1f} {r['load_time_ms']:>8.0f} "
+              f"{r['latency_ms']['p50']:>7.2f} {r['latency_ms']['p99']:>7.2f} "
+              f"{r['best_throughput_ips']:>7.1f} {r['peak_rss_mb']:>7.0f} {accuracy:>6}")
+    print(f"{'='*100}\n")
+
+
+def main():
+    """Main benchmark function."""
+    parser = argparse.ArgumentParser(description="Benchmark Plant Disease Classification Models")
+    parser.add_argument(
+        '--models',
+        type=str,
+        nargs='+',
+        required=True,
+        help='Paths to trained Keras models (.h5)'
+    )
+    parser.add_argument(
+        '--formats',
+        type=str,
+        nargs='+',
+        default=FORMATS,
+        choices=FORMATS,
+        help='Formats to benchmark'
+    )
+    parser.add_argument(
+        '--threads',
+        type=int,
+        nargs='+',
+        default=[1, os.cpu_count() or 1],
+        help='CPU thread counts to benchmark'
+    )
+    parser.add_argument(
+        '--batch-sizes',
+        type=int,
+        nargs='+',
+        default=[1, 8, 32],
+        help='Batch sizes for throughput measurements'
+    )
+    parser.add_argument(
+        '--iterations',
+        type=int,
+        default=100,
+        help='Single-image latency iterations'
+    )
+    parser.add_argument(
+        '--accuracy-samples',
+        type=int,
+        default=500,
+        help='Test images used for accuracy (0 to skip)'
+    )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        default=1,
+        help='Combinations benchmarked in parallel (use 1 for clean latency numbers)'
+    )
+    parser.add_argument(
+        '--output-dir',
+        type=str,
+        default=None,
+        help='Leaderboard directory (default: ml/logs/benchmark)'
+    )
+
+    args = parser.parse_args()
+
+    from ml.utils import load_ml_config, get_class_names, load_model_metadata, model_name_from_path
+
+    config = load_ml_config()
+    output_dir = Path(args.output_dir) if args.output_dir else project_root / "ml" / "logs" / "benchmark"
+    converted_dir = output_dir / "models"
+    converted_dir.mkdir(parents=True, exist_ok=True)
+
+    # Labelled test images shared by every combination
+    samples = []
+    if args.accuracy_samples:
+        samples = list_test_images(
+            project_root / config['paths']['test_dir'],
+            get_class_names(),
+            limit=args.accuracy_samples,
+            seed=config['random_seed']
+        )
+
+    print(f"\n{'='*60}")
+    print("Model Benchmark Suite")
+    print(f"{'='*60}")
+    print(f"Models: {len(args.models)}")
+    print(f"Formats: {', '.join(args.formats)}")
+    print(f"Threads: {args.threads}")
+    print(f"Batch Sizes: {args.batch_sizes}")
+    print(f"Accuracy Samples: {len(samples)}")
+    print(f"Parallel Jobs: {args.jobs}")
+    print(f"{'='*60}\n")
+
+    # Convert models up front in the parent process
+    tasks = []
+    for model_path in args.models:
+        model_path = Path(model_path)
+
+        # int8 calibration images at the model's own resolution
+        representative_data = None
+        if 'tflite-int8' in args.formats and samples:
+            metadata = load_model_metadata(model_path)
+            input_shape = tuple(metadata['input_shape'] if metadata else config['model']['input_shape'])
+            representative_data = load_images([path for path, _ in samples[:100]], input_shape)
+
+        for model_format in args.formats:
+            model_file = prepare_model_file(model_path, model_format, converted_dir, representative_data)
+            for threads in args.threads:
+                tasks.append({
+                    'model_name': model_name_from_path(model_path),
+                    'model_path': str(model_file),
+                    'format': model_format,
+                    'threads': threads,
+                    'batch_sizes': args.batch_sizes,
+                    'iterations': args.iterations,
+                    'min_seconds': 2.0,
+                    'samples': samples
+                })
+
+    # One fresh process per combination keeps RSS and thread pools isolated
+    results = []
+    timestamp = datetime.now().isoformat(timespec='seconds')
+    git_commit = get_git_commit()
+
+    with get_context('spawn').Pool(processes=args.jobs, maxtasksperchild=1) as pool:
+        for result in pool.imap_unordered(benchmark_combination, tasks):
+            result['timestamp'] = timestamp
+            result['git_commit'] = git_commit
+            results.append(result)
+            print(f"  ✓ {result['model']} [{result['format']}, {result['threads']} threads]: "
+                  f"p50 {result['latency_ms']['p50']:.2f} ms, "
+                  f"{result['best_throughput_ips']:.1f} img/s")
+
+    print_results(results)
+    update_leaderboard(results, output_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+Model Bundle Export for Plant Disease Classification
+Author: Peter Maina (136532)
+Project: AI-Based Tomato & Potato Disease Classification
+
+This module writes a trained model as one self-describing directory:
+
+    <model_name>_final/
+        model.h5           Keras model (always present)
+        saved_model/       TensorFlow SavedModel
+        model.tflite       TensorFlow Lite model
+        model.onnx         ONNX model (only if tf2onnx is installed)
+        labels.json        Class names in model output order
+        manifest.json      Everything needed to serve the model
+
+The manifest records the input shape, labels, preprocessing, calibration on
+the validation set, a content hash over every file and single-image CPU
+latency per format, so the ML service can check the bundle and load the
+fastest format available on its host.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+import numpy as np
+
+from ml.utils import BUNDLE_MANIFEST_NAME, build_model_metadata
+from ml.benchmark import create_runner, measure_latency
+
+BUNDLE_FORMAT_VERSION = 1
+LABELS_NAME = 'labels.json'
+
+# File (or directory) of each format inside a bundle
+FORMAT_FILES = {
+    'keras': 'model.h5',
+    'saved_model': 'saved_model',
+    'tflite': 'model.tflite',
+    'onnx': 'model.onnx'
+}
+
+
+def file_sha256(path):
+    """
+    Hash a file, or every file of a directory in sorted relative-path order.
+
+    Args:
+        path (Path): File or directory
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    path = Path(path)
+    files = sorted(p for p in path.rglob('*') if p.is_file()) if path.is_dir() else [path]
+
+    digest = hashlib.sha256()
+    for file_path in files:
+        if path.is_dir():
+            digest.update(file_path.relative_to(path).as_posix().encode())
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def path_size_bytes(path):
+    """Size of a file, or the total size of a directory."""
+    path = Path(path)
+    if path.is_dir():
+        return sum(p.stat().st_size for p in path.rglob('*') if p.is_file())
+    return path.stat().st_size
+
+
+def content_hash(files):
+    """
+    Hash identifying the whole bundle (format names plus file hashes).
+
+    Args:
+        files (dict): Format name -> {'sha256': ...} entries of the manifest
+
+    Returns:
+        str: 'sha256:<hex>' digest
+    """
+    digest = hashlib.sha256()
+    for name in sorted(files):
+        digest.update(f"{name}:{files[name]['sha256']}\n".encode())
+    return f"sha256:{digest.hexdigest()}"
+
+
+def export_onnx(model, output_path, opset):
+    """
+    Export a Keras model to ONNX with tf2onnx.
+
+    Args:
+        model (keras.Model): Model to export
+        output_path (Path): Output .onnx path
+        opset (int): ONNX opset version
+
+    Returns:
+        bool: True if exported, False if tf2onnx is not installed
+    """
+    try:
+        import tensorflow as tf
+        import tf2onnx
+    except ImportError:
+        print("⚠ tf2onnx not installed, skipping ONNX export (pip install tf2onnx)")
+        return False
+
+    input_signature = [tf.TensorSpec((None,) + tuple(model.input_shape[1:]), tf.float32, name='input')]
+    tf2onnx.convert.from_keras(model, input_signature=input_signature,
+                               opset=opset, output_path=str(output_path))
+    return True
+
+
+def compute_bundle_calibration(model, calibration_gen):
+    """
+    Measure calibration of a model on a non-shuffled data generator.
+
+    Args:
+        model (keras.Model): Trained model
+        calibration_gen: Non-shuffled generator (e.g. validation set)
+
+    Returns:
+        dict: Accuracy, ECE and reliability bins
+    """
+    from ml.evaluation import collect_predictions, compute_calibration
+
+    print("\nMeasuring calibration on the validation set...")
+    probabilities, true_classes = collect_predictions(model, calibration_gen)
+    predicted = np.argmax(probabilities, axis=1)
+    correct = predicted == true_classes
+
+    return dict(
+        compute_calibration(probabilities.max(axis=1), correct),
+        dataset='validation',
+        samples=int(len(true_classes)),
+        accuracy=float(np.mean(correct))
+    )
+
+
+def benchmark_bundle(bundle_dir, formats, input_shape, iterations, threads):
+    """
+    Measure single-image CPU latency of every format in a bundle.
+
+    Synthetic inputs are used so that export does not depend on test data;
+    latency does not depend on the pixel values.
+
+    Args:
+        bundle_dir (Path): Bundle directory
+        formats (list): Formats present in the bundle
+        input_shape (tuple): Model input shape (height, width, channels)
+        iterations (int): Timed predictions per format
+        threads (int): CPU threads per runtime
+
+    Returns:
+        dict: Latency percentiles in milliseconds per format
+    """
+    rng = np.random.default_rng(0)
+    images = rng.random((8,) + tuple(input_shape), dtype=np.float32)
+
+    latency = {}
+    for model_format in formats:
+        runner = create_runner(bundle_dir / FORMAT_FILES[model_format], model_format, threads)
+        try:
+            runner.load()
+        except ImportError as e:
+            print(f"  ⚠ {model_format}: runtime not installed ({e}), not benchmarked")
+            continue
+        latency[model_format] = measure_latency(runner, images, iterations=iterations,
+                                                warmup=min(10, iterations))
+        print(f"  {model_format:<12} p50 {latency[model_format]['p50']:.2f} ms")
+    return latency
+
+
+def export_model_bundle(model, config, bundle_dir, model_name, class_names, calibration_gen=None):
+    """
+    Write a trained model as a self-describing bundle directory.
+
+    Args:
+        model (keras.Model): Trained model
+        config (dict): ML configuration
+        bundle_dir (Path): Bundle directory (replaced if it exists)
+        model_name (str): Name of the model
+        class_names (list): Class names in model output order
+        calibration_gen: Non-shuffled generator for calibration (optional)
+
+    Returns:
+        Path: Manifest path
+    """
+    from ml.utils import convert_to_tflite
+
+    export_config = config['export']
+    bundle_config = export_config['bundle']
+
+    bundle_dir = Path(bundle_dir)
+    if bundle_dir.exists():
+        shutil.rmtree(bundle_dir)
+    bundle_dir.mkdir(parents=True)
+
+    print(f"\n{'='*60}")
+    print(f"Exporting model bundle: {bundle_dir}")
+    print(f"{'='*60}")
+
+    # Keras model, always present (training, evaluation and pruning use it)
+    keras_path = bundle_dir / FORMAT_FILES['keras']
+    model.save(str(keras_path), include_optimizer=export_config['include_optimizer'])
+    formats = ['keras']
+    print(f"✓ Keras model saved to: {keras_path}")
+
+    requested = bundle_config.get('formats', [])
+    if 'saved_model' in requested:
+        model.save(str(bundle_dir / FORMAT_FILES['saved_model']), save_format='tf',
+                   include_optimizer=False)
+        formats.append('saved_model')
+        print("✓ SavedModel exported")
+
+    tflite_quantization = None
+    if 'tflite' in requested and export_config['tflite']['enabled']:
+        tflite_quantization = export_config['tflite']['quantization']
+        convert_to_tflite(str(keras_path), str(bundle_dir / FORMAT_FILES['tflite']),
+                          quantization=tflite_quantization)
+        formats.append('tflite')
+
+    if 'onnx' in requested and export_onnx(model, bundle_dir / FORMAT_FILES['onnx'],
+                                           bundle_config.get('onnx_opset', 13)):
+        formats.append('onnx')
+        print("✓ ONNX model exported")
+
+    labels_path = bundle_dir / LABELS_NAME
+    with open(labels_path, 'w') as f:
+        json.dump(list(class_names), f, indent=2)
+
+    # Hashes of everything the service loads
+    files = {}
+    for model_format in formats:
+        path = bundle_dir / FORMAT_FILES[model_format]
+        files[model_format] = {
+            'path': FORMAT_FILES[model_format],
+            'sha256': file_sha256(path),
+            'size_bytes': path_size_bytes(path)
+        }
+    if 'tflite' in files:
+        files['tflite']['quantization'] = tflite_quantization
+    labels_entry = {'path': LABELS_NAME, 'sha256': file_sha256(labels_path)}
+
+    calibration = None
+    if calibration_gen is not None:
+        calibration = compute_bundle_calibration(model, calibration_gen)
+        print(f"✓ Validation ECE: {calibration['expected_calibration_error']:.4f}")
+
+    print("\nBenchmarking formats (batch size 1)...")
+    threads = bundle_config.get('benchmark_threads', 1)
+    latency = benchmark_bundle(bundle_dir, formats, model.input_shape[1:],
+                               bundle_config.get('benchmark_iterations', 50), threads)
+
+    manifest = build_model_metadata(
+        architecture=config['model']['architecture'],
+        input_shape=model.input_shape[1:],
+        class_names=class_names,
+        resize_method=config['model']['resize_method'],
+        format_version=BUNDLE_FORMAT_VERSION,
+        model_name=model_name,
+        num_classes=len(class_names),
+        files=files,
+        labels=labels_entry,
+        content_hash=content_hash(dict(files, labels=labels_entry)),
+        calibration=calibration,
+        benchmark={
+            'batch_size': 1,
+            'threads': threads,
+            'cpu_count': os.cpu_count(),
+            'latency_ms': latency
+        }
+    )
+
+    manifest_path = bundle_dir / BUNDLE_MANIFEST_NAME
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=4)
+
+    print(f"✓ Manifest saved to: {manifest_path}")
+    print(f"  Formats: {', '.join(formats)}")
+    print(f"  Content hash: {manifest['content_hash']}")
+
+    return manifest_path
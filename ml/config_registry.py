@@ -0,0 +1,191 @@
+"""
+Configuration and Label Registry
+Author: Peter Maina (136532)
+Project: AI-Based Tomato & Potato Disease Classification
+
+Process-wide cache for the YAML configs and class_indices.json, shared by
+the ml/ scripts and data/scripts.
+
+Parsed files are stored as immutable structures (read-only mappings and
+tuples) and only re-read when the file's mtime or size changes. The file is
+stat'ed at most once per CHECK_INTERVAL seconds, so hot loops asking for
+class names or config values never touch the disk.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from types import MappingProxyType
+
+import yaml
+
+project_root = Path(__file__).parent.parent
+
+ML_CONFIG_PATH = project_root / "ml" / "config.yaml"
+DATA_CONFIG_PATH = project_root / "data" / "configs" / "data_config.yaml"
+CLASS_INDICES_PATH = project_root / "ml" / "class_indices.json"
+
+# Seconds between mtime checks of a cached file
+CHECK_INTERVAL = 1.0
+
+_lock = threading.Lock()
+_files = {}
+_derived = {}
+
+
+def freeze(value):
+    """
+    Recursively convert dicts to read-only mappings and lists to tuples.
+
+    Args:
+        value: Parsed YAML/JSON value
+
+    Returns:
+        Immutable equivalent of value
+    """
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value):
+    """
+    Recursively convert a frozen value back into plain dicts and lists.
+
+    Use this when a caller needs a private, mutable copy (e.g. to apply
+    command-line overrides).
+
+    Args:
+        value: Frozen value
+
+    Returns:
+        Mutable deep copy of value
+    """
+    if isinstance(value, MappingProxyType):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+    return value
+
+
+def _signature(path):
+    """File identity used for invalidation, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _load_file(path, parser):
+    """
+    Get the frozen contents of a file, re-parsing only when it changed.
+
+    Args:
+        path (Path): File path
+        parser (callable): Parses an open file object
+
+    Returns:
+        Frozen parsed contents, or None if the file does not exist
+    """
+    now = time.monotonic()
+    entry = _files.get(path)
+
+    if entry is not None and now - entry['checked_at'] < CHECK_INTERVAL:
+        return entry['value']
+
+    with _lock:
+        entry = _files.get(path)
+        signature = _signature(path)
+
+        if entry is None or entry['signature'] != signature:
+            value = None
+            if signature is not None:
+                with open(path, 'r') as f:
+                    value = freeze(parser(f))
+            entry = {'signature': signature, 'value': value}
+            _files[path] = entry
+
+        entry['checked_at'] = now
+        return entry['value']
+
+
+def _derive(name, source, build):
+    """Memoise a value computed from a cached file until that file changes."""
+    entry = _derived.get(name)
+    if entry is not None and entry[0] is source:
+        return entry[1]
+
+    value = build(source)
+    _derived[name] = (source, value)
+    return value
+
+
+def invalidate(path=None):
+    """
+    Drop cached entries so the next lookup re-reads from disk.
+
+    Args:
+        path (Path): File to invalidate (default: everything)
+    """
+    with _lock:
+        if path is None:
+            _files.clear()
+        else:
+            _files.pop(Path(path), None)
+        _derived.clear()
+
+
+def get_yaml(path):
+    """Get a frozen YAML file (None if missing)."""
+    return _load_file(Path(path), yaml.safe_load)
+
+
+def get_json(path):
+    """Get a frozen JSON file (None if missing)."""
+    return _load_file(Path(path), json.load)
+
+
+def get_ml_config():
+    """Get the frozen ML configuration (ml/config.yaml)."""
+    return _load_file(ML_CONFIG_PATH, yaml.safe_load)
+
+
+def get_data_config():
+    """Get the frozen data configuration (data/configs/data_config.yaml)."""
+    return _load_file(DATA_CONFIG_PATH, yaml.safe_load)
+
+
+def get_class_indices():
+    """
+    Get the frozen class name to index mapping saved during training.
+
+    Returns:
+        Mapping: Class name to index, or None if class_indices.json is missing
+    """
+    return _load_file(CLASS_INDICES_PATH, json.load)
+
+
+def get_class_names():
+    """
+    Get class names in model output order.
+
+    Uses class_indices.json when present and falls back to the class_names
+    list in ml/config.yaml.
+
+    Returns:
+        tuple: Class names
+    """
+    class_indices = get_class_indices()
+
+    if class_indices is not None:
+        return _derive(
+            'class_names', class_indices,
+            lambda indices: tuple(name for name, _ in sorted(indices.items(), key=lambda x: x[1]))
+        )
+
+    return get_ml_config()['class_names']
@@ -0,0 +1,174 @@
+"""
+Knowledge Distillation for Plant Disease Classification
+Author: Peter Maina (136532)
+Project: AI-Based Tomato & Potato Disease Classification
+
+This module trains a small student model on a teacher's soft targets.
+Teacher predictions are computed once per dataset and cached to disk with
+the same memory-mapped format as the backbone feature cache, so training
+the student never runs the teacher.
+"""
+
+import hashlib
+import os
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+
+from ml.feature_cache import extract_features
+
+
+def teacher_cache_key(teacher_path, generator):
+    """
+    Settings that identify a teacher target cache.
+
+    Args:
+        teacher_path (Path): Teacher model file
+        generator: Non-shuffled data generator the targets are computed on
+
+    Returns:
+        dict: Cache key (teacher file identity plus sample order)
+    """
+    stat = os.stat(teacher_path)
+    filenames = hashlib.sha256('\n'.join(generator.filenames).encode()).hexdigest()
+    return {
+        'teacher': str(teacher_path),
+        'teacher_size': stat.st_size,
+        'teacher_mtime_ns': stat.st_mtime_ns,
+        'image_shape': list(generator.image_shape),
+        'filenames_sha256': filenames
+    }
+
+
+def compute_teacher_targets(teacher, generator, cache_dir, name, teacher_path):
+    """
+    Get the teacher's class probabilities for every sample of a generator.
+
+    Args:
+        teacher (keras.Model): Trained teacher model
+        generator: Non-shuffled, non-augmented data generator
+        cache_dir (Path): Directory for cached targets
+        name (str): Cache name (e.g. 'train', 'validation')
+        teacher_path (Path): Teacher model file (used in the cache key)
+
+    Returns:
+        numpy.ndarray: Memory-mapped probabilities in generator.filenames order
+    """
+    targets, _ = extract_features(
+        teacher, [generator], cache_dir, f"{name}_teacher",
+        teacher_cache_key(teacher_path, generator)
+    )
+    return targets
+
+
+class DistillationSequence(keras.utils.Sequence):
+    """
+    Batches from a Keras directory iterator paired with cached teacher targets.
+
+    Targets are indexed by the iterator's (shuffled) sample indices, so the
+    student still sees augmented images in a fresh order every epoch. Labels
+    are the one-hot label followed by the teacher probabilities. Only the
+    iterator's public interface is used: `iterator[i]` gives batch i of the
+    current index_array, which on_epoch_end reshuffles.
+    """
+
+    def __init__(self, iterator, teacher_targets):
+        """
+        Args:
+            iterator: DirectoryIterator from flow_from_directory
+            teacher_targets (np.ndarray): Teacher probabilities in
+                iterator.filenames order
+        """
+        super().__init__()
+        if len(teacher_targets) != iterator.samples:
+            raise ValueError(f"Teacher targets cover {len(teacher_targets)} samples, "
+                             f"but the generator has {iterator.samples}")
+
+        self.iterator = iterator
+        self.teacher_targets = teacher_targets
+        self.samples = iterator.samples
+
+    def __len__(self):
+        return len(self.iterator)
+
+    def __getitem__(self, index):
+        # Sets index_array on first use
+        images, labels = self.iterator[index]
+
+        batch_size = self.iterator.batch_size
+        index_array = self.iterator.index_array[index * batch_size:(index + 1) * batch_size]
+        targets = np.asarray(self.teacher_targets[index_array], dtype=np.float32)
+
+        return images, np.concatenate([labels, targets], axis=1)
+
+    def on_epoch_end(self):
+        self.iterator.on_epoch_end()
+
+
+class DistillationLoss(keras.losses.Loss):
+    """
+    Hinton-style distillation loss on concatenated [one-hot, teacher] labels.
+
+    Both models end in a softmax, so log-probabilities stand in for logits:
+    softmax(log(p) / T) equals the temperature-softened distribution.
+    """
+
+    def __init__(self, num_classes, temperature=4.0, hard_label_weight=0.1,
+                 name='distillation_loss', **kwargs):
+        """
+        Args:
+            num_classes (int): Number of classes
+            temperature (float): Softening temperature
+            hard_label_weight (float): Weight of the cross-entropy with the
+                true labels (the rest goes to the teacher targets)
+        """
+        super().__init__(name=name, **kwargs)
+        self.num_classes = num_classes
+        self.temperature = temperature
+        self.hard_label_weight = hard_label_weight
+
+    def call(self, y_true, y_pred):
+        y_pred = tf.cast(y_pred, tf.float32)
+        labels = y_true[:, :self.num_classes]
+        teacher = y_true[:, self.num_classes:]
+
+        hard_loss = keras.losses.categorical_crossentropy(labels, y_pred)
+
+        epsilon = keras.backend.epsilon()
+        teacher_log = tf.math.log(tf.clip_by_value(teacher, epsilon, 1.0))
+        student_log = tf.math.log(tf.clip_by_value(y_pred, epsilon, 1.0))
+        soft_teacher = tf.nn.softmax(teacher_log / self.temperature)
+        soft_student_log = tf.nn.log_softmax(student_log / self.temperature)
+
+        # T^2 keeps soft-target gradients on the same scale as the hard loss
+        soft_loss = -tf.reduce_sum(soft_teacher * soft_student_log, axis=-1) * self.temperature ** 2
+
+        return self.hard_label_weight * hard_loss + (1 - self.hard_label_weight) * soft_loss
+
+    def get_config(self):
+        config = super().get_config()
+        config.update({
+            'num_classes': self.num_classes,
+            'temperature': self.temperature,
+            'hard_label_weight': self.hard_label_weight
+        })
+        return config
+
+
+def hard_label_accuracy(num_classes):
+    """
+    Accuracy against the one-hot part of [one-hot, teacher] labels.
+
+    The metric is named 'accuracy' so callbacks monitoring val_accuracy keep
+    working during distillation.
+
+    Args:
+        num_classes (int): Number of classes
+
+    Returns:
+        callable: Keras metric function
+    """
+    def accuracy(y_true, y_pred):
+        return keras.metrics.categorical_accuracy(y_true[:, :num_classes], y_pred)
+
+    return accuracy
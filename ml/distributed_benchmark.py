@@ -0,0 +1,200 @@
+"""
+Distributed Training Scaling Benchmark
+Author: Peter Maina (136532)
+Project: AI-Based Tomato & Potato Disease Classification
+
+This script measures MultiWorkerMirroredStrategy throughput for 1, 2 and 4
+local worker processes on a single Linux machine. Each worker gets an equal
+share of the CPU cores so the runs do not oversubscribe the host.
+"""
+
+import os
+import sys
+import argparse
+import json
+import socket
+import subprocess
+from datetime import datetime
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+
+def find_free_ports(count):
+    """
+    Reserve free localhost TCP ports for the worker cluster.
+
+    Args:
+        count (int): Number of ports
+
+    Returns:
+        list: Port numbers
+    """
+    sockets = []
+    for _ in range(count):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.bind(('localhost', 0))
+        sockets.append(sock)
+
+    ports = [sock.getsockname()[1] for sock in sockets]
+    for sock in sockets:
+        sock.close()
+    return ports
+
+
+def run_workers(num_workers, args, report_path):
+    """
+    Launch a local multi-worker training run and wait for it to finish.
+
+    Args:
+        num_workers (int): Number of worker processes
+        args (argparse.Namespace): Benchmark arguments
+        report_path (Path): Where the chief writes its throughput report
+
+    Returns:
+        dict: Throughput report written by the chief
+    """
+    ports = find_free_ports(num_workers)
+    cluster = {'worker': [f"localhost:{port}" for port in ports]}
+    threads = max(1, (os.cpu_count() or 1) // num_workers)
+
+    processes = []
+    for index in range(num_workers):
+        env = dict(os.environ)
+        env['TF_CONFIG'] = json.dumps({'cluster': cluster, 'task': {'type': 'worker', 'index': index}})
+        env['TF_CPP_MIN_LOG_LEVEL'] = '2'
+
+        command = [
+            sys.executable, str(project_root / "ml" / "training.py"),
+            '--architecture', args.architecture,
+            '--distributed', 'multi_worker',
+            '--epochs', str(args.epochs),
+            '--steps-per-epoch', str(args.steps_per_epoch),
+            '--batch-size', str(args.per_worker_batch_size * num_workers),
+            '--threads', str(threads),
+            '--benchmark-output', str(report_path)
+        ]
+
+        log_file = open(report_path.with_name(f"worker_{index}.log"), 'w')
+        processes.append((subprocess.Popen(command, env=env, stdout=log_file,
+                                           stderr=subprocess.STDOUT), log_file))
+
+    failed = False
+    for process, log_file in processes:
+        failed |= process.wait() != 0
+        log_file.close()
+
+    if failed or not report_path.exists():
+        raise RuntimeError(f"Benchmark with {num_workers} worker(s) failed, "
+                           f"see logs in {report_path.parent}")
+
+    with open(report_path, 'r') as f:
+        return json.load(f)
+
+
+def main():
+    """Main benchmark function."""
+    parser = argparse.ArgumentParser(description="Benchmark multi-worker training scaling")
+    parser.add_argument(
+        '--workers',
+        type=int,
+        nargs='+',
+        default=[1, 2, 4],
+        help='Worker counts to benchmark'
+    )
+    parser.add_argument(
+        '--architecture',
+        type=str,
+        default='MobileNetV2',
+        help='Model architecture (baseline, MobileNetV2, EfficientNetB0)'
+    )
+    parser.add_argument(
+        '--per-worker-batch-size',
+        type=int,
+        default=32,
+        help='Batch size per worker (global batch scales with workers)'
+    )
+    parser.add_argument(
+        '--steps-per-epoch',
+        type=int,
+        default=20,
+        help='Training steps per epoch'
+    )
+    parser.add_argument(
+        '--epochs',
+        type=int,
+        default=2,
+        help='Epochs per run (the first epoch is treated as warm-up)'
+    )
+    parser.add_argument(
+        '--output',
+        type=str,
+        default=None,
+        help='Output path for benchmark results (JSON)'
+    )
+
+    args = parser.parse_args()
+
+    print(f"\n{'='*60}")
+    print("Distributed Training Scaling Benchmark")
+    print(f"{'='*60}")
+    print(f"Architecture: {args.architecture}")
+    print(f"Workers: {args.workers}")
+    print(f"Per-worker Batch Size: {args.per_worker_batch_size}")
+    print(f"CPU Cores: {os.cpu_count()}")
+    print(f"{'='*60}\n")
+
+    # Worker logs and per-run reports are kept for inspection
+    run_dir = project_root / "ml" / "logs" / \
+        f"distributed_benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+    results = []
+    for num_workers in args.workers:
+        print(f"Running with {num_workers} worker(s)...")
+        report_path = run_dir / f"workers_{num_workers}" / "throughput.json"
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+
+        report = run_workers(num_workers, args, report_path)
+        results.append({
+            'workers': num_workers,
+            'global_batch_size': args.per_worker_batch_size * num_workers,
+            'images_per_second': report['mean_images_per_second'],
+            'epochs': report['epochs']
+        })
+        print(f"  ✓ {report['mean_images_per_second']:.1f} images/sec")
+
+    # Scaling relative to the smallest run
+    baseline = results[0]
+    for result in results:
+        speedup = result['images_per_second'] / baseline['images_per_second']
+        result['speedup'] = speedup
+        result['efficiency'] = speedup / (result['workers'] / baseline['workers'])
+
+    print(f"\n{'='*60}")
+    print("Scaling Summary")
+    print(f"{'='*60}")
+    print(f"{'Workers':>8} {'Images/sec':>12} {'Speedup':>9} {'Efficiency':>11}")
+    for result in results:
+        print(f"{result['workers']:>8} {result['images_per_second']:>12.1f} "
+              f"{result['speedup']:>8.2f}x {result['efficiency']*100:>10.1f}%")
+    print(f"{'='*60}\n")
+
+    output_path = Path(args.output) if args.output else run_dir / "results.json"
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(output_path, 'w') as f:
+        json.dump({
+            'architecture': args.architecture,
+            'cpu_count': os.cpu_count(),
+            'per_worker_batch_size': args.per_worker_batch_size,
+            'steps_per_epoch': args.steps_per_epoch,
+            'results': results
+        }, f, indent=4)
+
+    print(f"✓ Benchmark results saved to: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
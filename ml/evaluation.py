@@ -14,14 +14,6 @@ import numpy as np
 import tensorflow as tf
 from tensorflow import keras
 from tensorflow.keras.preprocessing.image import ImageDataGenerator
-from sklearn.metrics import (
-    classification_report,
-    confusion_matrix,
-    accuracy_score,
-    precision_score,
-    recall_score,
-    f1_score
-)
 import json
 
 # Add project root to path
@@ -33,7 +25,8 @@ from ml.utils import (
     get_class_names,
     plot_confusion_matrix,
     get_model_size_mb,
-    count_model_parameters
+    count_model_parameters,
+    model_name_from_path
 )
 
 
@@ -56,6 +49,7 @@ def create_test_generator(config):
     test_generator = test_datagen.flow_from_directory(
         test_dir,
         target_size=(img_height, img_width),
+        interpolation=config['model']['resize_method'],
         batch_size=batch_size,
         class_mode='categorical',
         shuffle=False  # Important for evaluation
@@ -64,10 +58,182 @@ def create_test_generator(config):
     return test_generator
 
 
+def collect_predictions(model, test_gen):
+    """
+    Run a single streamed prediction pass over the test set.
+
+    Predictions and labels are written into preallocated arrays batch by
+    batch, so every metric can be computed from one forward pass.
+
+    Args:
+        model (keras.Model): Trained model
+        test_gen: Non-shuffled test data generator
+
+    Returns:
+        tuple: (probabilities, true_classes) with shapes (N, C) and (N,)
+    """
+    num_samples = test_gen.samples
+    probabilities = np.empty((num_samples, test_gen.num_classes), dtype=np.float32)
+    true_classes = np.empty(num_samples, dtype=np.int64)
+
+    offset = 0
+    num_batches = len(test_gen)
+    for batch_index in range(num_batches):
+        images, labels = test_gen[batch_index]
+        end = offset + len(images)
+
+        probabilities[offset:end] = model.predict_on_batch(images)
+        true_classes[offset:end] = np.argmax(labels, axis=1)
+        offset = end
+
+        print(f"\r  Batch {batch_index + 1}/{num_batches}", end='')
+    print()
+
+    return probabilities, true_classes
+
+
+def compute_classification_report(cm, class_names):
+    """
+    Build per-class precision/recall/F1 from a confusion matrix.
+
+    Returns the same structure as sklearn's classification_report with
+    output_dict=True.
+
+    Args:
+        cm (numpy.ndarray): Confusion matrix (rows: true, columns: predicted)
+        class_names (list): List of class names
+
+    Returns:
+        dict: Per-class metrics plus 'accuracy', 'macro avg' and 'weighted avg'
+    """
+    true_positives = np.diag(cm).astype(np.float64)
+    support = cm.sum(axis=1).astype(np.float64)
+    predicted = cm.sum(axis=0).astype(np.float64)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.where(predicted > 0, true_positives / predicted, 0.0)
+        recall = np.where(support > 0, true_positives / support, 0.0)
+        f1 = np.where(precision + recall > 0,
+                      2 * precision * recall / (precision + recall), 0.0)
+
+    report = {}
+    for i, class_name in enumerate(class_names):
+        report[class_name] = {
+            'precision': float(precision[i]),
+            'recall': float(recall[i]),
+            'f1-score': float(f1[i]),
+            'support': int(support[i])
+        }
+
+    total = support.sum()
+    weights = support / total if total > 0 else support
+
+    report['accuracy'] = float(true_positives.sum() / total) if total > 0 else 0.0
+    report['macro avg'] = {
+        'precision': float(precision.mean()),
+        'recall': float(recall.mean()),
+        'f1-score': float(f1.mean()),
+        'support': int(total)
+    }
+    report['weighted avg'] = {
+        'precision': float((precision * weights).sum()),
+        'recall': float((recall * weights).sum()),
+        'f1-score': float((f1 * weights).sum()),
+        'support': int(total)
+    }
+
+    return report
+
+
+def format_classification_report(report, class_names, digits=4):
+    """
+    Format a classification report dict as text.
+
+    Args:
+        report (dict): Output of compute_classification_report
+        class_names (list): List of class names
+        digits (int): Number of decimal places
+
+    Returns:
+        str: Text table
+    """
+    width = max(len(name) for name in list(class_names) + ['weighted avg'])
+    header = f"{'':>{width}} {'precision':>10} {'recall':>10} {'f1-score':>10} {'support':>10}"
+    lines = [header, '']
+
+    def row(name, metrics):
+        return (f"{name:>{width}} {metrics['precision']:>10.{digits}f} "
+                f"{metrics['recall']:>10.{digits}f} {metrics['f1-score']:>10.{digits}f} "
+                f"{metrics['support']:>10}")
+
+    for class_name in class_names:
+        lines.append(row(class_name, report[class_name]))
+
+    lines.append('')
+    total = report['macro avg']['support']
+    lines.append(f"{'accuracy':>{width}} {'':>10} {'':>10} "
+                 f"{report['accuracy']:>10.{digits}f} {total:>10}")
+    lines.append(row('macro avg', report['macro avg']))
+    lines.append(row('weighted avg', report['weighted avg']))
+
+    return '\n'.join(lines)
+
+
+def compute_calibration(confidences, correct, num_bins=15):
+    """
+    Compute expected calibration error and reliability bins.
+
+    Args:
+        confidences (numpy.ndarray): Top-1 confidence per sample
+        correct (numpy.ndarray): Whether each top-1 prediction is correct
+        num_bins (int): Number of equal-width confidence bins
+
+    Returns:
+        dict: ECE, maximum calibration error and per-bin statistics
+    """
+    bin_ids = np.minimum((confidences * num_bins).astype(np.int64), num_bins - 1)
+
+    counts = np.bincount(bin_ids, minlength=num_bins)
+    confidence_sums = np.bincount(bin_ids, weights=confidences, minlength=num_bins)
+    correct_sums = np.bincount(bin_ids, weights=correct.astype(np.float64), minlength=num_bins)
+
+    bins = []
+    ece = 0.0
+    mce = 0.0
+    total = max(len(confidences), 1)
+
+    for i in range(num_bins):
+        if counts[i] == 0:
+            continue
+        mean_confidence = confidence_sums[i] / counts[i]
+        accuracy = correct_sums[i] / counts[i]
+        gap = abs(accuracy - mean_confidence)
+
+        ece += gap * counts[i] / total
+        mce = max(mce, gap)
+        bins.append({
+            'lower': i / num_bins,
+            'upper': (i + 1) / num_bins,
+            'count': int(counts[i]),
+            'mean_confidence': float(mean_confidence),
+            'accuracy': float(accuracy)
+        })
+
+    return {
+        'expected_calibration_error': float(ece),
+        'max_calibration_error': float(mce),
+        'num_bins': num_bins,
+        'bins': bins
+    }
+
+
 def evaluate_model(model_path, config):
     """
     Evaluate model on test dataset.
 
+    Runs a single prediction pass and derives loss, accuracy, per-class
+    metrics, the confusion matrix and calibration from its outputs.
+
     Args:
         model_path (str): Path to trained model
         config (dict): ML configuration
@@ -96,14 +262,27 @@ def evaluate_model(model_path, config):
     print(f"  Trainable Parameters: {param_counts['trainable']:,}")
     print(f"  Non-trainable Parameters: {param_counts['non_trainable']:,}")
 
-    # Create test generator
+    # Create test generator at the model's own input resolution
     print("\nCreating test data generator...")
+    config = dict(config, model=dict(config['model'], input_shape=list(model.input_shape[1:])))
     test_gen = create_test_generator(config)
     print(f"✓ Test samples: {test_gen.samples}")
 
-    # Evaluate model
-    print("\nEvaluating model on test set...")
-    test_loss, test_accuracy = model.evaluate(test_gen, verbose=1)[:2]
+    # Single prediction pass
+    print("\nGenerating predictions...")
+    probabilities, true_classes = collect_predictions(model, test_gen)
+    predicted_classes = np.argmax(probabilities, axis=1)
+    confidences = probabilities[np.arange(len(predicted_classes)), predicted_classes]
+    correct = predicted_classes == true_classes
+
+    # Get class names
+    class_names = get_class_names()
+    num_classes = len(class_names)
+
+    # Categorical cross-entropy (same clipping as Keras)
+    true_probabilities = probabilities[np.arange(len(true_classes)), true_classes]
+    test_loss = float(-np.mean(np.log(np.clip(true_probabilities, 1e-7, 1.0))))
+    test_accuracy = float(np.mean(correct))
 
     print(f"\n{'='*60}")
     print("Basic Metrics")
@@ -112,25 +291,20 @@ def evaluate_model(model_path, config):
     print(f"Test Accuracy: {test_accuracy*100:.2f}%")
     print(f"{'='*60}\n")
 
-    # Get predictions
-    print("Generating predictions...")
-    predictions = model.predict(test_gen, verbose=1)
-    predicted_classes = np.argmax(predictions, axis=1)
-
-    # Get true labels
-    true_classes = test_gen.classes
-
-    # Get class names
-    class_names = get_class_names()
-
     # Compute detailed metrics
     print("\nComputing detailed metrics...")
 
-    # Overall metrics
-    accuracy = accuracy_score(true_classes, predicted_classes)
-    precision = precision_score(true_classes, predicted_classes, average='weighted')
-    recall = recall_score(true_classes, predicted_classes, average='weighted')
-    f1 = f1_score(true_classes, predicted_classes, average='weighted')
+    # Confusion matrix drives every per-class metric
+    cm = np.bincount(
+        true_classes * num_classes + predicted_classes,
+        minlength=num_classes * num_classes
+    ).reshape(num_classes, num_classes)
+
+    report = compute_classification_report(cm, class_names)
+    accuracy = report['accuracy']
+    precision = report['weighted avg']['precision']
+    recall = report['weighted avg']['recall']
+    f1 = report['weighted avg']['f1-score']
 
     print(f"\n{'='*60}")
     print("Detailed Metrics")
@@ -141,23 +315,19 @@ def evaluate_model(model_path, config):
     print(f"F1-Score (weighted): {f1*100:.2f}%")
     print(f"{'='*60}\n")
 
+    # Calibration
+    calibration = compute_calibration(confidences, correct)
+    print(f"Expected Calibration Error: {calibration['expected_calibration_error']:.4f}")
+
     # Classification report
     if config['evaluation']['generate_classification_report']:
         print("\nClassification Report:")
         print("="*60)
-        report = classification_report(
-            true_classes,
-            predicted_classes,
-            target_names=class_names,
-            digits=4
-        )
-        print(report)
+        print(format_classification_report(report, class_names))
 
     # Confusion matrix
-    cm = None
     if config['evaluation']['generate_confusion_matrix']:
         print("\nGenerating confusion matrix...")
-        cm = confusion_matrix(true_classes, predicted_classes)
 
         # Save confusion matrix plot
         cm_plot_path = project_root / "ml" / "logs" / "confusion_matrix.png"
@@ -171,19 +341,16 @@ def evaluate_model(model_path, config):
         'parameters': param_counts,
         'test_samples': int(test_gen.samples),
         'metrics': {
-            'test_loss': float(test_loss),
-            'test_accuracy': float(test_accuracy),
+            'test_loss': test_loss,
+            'test_accuracy': test_accuracy,
             'accuracy': float(accuracy),
             'precision': float(precision),
             'recall': float(recall),
             'f1_score': float(f1)
         },
-        'per_class_metrics': classification_report(
-            true_classes,
-            predicted_classes,
-            target_names=class_names,
-            output_dict=True
-        )
+        'per_class_metrics': report,
+        'confusion_matrix': cm.tolist(),
+        'calibration': calibration
     }
 
     # Save predictions if requested
@@ -191,14 +358,16 @@ def evaluate_model(model_path, config):
         predictions_file = project_root / "ml" / "logs" / "predictions.json"
         predictions_file.parent.mkdir(parents=True, exist_ok=True)
 
-        pred_data = []
-        for i in range(len(true_classes)):
-            pred_data.append({
-                'true_class': class_names[true_classes[i]],
-                'predicted_class': class_names[predicted_classes[i]],
-                'confidence': float(predictions[i][predicted_classes[i]]),
-                'correct': bool(true_classes[i] == predicted_classes[i])
-            })
+        pred_data = [
+            {
+                'true_class': class_names[true_class],
+                'predicted_class': class_names[predicted_class],
+                'confidence': float(confidence),
+                'correct': bool(is_correct)
+            }
+            for true_class, predicted_class, confidence, is_correct
+            in zip(true_classes, predicted_classes, confidences, correct)
+        ]
 
         with open(predictions_file, 'w') as f:
             json.dump(pred_data, f, indent=4)
@@ -244,7 +413,11 @@ def save_evaluation_report(results, output_path):
         f.write(f"Test Accuracy: {results['metrics']['test_accuracy']*100:.2f}%\n")
         f.write(f"Precision: {results['metrics']['precision']*100:.2f}%\n")
         f.write(f"Recall: {results['metrics']['recall']*100:.2f}%\n")
-        f.write(f"F1-Score: {results['metrics']['f1_score']*100:.2f}%\n\n")
+        f.write(f"F1-Score: {results['metrics']['f1_score']*100:.2f}%\n")
+        if 'calibration' in results:
+            f.write(f"Expected Calibration Error: "
+                    f"{results['calibration']['expected_calibration_error']:.4f}\n")
+        f.write("\n")
 
         f.write("="*60 + "\n")
         f.write("Per-Class Metrics\n")
@@ -290,7 +463,7 @@ def main():
     if args.output:
         output_path = args.output
     else:
-        model_name = Path(args.model).stem
+        model_name = model_name_from_path(args.model)
         output_path = project_root / "ml" / "logs" / f"{model_name}_evaluation.json"
 
     save_evaluation_report(results, str(output_path))
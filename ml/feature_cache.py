@@ -0,0 +1,203 @@
+"""
+Cached Backbone Features for Plant Disease Classification
+Author: Peter Maina (136532)
+Project: AI-Based Tomato & Potato Disease Classification
+
+This module runs a frozen backbone once over a dataset and stores the pooled
+feature vectors in memory-mapped .npy files, so the classification head can
+be trained on features instead of images.
+"""
+
+import hashlib
+import json
+import math
+import os
+from pathlib import Path
+import numpy as np
+from tensorflow import keras
+from tensorflow.keras import layers
+
+
+def build_feature_extractor(backbone):
+    """
+    Wrap a backbone with the same global average pooling used by the models.
+
+    Args:
+        backbone (keras.Model): Pretrained backbone (include_top=False)
+
+    Returns:
+        keras.Model: Model mapping images to pooled feature vectors
+    """
+    inputs = keras.Input(shape=backbone.input_shape[1:])
+    x = backbone(inputs, training=False)
+    outputs = layers.GlobalAveragePooling2D(dtype='float32')(x)
+    return keras.Model(inputs, outputs, name=f"{backbone.name}_features")
+
+
+def _cache_is_valid(meta_path, expected_meta):
+    """Check whether an existing cache was built with the same settings."""
+    if not meta_path.exists():
+        return False
+
+    with open(meta_path, 'r') as f:
+        meta = json.load(f)
+
+    return all(meta.get(key) == value for key, value in expected_meta.items())
+
+
+def dataset_fingerprint(generator, content_hashes=None):
+    """
+    Hash identifying the images of a generator and their order.
+
+    Each file contributes its name, size and mtime, plus its content SHA-256
+    from the dataset manifest when known, so replacing or moving images
+    changes the fingerprint even if the sample count stays the same.
+
+    Args:
+        generator: Keras directory iterator
+        content_hashes (dict): 'class/file name' -> content SHA-256 (optional)
+
+    Returns:
+        str: Hex digest
+    """
+    content_hashes = content_hashes or {}
+    digest = hashlib.sha256()
+    for filename, filepath in zip(generator.filenames, generator.filepaths):
+        filename = filename.replace(os.sep, '/')
+        stat = os.stat(filepath)
+        digest.update(
+            f"{filename}\t{stat.st_size}\t{stat.st_mtime_ns}\t{content_hashes.get(filename, '')}\n".encode()
+        )
+    return digest.hexdigest()
+
+
+def extract_features(extractor, generators, cache_dir, name, cache_key, dtype='float32',
+                     content_hashes=None):
+    """
+    Extract pooled features for one or more passes over a dataset.
+
+    Features are written batch by batch into a memory-mapped .npy file, so
+    peak memory stays at one batch regardless of dataset size. An existing
+    cache with a matching key is reused without running the backbone.
+
+    Args:
+        extractor (keras.Model): Model built by build_feature_extractor
+        generators (list): Non-shuffled data generators; each one is a pass
+            (e.g. one clean pass plus augmented passes)
+        cache_dir (Path): Directory for cached arrays
+        name (str): Cache name (e.g. 'train', 'validation')
+        cache_key (dict): Settings that invalidate the cache when changed
+        dtype (str): Storage dtype ('float32' or 'float16')
+        content_hashes (dict): Manifest content hashes of the images (see
+            dataset_fingerprint; optional)
+
+    Returns:
+        tuple: (features, labels) as read-only memory-mapped arrays
+    """
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    features_path = cache_dir / f"{name}_features.npy"
+    labels_path = cache_dir / f"{name}_labels.npy"
+    meta_path = cache_dir / f"{name}_meta.json"
+
+    num_samples = sum(gen.samples for gen in generators)
+    expected_meta = dict(cache_key, samples=num_samples, passes=len(generators), dtype=dtype,
+                         files_sha256=dataset_fingerprint(generators[0], content_hashes))
+
+    if features_path.exists() and labels_path.exists() and \
+            _cache_is_valid(meta_path, expected_meta):
+        print(f"✓ Reusing cached {name} features: {features_path}")
+        return load_features(cache_dir, name)
+
+    feature_dim = int(extractor.output_shape[-1])
+    num_classes = generators[0].num_classes
+
+    print(f"Extracting {name} features: {num_samples} samples x {feature_dim} dims "
+          f"({len(generators)} pass(es))")
+
+    features = np.lib.format.open_memmap(
+        features_path, mode='w+', dtype=dtype, shape=(num_samples, feature_dim)
+    )
+    labels = np.lib.format.open_memmap(
+        labels_path, mode='w+', dtype='float32', shape=(num_samples, num_classes)
+    )
+
+    offset = 0
+    for pass_index, generator in enumerate(generators, 1):
+        for batch_index in range(len(generator)):
+            images, batch_labels = generator[batch_index]
+            batch_features = extractor.predict_on_batch(images)
+
+            end = offset + len(images)
+            features[offset:end] = batch_features
+            labels[offset:end] = batch_labels
+            offset = end
+
+        print(f"  ✓ Pass {pass_index}/{len(generators)} done ({offset}/{num_samples})")
+
+    features.flush()
+    labels.flush()
+    del features, labels
+
+    with open(meta_path, 'w') as f:
+        json.dump(expected_meta, f, indent=4)
+
+    print(f"✓ Cached {name} features saved to: {features_path}")
+
+    return load_features(cache_dir, name)
+
+
+def load_features(cache_dir, name):
+    """
+    Open cached features and labels as read-only memory maps.
+
+    Args:
+        cache_dir (Path): Directory for cached arrays
+        name (str): Cache name
+
+    Returns:
+        tuple: (features, labels)
+    """
+    cache_dir = Path(cache_dir)
+    features = np.load(cache_dir / f"{name}_features.npy", mmap_mode='r')
+    labels = np.load(cache_dir / f"{name}_labels.npy", mmap_mode='r')
+    return features, labels
+
+
+class FeatureSequence(keras.utils.Sequence):
+    """Batches cached features from a memory map without loading them all."""
+
+    def __init__(self, features, labels, batch_size=256, shuffle=True, seed=42):
+        """
+        Args:
+            features (np.ndarray): Feature array (may be memory-mapped)
+            labels (np.ndarray): One-hot label array
+            batch_size (int): Batch size
+            shuffle (bool): Shuffle sample order every epoch
+            seed (int): Random seed for shuffling
+        """
+        super().__init__()
+        self.features = features
+        self.labels = labels
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.rng = np.random.default_rng(seed)
+        self.indices = np.arange(len(features))
+        if shuffle:
+            self.rng.shuffle(self.indices)
+
+    def __len__(self):
+        return math.ceil(len(self.indices) / self.batch_size)
+
+    def __getitem__(self, index):
+        # Sorted indices keep memory-map reads mostly sequential
+        batch_indices = np.sort(self.indices[index * self.batch_size:(index + 1) * self.batch_size])
+        return (
+            np.asarray(self.features[batch_indices], dtype=np.float32),
+            np.asarray(self.labels[batch_indices], dtype=np.float32)
+        )
+
+    def on_epoch_end(self):
+        if self.shuffle:
+            self.rng.shuffle(self.indices)
@@ -9,7 +9,13 @@ This script handles model inference on single or multiple images.
 import os
 import sys
 import argparse
+import csv
+import queue
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import numpy as np
 import tensorflow as tf
 from tensorflow import keras
 import json
@@ -77,87 +83,371 @@ def predict_single_image(model_path, image_path, visualize=True):
     return predicted_class, confidence
 
 
-def predict_batch(model_path, image_dir, output_file=None):
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png'}
+RESULT_FIELDS = ['image', 'predicted_class', 'confidence', 'error']
+
+
+def find_images(image_dir):
+    """
+    Recursively find image files under a directory.
+
+    Files are yielded lazily in a stable (sorted) order so very large
+    directories never have to be listed into memory at once.
+
+    Args:
+        image_dir (Path): Root directory
+
+    Yields:
+        Path: Image file path
+    """
+    for root, dirs, files in os.walk(image_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if Path(name).suffix.lower() in IMAGE_EXTENSIONS:
+                yield Path(root) / name
+
+
+def decode_image(image_path, target_size):
+    """
+    Decode and preprocess one image (same steps as load_and_preprocess_image).
+
+    Args:
+        image_path (Path): Image file path
+        target_size (tuple): (width, height)
+
+    Returns:
+        numpy.ndarray: Float32 array of shape (height, width, 3) in [0, 1]
+    """
+    from PIL import Image
+
+    with Image.open(image_path) as img:
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        img = img.resize(target_size, Image.BILINEAR)
+        return np.asarray(img, dtype=np.float32) / 255.0
+
+
+def iter_image_batches(image_paths, target_size, batch_size=32, workers=None, prefetch_batches=2):
+    """
+    Decode images in parallel into fixed-size batches.
+
+    At most prefetch_batches batches are decoded ahead of the consumer, so
+    memory stays bounded however many images there are. The last batch is
+    zero-padded to batch_size so the model always sees the same shape.
+
+    Args:
+        image_paths (iterable): Image paths (may be a generator)
+        target_size (tuple): (width, height)
+        batch_size (int): Images per batch
+        workers (int): Decode threads (default: CPU count)
+        prefetch_batches (int): Batches decoded ahead of the consumer
+
+    Yields:
+        tuple: (paths, batch, count, errors) where batch has batch_size rows,
+            the first count of which are real images, and errors lists
+            (path, message) for images that failed to decode
+    """
+    workers = workers or os.cpu_count() or 1
+    width, height = target_size
+    paths = iter(image_paths)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+
+        def submit_next():
+            for path in paths:
+                pending.append((path, executor.submit(decode_image, path, target_size)))
+                return True
+            return False
+
+        # Fill the prefetch window
+        while len(pending) < batch_size * prefetch_batches and submit_next():
+            pass
+
+        while pending:
+            batch = np.zeros((batch_size, height, width, 3), dtype=np.float32)
+            batch_paths = []
+            errors = []
+
+            while pending and len(batch_paths) < batch_size:
+                path, future = pending.popleft()
+                submit_next()
+                try:
+                    batch[len(batch_paths)] = future.result()
+                    batch_paths.append(path)
+                except Exception as e:
+                    errors.append((path, str(e)))
+
+            yield batch_paths, batch, len(batch_paths), errors
+
+
+class ResultWriter:
+    """Streams prediction results to CSV, JSON Lines or JSON as they arrive."""
+
+    def __init__(self, output_file):
+        """
+        Args:
+            output_file (str): Output path; the format follows the extension
+                (.csv, .jsonl or .json)
+        """
+        self.path = Path(output_file)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.format = self.path.suffix.lower().lstrip('.')
+        self.file = open(self.path, 'w', newline='')
+        self.count = 0
+
+        if self.format == 'csv':
+            self.writer = csv.DictWriter(self.file, fieldnames=RESULT_FIELDS)
+            self.writer.writeheader()
+        elif self.format == 'json':
+            self.file.write('[\n')
+
+    def write(self, result):
+        """Write a single result row."""
+        if self.format == 'csv':
+            self.writer.writerow(result)
+        elif self.format == 'json':
+            if self.count:
+                self.file.write(',\n')
+            self.file.write('    ' + json.dumps(result))
+        else:
+            self.file.write(json.dumps(result) + '\n')
+        self.count += 1
+
+    def close(self):
+        """Finish and close the output file."""
+        if self.format == 'json':
+            self.file.write('\n]\n')
+        self.file.close()
+
+
+def run_batch_prediction(predict_fn, image_dir, class_names, target_size,
+                         output_file=None, batch_size=32, workers=None, concurrency=1):
+    """
+    Score every image under a directory with a batched predict function.
+
+    Args:
+        predict_fn (callable): Maps a (batch_size, H, W, 3) array to class
+            probabilities; must be thread-safe when concurrency > 1
+        image_dir (Path): Root image directory (searched recursively)
+        class_names (list): Class names in model output order
+        target_size (tuple): (width, height)
+        output_file (str): Path to stream results to (optional)
+        batch_size (int): Images per forward pass
+        workers (int): Decode threads
+        concurrency (int): Batches scored in parallel
+
+    Returns:
+        dict: Summary with total, successful, failed and images_per_second
+    """
+    writer = ResultWriter(output_file) if output_file else None
+    counts = {'successful': 0, 'failed': 0, 'batches': 0}
+    start = time.perf_counter()
+
+    def record(paths, count, errors, future):
+        """Write one finished batch (results stay in input order)."""
+        for path, message in errors:
+            print(f"  ✗ Error: {path}: {message}")
+            if writer:
+                writer.write({'image': str(path.relative_to(image_dir)),
+                              'predicted_class': None, 'confidence': None, 'error': message})
+        counts['failed'] += len(errors)
+
+        if count:
+            predictions = np.asarray(future.result())[:count]
+            indices = predictions.argmax(axis=1)
+
+            for path, idx, probs in zip(paths, indices, predictions):
+                if writer:
+                    writer.write({
+                        'image': str(path.relative_to(image_dir)),
+                        'predicted_class': class_names[idx],
+                        'confidence': float(probs[idx]),
+                        'error': None
+                    })
+            counts['successful'] += count
+
+        counts['batches'] += 1
+        if counts['batches'] % 10 == 0:
+            processed = counts['successful'] + counts['failed']
+            print(f"Processed {processed} images "
+                  f"({processed / (time.perf_counter() - start):.1f} images/sec)")
+
+    try:
+        batches = iter_image_batches(find_images(image_dir), target_size, batch_size, workers)
+
+        with ThreadPoolExecutor(max_workers=concurrency) as inference_pool:
+            in_flight = deque()
+
+            for paths, batch, count, errors in batches:
+                future = inference_pool.submit(predict_fn, batch) if count else None
+                in_flight.append((paths, count, errors, future))
+
+                if len(in_flight) > concurrency:
+                    record(*in_flight.popleft())
+
+            while in_flight:
+                record(*in_flight.popleft())
+    finally:
+        if writer:
+            writer.close()
+
+    elapsed = time.perf_counter() - start
+    total = counts['successful'] + counts['failed']
+    return {
+        'total': total,
+        'successful': counts['successful'],
+        'failed': counts['failed'],
+        'seconds': elapsed,
+        'images_per_second': total / elapsed if elapsed else 0.0
+    }
+
+
+def print_batch_summary(summary, output_file=None):
+    """Print the summary returned by run_batch_prediction."""
+    print(f"\n{'='*60}")
+    print("Batch Prediction Summary")
+    print(f"{'='*60}")
+    print(f"Total Images: {summary['total']}")
+    print(f"Successful Predictions: {summary['successful']}")
+    print(f"Failed Predictions: {summary['failed']}")
+    print(f"Throughput: {summary['images_per_second']:.1f} images/sec")
+    print(f"{'='*60}\n")
+
+    if output_file:
+        print(f"✓ Results saved to: {output_file}")
+
+
+def predict_batch(model_path, image_dir, output_file=None, batch_size=32, workers=None):
     """
-    Predict disease classes for multiple images in a directory.
+    Predict disease classes for all images under a directory.
+
+    Images are found recursively, decoded in parallel into fixed-size batches
+    and scored with one forward pass per batch. Results are streamed to the
+    output file, so memory use does not grow with the number of images.
 
     Args:
         model_path (str): Path to trained model
         image_dir (str): Directory containing images
-        output_file (str): Path to save results (optional)
+        output_file (str): Path to save results (.csv, .jsonl or .json)
+        batch_size (int): Images per forward pass
+        workers (int): Decode threads (default: CPU count)
+
+    Returns:
+        dict: Summary with total, successful, failed and images_per_second
     """
     print(f"\n{'='*60}")
     print("Batch Prediction")
     print(f"{'='*60}")
     print(f"Model: {model_path}")
     print(f"Image Directory: {image_dir}")
+    print(f"Batch Size: {batch_size}")
     print(f"{'='*60}\n")
 
+    image_dir = Path(image_dir)
+    if next(find_images(image_dir), None) is None:
+        print(f"No images found in {image_dir}")
+        return
+
     # Load model
     print("Loading model...")
     model = keras.models.load_model(model_path)
     print("✓ Model loaded successfully")
 
-    # Get class names
+    # Class names and input size are looked up once for the whole run
     class_names = get_class_names()
+    height, width = model.input_shape[1:3]
 
-    # Get all images
-    image_dir = Path(image_dir)
-    image_extensions = ['.jpg', '.jpeg', '.png', '.JPG', '.JPEG', '.PNG']
-    image_files = []
+    summary = run_batch_prediction(
+        model.predict_on_batch, image_dir, class_names, (width, height),
+        output_file=output_file, batch_size=batch_size, workers=workers
+    )
 
-    for ext in image_extensions:
-        image_files.extend(list(image_dir.glob(f"*{ext}")))
+    print_batch_summary(summary, output_file)
 
-    if not image_files:
-        print(f"No images found in {image_dir}")
-        return
+    return summary
 
-    print(f"Found {len(image_files)} images\n")
 
-    # Make predictions
-    results = []
+class TFLiteInterpreterPool:
+    """
+    Pool of preallocated TFLite interpreters that can be shared by threads.
 
-    for i, image_path in enumerate(image_files, 1):
-        print(f"Processing {i}/{len(image_files)}: {image_path.name}")
+    An interpreter is not thread-safe, so each call checks one out of the
+    pool for the duration of a batch. Interpreters release the GIL while
+    invoking, so a pool of N scores N batches in parallel.
+    """
 
+    def __init__(self, model_path, size=1, num_threads=1, batch_size=None):
+        """
+        Args:
+            model_path (str): Path to .tflite model
+            size (int): Number of interpreters (one per inference thread)
+            num_threads (int): CPU threads used by each interpreter
+            batch_size (int): Resize the input tensor to this batch dimension
+                (optional; without it images are invoked one at a time)
+        """
+        self.model_path = str(model_path)
+        self.batch_size = batch_size
+        self._interpreters = queue.Queue()
+
+        for _ in range(size):
+            interpreter = tf.lite.Interpreter(model_path=self.model_path, num_threads=num_threads)
+            input_index = interpreter.get_input_details()[0]['index']
+            if batch_size:
+                shape = list(interpreter.get_input_details()[0]['shape'])
+                interpreter.resize_tensor_input(input_index, [batch_size] + shape[1:])
+            interpreter.allocate_tensors()
+            self._interpreters.put(interpreter)
+
+        # All interpreters share the same model, so read details once
+        interpreter = self._interpreters.queue[0]
+        self.input_details = interpreter.get_input_details()[0]
+        self.output_details = interpreter.get_output_details()[0]
+
+    @property
+    def input_shape(self):
+        """Model input shape without the batch dimension (H, W, C)."""
+        return tuple(int(dim) for dim in self.input_details['shape'][1:])
+
+    def _quantize(self, batch):
+        """Convert float inputs for integer-quantized models."""
+        dtype = self.input_details['dtype']
+        if dtype == np.float32:
+            return batch
+        scale, zero_point = self.input_details['quantization']
+        return np.round(batch / scale + zero_point).astype(dtype)
+
+    def _dequantize(self, output):
+        """Convert integer-quantized outputs back to probabilities."""
+        if self.output_details['dtype'] == np.float32:
+            return output
+        scale, zero_point = self.output_details['quantization']
+        return (output.astype(np.float32) - zero_point) * scale
+
+    def _invoke(self, interpreter, batch):
+        interpreter.set_tensor(self.input_details['index'], self._quantize(batch))
+        interpreter.invoke()
+        # Copy: the output buffer is reused by the next invoke
+        return self._dequantize(interpreter.get_tensor(self.output_details['index']).copy())
+
+    def predict(self, batch):
+        """
+        Predict class probabilities for a batch.
+
+        Args:
+            batch (numpy.ndarray): Images (N, H, W, C); N must equal
+                batch_size when the pool was created with one
+
+        Returns:
+            numpy.ndarray: Probabilities (N, num_classes)
+        """
+        interpreter = self._interpreters.get()
         try:
-            predicted_class, confidence, _ = predict_image(
-                model, str(image_path), class_names
-            )
-
-            result = {
-                'image': image_path.name,
-                'predicted_class': predicted_class,
-                'confidence': float(confidence)
-            }
-            results.append(result)
-
-            print(f"  → {predicted_class} ({confidence*100:.2f}%)")
-
-        except Exception as e:
-            print(f"  ✗ Error: {str(e)}")
-
-    # Print summary
-    print(f"\n{'='*60}")
-    print("Batch Prediction Summary")
-    print(f"{'='*60}")
-    print(f"Total Images: {len(image_files)}")
-    print(f"Successful Predictions: {len(results)}")
-    print(f"Failed Predictions: {len(image_files) - len(results)}")
-    print(f"{'='*60}\n")
-
-    # Save results if requested
-    if output_file:
-        output_path = Path(output_file)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-
-        with open(output_path, 'w') as f:
-            json.dump(results, f, indent=4)
-
-        print(f"✓ Results saved to: {output_path}")
-
-    return results
+            if self.batch_size:
+                return self._invoke(interpreter, batch)
+            return np.concatenate([self._invoke(interpreter, image[np.newaxis]) for image in batch])
+        finally:
+            self._interpreters.put(interpreter)
 
 
 def predict_with_tflite(tflite_model_path, image_path):
@@ -176,24 +466,14 @@ def predict_with_tflite(tflite_model_path, image_path):
     print(f"{'='*60}\n")
 
     # Load TFLite model
-    interpreter = tf.lite.Interpreter(model_path=tflite_model_path)
-    interpreter.allocate_tensors()
-
-    # Get input and output details
-    input_details = interpreter.get_input_details()
-    output_details = interpreter.get_output_details()
+    pool = TFLiteInterpreterPool(tflite_model_path)
 
     # Preprocess image
-    img_array = load_and_preprocess_image(image_path)
-
-    # Set input tensor
-    interpreter.set_tensor(input_details[0]['index'], img_array)
+    height, width = pool.input_shape[:2]
+    img_array = load_and_preprocess_image(image_path, (width, height))
 
     # Run inference
-    interpreter.invoke()
-
-    # Get predictions
-    predictions = interpreter.get_tensor(output_details[0]['index'])[0]
+    predictions = pool.predict(img_array)[0]
 
     # Get class names
     class_names = get_class_names()
@@ -214,6 +494,68 @@ def predict_with_tflite(tflite_model_path, image_path):
     return predicted_class, confidence
 
 
+def predict_batch_tflite(tflite_model_path, image_dir, output_file=None, batch_size=32,
+                         workers=None, interpreters=None, num_threads=1, resize_batch=True):
+    """
+    Predict disease classes for all images under a directory with TFLite.
+
+    Batches from the parallel decode queue are scored by a pool of
+    interpreters, one per inference thread, to keep every core busy.
+
+    Args:
+        tflite_model_path (str): Path to TFLite model
+        image_dir (str): Directory containing images
+        output_file (str): Path to save results (.csv, .jsonl or .json)
+        batch_size (int): Images per batch
+        workers (int): Image decode threads (default: CPU count)
+        interpreters (int): Interpreters in the pool (default: CPU count
+            divided by num_threads)
+        num_threads (int): CPU threads per interpreter
+        resize_batch (bool): Resize the input tensor to batch_size instead of
+            invoking once per image
+
+    Returns:
+        dict: Summary with total, successful, failed and images_per_second
+    """
+    interpreters = interpreters or max(1, (os.cpu_count() or 1) // num_threads)
+
+    print(f"\n{'='*60}")
+    print("TFLite Batch Prediction")
+    print(f"{'='*60}")
+    print(f"Model: {tflite_model_path}")
+    print(f"Image Directory: {image_dir}")
+    print(f"Batch Size: {batch_size}")
+    print(f"Interpreters: {interpreters} x {num_threads} thread(s)")
+    print(f"{'='*60}\n")
+
+    image_dir = Path(image_dir)
+    if next(find_images(image_dir), None) is None:
+        print(f"No images found in {image_dir}")
+        return
+
+    print("Loading interpreters...")
+    pool = TFLiteInterpreterPool(
+        tflite_model_path,
+        size=interpreters,
+        num_threads=num_threads,
+        batch_size=batch_size if resize_batch else None
+    )
+    print("✓ Interpreters ready")
+
+    class_names = get_class_names()
+    height, width = pool.input_shape[:2]
+
+    summary = run_batch_prediction(
+        pool.predict, image_dir, class_names, (width, height),
+        output_file=output_file, batch_size=batch_size, workers=workers,
+        concurrency=interpreters
+    )
+
+    print_batch_summary(summary, output_file)
+
+    return summary
+
+
 def main():
     """Main inference function."""
     parser = argparse.ArgumentParser(description="Plant Disease Classification Inference")
@@ -239,7 +581,19 @@ def main():
         '--output',
         type=str,
         default=None,
-        help='Output file for batch prediction results'
+        help='Output file for batch prediction results (.csv, .jsonl or .json)'
+    )
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=32,
+        help='Images per forward pass for batch prediction'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Image decode threads for batch prediction (default: CPU count)'
     )
     parser.add_argument(
         '--no-viz',
@@ -251,6 +605,23 @@ def main():
         action='store_true',
         help='Use TensorFlow Lite model'
     )
+    parser.add_argument(
+        '--interpreters',
+        type=int,
+        default=None,
+        help='TFLite interpreters for batch prediction (default: CPU count / --num-threads)'
+    )
+    parser.add_argument(
+        '--num-threads',
+        type=int,
+        default=1,
+        help='CPU threads per TFLite interpreter'
+    )
+    parser.add_argument(
+        '--no-resize-batch',
+        action='store_true',
+        help='Invoke TFLite once per image instead of resizing the input to the batch size'
+    )
 
     args = parser.parse_args()
 
@@ -273,12 +644,23 @@ def main():
     # Batch prediction
     elif args.image_dir:
         if args.tflite:
-            print("Batch prediction with TFLite not yet implemented")
+            predict_batch_tflite(
+                args.model,
+                args.image_dir,
+                output_file=args.output,
+                batch_size=args.batch_size,
+                workers=args.workers,
+                interpreters=args.interpreters,
+                num_threads=args.num_threads,
+                resize_batch=not args.no_resize_batch
+            )
         else:
             predict_batch(
                 args.model,
                 args.image_dir,
-                output_file=args.output
+                output_file=args.output,
+                batch_size=args.batch_size,
+                workers=args.workers
             )
 
 
@@ -0,0 +1,112 @@
+"""
+TensorFlow Model Utilities for Plant Disease Classification
+Author: Peter Maina (136532)
+Project: AI-Based Tomato & Potato Disease Classification
+
+This module contains the helpers of the ML pipeline that need TensorFlow.
+Import them from ml.utils; they are loaded on first use.
+"""
+
+import os
+import shutil
+from pathlib import Path
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+
+
+def convert_to_tflite(model_path, output_path=None, quantization='float16',
+                      representative_data=None, sparse=False):
+    """
+    Convert Keras model to TensorFlow Lite format for mobile deployment.
+
+    Args:
+        model_path (str): Path to Keras model (.h5)
+        output_path (str): Output path for TFLite model (optional)
+        quantization (str): Quantization method ('float16', 'int8', 'dynamic', None)
+        representative_data (numpy.ndarray): Sample inputs used to calibrate
+            int8 activations (optional; without it int8 only quantizes weights)
+        sparse (bool): Store pruned weights in TFLite's sparse format
+
+    Returns:
+        str: Path to saved TFLite model
+    """
+    print(f"\nConverting model to TensorFlow Lite...")
+    print(f"Input: {model_path}")
+    print(f"Quantization: {quantization}")
+
+    # Load model
+    model = keras.models.load_model(model_path)
+
+    # Create converter
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+
+    # Set optimization
+    if quantization:
+        if quantization == 'float16':
+            converter.optimizations = [tf.lite.Optimize.DEFAULT]
+            converter.target_spec.supported_types = [tf.float16]
+        elif quantization == 'int8':
+            converter.optimizations = [tf.lite.Optimize.DEFAULT]
+            # Full int8 quantization needs a representative dataset
+            if representative_data is not None:
+                converter.representative_dataset = lambda: (
+                    [sample[np.newaxis].astype(np.float32)] for sample in representative_data
+                )
+        elif quantization == 'dynamic':
+            converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+    # Pruned models: encode zero weights sparsely (smaller file, sparse kernels)
+    if sparse:
+        converter.optimizations = list(converter.optimizations) + \
+            [tf.lite.Optimize.EXPERIMENTAL_SPARSITY]
+
+    # Convert model
+    tflite_model = converter.convert()
+
+    # Save model
+    if output_path is None:
+        model_path_obj = Path(model_path)
+        output_path = model_path_obj.parent / f"{model_path_obj.stem}.tflite"
+
+    with open(output_path, 'wb') as f:
+        f.write(tflite_model)
+
+    # The TFLite model shares the Keras model's resolution and labels
+    from ml.utils import model_metadata_path
+    metadata_path = model_metadata_path(model_path)
+    output_metadata_path = model_metadata_path(output_path)
+    if metadata_path.exists() and metadata_path != output_metadata_path:
+        shutil.copyfile(metadata_path, output_metadata_path)
+
+    # Get model sizes
+    original_size = os.path.getsize(model_path) / (1024 * 1024)  # MB
+    tflite_size = os.path.getsize(output_path) / (1024 * 1024)  # MB
+
+    print(f"\n✓ TFLite conversion completed")
+    print(f"  Original model size: {original_size:.2f} MB")
+    print(f"  TFLite model size: {tflite_size:.2f} MB")
+    print(f"  Size reduction: {(1 - tflite_size/original_size)*100:.1f}%")
+    print(f"  Saved to: {output_path}")
+
+    return str(output_path)
+
+
+def count_model_parameters(model):
+    """
+    Count trainable and non-trainable parameters in model.
+
+    Args:
+        model: Keras model
+
+    Returns:
+        dict: Dictionary with parameter counts
+    """
+    trainable_count = sum([tf.size(w).numpy() for w in model.trainable_weights])
+    non_trainable_count = sum([tf.size(w).numpy() for w in model.non_trainable_weights])
+
+    return {
+        'trainable': trainable_count,
+        'non_trainable': non_trainable_count,
+        'total': trainable_count + non_trainable_count
+    }
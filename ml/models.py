@@ -73,16 +73,46 @@ def create_baseline_cnn(input_shape=(224, 224, 3), num_classes=13):
         layers.BatchNormalization(),
         layers.Dropout(0.5),
 
-        # Output layer
-        layers.Dense(num_classes, activation='softmax')
+        # Output layer (float32 keeps softmax stable under mixed precision)
+        layers.Dense(num_classes, activation='softmax', dtype='float32')
     ], name='baseline_cnn')
 
     return model
 
 
+def add_classification_head(x, num_classes=13):
+    """
+    Add the shared transfer-learning classification head.
+
+    The head operates on pooled backbone features, so the same layers can be
+    trained standalone on cached features (see create_feature_head_model)
+    and copied into the full model afterwards.
+
+    Args:
+        x (tf.Tensor): Pooled feature tensor
+        num_classes (int): Number of output classes
+
+    Returns:
+        tf.Tensor: Class probabilities
+    """
+    x = layers.BatchNormalization()(x)
+    x = layers.Dropout(0.5)(x)
+
+    x = layers.Dense(512, activation='relu')(x)
+    x = layers.BatchNormalization()(x)
+    x = layers.Dropout(0.5)(x)
+
+    x = layers.Dense(256, activation='relu')(x)
+    x = layers.BatchNormalization()(x)
+    x = layers.Dropout(0.3)(x)
+
+    # Output layer (float32 keeps softmax stable under mixed precision)
+    return layers.Dense(num_classes, activation='softmax', dtype='float32')(x)
+
+
 def create_mobilenetv2_model(input_shape=(224, 224, 3), num_classes=13,
                               use_pretrained=True, freeze_base=True,
-                              fine_tune_layers=20):
+                              fine_tune_layers=20, alpha=1.0):
     """
     Create a MobileNetV2-based model with transfer learning.
 
@@ -95,6 +125,8 @@ def create_mobilenetv2_model(input_shape=(224, 224, 3), num_classes=13,
         use_pretrained (bool): Use ImageNet pretrained weights
         freeze_base (bool): Freeze base model layers initially
         fine_tune_layers (int): Number of layers to unfreeze for fine-tuning
+        alpha (float): Width multiplier (e.g. 0.35 or 0.5 for a compact
+            student; ImageNet weights exist for 0.35, 0.5, 0.75, 1.0, 1.3, 1.4)
 
     Returns:
         keras.Model: MobileNetV2-based model
@@ -104,6 +136,7 @@ def create_mobilenetv2_model(input_shape=(224, 224, 3), num_classes=13,
 
     base_model = MobileNetV2(
         input_shape=input_shape,
+        alpha=alpha,
         include_top=False,
         weights=weights
     )
@@ -128,19 +161,7 @@ def create_mobilenetv2_model(input_shape=(224, 224, 3), num_classes=13,
 
     # Classification head
     x = layers.GlobalAveragePooling2D()(x)
-    x = layers.BatchNormalization()(x)
-    x = layers.Dropout(0.5)(x)
-
-    x = layers.Dense(512, activation='relu')(x)
-    x = layers.BatchNormalization()(x)
-    x = layers.Dropout(0.5)(x)
-
-    x = layers.Dense(256, activation='relu')(x)
-    x = layers.BatchNormalization()(x)
-    x = layers.Dropout(0.3)(x)
-
-    # Output layer
-    outputs = layers.Dense(num_classes, activation='softmax')(x)
+    outputs = add_classification_head(x, num_classes)
 
     model = keras.Model(inputs, outputs, name='mobilenetv2_plant_disease')
 
@@ -194,23 +215,65 @@ def create_efficientnetb0_model(input_shape=(224, 224, 3), num_classes=13,
 
     # Classification head
     x = layers.GlobalAveragePooling2D()(x)
-    x = layers.BatchNormalization()(x)
-    x = layers.Dropout(0.5)(x)
+    outputs = add_classification_head(x, num_classes)
 
-    x = layers.Dense(512, activation='relu')(x)
-    x = layers.BatchNormalization()(x)
-    x = layers.Dropout(0.5)(x)
+    model = keras.Model(inputs, outputs, name='efficientnetb0_plant_disease')
 
-    x = layers.Dense(256, activation='relu')(x)
-    x = layers.BatchNormalization()(x)
-    x = layers.Dropout(0.3)(x)
+    return model
 
-    # Output layer
-    outputs = layers.Dense(num_classes, activation='softmax')(x)
 
-    model = keras.Model(inputs, outputs, name='efficientnetb0_plant_disease')
+def create_feature_head_model(feature_dim, num_classes=13):
+    """
+    Create the classification head as a standalone model on pooled features.
 
-    return model
+    Args:
+        feature_dim (int): Size of the pooled backbone feature vector
+        num_classes (int): Number of output classes
+
+    Returns:
+        keras.Model: Head model taking (batch, feature_dim) inputs
+    """
+    inputs = keras.Input(shape=(feature_dim,))
+    outputs = add_classification_head(inputs, num_classes)
+    return keras.Model(inputs, outputs, name='classification_head')
+
+
+def get_backbone(model):
+    """
+    Get the pretrained backbone nested inside a transfer-learning model.
+
+    Args:
+        model (keras.Model): Model built by create_mobilenetv2_model or
+            create_efficientnetb0_model
+
+    Returns:
+        keras.Model: Backbone model, or None for models without one
+    """
+    for layer in model.layers:
+        if isinstance(layer, keras.Model):
+            return layer
+    return None
+
+
+def transfer_head_weights(head_model, model):
+    """
+    Copy weights from a standalone head into a full transfer-learning model.
+
+    Args:
+        head_model (keras.Model): Model built by create_feature_head_model
+        model (keras.Model): Full model with the same head architecture
+    """
+    backbone = get_backbone(model)
+    head_index = model.layers.index(backbone) + 1
+
+    source_layers = [layer for layer in head_model.layers if layer.weights]
+    target_layers = [layer for layer in model.layers[head_index:] if layer.weights]
+
+    if len(source_layers) != len(target_layers):
+        raise ValueError("Head architecture does not match the full model")
+
+    for source, target in zip(source_layers, target_layers):
+        target.set_weights(source.get_weights())
 
 
 def get_model(architecture='MobileNetV2', **kwargs):
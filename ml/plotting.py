@@ -0,0 +1,145 @@
+"""
+Plotting Utilities for Plant Disease Classification
+Author: Peter Maina (136532)
+Project: AI-Based Tomato & Potato Disease Classification
+
+This module contains the matplotlib/seaborn helpers of the ML pipeline.
+Import them from ml.utils; they are loaded on first use.
+"""
+
+import numpy as np
+import matplotlib.pyplot as plt
+import seaborn as sns
+
+
+def plot_training_history(history_dict, save_path=None):
+    """
+    Plot training history.
+
+    Args:
+        history_dict (dict): Training history dictionary
+        save_path (str): Path to save plot (optional)
+    """
+    fig, axes = plt.subplots(2, 2, figsize=(15, 10))
+    fig.suptitle('Training History', fontsize=16)
+
+    # Plot accuracy
+    if 'accuracy' in history_dict and 'val_accuracy' in history_dict:
+        axes[0, 0].plot(history_dict['accuracy'], label='Train Accuracy')
+        axes[0, 0].plot(history_dict['val_accuracy'], label='Val Accuracy')
+        axes[0, 0].set_title('Model Accuracy')
+        axes[0, 0].set_xlabel('Epoch')
+        axes[0, 0].set_ylabel('Accuracy')
+        axes[0, 0].legend()
+        axes[0, 0].grid(True)
+
+    # Plot loss
+    if 'loss' in history_dict and 'val_loss' in history_dict:
+        axes[0, 1].plot(history_dict['loss'], label='Train Loss')
+        axes[0, 1].plot(history_dict['val_loss'], label='Val Loss')
+        axes[0, 1].set_title('Model Loss')
+        axes[0, 1].set_xlabel('Epoch')
+        axes[0, 1].set_ylabel('Loss')
+        axes[0, 1].legend()
+        axes[0, 1].grid(True)
+
+    # Plot precision
+    if 'precision' in history_dict and 'val_precision' in history_dict:
+        axes[1, 0].plot(history_dict['precision'], label='Train Precision')
+        axes[1, 0].plot(history_dict['val_precision'], label='Val Precision')
+        axes[1, 0].set_title('Model Precision')
+        axes[1, 0].set_xlabel('Epoch')
+        axes[1, 0].set_ylabel('Precision')
+        axes[1, 0].legend()
+        axes[1, 0].grid(True)
+
+    # Plot recall
+    if 'recall' in history_dict and 'val_recall' in history_dict:
+        axes[1, 1].plot(history_dict['recall'], label='Train Recall')
+        axes[1, 1].plot(history_dict['val_recall'], label='Val Recall')
+        axes[1, 1].set_title('Model Recall')
+        axes[1, 1].set_xlabel('Epoch')
+        axes[1, 1].set_ylabel('Recall')
+        axes[1, 1].legend()
+        axes[1, 1].grid(True)
+
+    plt.tight_layout()
+
+    if save_path:
+        plt.savefig(save_path, dpi=300, bbox_inches='tight')
+        print(f"✓ Training history plot saved to: {save_path}")
+
+    plt.show()
+
+
+def plot_confusion_matrix(cm, class_names, save_path=None):
+    """
+    Plot confusion matrix.
+
+    Args:
+        cm (numpy.ndarray): Confusion matrix
+        class_names (list): List of class names
+        save_path (str): Path to save plot (optional)
+    """
+    plt.figure(figsize=(15, 12))
+
+    # Normalize confusion matrix
+    cm_normalized = cm.astype('float') / cm.sum(axis=1)[:, np.newaxis]
+
+    # Plot
+    sns.heatmap(
+        cm_normalized,
+        annot=True,
+        fmt='.2f',
+        cmap='Blues',
+        xticklabels=class_names,
+        yticklabels=class_names,
+        cbar_kws={'label': 'Percentage'}
+    )
+
+    plt.title('Confusion Matrix (Normalized)', fontsize=16, pad=20)
+    plt.ylabel('True Label', fontsize=12)
+    plt.xlabel('Predicted Label', fontsize=12)
+    plt.xticks(rotation=45, ha='right')
+    plt.yticks(rotation=0)
+    plt.tight_layout()
+
+    if save_path:
+        plt.savefig(save_path, dpi=300, bbox_inches='tight')
+        print(f"✓ Confusion matrix saved to: {save_path}")
+
+    plt.show()
+
+
+def visualize_prediction(image_path, predicted_class, confidence, top_k=5):
+    """
+    Visualize prediction results.
+
+    Args:
+        image_path (str): Path to image file
+        predicted_class (str): Predicted class name
+        confidence (float): Prediction confidence
+        top_k (int): Number of top predictions to show
+    """
+    from PIL import Image
+
+    # Load image
+    img = Image.open(image_path)
+
+    # Create figure
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 5))
+
+    # Display image
+    ax1.imshow(img)
+    ax1.axis('off')
+    ax1.set_title(f'Predicted: {predicted_class}\nConfidence: {confidence*100:.2f}%',
+                  fontsize=12, fontweight='bold')
+
+    # Display top predictions (if available)
+    # This would require all_predictions to be passed
+    ax2.text(0.5, 0.5, f'{predicted_class}\n{confidence*100:.2f}%',
+             ha='center', va='center', fontsize=16, fontweight='bold')
+    ax2.axis('off')
+
+    plt.tight_layout()
+    plt.show()
@@ -0,0 +1,348 @@
+"""
+Pruning Script for Plant Disease Classification
+Author: Peter Maina (136532)
+Project: AI-Based Tomato & Potato Disease Classification
+
+This script is an optimisation stage after ml/training.py. It:
+1. Applies magnitude pruning or 2:4 structured sparsity to a trained model
+2. Fine-tunes briefly so accuracy recovers
+3. Strips the pruning wrappers and exports a sparse TFLite model
+4. Reports sparsity, size, CPU latency and accuracy against the unpruned model
+
+Requires the optional tensorflow-model-optimization package.
+"""
+
+import sys
+import argparse
+import gzip
+import json
+from pathlib import Path
+import numpy as np
+from tensorflow import keras
+from tensorflow.keras import layers
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from ml.training import load_config, create_data_generators, compile_model
+from ml.utils import convert_to_tflite, get_class_names, get_model_size_mb, model_name_from_path
+from ml.benchmark import TFLiteRunner, list_test_images, load_images, measure_latency, measure_accuracy
+
+
+def import_tfmot():
+    """Import tensorflow_model_optimization with an install hint."""
+    try:
+        import tensorflow_model_optimization as tfmot
+    except ImportError as e:
+        raise ImportError(
+            "Pruning requires tensorflow-model-optimization: "
+            "pip install tensorflow-model-optimization"
+        ) from e
+    return tfmot
+
+
+def iter_layers(model):
+    """Yield every layer of a model, descending into nested models (backbones)."""
+    for layer in model.layers:
+        if isinstance(layer, keras.Model):
+            yield from iter_layers(layer)
+        else:
+            yield layer
+
+
+def is_prunable(layer, method, output_layer_name=None):
+    """
+    Check whether a layer's kernel should be pruned.
+
+    Only regular and pointwise convolutions and dense layers are pruned;
+    depthwise convolutions hold few weights and lose accuracy quickly.
+    2:4 sparsity groups weights along the input channels, so those must be
+    a multiple of 4 (which excludes the RGB stem convolution).
+
+    Args:
+        layer (keras.layers.Layer): Layer to check
+        method (str): 'magnitude' or 'structured'
+        output_layer_name (str): Name of a layer to leave dense (optional)
+
+    Returns:
+        bool: True if the layer should be pruned
+    """
+    if not isinstance(layer, (layers.Conv2D, layers.Dense)):
+        return False
+    if isinstance(layer, layers.DepthwiseConv2D) or layer.name == output_layer_name:
+        return False
+    if method == 'structured':
+        # Conv2D kernels are (h, w, in, out), Dense kernels are (in, out)
+        return int(layer.kernel.shape[-2]) % 4 == 0
+    return True
+
+
+def apply_pruning(model, method, target_sparsity, total_steps, prune_output_layer=False):
+    """
+    Wrap prunable layers of a model (including the backbone) for pruning.
+
+    Args:
+        model (keras.Model): Trained model
+        method (str): 'magnitude' (unstructured, ramped up during fine-tuning)
+            or 'structured' (2 of every 4 weights zero from the start)
+        target_sparsity (float): Final sparsity for magnitude pruning
+        total_steps (int): Fine-tuning steps
+        prune_output_layer (bool): Also prune the softmax layer
+
+    Returns:
+        keras.Model: Model with pruning wrappers
+    """
+    tfmot = import_tfmot()
+    sparsity = tfmot.sparsity.keras
+
+    if method == 'structured':
+        params = {
+            'pruning_schedule': sparsity.ConstantSparsity(0.5, begin_step=0, frequency=100),
+            'sparsity_m_by_n': (2, 4)
+        }
+    elif method == 'magnitude':
+        end_step = max(1, int(total_steps * 0.8))
+        params = {
+            'pruning_schedule': sparsity.PolynomialDecay(
+                initial_sparsity=0.0,
+                final_sparsity=target_sparsity,
+                begin_step=0,
+                end_step=end_step,
+                frequency=max(1, min(100, end_step // 10))
+            )
+        }
+    else:
+        raise ValueError(f"Unknown pruning method: {method}")
+
+    output_layer_name = None if prune_output_layer else model.layers[-1].name
+
+    def clone_function(layer):
+        # Returning the original layer (or a wrapper around it) keeps its weights
+        if isinstance(layer, keras.Model):
+            return keras.models.clone_model(layer, clone_function=clone_function)
+        if is_prunable(layer, method, output_layer_name):
+            return sparsity.prune_low_magnitude(layer, **params)
+        return layer
+
+    return keras.models.clone_model(model, clone_function=clone_function)
+
+
+def compute_sparsity(model, method, prune_output_layer=False):
+    """
+    Measure the fraction of zero weights in pruned kernels.
+
+    Args:
+        model (keras.Model): Stripped model
+        method (str): Pruning method used
+        prune_output_layer (bool): Whether the softmax layer was pruned
+
+    Returns:
+        dict: Zero fraction of pruned kernels and of all weights
+    """
+    output_layer_name = None if prune_output_layer else model.layers[-1].name
+
+    pruned_zeros = pruned_total = 0
+    for layer in iter_layers(model):
+        if is_prunable(layer, method, output_layer_name):
+            kernel = layer.kernel.numpy()
+            pruned_zeros += int(np.sum(kernel == 0))
+            pruned_total += kernel.size
+
+    all_zeros = sum(int(np.sum(w == 0)) for w in model.get_weights())
+    all_total = sum(w.size for w in model.get_weights())
+
+    return {
+        'pruned_kernels': pruned_zeros / pruned_total if pruned_total else 0.0,
+        'all_weights': all_zeros / all_total if all_total else 0.0
+    }
+
+
+def gzipped_size_mb(path):
+    """Compressed file size in MB (zero weights compress away)."""
+    with open(path, 'rb') as f:
+        return len(gzip.compress(f.read())) / (1024 * 1024)
+
+
+def evaluate_tflite(tflite_path, samples, latency_images, threads):
+    """
+    Measure CPU latency and accuracy of a TFLite model.
+
+    Args:
+        tflite_path (Path): TFLite model
+        samples (list): Labelled (image_path, class_index) test samples
+        latency_images (numpy.ndarray): Images for latency timing
+        threads (int): Interpreter threads
+
+    Returns:
+        dict: Latency percentiles and accuracy
+    """
+    runner = TFLiteRunner(tflite_path, threads)
+    runner.load()
+    return {
+        'latency_ms': measure_latency(runner, latency_images),
+        'accuracy': measure_accuracy(runner, samples)
+    }
+
+
+def main():
+    """Main pruning function."""
+    parser = argparse.ArgumentParser(description="Prune Plant Disease Classification Models")
+    parser.add_argument(
+        '--model',
+        type=str,
+        required=True,
+        help='Path to trained Keras model (.h5)'
+    )
+    parser.add_argument(
+        '--method',
+        type=str,
+        default=None,
+        choices=['magnitude', 'structured'],
+        help='Pruning method (default from config)'
+    )
+    parser.add_argument(
+        '--target-sparsity',
+        type=float,
+        default=None,
+        help='Final sparsity for magnitude pruning (default from config)'
+    )
+    parser.add_argument(
+        '--epochs',
+        type=int,
+        default=None,
+        help='Fine-tuning epochs (default from config)'
+    )
+    parser.add_argument(
+        '--quantization',
+        type=str,
+        default=None,
+        choices=['float16', 'dynamic'],
+        help='Quantization applied to both exported TFLite models'
+    )
+    parser.add_argument(
+        '--threads',
+        type=int,
+        default=1,
+        help='TFLite threads for latency measurement'
+    )
+    parser.add_argument(
+        '--eval-samples',
+        type=int,
+        default=None,
+        help='Test images used for accuracy (default: whole test set)'
+    )
+
+    args = parser.parse_args()
+
+    config = load_config()
+    prune_config = config['pruning']
+    method = args.method or prune_config['method']
+    target_sparsity = args.target_sparsity or prune_config['target_sparsity']
+    epochs = args.epochs if args.epochs is not None else prune_config['fine_tune_epochs']
+    prune_output_layer = prune_config.get('prune_output_layer', False)
+
+    model_path = Path(args.model)
+    output_dir = project_root / prune_config['output_dir']
+    output_dir.mkdir(parents=True, exist_ok=True)
+    name = f"{model_name_from_path(model_path)}_pruned_{method}"
+
+    print(f"\n{'='*60}")
+    print("Model Pruning")
+    print(f"{'='*60}")
+    print(f"Model: {model_path}")
+    print(f"Method: {method}")
+    print(f"Target Sparsity: {0.5 if method == 'structured' else target_sparsity}")
+    print(f"Fine-tuning Epochs: {epochs}")
+    print(f"{'='*60}\n")
+
+    tfmot = import_tfmot()
+
+    # Data at the model's own input resolution
+    model = keras.models.load_model(str(model_path), compile=False)
+    config['model']['input_shape'] = [int(dim) for dim in model.input_shape[1:]]
+    train_gen, val_gen, _ = create_data_generators(config)
+    total_steps = max(1, epochs * len(train_gen))
+
+    # Prune and fine-tune the whole network at a low learning rate
+    model.trainable = True
+    pruned_model = apply_pruning(model, method, target_sparsity, total_steps, prune_output_layer)
+
+    fine_tune_config = dict(config)
+    fine_tune_config['training'] = dict(config['training'], learning_rate=prune_config['learning_rate'])
+    fine_tune_config['performance'] = dict(config.get('performance', {}), jit_compile=False)
+    compile_model(pruned_model, fine_tune_config)
+
+    pruned_model.fit(
+        train_gen,
+        epochs=max(1, epochs),
+        validation_data=val_gen,
+        callbacks=[tfmot.sparsity.keras.UpdatePruningStep()],
+        verbose=1
+    )
+
+    # Strip wrappers so the exported graph is a plain Keras model
+    stripped_model = tfmot.sparsity.keras.strip_pruning(pruned_model)
+    sparsity = compute_sparsity(stripped_model, method, prune_output_layer)
+
+    pruned_h5 = output_dir / f"{name}.h5"
+    stripped_model.save(str(pruned_h5), include_optimizer=False)
+    print(f"✓ Pruned model saved to: {pruned_h5}")
+
+    # Export both models with the same settings for a fair comparison
+    baseline_tflite = output_dir / f"{model_name_from_path(model_path)}.tflite"
+    pruned_tflite = output_dir / f"{name}.tflite"
+    convert_to_tflite(str(model_path), str(baseline_tflite), quantization=args.quantization)
+    convert_to_tflite(str(pruned_h5), str(pruned_tflite), quantization=args.quantization, sparse=True)
+
+    # CPU latency and accuracy
+    samples = list_test_images(
+        project_root / config['paths']['test_dir'],
+        get_class_names(),
+        limit=args.eval_samples,
+        seed=config['random_seed']
+    )
+    if not samples:
+        raise FileNotFoundError(f"No test images found in {config['paths']['test_dir']}")
+    latency_images = load_images([path for path, _ in samples[:16]],
+                                 tuple(config['model']['input_shape']))
+
+    report = {'model': str(model_path), 'method': method, 'threads': args.threads,
+              'quantization': args.quantization, 'eval_samples': len(samples)}
+
+    for variant, h5_path, tflite_path, variant_sparsity in [
+        ('unpruned', model_path, baseline_tflite, None),
+        ('pruned', pruned_h5, pruned_tflite, sparsity)
+    ]:
+        print(f"\nBenchmarking {variant} model...")
+        report[variant] = dict(
+            evaluate_tflite(tflite_path, samples, latency_images, args.threads),
+            sparsity=variant_sparsity,
+            h5_size_mb=get_model_size_mb(h5_path),
+            tflite_size_mb=get_model_size_mb(tflite_path),
+            tflite_gzip_mb=gzipped_size_mb(tflite_path)
+        )
+
+    # Summary
+    print(f"\n{'='*60}")
+    print("Pruning Results")
+    print(f"{'='*60}")
+    print(f"Kernel Sparsity: {sparsity['pruned_kernels']*100:.1f}% "
+          f"(all weights: {sparsity['all_weights']*100:.1f}%)")
+    print(f"{'':<10} {'TFLite MB':>10} {'gzip MB':>8} {'p50 ms':>8} {'p95 ms':>8} {'Accuracy':>9}")
+    for variant in ['unpruned', 'pruned']:
+        r = report[variant]
+        print(f"{variant:<10} {r['tflite_size_mb']:>10.2f} {r['tflite_gzip_mb']:>8.2f} "
+              f"{r['latency_ms']['p50']:>8.2f} {r['latency_ms']['p95']:>8.2f} "
+              f"{r['accuracy']*100:>8.2f}%")
+    print(f"{'='*60}\n")
+
+    report_path = output_dir / f"{name}_report.json"
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=4)
+
+    print(f"✓ Pruning report saved to: {report_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Input Resolution Sweep for Plant Disease Classification
+Author: Peter Maina (136532)
+Project: AI-Based Tomato & Potato Disease Classification
+
+This script compares one architecture at several input resolutions
+(e.g. 128/160/192/224). For each resolution it trains a model (or uses an
+existing one), exports it to TFLite and measures:
+1. Test accuracy
+2. Single-image CPU latency (p50/p95)
+3. TFLite model size
+
+It then suggests the operating point: the most accurate resolution that
+fits the latency budget.
+"""
+
+import os
+import sys
+import argparse
+import json
+import subprocess
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from ml.utils import (
+    load_ml_config, get_class_names, load_model_metadata, get_model_size_mb, model_name_from_path
+)
+from ml.benchmark import TFLiteRunner, list_test_images, load_images, measure_latency, measure_accuracy
+
+
+def train_at_resolution(architecture, resolution, epochs, log_dir):
+    """
+    Train a model at one resolution with ml/training.py.
+
+    Args:
+        architecture (str): Model architecture
+        resolution (int): Square input resolution
+        epochs (int): Training epochs (optional)
+        log_dir (Path): Directory for the training log
+
+    Returns:
+        Path: The trained model (model.h5 in the bundle)
+    """
+    config = load_ml_config()
+    save_dir = project_root / config['paths']['model_save_dir']
+    started = time.time()
+
+    command = [
+        sys.executable, str(project_root / "ml" / "training.py"),
+        '--architecture', architecture,
+        '--image-size', str(resolution)
+    ]
+    if epochs:
+        command += ['--epochs', str(epochs)]
+
+    log_path = log_dir / f"train_{resolution}.log"
+    with open(log_path, 'w') as log_file:
+        result = subprocess.run(command, stdout=log_file, stderr=subprocess.STDOUT)
+    if result.returncode != 0:
+        raise RuntimeError(f"Training at {resolution}px failed, see {log_path}")
+
+    # The newest final model written by this run
+    candidates = [
+        path for path in save_dir.glob(f"{architecture}_*_final/model.h5")
+        if path.stat().st_mtime >= started
+    ]
+    if not candidates:
+        raise FileNotFoundError(f"No model written to {save_dir} by the {resolution}px run")
+    return max(candidates, key=lambda path: path.stat().st_mtime)
+
+
+def model_resolution(model_path):
+    """Input resolution recorded in a model's metadata file."""
+    metadata = load_model_metadata(model_path)
+    if metadata is None:
+        raise FileNotFoundError(f"No metadata file for {model_path}; "
+                                f"re-save the model with ml/training.py")
+    return int(metadata['image_size'])
+
+
+def evaluate_resolution(model_path, output_dir, samples, threads, quantization):
+    """
+    Export a model to TFLite and measure accuracy, latency and size.
+
+    Args:
+        model_path (Path): Trained Keras model
+        output_dir (Path): Directory for the TFLite export
+        samples (list): Labelled (image_path, class_index) test samples
+        threads (int): TFLite threads
+        quantization (str): TFLite quantization (None for float32)
+
+    Returns:
+        dict: Measurements
+    """
+    from ml.utils import convert_to_tflite
+
+    tflite_path = output_dir / f"{model_name_from_path(model_path)}.tflite"
+    convert_to_tflite(str(model_path), str(tflite_path), quantization=quantization)
+
+    runner = TFLiteRunner(tflite_path, threads)
+    runner.load()
+    latency_images = load_images([path for path, _ in samples[:16]], runner.input_shape)
+
+    return {
+        'model': str(model_path),
+        'resolution': int(runner.input_shape[0]),
+        'accuracy': measure_accuracy(runner, samples),
+        'latency_ms': measure_latency(runner, latency_images),
+        'tflite_size_mb': get_model_size_mb(tflite_path)
+    }
+
+
+def choose_operating_point(results, latency_budget_ms=None):
+    """
+    Pick the most accurate resolution within the latency budget.
+
+    Args:
+        results (list): Measurements per resolution
+        latency_budget_ms (float): p50 latency budget (optional)
+
+    Returns:
+        dict: Chosen result, or None if nothing fits the budget
+    """
+    candidates = results
+    if latency_budget_ms:
+        candidates = [r for r in results if r['latency_ms']['p50'] <= latency_budget_ms]
+    if not candidates:
+        return None
+    # Prefer the faster model when accuracy ties
+    return max(candidates, key=lambda r: (r['accuracy'], -r['latency_ms']['p50']))
+
+
+def main():
+    """Main sweep function."""
+    parser = argparse.ArgumentParser(description="Sweep input resolution vs accuracy and CPU latency")
+    parser.add_argument(
+        '--resolutions',
+        type=int,
+        nargs='+',
+        default=[128, 160, 192, 224],
+        help='Square input resolutions to train and compare'
+    )
+    parser.add_argument(
+        '--models',
+        type=str,
+        nargs='+',
+        default=None,
+        help='Compare existing models instead of training (resolution read from metadata)'
+    )
+    parser.add_argument(
+        '--architecture',
+        type=str,
+        default=None,
+        help='Model architecture to train (default from config)'
+    )
+    parser.add_argument(
+        '--epochs',
+        type=int,
+        default=None,
+        help='Training epochs per resolution (default from config)'
+    )
+    parser.add_argument(
+        '--threads',
+        type=int,
+        default=1,
+        help='TFLite threads for latency measurement'
+    )
+    parser.add_argument(
+        '--quantization',
+        type=str,
+        default=None,
+        choices=['float16', 'dynamic', 'int8'],
+        help='TFLite quantization (default: float32)'
+    )
+    parser.add_argument(
+        '--eval-samples',
+        type=int,
+        default=None,
+        help='Test images used for accuracy (default: whole test set)'
+    )
+    parser.add_argument(
+        '--latency-budget-ms',
+        type=float,
+        default=None,
+        help='p50 latency budget used to pick the operating point'
+    )
+
+    args = parser.parse_args()
+
+    config = load_ml_config()
+    architecture = args.architecture or config['model']['architecture']
+    run_dir = project_root / "ml" / "logs" / \
+        f"resolution_sweep_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    run_dir.mkdir(parents=True, exist_ok=True)
+
+    print(f"\n{'='*60}")
+    print("Input Resolution Sweep")
+    print(f"{'='*60}")
+    if args.models:
+        print(f"Models: {len(args.models)}")
+    else:
+        print(f"Architecture: {architecture}")
+        print(f"Resolutions: {args.resolutions}")
+    print(f"TFLite Threads: {args.threads}")
+    print(f"CPU Cores: {os.cpu_count()}")
+    print(f"{'='*60}\n")
+
+    # One model per resolution
+    if args.models:
+        models = {model_resolution(path): Path(path) for path in args.models}
+    else:
+        models = {}
+        for resolution in args.resolutions:
+            print(f"Training {architecture} at {resolution}x{resolution}...")
+            models[resolution] = train_at_resolution(architecture, resolution, args.epochs, run_dir)
+            print(f"  ✓ {models[resolution]}")
+
+    samples = list_test_images(
+        project_root / config['paths']['test_dir'],
+        get_class_names(),
+        limit=args.eval_samples,
+        seed=config['random_seed']
+    )
+    if not samples:
+        raise FileNotFoundError(f"No test images found in {config['paths']['test_dir']}")
+
+    results = []
+    for resolution in sorted(models):
+        print(f"\nEvaluating {resolution}x{resolution}...")
+        results.append(evaluate_resolution(models[resolution], run_dir, samples,
+                                           args.threads, args.quantization))
+
+    chosen = choose_operating_point(results, args.latency_budget_ms)
+
+    # Summary
+    print(f"\n{'='*60}")
+    print("Resolution Sweep Results")
+    print(f"{'='*60}")
+    print(f"{'Resolution':>10} {'Accuracy':>9} {'p50 ms':>8} {'p95 ms':>8} {'TFLite MB':>10}")
+    for r in results:
+        marker = ' *' if r is chosen else ''
+        print(f"{r['resolution']:>10} {r['accuracy']*100:>8.2f}% {r['latency_ms']['p50']:>8.2f} "
+              f"{r['latency_ms']['p95']:>8.2f} {r['tflite_size_mb']:>10.2f}{marker}")
+    if chosen:
+        print(f"\nOperating point: {chosen['resolution']}x{chosen['resolution']} ({chosen['model']})")
+    else:
+        print(f"\nNo resolution meets the {args.latency_budget_ms} ms budget")
+    print(f"{'='*60}\n")
+
+    output_path = run_dir / "results.json"
+    with open(output_path, 'w') as f:
+        json.dump({
+            'architecture': architecture,
+            'threads': args.threads,
+            'quantization': args.quantization,
+            'eval_samples': len(samples),
+            'latency_budget_ms': args.latency_budget_ms,
+            'operating_point': chosen['resolution'] if chosen else None,
+            'results': results
+        }, f, indent=4)
+
+    print(f"✓ Sweep results saved to: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
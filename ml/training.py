@@ -9,31 +9,41 @@ This script handles the complete training pipeline.
 import os
 import sys
 import argparse
-import yaml
+import contextlib
+import shutil
+import tempfile
 from pathlib import Path
+import numpy as np
 import tensorflow as tf
 from tensorflow import keras
 from tensorflow.keras.preprocessing.image import ImageDataGenerator
 from tensorflow.keras.callbacks import (
-    ModelCheckpoint, EarlyStopping, ReduceLROnPlateau,
+    Callback, ModelCheckpoint, EarlyStopping, ReduceLROnPlateau,
     TensorBoard, CSVLogger
 )
 import json
+import time
 from datetime import datetime
 
 # Add project root to path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from ml.models import get_model, print_model_summary
+from ml.models import (
+    get_model, print_model_summary, get_backbone,
+    create_feature_head_model, transfer_head_weights
+)
+from ml.feature_cache import build_feature_extractor, extract_features, FeatureSequence
+from ml.distillation import (
+    compute_teacher_targets, DistillationSequence, DistillationLoss, hard_label_accuracy
+)
+from ml.config_registry import get_data_config, get_ml_config, thaw, invalidate, CLASS_INDICES_PATH
+from ml.utils import get_class_names, model_name_from_path
 
 
 def load_config():
-    """Load ML configuration from YAML file."""
-    config_path = project_root / "ml" / "config.yaml"
-    with open(config_path, 'r') as f:
-        config = yaml.safe_load(f)
-    return config
+    """Load ML configuration (a mutable copy of the cached config)."""
+    return thaw(get_ml_config())
 
 
 def setup_gpu(config):
@@ -54,11 +64,7 @@ def setup_gpu(config):
                     tf.config.experimental.set_memory_growth(gpu, True)
                 print("✓ GPU memory growth enabled")
 
-            # Enable mixed precision
-            if config['gpu']['mixed_precision']:
-                policy = tf.keras.mixed_precision.Policy('mixed_float16')
-                tf.keras.mixed_precision.set_global_policy(policy)
-                print("✓ Mixed precision training enabled")
+            # Mixed precision is applied by setup_performance()
 
         except RuntimeError as e:
             print(f"GPU setup error: {e}")
@@ -66,21 +72,362 @@ def setup_gpu(config):
         print("⚠ No GPU found, using CPU")
 
 
-def create_data_generators(config):
+def cpu_supports_bfloat16():
     """
-    Create data generators for training and validation.
+    Check whether the host CPU has native bfloat16 instructions.
+
+    Returns:
+        bool: True if AVX512-BF16 or AMX-BF16 is available
+    """
+    try:
+        with open('/proc/cpuinfo', 'r') as f:
+            cpuinfo = f.read()
+    except OSError:
+        return False
+
+    return 'avx512_bf16' in cpuinfo or 'amx_bf16' in cpuinfo
+
+
+def resolve_precision_policy(config):
+    """
+    Decide which Keras mixed precision policy to use.
 
     Args:
         config (dict): ML configuration
 
     Returns:
-        tuple: (train_generator, val_generator, test_generator)
+        str: Policy name ('mixed_float16', 'mixed_bfloat16' or 'float32')
     """
-    print("\nCreating data generators...")
+    requested = config.get('performance', {}).get('mixed_precision')
+    has_gpu = bool(tf.config.list_physical_devices('GPU')) and config['gpu']['use_gpu']
 
-    # Data augmentation for training
+    # Legacy switch: gpu.mixed_precision enables float16 on GPU hosts
+    if requested is None and has_gpu and config['gpu']['mixed_precision']:
+        requested = 'float16'
+
+    if requested is None:
+        return 'float32'
+
+    requested = str(requested).lower()
+
+    if requested == 'auto':
+        if has_gpu:
+            return 'mixed_float16'
+        return 'mixed_bfloat16' if cpu_supports_bfloat16() else 'float32'
+
+    if requested == 'float16':
+        if has_gpu:
+            return 'mixed_float16'
+        print("⚠ float16 mixed precision needs a GPU, using float32")
+        return 'float32'
+
+    if requested == 'bfloat16':
+        if has_gpu or cpu_supports_bfloat16():
+            return 'mixed_bfloat16'
+        print("⚠ CPU has no native bfloat16 support, using float32")
+        return 'float32'
+
+    raise ValueError(f"Unknown mixed_precision setting: {requested}. "
+                     f"Choose from: auto, bfloat16, float16, null")
+
+
+def setup_performance(config):
+    """
+    Configure thread pools and mixed precision for training.
+
+    Must run before any TensorFlow op executes, because thread pool sizes
+    cannot be changed once the runtime is initialized.
+
+    Args:
+        config (dict): ML configuration
+    """
+    perf_config = config.get('performance', {})
+
+    intra_op_threads = perf_config.get('intra_op_threads', 0)
+    inter_op_threads = perf_config.get('inter_op_threads', 0)
+
+    if intra_op_threads:
+        tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+    if inter_op_threads:
+        tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+
+    if intra_op_threads or inter_op_threads:
+        print(f"✓ Thread pools: intra-op={intra_op_threads or 'default'}, "
+              f"inter-op={inter_op_threads or 'default'}")
+
+    policy_name = resolve_precision_policy(config)
+    if policy_name != 'float32':
+        tf.keras.mixed_precision.set_global_policy(policy_name)
+        print(f"✓ Mixed precision policy: {policy_name}")
+
+    if perf_config.get('jit_compile'):
+        print("✓ XLA JIT compilation enabled")
+
+
+class ThroughputCallback(Callback):
+    """Report training throughput (images/sec) for every epoch."""
+
+    def __init__(self, num_samples, report_path=None):
+        """
+        Args:
+            num_samples (int): Training images per epoch
+            report_path (Path): JSON file to write per-epoch results (optional)
+        """
+        super().__init__()
+        self.num_samples = num_samples
+        self.report_path = report_path
+        self.epochs = []
+        self._epoch_start = None
+        self._train_end = None
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._epoch_start = time.perf_counter()
+        self._train_end = None
+
+    def on_test_begin(self, logs=None):
+        # Validation runs inside the epoch; exclude it from training throughput
+        if self._epoch_start is not None and self._train_end is None:
+            self._train_end = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        end = time.perf_counter()
+        train_time = (self._train_end or end) - self._epoch_start
+
+        record = {
+            'epoch': epoch + 1,
+            'train_seconds': train_time,
+            'epoch_seconds': end - self._epoch_start,
+            'images_per_second': self.num_samples / train_time if train_time > 0 else 0.0
+        }
+        self.epochs.append(record)
+
+        print(f"  Throughput: {record['images_per_second']:.1f} images/sec "
+              f"({record['train_seconds']:.1f}s train, {record['epoch_seconds']:.1f}s epoch)")
+
+    def on_train_end(self, logs=None):
+        if not self.epochs:
+            return
+
+        # First epoch includes tracing/XLA compilation, report it separately
+        steady = self.epochs[1:] or self.epochs
+        mean_throughput = sum(r['images_per_second'] for r in steady) / len(steady)
+        print(f"✓ Mean throughput: {mean_throughput:.1f} images/sec")
+
+        if self.report_path:
+            self.report_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.report_path, 'w') as f:
+                json.dump({
+                    'policy': tf.keras.mixed_precision.global_policy().name,
+                    'mean_images_per_second': mean_throughput,
+                    'epochs': self.epochs
+                }, f, indent=4)
+            print(f"✓ Throughput report saved to: {self.report_path}")
+
+
+def get_worker_task():
+    """
+    Get this process's task from the TF_CONFIG environment variable.
+
+    Returns:
+        tuple: (task_type, task_index, cluster) or (None, 0, {}) when unset
+    """
+    tf_config = json.loads(os.environ.get('TF_CONFIG', '{}'))
+    task = tf_config.get('task', {})
+    return task.get('type'), task.get('index', 0), tf_config.get('cluster', {})
+
+
+def is_chief():
+    """
+    Check whether this process is the chief worker.
+
+    The chief writes logs, reports and the final model. Without TF_CONFIG the
+    single local process is the chief.
+
+    Returns:
+        bool: True for the chief worker
+    """
+    task_type, task_index, cluster = get_worker_task()
+
+    if task_type is None or task_type == 'chief':
+        return True
+
+    return task_type == 'worker' and task_index == 0 and 'chief' not in cluster
+
+
+def create_strategy(config):
+    """
+    Create a tf.distribute strategy from the distributed configuration.
+
+    'mirrored' replicates across local GPUs, or across logical CPU devices
+    on CPU-only hosts. 'multi_worker' synchronises several processes (local
+    or remote) described by TF_CONFIG.
+
+    Must run before any TensorFlow op executes.
+
+    Args:
+        config (dict): ML configuration
+
+    Returns:
+        tf.distribute.Strategy: Strategy, or None for single-process training
+    """
+    dist_config = config.get('distributed', {})
+    mode = dist_config.get('strategy')
+
+    if not mode:
+        return None
+
+    mode = mode.lower()
+
+    if mode == 'mirrored':
+        gpus = tf.config.list_physical_devices('GPU')
+        if gpus and config['gpu']['use_gpu']:
+            strategy = tf.distribute.MirroredStrategy()
+        else:
+            # Split the host CPU into logical devices, one per replica
+            replicas = dist_config.get('cpu_replicas', 2)
+            cpus = tf.config.list_physical_devices('CPU')
+            tf.config.set_logical_device_configuration(
+                cpus[0], [tf.config.LogicalDeviceConfiguration()] * replicas
+            )
+            devices = [device.name for device in tf.config.list_logical_devices('CPU')]
+            strategy = tf.distribute.MirroredStrategy(
+                devices=devices,
+                cross_device_ops=tf.distribute.ReductionToOneDevice()
+            )
+
+    elif mode == 'multi_worker':
+        if 'TF_CONFIG' not in os.environ:
+            raise ValueError("multi_worker strategy requires the TF_CONFIG environment variable")
+
+        strategy = tf.distribute.MultiWorkerMirroredStrategy(
+            communication_options=tf.distribute.experimental.CommunicationOptions(
+                implementation=tf.distribute.experimental.CommunicationImplementation.RING
+            )
+        )
+
+    else:
+        raise ValueError(f"Unknown distributed strategy: {mode}. "
+                         f"Choose from: mirrored, multi_worker")
+
+    task_type, task_index, _ = get_worker_task()
+    print(f"✓ Distribution strategy: {type(strategy).__name__} "
+          f"({strategy.num_replicas_in_sync} replicas"
+          f"{f', task {task_type}:{task_index}' if task_type else ''})")
+
+    return strategy
+
+
+def create_augmentation_layers(config):
+    """
+    Build Keras preprocessing layers matching the ImageDataGenerator settings.
+
+    Used by the tf.data pipeline in distributed mode. Shear has no layer
+    equivalent and is skipped.
+
+    Args:
+        config (dict): ML configuration
+
+    Returns:
+        keras.Sequential: Augmentation model, or None if augmentation is off
+    """
+    aug_config = config['data_augmentation']
+    if not aug_config['enabled']:
+        return None
+
+    seed = config['random_seed']
+    fill_mode = aug_config['fill_mode']
+    augmentation = []
+
+    flip_modes = [mode for mode, enabled in (
+        ('horizontal', aug_config['horizontal_flip']),
+        ('vertical', aug_config['vertical_flip'])
+    ) if enabled]
+    if flip_modes:
+        augmentation.append(keras.layers.RandomFlip('_and_'.join(flip_modes), seed=seed))
+
+    if aug_config['rotation_range']:
+        augmentation.append(keras.layers.RandomRotation(
+            aug_config['rotation_range'] / 360.0, fill_mode=fill_mode, seed=seed))
+
+    if aug_config['width_shift_range'] or aug_config['height_shift_range']:
+        augmentation.append(keras.layers.RandomTranslation(
+            aug_config['height_shift_range'], aug_config['width_shift_range'],
+            fill_mode=fill_mode, seed=seed))
+
+    if aug_config['zoom_range']:
+        augmentation.append(keras.layers.RandomZoom(
+            aug_config['zoom_range'], fill_mode=fill_mode, seed=seed))
+
+    if aug_config.get('brightness_range'):
+        low, high = aug_config['brightness_range']
+        augmentation.append(keras.layers.RandomBrightness(
+            (low - 1.0, high - 1.0), value_range=(0.0, 1.0), seed=seed))
+
+    return keras.Sequential(augmentation, name='augmentation')
+
+
+def create_distributed_dataset(generator, config, global_batch_size, training=False):
+    """
+    Create a sharded tf.data input pipeline for distributed training.
+
+    Each input pipeline (one per worker) reads a disjoint shard of the files
+    listed by the directory generator, so no image is decoded twice per
+    epoch. Batches are sized per replica from the global batch size.
+
+    Args:
+        generator: Directory generator (used for file list and labels)
+        config (dict): ML configuration
+        global_batch_size (int): Batch size summed over all replicas
+        training (bool): Shuffle and augment
+
+    Returns:
+        tf.keras.utils.experimental.DatasetCreator: Dataset factory for model.fit
+    """
+    filepaths = list(generator.filepaths)
+    labels = [int(label) for label in generator.classes]
+    num_classes = generator.num_classes
+    img_height, img_width = config['model']['input_shape'][:2]
+    seed = config['random_seed']
+    augmentation = create_augmentation_layers(config) if training else None
+
+    def load_image(path, label):
+        image = tf.io.decode_image(tf.io.read_file(path), channels=3, expand_animations=False)
+        image = tf.image.resize(image, [img_height, img_width]) / 255.0
+        return image, tf.one_hot(label, num_classes)
+
+    def dataset_fn(input_context):
+        batch_size = input_context.get_per_replica_batch_size(global_batch_size)
+
+        dataset = tf.data.Dataset.from_tensor_slices((filepaths, labels))
+        dataset = dataset.shard(input_context.num_input_pipelines,
+                                input_context.input_pipeline_id)
+        if training:
+            dataset = dataset.shuffle(len(filepaths), seed=seed, reshuffle_each_iteration=True)
+
+        dataset = dataset.map(load_image, num_parallel_calls=tf.data.AUTOTUNE)
+        dataset = dataset.repeat().batch(batch_size, drop_remainder=True)
+
+        if augmentation is not None:
+            dataset = dataset.map(lambda x, y: (augmentation(x, training=True), y),
+                                  num_parallel_calls=tf.data.AUTOTUNE)
+
+        return dataset.prefetch(tf.data.AUTOTUNE)
+
+    return tf.keras.utils.experimental.DatasetCreator(dataset_fn)
+
+
+def create_train_datagen(config):
+    """
+    Create the training ImageDataGenerator (with augmentation if enabled).
+
+    Args:
+        config (dict): ML configuration
+
+    Returns:
+        ImageDataGenerator: Training data generator factory
+    """
     if config['data_augmentation']['enabled']:
-        train_datagen = ImageDataGenerator(
+        return ImageDataGenerator(
             rescale=1./255,
             rotation_range=config['data_augmentation']['rotation_range'],
             width_shift_range=config['data_augmentation']['width_shift_range'],
@@ -93,7 +440,323 @@ def create_data_generators(config):
             brightness_range=config['data_augmentation'].get('brightness_range')
         )
     else:
-        train_datagen = ImageDataGenerator(rescale=1./255)
+        return ImageDataGenerator(rescale=1./255)
+
+
+class ResumableCheckpoint(Callback):
+    """
+    Save full training state every epoch so an interrupted run can resume.
+
+    Model weights, optimizer slots (including the learning rate variable
+    changed by ReduceLROnPlateau) and the epoch counter are written with a
+    tf.train.CheckpointManager. EarlyStopping / ReduceLROnPlateau counters
+    and the training generator position are stored in a JSON sidecar next to
+    each checkpoint, together with the run settings that shape the model
+    (see resume_run_config). Place this callback last so the restored callback state
+    is applied after the other callbacks reset themselves in on_train_begin.
+    """
+
+    def __init__(self, run_dir, model_name, max_to_keep=3, async_save=True,
+                 train_generator=None, run_config=None):
+        """
+        Args:
+            run_dir (Path): Directory holding this run's checkpoints
+            model_name (str): Name of the model
+            max_to_keep (int): Number of checkpoints to keep
+            async_save (bool): Write checkpoints in a background thread
+            train_generator: Training generator whose position is saved
+            run_config (dict): Run settings to reapply on resume (optional)
+        """
+        super().__init__()
+        self.model_name = model_name
+        self.run_config = run_config
+        self.train_generator = train_generator
+        self.max_to_keep = max_to_keep
+        self.epoch = tf.Variable(0, trainable=False, dtype=tf.int64, name='epoch')
+        self.restored_state = None
+        self._manager = None
+        self._model = None
+        self._best_saved_epoch = None
+        self._callbacks = []
+
+        # Non-chief workers write to a private directory (required for
+        # collective saves under MultiWorkerMirroredStrategy)
+        task_type, task_index, _ = get_worker_task()
+        self.run_dir = Path(run_dir) if is_chief() else \
+            Path(run_dir) / "workers" / f"{task_type}_{task_index}"
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+
+        self.options = None
+        if async_save:
+            try:
+                self.options = tf.train.CheckpointOptions(experimental_enable_async_checkpoint=True)
+            except TypeError:
+                print("⚠ Async checkpointing not supported by this TensorFlow version")
+
+    def _get_manager(self, model):
+        if self._manager is None or self._model is not model:
+            checkpoint = tf.train.Checkpoint(model=model, optimizer=model.optimizer, epoch=self.epoch)
+            self._manager = tf.train.CheckpointManager(
+                checkpoint, str(self.run_dir), max_to_keep=self.max_to_keep
+            )
+            self._model = model
+        return self._manager
+
+    def _tracked_callbacks(self):
+        tracked = {}
+        for callback in self._callbacks:
+            if isinstance(callback, EarlyStopping):
+                tracked['early_stopping'] = callback
+            elif isinstance(callback, ReduceLROnPlateau):
+                tracked['lr_scheduler'] = callback
+        return tracked
+
+    def set_callbacks(self, callbacks):
+        """Register the callbacks whose counters are saved and restored."""
+        self._callbacks = [callback for callback in callbacks if callback is not self]
+
+    def restore(self, model):
+        """
+        Restore the latest checkpoint of this run into the model.
+
+        Args:
+            model (keras.Model): Compiled model with the same architecture
+
+        Returns:
+            int: Epoch to resume from (0 if there is no checkpoint)
+        """
+        manager = self._get_manager(model)
+        if manager.latest_checkpoint is None:
+            print(f"⚠ No checkpoint found in {self.run_dir}, starting from scratch")
+            return 0
+
+        # Create optimizer slots so they are restored immediately
+        if hasattr(model.optimizer, 'build'):
+            model.optimizer.build(model.trainable_variables)
+
+        manager.checkpoint.restore(manager.latest_checkpoint).expect_partial()
+
+        state_path = Path(f"{manager.latest_checkpoint}.state.json")
+        if state_path.exists():
+            with open(state_path, 'r') as f:
+                self.restored_state = json.load(f)
+
+        best_weights_path = self.run_dir / "early_stopping_best.npz"
+        if self.restored_state and best_weights_path.exists():
+            with np.load(best_weights_path) as data:
+                self.restored_state['best_weights'] = [data[f"arr_{i}"] for i in range(len(data.files))]
+
+        if self.restored_state and self.train_generator is not None:
+            self.train_generator.total_batches_seen = self.restored_state.get('total_batches_seen', 0)
+
+        initial_epoch = int(self.epoch.numpy())
+        print(f"✓ Resumed from {manager.latest_checkpoint} (epoch {initial_epoch})")
+        return initial_epoch
+
+    def on_train_begin(self, logs=None):
+        # Re-apply callback counters after the callbacks reset themselves
+        if not self.restored_state:
+            return
+
+        for key, callback in self._tracked_callbacks().items():
+            for attr, value in self.restored_state.get(key, {}).items():
+                setattr(callback, attr, value)
+            if key == 'early_stopping' and self.restored_state.get('best_weights') is not None:
+                callback.best_weights = self.restored_state['best_weights']
+
+        self.restored_state = None
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.epoch.assign(epoch + 1)
+        manager = self._get_manager(self.model)
+        save_path = manager.save(checkpoint_number=epoch + 1, options=self.options)
+
+        if not is_chief():
+            return
+
+        state = {
+            'model_name': self.model_name,
+            'run_config': self.run_config,
+            'epoch': epoch + 1,
+            'total_batches_seen': getattr(self.train_generator, 'total_batches_seen', 0)
+        }
+        for key, callback in self._tracked_callbacks().items():
+            attrs = ('wait', 'best', 'stopped_epoch', 'best_epoch') if key == 'early_stopping' \
+                else ('wait', 'best', 'cooldown_counter')
+            state[key] = {attr: float(getattr(callback, attr)) if attr == 'best'
+                          else int(getattr(callback, attr))
+                          for attr in attrs if hasattr(callback, attr)}
+
+            # Keep EarlyStopping's best weights so restore_best_weights survives a resume
+            best_epoch = getattr(callback, 'best_epoch', None)
+            if key == 'early_stopping' and callback.best_weights is not None \
+                    and best_epoch != self._best_saved_epoch:
+                np.savez(self.run_dir / "early_stopping_best.npz", *callback.best_weights)
+                self._best_saved_epoch = best_epoch
+
+        with open(f"{save_path}.state.json", 'w') as f:
+            json.dump(state, f, indent=4)
+
+        # Remove sidecars of checkpoints the manager rotated out
+        kept = set(manager.checkpoints)
+        for state_path in self.run_dir.glob("ckpt-*.state.json"):
+            if str(state_path)[:-len(".state.json")] not in kept:
+                state_path.unlink()
+
+    def on_train_end(self, logs=None):
+        # Wait for any in-flight async write before the process exits
+        if self._manager is not None:
+            self._manager.sync()
+
+
+def add_resumable_checkpoint(model, config, callbacks, model_name, resume_run_dir=None,
+                             train_generator=None):
+    """
+    Append a ResumableCheckpoint callback and restore state when resuming.
+
+    Args:
+        model (keras.Model): Compiled model
+        config (dict): ML configuration
+        callbacks (list): Training callbacks
+        model_name (str): Name of the model
+        resume_run_dir (Path): Run directory to resume from (optional)
+        train_generator: Training generator whose position is saved (optional)
+
+    Returns:
+        tuple: (callbacks, initial_epoch)
+    """
+    if not (config['resume']['enabled'] or resume_run_dir):
+        return callbacks, 0
+
+    run_dir = resume_run_dir or project_root / config['resume']['checkpoint_dir'] / model_name
+    resumable = ResumableCheckpoint(
+        run_dir,
+        model_name,
+        max_to_keep=config['resume'].get('max_to_keep', 3),
+        async_save=config['resume'].get('async_save', True),
+        train_generator=train_generator,
+        run_config=resume_run_config(config)
+    )
+    resumable.set_callbacks(callbacks)
+    print(f"✓ Resumable checkpoints enabled: {resumable.run_dir}")
+
+    initial_epoch = resumable.restore(model) if resume_run_dir else 0
+
+    # Must be last so restored callback counters survive on_train_begin
+    return callbacks + [resumable], initial_epoch
+
+
+def resume_run_config(config):
+    """
+    Settings of a run that a resume must repeat to rebuild the same model.
+
+    Args:
+        config (dict): ML configuration with the command-line overrides applied
+
+    Returns:
+        dict: Architecture, input shape, distillation and feature-cache settings
+    """
+    distillation = config['distillation']
+    return {
+        'architecture': config['model']['architecture'],
+        'input_shape': [int(dim) for dim in config['model']['input_shape']],
+        'teacher_model': str(distillation['teacher_model']) if distillation.get('teacher_model') else None,
+        'student': distillation.get('student'),
+        'student_alpha': distillation.get('student_alpha'),
+        'feature_cache': bool(config['feature_cache']['enabled'])
+    }
+
+
+def apply_resume_run_config(config, run_config, args):
+    """
+    Reapply the settings of an interrupted run before resuming it.
+
+    Options left off the command line are taken from the run; options given
+    must match it.
+
+    Args:
+        config (dict): ML configuration (updated in place)
+        run_config (dict): Settings saved with the run (see resume_run_config)
+        args (argparse.Namespace): Command-line arguments
+
+    Raises:
+        ValueError: If a command-line option contradicts the resumed run
+    """
+    distilled = bool(run_config['teacher_model'])
+    teacher = (project_root / run_config['teacher_model']).resolve() if distilled else None
+
+    # (command-line value or None, value of the run)
+    given = {
+        'architecture': (args.architecture if not distilled else None, run_config['architecture']),
+        'input_shape': ([args.image_size, args.image_size, 3] if args.image_size else None,
+                        run_config['input_shape']),
+        'teacher_model': ((project_root / args.distill).resolve() if args.distill else None, teacher),
+        'student': (args.student if distilled else None, run_config['student']),
+        'student_alpha': (args.student_alpha if distilled else None, run_config['student_alpha']),
+        'feature_cache': (True if args.cached_features else None, run_config['feature_cache'])
+    }
+    for key, (option, saved) in given.items():
+        if option is not None and option != saved:
+            raise ValueError(f"--resume: the run was trained with {key}={saved}, "
+                             f"but the command line asks for {option}")
+
+    config['model']['architecture'] = run_config['architecture']
+    config['model']['input_shape'] = list(run_config['input_shape'])
+    config['feature_cache']['enabled'] = run_config['feature_cache']
+    config['distillation']['teacher_model'] = run_config['teacher_model']
+    for key in ('student', 'student_alpha'):
+        if run_config[key] is not None:
+            config['distillation'][key] = run_config[key]
+
+
+def find_resume_run(config, run_name='latest'):
+    """
+    Locate the checkpoint directory of a run to resume.
+
+    Args:
+        config (dict): ML configuration
+        run_name (str): Run (model) name, or 'latest' for the newest run
+
+    Returns:
+        tuple: (run_dir, state) where state is the latest JSON sidecar
+    """
+    base_dir = project_root / config['resume']['checkpoint_dir']
+
+    if run_name == 'latest':
+        runs = [path for path in base_dir.glob("*") if path.is_dir()] if base_dir.exists() else []
+        if not runs:
+            raise FileNotFoundError(f"No resumable runs found in {base_dir}")
+        run_dir = max(runs, key=lambda path: path.stat().st_mtime)
+    else:
+        run_dir = base_dir / run_name
+
+    latest = tf.train.latest_checkpoint(str(run_dir))
+    if latest is None:
+        raise FileNotFoundError(f"No checkpoint found in {run_dir}")
+
+    state_path = Path(f"{latest}.state.json")
+    state = {}
+    if state_path.exists():
+        with open(state_path, 'r') as f:
+            state = json.load(f)
+
+    return run_dir, state
+
+
+def create_data_generators(config):
+    """
+    Create data generators for training and validation.
+
+    Args:
+        config (dict): ML configuration
+
+    Returns:
+        tuple: (train_generator, val_generator, test_generator)
+    """
+    print("\nCreating data generators...")
+
+    # Data augmentation for training
+    train_datagen = create_train_datagen(config)
 
     # Validation and test data (no augmentation, only rescaling)
     val_test_datagen = ImageDataGenerator(rescale=1./255)
@@ -111,14 +774,17 @@ def create_data_generators(config):
     train_generator = train_datagen.flow_from_directory(
         train_dir,
         target_size=(img_height, img_width),
+        interpolation=config['model']['resize_method'],
         batch_size=batch_size,
         class_mode='categorical',
-        shuffle=True
+        shuffle=True,
+        seed=config['random_seed']  # Reproducible shuffling (and resumable position)
     )
 
     val_generator = val_test_datagen.flow_from_directory(
         val_dir,
         target_size=(img_height, img_width),
+        interpolation=config['model']['resize_method'],
         batch_size=batch_size,
         class_mode='categorical',
         shuffle=False
@@ -127,6 +793,7 @@ def create_data_generators(config):
     test_generator = val_test_datagen.flow_from_directory(
         test_dir,
         target_size=(img_height, img_width),
+        interpolation=config['model']['resize_method'],
         batch_size=batch_size,
         class_mode='categorical',
         shuffle=False
@@ -138,10 +805,11 @@ def create_data_generators(config):
     print(f"✓ Number of classes: {train_generator.num_classes}")
 
     # Save class indices
-    class_indices_path = project_root / "ml" / "class_indices.json"
+    class_indices_path = CLASS_INDICES_PATH
     with open(class_indices_path, 'w') as f:
         json.dump(train_generator.class_indices, f, indent=4)
     print(f"✓ Class indices saved to: {class_indices_path}")
+    invalidate(CLASS_INDICES_PATH)
 
     return train_generator, val_generator, test_generator
 
@@ -216,8 +884,9 @@ def create_callbacks(config, model_name):
         callbacks.append(tensorboard)
         print(f"✓ TensorBoard enabled: {log_dir}")
 
-    # CSV Logger
-    if config['callbacks']['csv_logger']['enabled']:
+    # CSV Logger (chief only; ModelCheckpoint and TensorBoard already redirect
+    # non-chief workers to temporary directories under a distribution strategy)
+    if config['callbacks']['csv_logger']['enabled'] and is_chief():
         csv_log_path = project_root / config['callbacks']['csv_logger']['filename']
         csv_log_path.parent.mkdir(parents=True, exist_ok=True)
 
@@ -231,13 +900,15 @@ def create_callbacks(config, model_name):
     return callbacks
 
 
-def compile_model(model, config):
+def compile_model(model, config, loss=None, metrics=None):
     """
     Compile the model with optimizer, loss, and metrics.
 
     Args:
         model (keras.Model): Model to compile
         config (dict): ML configuration
+        loss: Loss overriding training.loss_function (optional)
+        metrics (list): Metrics overriding the configured ones (optional)
     """
     # Get optimizer
     optimizer_name = config['training']['optimizer'].lower()
@@ -253,8 +924,9 @@ def compile_model(model, config):
         optimizer = keras.optimizers.Adam(learning_rate=learning_rate)
 
     # Get metrics
-    metrics = []
-    for metric_name in config['metrics']:
+    configured_metrics = config['metrics'] if metrics is None else []
+    metrics = [] if metrics is None else list(metrics)
+    for metric_name in configured_metrics:
         metric_name = metric_name.lower()
         if metric_name == 'accuracy':
             metrics.append('accuracy')
@@ -265,27 +937,39 @@ def compile_model(model, config):
         elif metric_name == 'auc':
             metrics.append(keras.metrics.AUC(name='auc'))
 
+    # Performance options
+    perf_config = config.get('performance', {})
+    jit_compile = bool(perf_config.get('jit_compile', False))
+    steps_per_execution = int(perf_config.get('steps_per_execution', 1))
+
     # Compile model
     model.compile(
         optimizer=optimizer,
-        loss=config['training']['loss_function'],
-        metrics=metrics
+        loss=loss or config['training']['loss_function'],
+        metrics=metrics,
+        jit_compile=jit_compile,
+        steps_per_execution=steps_per_execution
     )
 
-    print(f"✓ Model compiled with {optimizer_name} optimizer")
+    print(f"✓ Model compiled with {optimizer_name} optimizer "
+          f"(jit_compile={jit_compile}, steps_per_execution={steps_per_execution})")
 
 
-def train_model(model, train_gen, val_gen, config, callbacks, model_name):
+def train_model(model, train_gen, val_gen, config, callbacks, model_name,
+                steps_per_epoch=None, validation_steps=None, initial_epoch=0):
     """
     Train the model.
 
     Args:
         model (keras.Model): Model to train
-        train_gen: Training data generator
-        val_gen: Validation data generator
+        train_gen: Training data generator (or DatasetCreator)
+        val_gen: Validation data generator (or DatasetCreator)
         config (dict): ML configuration
         callbacks (list): Training callbacks
         model_name (str): Name of the model
+        steps_per_epoch (int): Steps per epoch (required for DatasetCreator)
+        validation_steps (int): Validation steps (required for DatasetCreator)
+        initial_epoch (int): Epoch to start from when resuming
 
     Returns:
         keras.callbacks.History: Training history
@@ -296,13 +980,29 @@ def train_model(model, train_gen, val_gen, config, callbacks, model_name):
 
     epochs = config['training']['epochs']
 
+    # Per-epoch throughput report (written by the chief only)
+    perf_config = config.get('performance', {})
+    if perf_config.get('throughput_report', True):
+        report_path = perf_config.get('throughput_report_path') or \
+            project_root / "ml" / "logs" / "training" / f"{model_name}_throughput.json"
+        if steps_per_epoch:
+            num_samples = steps_per_epoch * config['training']['batch_size']
+        else:
+            num_samples = train_gen.samples
+        callbacks = callbacks + [
+            ThroughputCallback(num_samples, Path(report_path) if is_chief() else None)
+        ]
+
     # Train model
     history = model.fit(
         train_gen,
         epochs=epochs,
+        initial_epoch=initial_epoch,
+        steps_per_epoch=steps_per_epoch,
         validation_data=val_gen,
+        validation_steps=validation_steps,
         callbacks=callbacks,
-        verbose=1
+        verbose=1 if is_chief() else 2
     )
 
     print(f"\n{'='*60}")
@@ -312,31 +1012,431 @@ def train_model(model, train_gen, val_gen, config, callbacks, model_name):
     return history
 
 
-def save_final_model(model, config, model_name):
+def manifest_content_hashes(split):
+    """
+    Content SHA-256 of the images in a dataset split, from the dataset manifest.
+
+    Args:
+        split (str): 'train', 'validation' or 'test'
+
+    Returns:
+        dict: 'class/file name' -> SHA-256 (empty without a manifest)
+    """
+    from data.scripts.manifest import DatasetManifest
+
+    data_config = get_data_config()
+    db_path = project_root / data_config.get('manifest', {}).get('path', 'data/manifest.sqlite')
+    if not db_path.exists():
+        return {}
+
+    with DatasetManifest(db_path) as manifest:
+        return {
+            f"{record['class_name']}/{record['relpath'].split('/')[-1]}": record['sha256']
+            for record in manifest.records(project_root / data_config['paths']['processed_data'])
+            if record['split'] == split
+        }
+
+
+def train_with_cached_features(model, train_gen, val_gen, config, model_name):
+    """
+    Two-stage training for models with a frozen backbone.
+
+    Stage 1 runs the frozen backbone once over the data, caches the pooled
+    features in memory-mapped arrays and trains only the classification head
+    on them. The trained head is copied into the full model. Stage 2
+    (optional) unfreezes the last fine_tune_layers of the backbone and
+    fine-tunes end-to-end on images.
+
+    Args:
+        model (keras.Model): Transfer-learning model with frozen backbone
+        train_gen: Training data generator (used for stage 2)
+        val_gen: Validation data generator
+        config (dict): ML configuration
+        model_name (str): Name of the model
+
+    Returns:
+        keras.callbacks.History: Combined training history
+    """
+    cache_config = config['feature_cache']
+    backbone = get_backbone(model)
+
+    if backbone is None or backbone.trainable:
+        raise ValueError("Cached features require a transfer-learning model "
+                         "with freeze_base_model: true")
+
+    print(f"\n{'='*60}")
+    print("Stage 1: Training Head on Cached Backbone Features")
+    print(f"{'='*60}\n")
+
+    # Non-shuffled generators so features line up with labels
+    img_height, img_width = config['model']['input_shape'][:2]
+    batch_size = config['training']['batch_size']
+    train_dir = str(project_root / config['paths']['train_dir'])
+    clean_datagen = ImageDataGenerator(rescale=1./255)
+
+    def flow(datagen, directory, seed=None):
+        return datagen.flow_from_directory(
+            directory,
+            target_size=(img_height, img_width),
+            interpolation=config['model']['resize_method'],
+            batch_size=batch_size,
+            class_mode='categorical',
+            shuffle=False,
+            seed=seed
+        )
+
+    train_passes = [flow(clean_datagen, train_dir)]
+    if config['data_augmentation']['enabled']:
+        augment_datagen = create_train_datagen(config)
+        for pass_index in range(cache_config.get('augment_passes', 0)):
+            train_passes.append(flow(augment_datagen, train_dir, seed=config['random_seed'] + pass_index))
+
+    extractor = build_feature_extractor(backbone)
+    cache_dir = project_root / cache_config['cache_dir'] / backbone.name
+    cache_key = {
+        'backbone': backbone.name,
+        'input_shape': list(config['model']['input_shape']),
+        'weights': config['model']['pretrained_weights'],
+        'augmentation': config['data_augmentation'] if len(train_passes) > 1 else None,
+        'random_seed': config['random_seed']
+    }
+    dtype = cache_config.get('dtype', 'float32')
+
+    train_features, train_labels = extract_features(
+        extractor, train_passes, cache_dir, 'train', cache_key, dtype,
+        content_hashes=manifest_content_hashes('train')
+    )
+    val_features, val_labels = extract_features(
+        extractor, [val_gen], cache_dir, 'validation', cache_key, dtype,
+        content_hashes=manifest_content_hashes('validation')
+    )
+
+    # Train the head alone; a forward pass now costs a few dense layers
+    head = create_feature_head_model(train_features.shape[1], config['model']['num_classes'])
+    compile_model(head, config)
+
+    head_batch_size = cache_config.get('head_batch_size', 256)
+    head_callbacks = [
+        EarlyStopping(
+            monitor=config['training']['early_stopping']['monitor'],
+            patience=config['training']['early_stopping']['patience'],
+            restore_best_weights=True,
+            min_delta=config['training']['early_stopping']['min_delta'],
+            verbose=1
+        ),
+        ReduceLROnPlateau(
+            monitor=config['training']['lr_scheduler']['monitor'],
+            factor=config['training']['lr_scheduler']['factor'],
+            patience=config['training']['lr_scheduler']['patience'],
+            min_lr=config['training']['lr_scheduler']['min_lr'],
+            verbose=1
+        )
+    ]
+
+    head_history = head.fit(
+        FeatureSequence(train_features, train_labels, head_batch_size,
+                        shuffle=True, seed=config['random_seed']),
+        epochs=cache_config.get('head_epochs', config['training']['epochs']),
+        validation_data=FeatureSequence(val_features, val_labels, head_batch_size, shuffle=False),
+        callbacks=head_callbacks,
+        verbose=2
+    )
+
+    transfer_head_weights(head, model)
+    print("✓ Head weights copied into full model")
+
+    history = keras.callbacks.History()
+    history.history = {f"head_{key}": values for key, values in head_history.history.items()}
+
+    # Optional end-to-end fine-tuning
+    fine_tune_epochs = cache_config.get('fine_tune_epochs', 0)
+    fine_tune_layers = config['model']['fine_tune_layers']
+
+    if fine_tune_epochs > 0 and fine_tune_layers > 0:
+        print(f"\n{'='*60}")
+        print(f"Stage 2: Fine-tuning last {fine_tune_layers} backbone layers")
+        print(f"{'='*60}\n")
+
+        backbone.trainable = True
+        for layer in backbone.layers[:-fine_tune_layers]:
+            layer.trainable = False
+
+        fine_tune_config = dict(config)
+        fine_tune_config['training'] = dict(
+            config['training'],
+            epochs=fine_tune_epochs,
+            learning_rate=cache_config.get('fine_tune_learning_rate',
+                                           config['training']['learning_rate'] * 0.1)
+        )
+        compile_model(model, fine_tune_config)
+
+        callbacks = create_callbacks(config, model_name)
+        fine_tune_history = train_model(
+            model, train_gen, val_gen, fine_tune_config, callbacks, model_name
+        )
+        history.history.update(fine_tune_history.history)
+    else:
+        # The full model needs compiling before it can be saved with an optimizer
+        compile_model(model, config)
+
+    return history
+
+
+def teacher_generator(teacher, directory, config, student_gen):
     """
-    Save the final trained model.
+    Clean, non-shuffled generator over a directory at the teacher's resolution.
+
+    A student trained at a lower resolution (--image-size) still gets
+    targets from images sized for the teacher. The files must be listed in
+    the same order as the student's generator so the targets line up.
+
+    Args:
+        teacher (keras.Model): Teacher model
+        directory (str): Image directory
+        config (dict): ML configuration
+        student_gen: The student's generator over the same directory
+
+    Returns:
+        DirectoryIterator: Generator yielding teacher-sized batches
+
+    Raises:
+        ValueError: If the two generators list different files
+    """
+    img_height, img_width = teacher.input_shape[1:3]
+    if img_height is None or img_width is None:
+        # Variable-size input: use the student's resolution
+        img_height, img_width = config['model']['input_shape'][:2]
+
+    generator = ImageDataGenerator(rescale=1./255).flow_from_directory(
+        directory,
+        target_size=(img_height, img_width),
+        interpolation=config['model']['resize_method'],
+        batch_size=config['training']['batch_size'],
+        class_mode='categorical',
+        shuffle=False
+    )
+    if generator.filenames != student_gen.filenames:
+        raise ValueError(f"Teacher and student generators list different files in {directory}; "
+                         f"cannot align teacher targets")
+    return generator
+
+
+def train_with_distillation(model, teacher_path, train_gen, val_gen, config, model_name,
+                            resume_run_dir=None):
+    """
+    Train a student model on a teacher's cached soft targets.
+
+    The teacher is run once over the clean training and validation images,
+    loaded at the teacher's own input resolution; its probabilities are cached to disk and paired with the augmented,
+    shuffled training batches, so the student trains without the teacher
+    in memory.
+
+    Args:
+        model (keras.Model): Student model
+        teacher_path (Path): Trained teacher model (.h5)
+        train_gen: Training data generator (shuffled, augmented)
+        val_gen: Validation data generator (not shuffled)
+        config (dict): ML configuration
+        model_name (str): Name of the student model
+        resume_run_dir (Path): Interrupted run to resume (optional)
+
+    Returns:
+        keras.callbacks.History: Training history
+    """
+    dist_config = config['distillation']
+    num_classes = config['model']['num_classes']
+
+    print(f"\n{'='*60}")
+    print("Computing Teacher Soft Targets")
+    print(f"{'='*60}")
+    print(f"Teacher: {teacher_path}")
+    print(f"{'='*60}\n")
+
+    # Clean, non-shuffled passes at the teacher's resolution (same file order)
+    teacher = keras.models.load_model(str(teacher_path), compile=False)
+    teacher_train_gen = teacher_generator(teacher, str(project_root / config['paths']['train_dir']),
+                                          config, train_gen)
+    teacher_val_gen = teacher_generator(teacher, str(project_root / config['paths']['val_dir']),
+                                        config, val_gen)
+
+    cache_dir = project_root / dist_config['cache_dir'] / model_name_from_path(teacher_path)
+    train_targets = compute_teacher_targets(teacher, teacher_train_gen, cache_dir, 'train', teacher_path)
+    val_targets = compute_teacher_targets(teacher, teacher_val_gen, cache_dir, 'validation', teacher_path)
+    del teacher
+
+    print(f"\n{'='*60}")
+    print("Training Student on Teacher Targets")
+    print(f"{'='*60}")
+    print(f"Temperature: {dist_config['temperature']}")
+    print(f"Hard Label Weight: {dist_config['hard_label_weight']}")
+    print(f"{'='*60}\n")
+
+    compile_model(
+        model, config,
+        loss=DistillationLoss(num_classes, dist_config['temperature'],
+                              dist_config['hard_label_weight']),
+        metrics=[hard_label_accuracy(num_classes)]
+    )
+
+    callbacks = create_callbacks(config, model_name)
+    callbacks, initial_epoch = add_resumable_checkpoint(
+        model, config, callbacks, model_name, resume_run_dir
+    )
+
+    history = train_model(
+        model,
+        DistillationSequence(train_gen, train_targets),
+        DistillationSequence(val_gen, val_targets),
+        config, callbacks, model_name,
+        initial_epoch=initial_epoch
+    )
+
+    # Recompile with the standard loss so the saved model loads without custom objects
+    compile_model(model, config)
+
+    return history
+
+
+def report_distillation(student, teacher_path, test_gen, config, model_name):
+    """
+    Compare the student's test accuracy and CPU latency with the teacher's.
+
+    Args:
+        student (keras.Model): Trained student model
+        teacher_path (Path): Trained teacher model (.h5)
+        test_gen: Non-shuffled test data generator
+        config (dict): ML configuration
+        model_name (str): Name of the student model
+
+    Returns:
+        dict: Distillation report
+    """
+    from ml.benchmark import KerasRunner, measure_latency
+    from ml.evaluation import collect_predictions
+
+    teacher = keras.models.load_model(str(teacher_path), compile=False)
+    # Each model sees the test images at its own resolution
+    teacher_test_gen = teacher_generator(teacher, str(project_root / config['paths']['test_dir']),
+                                         config, test_gen)
+    budget_ms = config['distillation']['latency_budget_ms']
+
+    report = {'teacher_path': str(teacher_path), 'latency_budget_ms': budget_ms}
+    for role, model, generator in [('teacher', teacher, teacher_test_gen), ('student', student, test_gen)]:
+        print(f"\nEvaluating {role}...")
+        probabilities, true_classes = collect_predictions(model, generator)
+        report[role] = {
+            'name': model.name,
+            'parameters': int(model.count_params()),
+            'accuracy': float(np.mean(np.argmax(probabilities, axis=1) == true_classes)),
+            'latency_ms': measure_latency(KerasRunner(None, model=model), generator[0][0][:16])
+        }
+
+    teacher_result, student_result = report['teacher'], report['student']
+    report['speedup'] = teacher_result['latency_ms']['p50'] / student_result['latency_ms']['p50']
+    report['accuracy_delta'] = student_result['accuracy'] - teacher_result['accuracy']
+    report['meets_latency_budget'] = student_result['latency_ms']['p50'] <= budget_ms
+
+    print(f"\n{'='*60}")
+    print("Distillation Results")
+    print(f"{'='*60}")
+    print(f"{'':<9} {'Params':>11} {'Accuracy':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for role in ['teacher', 'student']:
+        r = report[role]
+        print(f"{role:<9} {r['parameters']:>11,} {r['accuracy']*100:>8.2f}% "
+              f"{r['latency_ms']['p50']:>8.2f} {r['latency_ms']['p95']:>8.2f}")
+    print(f"Speedup: {report['speedup']:.2f}x, accuracy change: {report['accuracy_delta']*100:+.2f} pts")
+    print(f"Latency budget {budget_ms} ms: {'met' if report['meets_latency_budget'] else 'NOT met'}")
+    print(f"{'='*60}\n")
+
+    report_path = project_root / "ml" / "logs" / "training" / f"{model_name}_distillation.json"
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(f"✓ Distillation report saved to: {report_path}")
+
+    return report
+
+
+def save_final_model(model, config, model_name, calibration_gen=None):
+    """
+    Save the final trained model as a bundle directory.
+
+    The bundle holds every export format, the labels and a manifest with
+    preprocessing, calibration, content hash and latency (see ml/bundle.py).
 
     Args:
         model (keras.Model): Trained model
         config (dict): ML configuration
         model_name (str): Name of the model
+        calibration_gen: Non-shuffled validation generator for calibration (optional)
+
+    Returns:
+        Path: Bundle directory
     """
+    from ml.bundle import export_model_bundle
+
     # Save directory
     save_dir = project_root / config['paths']['model_save_dir']
     save_dir.mkdir(parents=True, exist_ok=True)
 
-    # Save model
-    model_path = save_dir / f"{model_name}_final.h5"
-    model.save(str(model_path), include_optimizer=config['export']['include_optimizer'])
+    # Save model, labels and manifest
+    bundle_dir = save_dir / f"{model_name}_final"
+    export_model_bundle(model, config, bundle_dir, model_name, get_class_names(),
+                        calibration_gen=calibration_gen)
 
-    print(f"\n✓ Final model saved to: {model_path}")
+    print(f"\n✓ Final model bundle saved to: {bundle_dir}")
 
     # Save model architecture as JSON
-    json_path = save_dir / f"{model_name}_architecture.json"
+    json_path = bundle_dir / "architecture.json"
     with open(json_path, 'w') as f:
         f.write(model.to_json())
     print(f"✓ Model architecture saved to: {json_path}")
 
+    return bundle_dir
+
+
+def save_distributed_model(model, model_name):
+    """
+    Join the final collective save of a distributed model.
+
+    Under MultiWorkerMirroredStrategy saving is a collective operation that
+    every worker must run the same number of times, or the others block.
+    Every worker, the chief included, runs exactly this one save to a
+    private temporary directory and deletes it afterwards; the chief then
+    exports the bundle from a local copy (see local_model_copy).
+
+    Args:
+        model (keras.Model): Trained model
+        model_name (str): Name of the model
+    """
+    task_type, task_index, _ = get_worker_task()
+    worker_dir = Path(tempfile.mkdtemp(prefix=f"{model_name}_{task_type}_{task_index}_"))
+    try:
+        model.save(worker_dir / "model")
+    finally:
+        shutil.rmtree(worker_dir, ignore_errors=True)
+
+
+def local_model_copy(model, config):
+    """
+    Copy a distributed model outside the strategy scope.
+
+    Saving, calibration, benchmarking and format exports of the copy run on
+    this process alone, with no collective operations the other workers
+    would have to join.
+
+    Args:
+        model (keras.Model): Model created under a distribution strategy
+        config (dict): ML configuration
+
+    Returns:
+        keras.Model: Compiled, non-distributed model with the same weights
+    """
+    local_model = keras.models.clone_model(model)
+    local_model.set_weights(model.get_weights())
+    compile_model(local_model, config)
+    return local_model
+
 
 def save_training_history(history, model_name):
     """
@@ -374,6 +1474,12 @@ def main():
         default=None,
         help='Number of training epochs'
     )
+    parser.add_argument(
+        '--image-size',
+        type=int,
+        default=None,
+        help='Square input resolution, e.g. 128, 160, 192 or 224 (default from config)'
+    )
     parser.add_argument(
         '--batch-size',
         type=int,
@@ -385,6 +1491,69 @@ def main():
         action='store_true',
         help='Force GPU usage'
     )
+    parser.add_argument(
+        '--performance-mode',
+        action='store_true',
+        help='Enable XLA, automatic mixed precision and steps_per_execution=32'
+    )
+    parser.add_argument(
+        '--cached-features',
+        action='store_true',
+        help='Train the head on cached frozen-backbone features first'
+    )
+    parser.add_argument(
+        '--distributed',
+        type=str,
+        choices=['mirrored', 'multi_worker'],
+        default=None,
+        help='Distribution strategy (multi_worker reads TF_CONFIG)'
+    )
+    parser.add_argument(
+        '--steps-per-epoch',
+        type=int,
+        default=None,
+        help='Limit training steps per epoch (useful for benchmarks)'
+    )
+    parser.add_argument(
+        '--benchmark-output',
+        type=str,
+        default=None,
+        help='Write the throughput report here and skip saving the model'
+    )
+    parser.add_argument(
+        '--resume',
+        type=str,
+        nargs='?',
+        const='latest',
+        default=None,
+        help='Resume an interrupted run (optionally give its run name; default: latest)'
+    )
+    parser.add_argument(
+        '--threads',
+        type=int,
+        default=None,
+        help='Intra-op thread count (inter-op is set to 2)'
+    )
+    parser.add_argument(
+        '--distill',
+        type=str,
+        default=None,
+        metavar='TEACHER',
+        help='Train a student on soft targets from this teacher model (.h5)'
+    )
+    parser.add_argument(
+        '--student',
+        type=str,
+        default=None,
+        choices=['baseline', 'MobileNetV2'],
+        help='Student architecture for --distill (default from config)'
+    )
+    parser.add_argument(
+        '--student-alpha',
+        type=float,
+        default=None,
+        help='Width multiplier for a MobileNetV2 student'
+    )
 
     args = parser.parse_args()
 
@@ -398,8 +1567,65 @@ def main():
         config['training']['epochs'] = args.epochs
     if args.batch_size:
         config['training']['batch_size'] = args.batch_size
+    if args.image_size:
+        config['model']['input_shape'] = [args.image_size, args.image_size, 3]
     if args.use_gpu:
         config['gpu']['use_gpu'] = True
+    config.setdefault('performance', {})
+    config.setdefault('feature_cache', {'enabled': False, 'cache_dir': 'ml/cache/features'})
+    if args.cached_features:
+        config['feature_cache']['enabled'] = True
+    config.setdefault('distributed', {'strategy': None})
+    if args.distributed:
+        config['distributed']['strategy'] = args.distributed
+    config.setdefault('resume', {'enabled': False, 'checkpoint_dir': 'ml/trained_models/resume'})
+    config.setdefault('distillation', {})
+    if args.distill:
+        config['distillation']['teacher_model'] = args.distill
+    if args.student:
+        config['distillation']['student'] = args.student
+    if args.student_alpha:
+        config['distillation']['student_alpha'] = args.student_alpha
+
+    # Resuming reuses the interrupted run's name and settings
+    resume_run_dir = None
+    resume_model_name = None
+    run_config = None
+    if args.resume:
+        resume_run_dir, resume_state = find_resume_run(config, args.resume)
+        resume_model_name = resume_state.get('model_name', resume_run_dir.name)
+        run_config = resume_state.get('run_config')
+        if run_config:
+            apply_resume_run_config(config, run_config, args)
+            print(f"✓ Using the settings of the resumed run: {run_config}")
+        config['callbacks']['csv_logger']['append'] = True
+
+    teacher_path = config['distillation'].get('teacher_model')
+    if teacher_path:
+        # The student replaces the configured architecture
+        config['model']['architecture'] = config['distillation'].get('student', 'baseline')
+        teacher_path = Path(teacher_path)
+        if not teacher_path.is_absolute():
+            teacher_path = project_root / teacher_path
+
+    if run_config is None and resume_model_name:
+        # Runs saved before the settings were stored: the name gives the architecture
+        architecture = resume_model_name.rsplit('_', 2)[0]
+        if architecture.startswith('distilled_'):
+            architecture = architecture[len('distilled_'):]
+        if architecture != config['model']['architecture']:
+            print(f"⚠ Using architecture {architecture} from the resumed run")
+            config['model']['architecture'] = architecture
+    if args.benchmark_output:
+        config['performance']['throughput_report'] = True
+        config['performance']['throughput_report_path'] = args.benchmark_output
+    if args.performance_mode:
+        config['performance']['jit_compile'] = True
+        config['performance']['mixed_precision'] = 'auto'
+        config['performance']['steps_per_execution'] = 32
+    if args.threads:
+        config['performance']['intra_op_threads'] = args.threads
+        config['performance']['inter_op_threads'] = 2
 
     print(f"\n{'='*60}")
     print("Plant Disease Classification - Training Pipeline")
@@ -407,6 +1633,7 @@ def main():
     print(f"Architecture: {config['model']['architecture']}")
     print(f"Epochs: {config['training']['epochs']}")
     print(f"Batch Size: {config['training']['batch_size']}")
+    print(f"Input Shape: {config['model']['input_shape']}")
     print(f"Learning Rate: {config['training']['learning_rate']}")
     print(f"{'='*60}\n")
 
@@ -414,44 +1641,124 @@ def main():
     if config['gpu']['use_gpu']:
         setup_gpu(config)
 
+    # Thread pools, mixed precision and XLA
+    setup_performance(config)
+
+    # Distribution strategy (None for single-process training)
+    strategy = create_strategy(config)
+    if strategy is not None and config['feature_cache']['enabled']:
+        raise ValueError("Cached-feature training does not support distributed mode")
+    if teacher_path and (strategy is not None or config['feature_cache']['enabled']):
+        raise ValueError("Distillation does not support distributed or cached-feature training")
+
     # Create data generators
     train_gen, val_gen, test_gen = create_data_generators(config)
 
-    # Create model
+    # Create model (variables must be created inside the strategy scope)
     print("\nCreating model...")
-    model = get_model(
-        architecture=config['model']['architecture'],
-        input_shape=tuple(config['model']['input_shape']),
-        num_classes=config['model']['num_classes'],
-        use_pretrained=config['model']['use_pretrained'],
-        freeze_base=config['model']['freeze_base_model'],
-        fine_tune_layers=config['model']['fine_tune_layers']
-    )
+    with strategy.scope() if strategy is not None else contextlib.nullcontext():
+        if config['model']['architecture'].lower() == 'baseline':
+            model = get_model(
+                architecture='baseline',
+                input_shape=tuple(config['model']['input_shape']),
+                num_classes=config['model']['num_classes']
+            )
+        else:
+            model_kwargs = {}
+            if teacher_path and config['model']['architecture'].lower() == 'mobilenetv2':
+                model_kwargs['alpha'] = config['distillation'].get('student_alpha', 1.0)
+            model = get_model(
+                architecture=config['model']['architecture'],
+                input_shape=tuple(config['model']['input_shape']),
+                num_classes=config['model']['num_classes'],
+                use_pretrained=config['model']['use_pretrained'],
+                freeze_base=config['model']['freeze_base_model'],
+                fine_tune_layers=config['model']['fine_tune_layers'],
+                **model_kwargs
+            )
+
+        if not config['feature_cache']['enabled'] and not teacher_path:
+            # Compile model
+            compile_model(model, config)
 
     # Print model summary
-    print_model_summary(model)
+    if is_chief():
+        print_model_summary(model)
+
+    model_name = resume_model_name or \
+        f"{config['model']['architecture']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    if teacher_path and not resume_model_name:
+        model_name = f"distilled_{model_name}"
+
+    if config['feature_cache']['enabled'] and (args.resume or config['resume']['enabled']):
+        print("⚠ Resumable checkpoints are not used for cached-feature training")
+
+    if teacher_path:
+        # Student trained on cached teacher soft targets
+        history = train_with_distillation(model, teacher_path, train_gen, val_gen, config,
+                                          model_name, resume_run_dir)
+    elif config['feature_cache']['enabled']:
+        # Two-stage training on cached backbone features
+        history = train_with_cached_features(model, train_gen, val_gen, config, model_name)
+    elif strategy is not None:
+        # Sharded tf.data input; batch_size is the global batch over all replicas
+        global_batch_size = config['training']['batch_size']
+        steps_per_epoch = args.steps_per_epoch or max(1, train_gen.samples // global_batch_size)
+        validation_steps = max(1, val_gen.samples // global_batch_size)
+
+        train_data = create_distributed_dataset(train_gen, config, global_batch_size, training=True)
+        val_data = create_distributed_dataset(val_gen, config, global_batch_size)
+
+        callbacks = create_callbacks(config, model_name)
+        callbacks, initial_epoch = add_resumable_checkpoint(
+            model, config, callbacks, model_name, resume_run_dir
+        )
+        history = train_model(model, train_data, val_data, config, callbacks, model_name,
+                              steps_per_epoch=steps_per_epoch,
+                              validation_steps=validation_steps,
+                              initial_epoch=initial_epoch)
+    else:
+        # Create callbacks
+        callbacks = create_callbacks(config, model_name)
+        callbacks, initial_epoch = add_resumable_checkpoint(
+            model, config, callbacks, model_name, resume_run_dir, train_gen
+        )
 
-    # Compile model
-    compile_model(model, config)
+        # Train model
+        history = train_model(model, train_gen, val_gen, config, callbacks, model_name,
+                              steps_per_epoch=args.steps_per_epoch,
+                              initial_epoch=initial_epoch)
 
-    # Create callbacks
-    model_name = f"{config['model']['architecture']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-    callbacks = create_callbacks(config, model_name)
+    if args.benchmark_output:
+        print(f"✓ Benchmark run finished, report: {args.benchmark_output}")
+        return
 
-    # Train model
-    history = train_model(model, train_gen, val_gen, config, callbacks, model_name)
+    if strategy is not None:
+        # Every worker joins one collective save; the chief then writes the
+        # bundle from a local copy, so its exports need no other worker
+        save_distributed_model(model, model_name)
+        if is_chief():
+            model = local_model_copy(model, config)
+
+    if not is_chief():
+        # Only the chief writes the bundle and history
+        return
 
     # Save final model
-    save_final_model(model, config, model_name)
+    bundle_dir = save_final_model(model, config, model_name, calibration_gen=val_gen)
 
     # Save training history
     save_training_history(history, model_name)
 
+    # Student vs teacher speed and accuracy
+    if teacher_path:
+        report_distillation(model, teacher_path, test_gen, config, model_name)
+
     print(f"\n{'='*60}")
     print("✓ Training pipeline completed successfully!")
     print(f"{'='*60}\n")
     print("Next steps:")
-    print(f"  1. Evaluate model: python ml/evaluation.py --model {model_name}_final.h5")
+    print(f"  1. Evaluate model: python ml/evaluation.py --model {(bundle_dir / 'model.h5').relative_to(project_root)}")
     print(f"  2. View TensorBoard: tensorboard --logdir ml/logs/tensorboard")
 
 
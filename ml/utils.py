@@ -4,26 +4,59 @@ Author: Peter Maina (136532)
 Project: AI-Based Tomato & Potato Disease Classification
 
 This module contains helper functions for ML pipeline.
+
+Only light dependencies are imported here. Plotting helpers (ml.plotting)
+and TensorFlow helpers (ml.model_utils) are still available as attributes of
+this module but are imported lazily.
 """
 
-import os
+import importlib
 import json
-import yaml
+import os
+from datetime import datetime
 from pathlib import Path
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import tensorflow as tf
-from tensorflow import keras
+
+from ml import config_registry
+from ml.config_registry import thaw
+
+# Manifest file of a model bundle directory (written by ml/bundle.py)
+BUNDLE_MANIFEST_NAME = 'manifest.json'
+
+# Heavy helpers live in submodules that are imported on first use, so that
+# `import ml.utils` stays fast for callers that only need the light helpers.
+_LAZY_ATTRIBUTES = {
+    'plot_training_history': 'ml.plotting',
+    'plot_confusion_matrix': 'ml.plotting',
+    'visualize_prediction': 'ml.plotting',
+    'convert_to_tflite': 'ml.model_utils',
+    'count_model_parameters': 'ml.model_utils',
+}
+
+
+def __getattr__(name):
+    """Load plotting and TensorFlow helpers on first access (PEP 562)."""
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_ATTRIBUTES))
 
 
 def load_ml_config():
-    """Load ML configuration from YAML file."""
-    project_root = Path(__file__).parent.parent
-    config_path = project_root / "ml" / "config.yaml"
-    with open(config_path, 'r') as f:
-        config = yaml.safe_load(f)
-    return config
+    """
+    Load ML configuration from YAML file.
+
+    Returns a private mutable copy of the cached config; read-only callers
+    can use config_registry.get_ml_config() to skip the copy.
+    """
+    return thaw(config_registry.get_ml_config())
 
 
 def load_class_indices():
@@ -33,13 +66,10 @@ def load_class_indices():
     Returns:
         dict: Class name to index mapping
     """
-    project_root = Path(__file__).parent.parent
-    class_indices_path = project_root / "ml" / "class_indices.json"
+    class_indices = config_registry.get_class_indices()
 
-    if class_indices_path.exists():
-        with open(class_indices_path, 'r') as f:
-            class_indices = json.load(f)
-        return class_indices
+    if class_indices is not None:
+        return dict(class_indices)
     else:
         print("Warning: class_indices.json not found")
         return None
@@ -49,175 +79,138 @@ def get_class_names():
     """
     Get list of class names in order.
 
+    The result is cached until class_indices.json or ml/config.yaml change.
+
     Returns:
-        list: List of class names
+        tuple: Class names
     """
-    class_indices = load_class_indices()
-
-    if class_indices:
-        # Sort by index value
-        sorted_classes = sorted(class_indices.items(), key=lambda x: x[1])
-        return [class_name for class_name, _ in sorted_classes]
-    else:
-        # Fallback to config
-        config = load_ml_config()
-        return config['class_names']
+    return config_registry.get_class_names()
 
 
-def plot_training_history(history_dict, save_path=None):
+def model_metadata_path(model_path):
     """
-    Plot training history.
+    Get the metadata file shared by every format of a model.
+
+    X.h5, X.tflite and X.onnx all use X.metadata.json.
 
     Args:
-        history_dict (dict): Training history dictionary
-        save_path (str): Path to save plot (optional)
+        model_path (str): Path to a model file
+
+    Returns:
+        Path: Metadata file path
     """
-    fig, axes = plt.subplots(2, 2, figsize=(15, 10))
-    fig.suptitle('Training History', fontsize=16)
-
-    # Plot accuracy
-    if 'accuracy' in history_dict and 'val_accuracy' in history_dict:
-        axes[0, 0].plot(history_dict['accuracy'], label='Train Accuracy')
-        axes[0, 0].plot(history_dict['val_accuracy'], label='Val Accuracy')
-        axes[0, 0].set_title('Model Accuracy')
-        axes[0, 0].set_xlabel('Epoch')
-        axes[0, 0].set_ylabel('Accuracy')
-        axes[0, 0].legend()
-        axes[0, 0].grid(True)
-
-    # Plot loss
-    if 'loss' in history_dict and 'val_loss' in history_dict:
-        axes[0, 1].plot(history_dict['loss'], label='Train Loss')
-        axes[0, 1].plot(history_dict['val_loss'], label='Val Loss')
-        axes[0, 1].set_title('Model Loss')
-        axes[0, 1].set_xlabel('Epoch')
-        axes[0, 1].set_ylabel('Loss')
-        axes[0, 1].legend()
-        axes[0, 1].grid(True)
-
-    # Plot precision
-    if 'precision' in history_dict and 'val_precision' in history_dict:
-        axes[1, 0].plot(history_dict['precision'], label='Train Precision')
-        axes[1, 0].plot(history_dict['val_precision'], label='Val Precision')
-        axes[1, 0].set_title('Model Precision')
-        axes[1, 0].set_xlabel('Epoch')
-        axes[1, 0].set_ylabel('Precision')
-        axes[1, 0].legend()
-        axes[1, 0].grid(True)
-
-    # Plot recall
-    if 'recall' in history_dict and 'val_recall' in history_dict:
-        axes[1, 1].plot(history_dict['recall'], label='Train Recall')
-        axes[1, 1].plot(history_dict['val_recall'], label='Val Recall')
-        axes[1, 1].set_title('Model Recall')
-        axes[1, 1].set_xlabel('Epoch')
-        axes[1, 1].set_ylabel('Recall')
-        axes[1, 1].legend()
-        axes[1, 1].grid(True)
-
-    plt.tight_layout()
-
-    if save_path:
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        print(f"✓ Training history plot saved to: {save_path}")
-
-    plt.show()
-
-
-def plot_confusion_matrix(cm, class_names, save_path=None):
+    model_path = Path(model_path)
+    return model_path.with_name(f"{model_path.stem}.metadata.json")
+
+
+def build_model_metadata(architecture, input_shape, class_names, resize_method='bilinear', **extra):
     """
-    Plot confusion matrix.
+    Describe a model's input resolution, labels and preprocessing.
 
     Args:
-        cm (numpy.ndarray): Confusion matrix
-        class_names (list): List of class names
-        save_path (str): Path to save plot (optional)
+        architecture (str): Model architecture
+        input_shape (tuple): Model input shape (height, width, channels)
+        class_names (list): Class names in model output order
+        resize_method (str): Interpolation the training images were loaded
+            with (config model.resize_method)
+        **extra: Additional fields to record
+
+    Returns:
+        dict: Metadata
     """
-    plt.figure(figsize=(15, 12))
+    input_shape = [int(dim) for dim in input_shape]
+    return {
+        'architecture': architecture,
+        'input_shape': input_shape,
+        'image_size': input_shape[0],
+        'class_names': list(class_names),
+        'preprocessing': {
+            'color_mode': 'rgb',
+            'resize_method': resize_method,
+            'rescale': 1.0 / 255
+        },
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        **extra
+    }
+
 
-    # Normalize confusion matrix
-    cm_normalized = cm.astype('float') / cm.sum(axis=1)[:, np.newaxis]
+def save_model_metadata(model_path, architecture, input_shape, class_names, resize_method='bilinear', **extra):
+    """
+    Write the metadata file that training, conversion and serving read the
+    input resolution and labels from.
 
-    # Plot
-    sns.heatmap(
-        cm_normalized,
-        annot=True,
-        fmt='.2f',
-        cmap='Blues',
-        xticklabels=class_names,
-        yticklabels=class_names,
-        cbar_kws={'label': 'Percentage'}
-    )
+    Args:
+        model_path (str): Path to the saved model
+        architecture (str): Model architecture
+        input_shape (tuple): Model input shape (height, width, channels)
+        class_names (list): Class names in model output order
+        resize_method (str): Interpolation the training images were loaded with
+        **extra: Additional fields to record
 
-    plt.title('Confusion Matrix (Normalized)', fontsize=16, pad=20)
-    plt.ylabel('True Label', fontsize=12)
-    plt.xlabel('Predicted Label', fontsize=12)
-    plt.xticks(rotation=45, ha='right')
-    plt.yticks(rotation=0)
-    plt.tight_layout()
+    Returns:
+        Path: Metadata file path
+    """
+    metadata = build_model_metadata(architecture, input_shape, class_names, resize_method, **extra)
 
-    if save_path:
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        print(f"✓ Confusion matrix saved to: {save_path}")
+    metadata_path = model_metadata_path(model_path)
+    with open(metadata_path, 'w') as f:
+        json.dump(metadata, f, indent=4)
 
-    plt.show()
+    return metadata_path
 
 
-def convert_to_tflite(model_path, output_path=None, quantization='float16'):
+def bundle_manifest_path(model_path):
     """
-    Convert Keras model to TensorFlow Lite format for mobile deployment.
+    Get the manifest of the model bundle a path belongs to.
 
     Args:
-        model_path (str): Path to Keras model (.h5)
-        output_path (str): Output path for TFLite model (optional)
-        quantization (str): Quantization method ('float16', 'int8', 'dynamic', None)
+        model_path (str): Bundle directory or a file inside it
 
     Returns:
-        str: Path to saved TFLite model
+        Path: Manifest path, or None if the path is not part of a bundle
     """
-    print(f"\nConverting model to TensorFlow Lite...")
-    print(f"Input: {model_path}")
-    print(f"Quantization: {quantization}")
+    model_path = Path(model_path)
+    bundle_dir = model_path if model_path.is_dir() else model_path.parent
+    manifest_path = bundle_dir / BUNDLE_MANIFEST_NAME
+    return manifest_path if manifest_path.exists() else None
 
-    # Load model
-    model = keras.models.load_model(model_path)
 
-    # Create converter
-    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+def model_name_from_path(model_path):
+    """
+    Get a model's name for reports: the bundle name for bundle files,
+    otherwise the file stem.
 
-    # Set optimization
-    if quantization:
-        if quantization == 'float16':
-            converter.optimizations = [tf.lite.Optimize.DEFAULT]
-            converter.target_spec.supported_types = [tf.float16]
-        elif quantization == 'int8':
-            converter.optimizations = [tf.lite.Optimize.DEFAULT]
-            # For full int8 quantization, you need representative dataset
-        elif quantization == 'dynamic':
-            converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    Args:
+        model_path (str): Path to a model file or bundle directory
 
-    # Convert model
-    tflite_model = converter.convert()
+    Returns:
+        str: Model name
+    """
+    model_path = Path(model_path)
+    if bundle_manifest_path(model_path):
+        return model_path.name if model_path.is_dir() else model_path.parent.name
+    return model_path.stem
 
-    # Save model
-    if output_path is None:
-        model_path_obj = Path(model_path)
-        output_path = model_path_obj.parent / f"{model_path_obj.stem}.tflite"
 
-    with open(output_path, 'wb') as f:
-        f.write(tflite_model)
+def load_model_metadata(model_path):
+    """
+    Load the metadata file of a model.
 
-    # Get model sizes
-    original_size = os.path.getsize(model_path) / (1024 * 1024)  # MB
-    tflite_size = os.path.getsize(output_path) / (1024 * 1024)  # MB
+    Args:
+        model_path (str): Path to a model file
 
-    print(f"\n✓ TFLite conversion completed")
-    print(f"  Original model size: {original_size:.2f} MB")
-    print(f"  TFLite model size: {tflite_size:.2f} MB")
-    print(f"  Size reduction: {(1 - tflite_size/original_size)*100:.1f}%")
-    print(f"  Saved to: {output_path}")
+    Returns:
+        dict: Metadata, or None if the model has no metadata file
+    """
+    metadata_path = model_metadata_path(model_path)
+    if not metadata_path.exists():
+        # Bundle files share the bundle manifest
+        metadata_path = bundle_manifest_path(model_path)
+        if metadata_path is None:
+            return None
 
-    return str(output_path)
+    with open(metadata_path, 'r') as f:
+        return json.load(f)
 
 
 def load_and_preprocess_image(image_path, target_size=(224, 224)):
@@ -265,8 +258,9 @@ def predict_image(model, image_path, class_names=None):
     Returns:
         tuple: (predicted_class, confidence, all_predictions)
     """
-    # Preprocess image
-    img_array = load_and_preprocess_image(image_path)
+    # Preprocess image at the model's own input resolution
+    height, width = model.input_shape[1:3]
+    img_array = load_and_preprocess_image(image_path, (width, height))
 
     # Make prediction
     predictions = model.predict(img_array, verbose=0)[0]
@@ -284,40 +278,6 @@ def predict_image(model, image_path, class_names=None):
     return predicted_class, confidence, predictions
 
 
-def visualize_prediction(image_path, predicted_class, confidence, top_k=5):
-    """
-    Visualize prediction results.
-
-    Args:
-        image_path (str): Path to image file
-        predicted_class (str): Predicted class name
-        confidence (float): Prediction confidence
-        top_k (int): Number of top predictions to show
-    """
-    from PIL import Image
-
-    # Load image
-    img = Image.open(image_path)
-
-    # Create figure
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 5))
-
-    # Display image
-    ax1.imshow(img)
-    ax1.axis('off')
-    ax1.set_title(f'Predicted: {predicted_class}\nConfidence: {confidence*100:.2f}%',
-                  fontsize=12, fontweight='bold')
-
-    # Display top predictions (if available)
-    # This would require all_predictions to be passed
-    ax2.text(0.5, 0.5, f'{predicted_class}\n{confidence*100:.2f}%',
-             ha='center', va='center', fontsize=16, fontweight='bold')
-    ax2.axis('off')
-
-    plt.tight_layout()
-    plt.show()
-
-
 def get_model_size_mb(model_path):
     """
     Get model file size in MB.
@@ -333,26 +293,6 @@ def get_model_size_mb(model_path):
     return size_mb
 
 
-def count_model_parameters(model):
-    """
-    Count trainable and non-trainable parameters in model.
-
-    Args:
-        model: Keras model
-
-    Returns:
-        dict: Dictionary with parameter counts
-    """
-    trainable_count = sum([tf.size(w).numpy() for w in model.trainable_weights])
-    non_trainable_count = sum([tf.size(w).numpy() for w in model.non_trainable_weights])
-
-    return {
-        'trainable': trainable_count,
-        'non_trainable': non_trainable_count,
-        'total': trainable_count + non_trainable_count
-    }
-
-
 # Example usage
 if __name__ == "__main__":
     print("ML Utility Functions")
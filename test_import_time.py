@@ -0,0 +1,112 @@
+"""
+Import-Time Regression Test
+
+Checks that the light ML helpers stay light:
+1. `import ml.utils` does not pull in TensorFlow, matplotlib or seaborn
+2. The import finishes within the startup budget
+3. Lazily loaded helpers still resolve from ml.utils (skipped without
+   TensorFlow or matplotlib, which they import)
+
+Each check runs in a fresh interpreter so earlier imports cannot hide a
+regression. Run with pytest or directly: python test_import_time.py
+"""
+
+import importlib.util
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent
+
+# Seconds allowed for `import ml.utils` (override with IMPORT_BUDGET_SECONDS)
+IMPORT_BUDGET_SECONDS = float(os.environ.get('IMPORT_BUDGET_SECONDS', '0.5'))
+HEAVY_MODULES = ['tensorflow', 'matplotlib', 'seaborn']
+# Imported by the lazily loaded helpers
+LAZY_HELPER_DEPENDENCIES = ['tensorflow', 'matplotlib']
+
+
+def run_python(code):
+    """Run code in a fresh interpreter from the project root and return stdout."""
+    result = subprocess.run(
+        [sys.executable, '-c', code], cwd=PROJECT_ROOT,
+        capture_output=True, text=True, check=True
+    )
+    return result.stdout.strip()
+
+
+def measure_import(module, repeats=3):
+    """
+    Import a module in fresh interpreters.
+
+    Returns:
+        tuple: (best import time in seconds, heavy modules that got loaded)
+    """
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+        "print(elapsed, ','.join(heavy))\n"
+    )
+    timings = []
+    for _ in range(repeats):
+        elapsed, _, heavy = run_python(code).partition(' ')
+        timings.append(float(elapsed))
+    return min(timings), [name for name in heavy.split(',') if name]
+
+
+def test_utils_import_has_no_heavy_dependencies():
+    _, heavy = measure_import('ml.utils', repeats=1)
+    assert not heavy, f"import ml.utils loaded heavy modules: {heavy}"
+
+
+def test_utils_import_within_budget():
+    elapsed, _ = measure_import('ml.utils')
+    assert elapsed <= IMPORT_BUDGET_SECONDS, \
+        f"import ml.utils took {elapsed:.3f}s (budget {IMPORT_BUDGET_SECONDS:.3f}s)"
+
+
+def test_lazy_helpers_are_exposed():
+    missing = [name for name in LAZY_HELPER_DEPENDENCIES if importlib.util.find_spec(name) is None]
+    if missing:
+        pytest.skip(f"lazy helpers need {', '.join(missing)}")
+
+    output = run_python(
+        "import ml.utils as utils\n"
+        "names = ['plot_training_history', 'plot_confusion_matrix', "
+        "'visualize_prediction', 'convert_to_tflite', 'count_model_parameters']\n"
+        "print(all(callable(getattr(utils, name)) for name in names))\n"
+    )
+    assert output == 'True'
+
+
+def main():
+    """Run all checks and print a summary."""
+    tests = [
+        test_utils_import_has_no_heavy_dependencies,
+        test_utils_import_within_budget,
+        test_lazy_helpers_are_exposed,
+    ]
+
+    failed = skipped = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[PASS] {test.__name__}")
+        except pytest.skip.Exception as e:
+            skipped += 1
+            print(f"[SKIP] {test.__name__}: {e}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[FAIL] {test.__name__}: {e}")
+
+    print(f"\nTotal: {len(tests) - failed - skipped}/{len(tests)} tests passed, {skipped} skipped")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -67,6 +67,7 @@ public function store(Request $request, MLService $mlService): JsonResponse
                 'disease_id' => $disease?->id,
                 'all_predictions' => $mlResult['all_predictions'] ?? [],
                 'inference_time' => $mlResult['inference_time'] ?? null,
+                'timings' => $mlResult['timings'] ?? null,
             ]);
 
             Log::info('Prediction created successfully', [
@@ -21,6 +21,7 @@ class Prediction extends Model
         'disease_id',
         'all_predictions',
         'inference_time',
+        'timings',
     ];
 
     /**
@@ -34,6 +35,7 @@ protected function casts(): array
             'confidence' => 'float',
             'all_predictions' => 'array',
             'inference_time' => 'float',
+            'timings' => 'array',
         ];
     }
 
@@ -28,10 +28,27 @@ public function predict(UploadedFile $image): array
                 'image_size' => $image->getSize(),
             ]);
 
+            $startedAt = hrtime(true);
+
+            // Let the ML service drop the request once we would have given up on it
             $response = Http::timeout($timeout)
+                ->withHeaders([config('ml.deadline_header') => (string) ($timeout * 1000)])
                 ->attach('file', file_get_contents($image->getRealPath()), $image->getClientOriginalName())
                 ->post($serviceUrl . $endpoint);
 
+            $roundTripMs = (hrtime(true) - $startedAt) / 1e6;
+
+            if ($response->status() === 503 && $response->header('Retry-After') !== '') {
+                Log::warning('ML service overloaded', [
+                    'retry_after' => $response->header('Retry-After'),
+                ]);
+
+                throw new \Exception(
+                    'ML service is busy. Please try again in ' . $response->header('Retry-After') . ' second(s).',
+                    503
+                );
+            }
+
             if (!$response->successful()) {
                 Log::error('ML service returned error', [
                     'status' => $response->status(),
@@ -45,11 +62,16 @@ public function predict(UploadedFile $image): array
             }
 
             $result = $response->json();
+            $result['timings'] = $this->buildTimings(
+                $result['timings'] ?? $this->parseServerTiming($response->header('Server-Timing')),
+                $roundTripMs
+            );
 
             Log::info('Prediction received from ML service', [
                 'predicted_class' => $result['predicted_class'] ?? 'unknown',
                 'confidence' => $result['confidence'] ?? 0,
                 'inference_time' => $result['inference_time'] ?? 0,
+                'timings' => $result['timings'],
             ]);
 
             return $result;
@@ -72,6 +94,47 @@ public function predict(UploadedFile $image): array
         }
     }
 
+    /**
+     * Parse a Server-Timing header into stage durations.
+     *
+     * @param string|null $header e.g. "decode;dur=2.1, inference;dur=80.4, total;dur=90.2"
+     * @return array<string, float> Durations in milliseconds
+     */
+    protected function parseServerTiming(?string $header): array
+    {
+        $timings = [];
+
+        foreach (explode(',', (string) $header) as $metric) {
+            if (preg_match('/^\s*([\w-]+)\s*;.*\bdur=([\d.]+)/', $metric, $matches)) {
+                $timings[$matches[1]] = (float) $matches[2];
+            }
+        }
+
+        return $timings;
+    }
+
+    /**
+     * Add client-side timings to the ML service's stage timings.
+     *
+     * round_trip is the full HTTP call as seen from Laravel; network is the
+     * part spent outside the ML service (transfer, connection setup, proxies).
+     *
+     * @param array<string, float> $serverTimings Stage durations from the ML service (ms)
+     * @param float $roundTripMs
+     * @return array<string, float>
+     */
+    protected function buildTimings(array $serverTimings, float $roundTripMs): array
+    {
+        $timings = $serverTimings;
+        $timings['round_trip'] = round($roundTripMs, 3);
+
+        if (isset($serverTimings['total'])) {
+            $timings['network'] = round(max(0, $roundTripMs - $serverTimings['total']), 3);
+        }
+
+        return $timings;
+    }
+
     /**
      * Check if ML service is healthy.
      *
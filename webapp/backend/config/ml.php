@@ -15,6 +15,9 @@
 
     'timeout' => env('ML_SERVICE_TIMEOUT', 30),
 
+    // Sent with the timeout in ms so the ML service drops requests we gave up on
+    'deadline_header' => env('ML_SERVICE_DEADLINE_HEADER', 'X-Request-Timeout-Ms'),
+
     'endpoints' => [
         'predict' => '/predict',
         'health' => '/health',
@@ -0,0 +1,29 @@
+<?php
+
+use Illuminate\Database\Migrations\Migration;
+use Illuminate\Database\Schema\Blueprint;
+use Illuminate\Support\Facades\Schema;
+
+return new class extends Migration
+{
+    /**
+     * Run the migrations.
+     */
+    public function up(): void
+    {
+        Schema::table('predictions', function (Blueprint $table) {
+            // Per-stage latency in ms from the ML service plus round_trip/network
+            $table->json('timings')->nullable()->after('inference_time');
+        });
+    }
+
+    /**
+     * Reverse the migrations.
+     */
+    public function down(): void
+    {
+        Schema::table('predictions', function (Blueprint $table) {
+            $table->dropColumn('timings');
+        });
+    }
+};
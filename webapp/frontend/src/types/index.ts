@@ -45,6 +45,7 @@ export interface Prediction {
   disease?: Disease;
   all_predictions?: PredictionClass[];
   inference_time?: number;
+  timings?: Record<string, number> | null; // Per-stage latency in ms (ML service stages, round_trip, network)
   created_at: string;
   updated_at: string;
 }
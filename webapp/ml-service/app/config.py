@@ -5,7 +5,7 @@ Loads configuration from environment variables.
 """
 
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -19,16 +19,59 @@ class Settings(BaseSettings):
     # Model Configuration
     model_path: str = "models/MobileNetV2_20251027_200458_final.h5"
     class_labels_path: str = "models/class_labels.json"
+    model_metadata_path: Optional[str] = None  # Default: <model>.metadata.json next to the model
+    model_bundle_dir: Optional[str] = None  # Bundle from ml/training.py (replaces the paths above)
+    model_format: Optional[str] = None  # Force a bundle format (default: fastest available)
+    verify_model_hash: bool = True  # Check bundle files against the manifest hashes
 
     # Image Processing
     max_image_size: int = 10485760  # 10MB
+    max_image_pixels: int = 50_000_000  # Width x height; larger images are rejected (decompression bombs)
     allowed_extensions: List[str] = ["jpg", "jpeg", "png"]
-    image_size: int = 224  # MobileNetV2 input size
+    image_size: Optional[int] = None  # Overrides the resolution in the model metadata
+
+    # Mock Predictor (inference latency = per-batch + per-image cost, with jitter)
+    mock_latency_profile: Optional[str] = None  # Parameters JSON or ml/benchmark.py leaderboard.json
+    mock_batch_overhead_ms: float = 40.0
+    mock_per_item_ms: float = 60.0
+    mock_latency_jitter: float = 0.25  # Log-normal sigma (0 = constant latency)
+    mock_seed: Optional[int] = 42  # Unset for non-reproducible latencies and predictions
+
+    # Admission Control (per worker, /predict only)
+    max_concurrent_predictions: int = 8  # 0 disables admission control
+    max_queued_predictions: int = 32  # Further requests get 503
+    max_queue_wait_ms: float = 10000.0  # Longer waits get 503
+    overload_retry_after_seconds: int = 1  # Retry-After sent with 503
+    deadline_header: str = "X-Request-Timeout-Ms"  # Caller's remaining time budget in ms
+
+    # Threading (per worker process)
+    inference_threads: Optional[int] = None  # Intra-op threads (TensorFlow, TFLite, ONNX); default: runtime's choice
+    inter_op_threads: Optional[int] = None  # Independent ops run at once (TensorFlow, ONNX)
+    decode_threads: int = 40  # Threadpool for image decoding, preprocessing and model calls
+
+    # Monitoring
+    metrics_enabled: bool = True  # Prometheus metrics at /metrics
+    prediction_cache_size: int = 0  # Predictions cached by image hash (0 disables)
+    response_timings: bool = True  # Include the per-stage `timings` object in /predict responses
+
+    # Profiling (admin endpoints are disabled unless ADMIN_TOKEN is set)
+    admin_token: Optional[str] = None
+    slow_request_threshold_ms: float = 1000.0  # Log requests slower than this (0 disables)
+    slow_request_log_size: int = 100
+    profiler_interval_ms: float = 5.0
+    profiler_max_seconds: int = 60
 
     # Server Configuration
     host: str = "0.0.0.0"
     port: int = 8000
     workers: int = 1
+    pin_worker_cpus: bool = True  # app.server: pin each worker to its share of the CPUs
+    worker_cpus: Optional[str] = None  # app.server: explicit CPUs per worker, e.g. "0-3;4-7"
+
+    # gRPC (optional, needs grpcio; each worker serves it next to REST)
+    grpc_port: int = 0  # 0 disables
+    grpc_max_batch_size: int = 8  # Streamed images predicted in one model call
+    grpc_batch_window_ms: float = 0.0  # Wait for more streamed images (0: batch those already waiting)
 
     # Logging
     log_level: str = "INFO"
@@ -4,11 +4,16 @@ FastAPI ML Service
 Main application for plant disease prediction using MobileNetV2.
 """
 
+import asyncio
 import logging
+import os
+import secrets
 from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Optional
 
-from fastapi import FastAPI, File, UploadFile, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import Depends, FastAPI, Header, Query, Request, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
@@ -21,6 +26,13 @@ from app.models.prediction import (
 # MOCK MODE: Using simulated predictions (no TensorFlow dependency)
 # To revert to production: Change import to 'from app.services.predictor import predictor'
 from app.services.predictor_mock import predictor
+from app.services.image_upload import UploadRejected, read_image_upload
+from app.services.model_metadata import model_metadata
+from app.services.prediction_cache import prediction_cache
+from app.utils import metrics
+from app.utils.admission import AdmissionController, AdmissionMiddleware, deadline_exceeded
+from app.utils.profiler import SamplingProfiler, SlowRequestLog
+from app.utils.timing import RequestTimerMiddleware, request_timer, set_threadpool_size
 # from app.services.predictor import predictor  # Production mode (requires TensorFlow)
 # from app.services.model_loader import model_loader  # Not needed in mock mode
 
@@ -41,8 +53,12 @@ async def lifespan(app: FastAPI):
     """
     # Startup: Load model
     logger.info("Starting up ML service...")
+    set_threadpool_size(settings.decode_threads)
     try:
-        predictor.initialize()
+        # A pre-fork master (app.server) may have loaded the model already
+        if not predictor.is_initialized():
+            predictor.initialize()
+        metrics.set_model_info(model_metadata.model_info(predictor.class_labels))
         logger.info("ML service started successfully")
     except FileNotFoundError as e:
         logger.error(f"Model file not found: {str(e)}")
@@ -51,10 +67,23 @@ async def lifespan(app: FastAPI):
         logger.error(f"Failed to initialize predictor: {str(e)}")
         logger.error("Service will start but may not function correctly")
 
+    # Optional gRPC endpoint sharing the predictor, cache and admission control
+    grpc_server = None
+    if settings.grpc_port:
+        try:
+            from app.rpc.server import start_grpc_server
+            grpc_server = await start_grpc_server(predictor, admission_controller, settings.grpc_port)
+        except ImportError as e:
+            logger.error(f"GRPC_PORT is set but gRPC is not installed ({str(e)}); install grpcio and protobuf")
+        except Exception as e:
+            logger.error(f"Failed to start the gRPC server: {str(e)}")
+
     yield
 
     # Shutdown: Cleanup (if needed)
     logger.info("Shutting down ML service...")
+    if grpc_server is not None:
+        await grpc_server.stop(grace=5)
 
 
 # Initialize FastAPI app
@@ -74,6 +103,69 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Bounded concurrency and queue for /predict, applied before the upload is read
+admission_controller = None
+if settings.max_concurrent_predictions:
+    admission_controller = AdmissionController(
+        settings.max_concurrent_predictions,
+        settings.max_queued_predictions,
+        settings.max_queue_wait_ms / 1000
+    )
+    app.add_middleware(
+        AdmissionMiddleware,
+        controller=admission_controller,
+        paths=["/predict"],
+        deadline_header=settings.deadline_header,
+        retry_after=settings.overload_retry_after_seconds
+    )
+
+# Request counts and durations per endpoint (outermost, so it sees every response)
+if settings.metrics_enabled:
+    app.add_middleware(
+        metrics.MetricsMiddleware,
+        endpoints=["/", "/health", "/model-info", "/predict", "/metrics"]
+    )
+
+# Requests slower than SLOW_REQUEST_THRESHOLD_MS, with their stage breakdown
+slow_request_log = SlowRequestLog(settings.slow_request_threshold_ms, settings.slow_request_log_size)
+
+# Per-request stage timer and Server-Timing header
+app.add_middleware(RequestTimerMiddleware, slow_request_log=slow_request_log)
+
+# /predict reads its multipart body itself; documented here for /docs
+UPLOAD_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {
+                        "file": {"type": "string", "format": "binary", "description": "Image file (JPEG, PNG)"}
+                    }
+                }
+            }
+        }
+    }
+}
+
+# One profiling session per worker at a time
+profiler_lock = asyncio.Lock()
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """
+    Allow admin endpoints only with the configured X-Admin-Token.
+
+    Raises:
+        HTTPException: 404 if ADMIN_TOKEN is unset, 403 if the token is wrong
+    """
+    if not settings.admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, settings.admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
 
 @app.get("/", tags=["Root"])
 async def root():
@@ -86,6 +178,7 @@ async def root():
             "health": "/health",
             "predict": "/predict",
             "model_info": "/model-info",
+            "metrics": "/metrics",
             "docs": "/docs"
         }
     }
@@ -101,12 +194,15 @@ async def health_check():
     """
     Health check endpoint.
 
-    Returns the current status of the service and whether the model is loaded.
+    Returns the current status of the service, whether the model is loaded
+    and this worker's admission counts. Not subject to admission control.
     """
     return HealthResponse(
         status="healthy" if predictor.is_initialized() else "degraded",
         model_loaded=predictor.is_initialized(),
-        version=settings.app_version
+        version=settings.app_version,
+        in_flight=admission_controller.in_flight if admission_controller else None,
+        queued=admission_controller.queued if admission_controller else None
     )
 
 
@@ -132,14 +228,8 @@ async def get_model_info():
         )
 
     try:
-        # MOCK MODE: Return simulated model info
-        model_info = {
-            "model_name": "MobileNetV2",
-            "model_version": "20251027_200458_final",
-            "num_classes": 13,
-            "classes": predictor.class_labels,
-            "input_shape": [224, 224, 3]
-        }
+        # MOCK MODE: Describe the configured model without loading it
+        model_info = model_metadata.model_info(predictor.class_labels)
         # Production mode (requires TensorFlow):
         # model_info = model_loader.get_model_info()
         return ModelInfoResponse(**model_info)
@@ -153,9 +243,10 @@ async def get_model_info():
     "/predict",
     response_model=PredictionResponse,
     tags=["Prediction"],
-    summary="Predict plant disease from image"
+    summary="Predict plant disease from image",
+    openapi_extra=UPLOAD_REQUEST_BODY
 )
-async def predict_disease(file: UploadFile = File(...)):
+async def predict_disease(request: Request):
     """
     Predict plant disease from uploaded image.
 
@@ -164,15 +255,20 @@ async def predict_disease(file: UploadFile = File(...)):
     - Confidence score
     - All class predictions with confidence scores
     - Inference time
+    - Per-stage timings in milliseconds (also in the Server-Timing header)
+
+    The multipart upload (field `file`, JPEG or PNG) is streamed: oversized,
+    non-image and decompression-bomb uploads are rejected before the rest of
+    the body is read.
 
     Args:
-        file: Uploaded image file (JPEG, PNG)
+        request: Incoming request (carries the stage timer and the upload stream)
 
     Returns:
         PredictionResponse with prediction results
 
     Raises:
-        HTTPException: If prediction fails
+        HTTPException: If the upload is rejected or prediction fails
     """
     # Check if model is loaded
     if not predictor.is_initialized():
@@ -181,27 +277,55 @@ async def predict_disease(file: UploadFile = File(...)):
             detail="Model not loaded. Please contact the administrator."
         )
 
-    # Validate file type
-    if file.content_type not in ['image/jpeg', 'image/jpg', 'image/png']:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invalid file type: {file.content_type}. Only JPEG and PNG are supported."
-        )
+    timer = request_timer(request)
 
     try:
-        # Read file content
-        file_content = await file.read()
+        # Stream and check the upload
+        with timer.stage('read'):
+            upload = await read_image_upload(
+                request, 'file', settings.max_image_size, settings.max_image_pixels
+            )
+        # The checks ran while the upload streamed in
+        timer.split('read', 'validate', upload.validate_ns)
+    except UploadRejected as e:
+        logger.warning(f"Upload rejected ({e.status_code}): {e.detail}")
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
 
-        # Perform prediction
-        prediction_result = predictor.predict(file_content)
+    try:
+        # Identical uploads reuse the earlier prediction
+        cache_key = upload.digest
+        prediction_result = prediction_cache.get(cache_key)
 
-        logger.info(
-            f"Prediction: {prediction_result.predicted_class} "
-            f"({prediction_result.confidence:.4f}) "
-            f"in {prediction_result.inference_time:.3f}s"
-        )
+        if prediction_result is None:
+            # Nobody is waiting for the answer any more
+            if deadline_exceeded(request):
+                raise HTTPException(status_code=504, detail="Request deadline exceeded before inference")
+
+            # Perform prediction
+            metrics.queue_depth.inc()
+            try:
+                prediction_result = await predictor.predict_async(upload, timer)
+            finally:
+                metrics.queue_depth.dec()
+            prediction_cache.put(cache_key, prediction_result)
+
+            logger.info(
+                f"Prediction: {prediction_result.predicted_class} "
+                f"({prediction_result.confidence:.4f}) "
+                f"in {prediction_result.inference_time:.3f}s"
+            )
+
+        if settings.response_timings:
+            prediction_result = prediction_result.model_copy(update={'timings': timer.timings_ms()})
+
+        with timer.stage('serialise'):
+            body = prediction_result.model_dump_json(exclude_none=True)
 
-        return prediction_result
+        metrics.observe_stages(timer)
+        return Response(content=body, media_type="application/json")
+
+    except HTTPException:
+        raise
 
     except ValueError as e:
         # Validation or preprocessing errors
@@ -217,6 +341,83 @@ async def predict_disease(file: UploadFile = File(...)):
         )
 
 
+@app.get("/metrics", tags=["Monitoring"], summary="Prometheus metrics", include_in_schema=False)
+async def get_metrics():
+    """
+    Prometheus metrics: request counts by status, request and per-stage
+    prediction latency histograms, queue depth, batch sizes, prediction
+    cache hit rate, served model version and process RSS.
+    """
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.post(
+    "/admin/profile",
+    tags=["Admin"],
+    summary="Sample the running worker's Python stacks",
+    dependencies=[Depends(require_admin)],
+    include_in_schema=False
+)
+async def run_profiler(
+    seconds: float = Query(10.0, gt=0, description="Sampling duration"),
+    interval_ms: Optional[float] = Query(None, gt=0, description="Sampling interval (default from settings)")
+):
+    """
+    Profile the worker that receives this request for `seconds` and return
+    collapsed stacks (feed to flamegraph.pl, speedscope or inferno).
+
+    With several workers, each call profiles one of them; the worker's pid
+    is in the file name.
+
+    Raises:
+        HTTPException: If the duration is too long or a profile is already running
+    """
+    if seconds > settings.profiler_max_seconds:
+        raise HTTPException(
+            status_code=400,
+            detail=f"seconds must be at most {settings.profiler_max_seconds}"
+        )
+    if profiler_lock.locked():
+        raise HTTPException(status_code=409, detail="A profile is already running in this worker")
+
+    async with profiler_lock:
+        profiler = SamplingProfiler((interval_ms or settings.profiler_interval_ms) / 1000)
+        logger.info(f"Profiling worker {os.getpid()} for {seconds}s")
+        profiler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.stop()
+
+    filename = f"profile-{os.getpid()}-{datetime.now().strftime('%Y%m%d_%H%M%S')}.collapsed"
+    return PlainTextResponse(
+        profiler.collapsed(),
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Profile-Samples": str(profiler.sample_count)
+        }
+    )
+
+
+@app.get(
+    "/admin/slow-requests",
+    tags=["Admin"],
+    summary="Recent requests slower than the threshold",
+    dependencies=[Depends(require_admin)],
+    include_in_schema=False
+)
+async def get_slow_requests():
+    """Stage breakdown of the most recent slow requests in this worker."""
+    return {
+        "pid": os.getpid(),
+        "threshold_ms": settings.slow_request_threshold_ms,
+        "requests": slow_request_log.entries()
+    }
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler for unhandled errors."""
@@ -3,7 +3,7 @@ Pydantic models for prediction requests and responses.
 """
 
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 
 class ClassPrediction(BaseModel):
@@ -21,7 +21,15 @@ class PredictionResponse(BaseModel):
     all_predictions: List[ClassPrediction] = Field(
         ..., description="All class predictions sorted by confidence"
     )
-    inference_time: float = Field(..., description="Inference time in seconds")
+    inference_time: float = Field(..., description="Inference time in seconds (0 when cached)")
+    cached: Optional[bool] = Field(
+        None, description="True when answered from the prediction cache without running the model"
+    )
+    timings: Optional[Dict[str, float]] = Field(
+        None,
+        description="Per-stage durations in milliseconds (read, validate, decode, resize, "
+                    "queue_wait, inference, postprocess) and total; also sent as Server-Timing"
+    )
 
 
 class HealthResponse(BaseModel):
@@ -30,6 +38,8 @@ class HealthResponse(BaseModel):
     status: str = Field(..., description="Service status")
     model_loaded: bool = Field(..., description="Whether model is loaded")
     version: str = Field(..., description="Service version")
+    in_flight: Optional[int] = Field(None, description="Predictions being processed by this worker")
+    queued: Optional[int] = Field(None, description="Predictions waiting for admission in this worker")
 
 
 class ModelInfoResponse(BaseModel):
@@ -40,6 +50,8 @@ class ModelInfoResponse(BaseModel):
     num_classes: int = Field(..., description="Number of output classes")
     classes: List[str] = Field(..., description="List of class names")
     input_shape: List[int] = Field(..., description="Model input shape")
+    format: Optional[str] = Field(None, description="Served model format (keras, saved_model, tflite, onnx)")
+    content_hash: Optional[str] = Field(None, description="Content hash of the model bundle")
 
 
 class ErrorResponse(BaseModel):
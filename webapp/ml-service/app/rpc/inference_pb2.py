@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# source: app/rpc/inference.proto
+# Protobuf Python Version: 4.25.1
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x17\x61pp/rpc/inference.proto\x12\x0fplantdisease.v1\"5\n\x06Pixels\x12\x0e\n\x06height\x18\x01 \x01(\r\x12\r\n\x05width\x18\x02 \x01(\r\x12\x0c\n\x04\x64\x61ta\x18\x03 \x01(\x0c\"z\n\x0ePredictRequest\x12\x12\n\nrequest_id\x18\x01 \x01(\t\x12\x11\n\x07\x65ncoded\x18\x02 \x01(\x0cH\x00\x12)\n\x06pixels\x18\x03 \x01(\x0b\x32\x17.plantdisease.v1.PixelsH\x00\x12\r\n\x05top_k\x18\x04 \x01(\rB\x07\n\x05image\"4\n\nClassScore\x12\x12\n\nclass_name\x18\x01 \x01(\t\x12\x12\n\nconfidence\x18\x02 \x01(\x02\"\xc6\x02\n\x0fPredictResponse\x12\x12\n\nrequest_id\x18\x01 \x01(\t\x12\x17\n\x0fpredicted_class\x18\x02 \x01(\t\x12\x12\n\nconfidence\x18\x03 \x01(\x02\x12\x30\n\x0bpredictions\x18\x04 \x03(\x0b\x32\x1b.plantdisease.v1.ClassScore\x12\x16\n\x0einference_time\x18\x05 \x01(\x02\x12\x43\n\ntimings_ms\x18\x06 \x03(\x0b\x32/.plantdisease.v1.PredictResponse.TimingsMsEntry\x12\r\n\x05\x65rror\x18\x07 \x01(\t\x12\x12\n\nerror_code\x18\x08 \x01(\t\x12\x0e\n\x06\x63\x61\x63hed\x18\t \x01(\x08\x1a\x30\n\x0eTimingsMsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x02:\x02\x38\x01\x32\xb1\x01\n\tInference\x12L\n\x07Predict\x12\x1f.plantdisease.v1.PredictRequest\x1a .plantdisease.v1.PredictResponse\x12V\n\rPredictStream\x12\x1f.plantdisease.v1.PredictRequest\x1a .plantdisease.v1.PredictResponse(\x01\x30\x01\x62\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'app.rpc.inference_pb2', _globals)
+if _descriptor._USE_C_DESCRIPTORS == False:
+  DESCRIPTOR._options = None
+  _globals['_PREDICTRESPONSE_TIMINGSMSENTRY']._options = None
+  _globals['_PREDICTRESPONSE_TIMINGSMSENTRY']._serialized_options = b'8\001'
+  _globals['_PIXELS']._serialized_start=44
+  _globals['_PIXELS']._serialized_end=97
+  _globals['_PREDICTREQUEST']._serialized_start=99
+  _globals['_PREDICTREQUEST']._serialized_end=221
+  _globals['_CLASSSCORE']._serialized_start=223
+  _globals['_CLASSSCORE']._serialized_end=275
+  _globals['_PREDICTRESPONSE']._serialized_start=278
+  _globals['_PREDICTRESPONSE']._serialized_end=604
+  _globals['_PREDICTRESPONSE_TIMINGSMSENTRY']._serialized_start=556
+  _globals['_PREDICTRESPONSE_TIMINGSMSENTRY']._serialized_end=604
+  _globals['_INFERENCE']._serialized_start=607
+  _globals['_INFERENCE']._serialized_end=784
+# @@protoc_insertion_point(module_scope)
@@ -0,0 +1,104 @@
+# Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
+"""Client and server classes corresponding to protobuf-defined services."""
+import grpc
+
+from app.rpc import inference_pb2 as app_dot_rpc_dot_inference__pb2
+
+
+class InferenceStub(object):
+    """Missing associated documentation comment in .proto file."""
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.Predict = channel.unary_unary(
+                '/plantdisease.v1.Inference/Predict',
+                request_serializer=app_dot_rpc_dot_inference__pb2.PredictRequest.SerializeToString,
+                response_deserializer=app_dot_rpc_dot_inference__pb2.PredictResponse.FromString,
+                )
+        self.PredictStream = channel.stream_stream(
+                '/plantdisease.v1.Inference/PredictStream',
+                request_serializer=app_dot_rpc_dot_inference__pb2.PredictRequest.SerializeToString,
+                response_deserializer=app_dot_rpc_dot_inference__pb2.PredictResponse.FromString,
+                )
+
+
+class InferenceServicer(object):
+    """Missing associated documentation comment in .proto file."""
+
+    def Predict(self, request, context):
+        """One image, one prediction
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def PredictStream(self, request_iterator, context):
+        """Many images over one stream; requests that arrive together are
+        predicted in one model call. Responses come back in request order,
+        and a failed image gets a response with `error` set instead of ending
+        the stream.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_InferenceServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'Predict': grpc.unary_unary_rpc_method_handler(
+                    servicer.Predict,
+                    request_deserializer=app_dot_rpc_dot_inference__pb2.PredictRequest.FromString,
+                    response_serializer=app_dot_rpc_dot_inference__pb2.PredictResponse.SerializeToString,
+            ),
+            'PredictStream': grpc.stream_stream_rpc_method_handler(
+                    servicer.PredictStream,
+                    request_deserializer=app_dot_rpc_dot_inference__pb2.PredictRequest.FromString,
+                    response_serializer=app_dot_rpc_dot_inference__pb2.PredictResponse.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'plantdisease.v1.Inference', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+
+
+ # This class is part of an EXPERIMENTAL API.
+class Inference(object):
+    """Missing associated documentation comment in .proto file."""
+
+    @staticmethod
+    def Predict(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/plantdisease.v1.Inference/Predict',
+            app_dot_rpc_dot_inference__pb2.PredictRequest.SerializeToString,
+            app_dot_rpc_dot_inference__pb2.PredictResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def PredictStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(request_iterator, target, '/plantdisease.v1.Inference/PredictStream',
+            app_dot_rpc_dot_inference__pb2.PredictRequest.SerializeToString,
+            app_dot_rpc_dot_inference__pb2.PredictResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
@@ -0,0 +1,347 @@
+"""
+gRPC Inference Server
+
+Serves the Inference service of app/rpc/inference.proto next to the REST
+API, in the same process and event loop, so both share the predictor (one
+model copy), the prediction cache, admission control and metrics:
+
+1. Predict: one image per call
+2. PredictStream: images that are waiting on a stream are predicted in one
+   model call (predict_batch_async), up to GRPC_MAX_BATCH_SIZE images,
+   optionally waiting GRPC_BATCH_WINDOW_MS for more
+
+Images arrive as JPEG/PNG bytes, checked like REST uploads, or as pixels the
+caller has decoded, which skips decoding in the service. The gRPC deadline
+takes the place of the REST deadline header.
+
+Started from the app lifespan when GRPC_PORT is set. grpcio is imported
+only then, so it is not needed otherwise, and a pre-fork master never
+imports it (gRPC does not survive fork).
+"""
+
+import asyncio
+import logging
+from time import perf_counter, perf_counter_ns
+from typing import List, Optional, Tuple
+
+import grpc
+
+from app.config import settings
+from app.models.prediction import PredictionResponse
+from app.rpc import inference_pb2, inference_pb2_grpc
+from app.services.image_upload import MULTIPART_OVERHEAD, DecodedImage, ImageInput, ImageUpload, UploadRejected
+from app.services.prediction_cache import prediction_cache
+from app.utils import metrics
+from app.utils.admission import AdmissionController, AdmissionRejected
+from app.utils.timing import StageTimer
+
+logger = logging.getLogger(__name__)
+
+
+class PredictionFailed(Exception):
+    """A prediction failed; carries the gRPC status to return."""
+
+    def __init__(self, code: grpc.StatusCode, detail: str):
+        super().__init__(detail)
+        self.code = code
+        self.detail = detail
+
+
+def grpc_status(status_code: int) -> grpc.StatusCode:
+    """gRPC status for the HTTP status of a rejection."""
+    if status_code == 503:
+        return grpc.StatusCode.UNAVAILABLE
+    if status_code == 504:
+        return grpc.StatusCode.DEADLINE_EXCEEDED
+    if status_code < 500:
+        # Includes 413: the same image will always be too large
+        return grpc.StatusCode.INVALID_ARGUMENT
+    return grpc.StatusCode.INTERNAL
+
+
+def call_deadline(context) -> Optional[float]:
+    """perf_counter() deadline of a call, or None if the caller set none."""
+    remaining = context.time_remaining()
+    if remaining is None:
+        return None
+    return perf_counter() + remaining
+
+
+class InferenceService(inference_pb2_grpc.InferenceServicer):
+    """Predict and PredictStream on the shared predictor."""
+
+    def __init__(self, predictor, admission: Optional[AdmissionController] = None,
+                 max_batch_size: int = 8, batch_window: float = 0.0):
+        """
+        Args:
+            predictor: Predictor (or mock predictor) also serving REST
+            admission: Admission controller shared with REST (optional)
+            max_batch_size: Most streamed images per model call
+            batch_window: Seconds to wait for more streamed images (0: batch
+                only the images already waiting)
+        """
+        self.predictor = predictor
+        self.admission = admission
+        self.max_batch_size = max(1, max_batch_size)
+        self.batch_window = batch_window
+
+    def _image(self, request, timer: StageTimer) -> ImageInput:
+        """Checked image of a request (the 'read' and 'validate' stages, as for REST)."""
+        kind = request.WhichOneof('image')
+        if kind is None:
+            raise PredictionFailed(grpc.StatusCode.INVALID_ARGUMENT, "Request has no image (set encoded or pixels)")
+
+        try:
+            if kind == 'encoded':
+                with timer.stage('read'):
+                    upload = ImageUpload(settings.max_image_size, settings.max_image_pixels)
+                    upload.feed(request.encoded)
+                    upload.finish()
+                timer.split('read', 'validate', upload.validate_ns)
+                return upload
+
+            with timer.stage('validate'):
+                pixels = request.pixels
+                return DecodedImage(pixels.width, pixels.height, pixels.data, settings.max_image_pixels)
+        except UploadRejected as e:
+            raise PredictionFailed(grpc_status(e.status_code), e.detail)
+
+    async def _admit(self, timers: List[StageTimer], deadline: Optional[float]):
+        """Wait for an admission slot (one per model call)."""
+        start_ns = perf_counter_ns()
+        try:
+            if deadline is not None and deadline <= perf_counter():
+                raise AdmissionRejected('deadline', 504, "Request deadline exceeded")
+            await self.admission.acquire(deadline)
+        except AdmissionRejected as e:
+            metrics.admission_rejections.inc(e.reason)
+            raise PredictionFailed(grpc_status(e.status_code), e.detail)
+
+        # Only calls that actually queued get an 'admission' stage
+        waited_ns = perf_counter_ns() - start_ns
+        if waited_ns > 100_000:
+            for timer in timers:
+                timer.add('admission', waited_ns)
+
+    async def _predict(self, images: List[ImageInput], timers: List[StageTimer],
+                       deadline: Optional[float]) -> List[PredictionResponse]:
+        """
+        Predict images with one model call, skipping cached ones.
+
+        Raises:
+            PredictionFailed: If the model is not loaded, the call is not
+                admitted, or any image fails
+        """
+        if not self.predictor.is_initialized():
+            raise PredictionFailed(grpc.StatusCode.UNAVAILABLE, "Model not loaded")
+
+        keys = [image.digest for image in images]
+        results = [prediction_cache.get(key) for key in keys]
+        misses = [index for index, result in enumerate(results) if result is None]
+        if not misses:
+            return results
+
+        if self.admission is not None:
+            await self._admit(timers, deadline)
+        try:
+            # Nobody is waiting for the answer any more
+            if deadline is not None and perf_counter() > deadline:
+                raise PredictionFailed(grpc.StatusCode.DEADLINE_EXCEEDED,
+                                       "Request deadline exceeded before inference")
+
+            metrics.queue_depth.inc(amount=len(misses))
+            try:
+                predicted = await self.predictor.predict_batch_async(
+                    [images[index] for index in misses], [timers[index] for index in misses]
+                )
+            finally:
+                metrics.queue_depth.dec(amount=len(misses))
+        except ValueError as e:
+            raise PredictionFailed(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+        except PredictionFailed:
+            raise
+        except Exception as e:
+            logger.error(f"gRPC prediction error: {str(e)}", exc_info=True)
+            raise PredictionFailed(grpc.StatusCode.INTERNAL, f"Prediction failed: {str(e)}")
+        finally:
+            if self.admission is not None:
+                self.admission.release()
+
+        for index, result in zip(misses, predicted):
+            prediction_cache.put(keys[index], result)
+            results[index] = result
+        return results
+
+    def _response(self, request, result: PredictionResponse, timer: StageTimer):
+        """PredictResponse message for a prediction."""
+        timings = timer.timings_ms() if settings.response_timings else None
+
+        with timer.stage('serialise'):
+            predictions = result.all_predictions[:request.top_k or None]
+            response = inference_pb2.PredictResponse(
+                request_id=request.request_id,
+                predicted_class=result.predicted_class,
+                confidence=result.confidence,
+                predictions=[
+                    inference_pb2.ClassScore(class_name=p.class_name, confidence=p.confidence)
+                    for p in predictions
+                ],
+                inference_time=result.inference_time,
+                timings_ms=timings,
+                cached=bool(result.cached)
+            )
+
+        metrics.observe_stages(timer)
+        return response
+
+    async def Predict(self, request, context):
+        """One image, one prediction."""
+        timer = StageTimer()
+        try:
+            image = self._image(request, timer)
+            result, = await self._predict([image], [timer], call_deadline(context))
+        except PredictionFailed as e:
+            metrics.grpc_predictions.inc('Predict', e.code.name)
+            logger.warning(f"gRPC Predict failed ({e.code.name}): {e.detail}")
+            await context.abort(e.code, e.detail)
+
+        metrics.grpc_predictions.inc('Predict', 'OK')
+        return self._response(request, result, timer)
+
+    async def PredictStream(self, request_iterator, context):
+        """Predict streamed images in batches, answering in request order."""
+        deadline = call_deadline(context)
+        # Bounded, so a fast sender is slowed down by gRPC flow control
+        pending: asyncio.Queue = asyncio.Queue(maxsize=2 * self.max_batch_size)
+        reader = asyncio.create_task(self._read_stream(request_iterator, pending))
+
+        try:
+            finished = False
+            while not finished:
+                batch, finished = await self._next_batch(pending)
+                if batch:
+                    for response in await self._predict_stream_batch(batch, deadline):
+                        yield response
+        finally:
+            reader.cancel()
+
+    async def _read_stream(self, request_iterator, pending: asyncio.Queue):
+        try:
+            async for request in request_iterator:
+                await pending.put(request)
+        finally:
+            await pending.put(None)
+
+    async def _next_batch(self, pending: asyncio.Queue) -> Tuple[list, bool]:
+        """
+        Next requests to predict together.
+
+        Returns:
+            (requests, whether the stream has ended)
+        """
+        batch = []
+        request = await pending.get()
+        window_end = perf_counter() + self.batch_window
+
+        while request is not None:
+            batch.append(request)
+            if len(batch) >= self.max_batch_size:
+                return batch, False
+
+            try:
+                request = pending.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = window_end - perf_counter()
+                if remaining <= 0:
+                    return batch, False
+                try:
+                    request = await asyncio.wait_for(pending.get(), remaining)
+                except asyncio.TimeoutError:
+                    return batch, False
+
+        return batch, True
+
+    async def _predict_stream_batch(self, requests: list, deadline: Optional[float]) -> list:
+        """Responses for a batch of streamed requests; failures become error responses."""
+        timers = [StageTimer() for _ in requests]
+        outcomes = []
+        for request, timer in zip(requests, timers):
+            try:
+                outcomes.append(self._image(request, timer))
+            except PredictionFailed as e:
+                outcomes.append(e)
+
+        valid = [index for index, outcome in enumerate(outcomes) if not isinstance(outcome, PredictionFailed)]
+        if valid:
+            results = await self._predict_isolated(
+                [outcomes[index] for index in valid], [timers[index] for index in valid], deadline
+            )
+            for index, result in zip(valid, results):
+                outcomes[index] = result
+
+        responses = []
+        for request, timer, outcome in zip(requests, timers, outcomes):
+            if isinstance(outcome, PredictionFailed):
+                metrics.grpc_predictions.inc('PredictStream', outcome.code.name)
+                responses.append(inference_pb2.PredictResponse(
+                    request_id=request.request_id, error=outcome.detail, error_code=outcome.code.name
+                ))
+            else:
+                metrics.grpc_predictions.inc('PredictStream', 'OK')
+                responses.append(self._response(request, outcome, timer))
+        return responses
+
+    async def _predict_isolated(self, images: List[ImageInput], timers: List[StageTimer],
+                                deadline: Optional[float]) -> list:
+        """
+        Predict a batch; if one bad image fails the model call, predict the
+        images one by one so only that image fails.
+
+        Returns:
+            PredictionResponse or PredictionFailed per image
+        """
+        try:
+            return await self._predict(images, timers, deadline)
+        except PredictionFailed as e:
+            if len(images) == 1 or e.code != grpc.StatusCode.INVALID_ARGUMENT:
+                return [e] * len(images)
+
+        results = []
+        for image, timer in zip(images, timers):
+            try:
+                results.extend(await self._predict([image], [timer], deadline))
+            except PredictionFailed as e:
+                results.append(e)
+        return results
+
+
+async def start_grpc_server(predictor, admission: Optional[AdmissionController], port: int) -> grpc.aio.Server:
+    """
+    Start the gRPC server on the running event loop.
+
+    Every pre-fork worker binds the same port (SO_REUSEPORT), and the kernel
+    spreads connections between them.
+
+    Args:
+        predictor: Predictor shared with REST
+        admission: Admission controller shared with REST (optional)
+        port: Port to listen on
+
+    Returns:
+        Started server (stop it with `await server.stop(grace)`)
+    """
+    server = grpc.aio.server(options=[
+        ('grpc.max_receive_message_length', settings.max_image_size + MULTIPART_OVERHEAD),
+        ('grpc.so_reuseport', 1)
+    ])
+    inference_pb2_grpc.add_InferenceServicer_to_server(
+        InferenceService(predictor, admission, settings.grpc_max_batch_size,
+                         settings.grpc_batch_window_ms / 1000),
+        server
+    )
+
+    host = f"[{settings.host}]" if ':' in settings.host else settings.host
+    server.add_insecure_port(f"{host}:{port}")
+    await server.start()
+    logger.info(f"✓ gRPC server listening on {host}:{port}")
+    return server
@@ -0,0 +1,278 @@
+"""
+Pre-fork Server
+
+Runs the ML service with several worker processes that share one listening
+socket and, where the runtime allows it, one copy of the model:
+
+1. The master imports the app and preloads the model (see
+   Predictor.preload), then opens the socket.
+2. Workers are forked from the master, so the imported modules and the
+   preloaded model are shared copy-on-write instead of loaded per worker.
+   A TFLite interpreter is shared only when every worker runs it on one
+   thread; with more threads the master shares the model bytes and each
+   worker builds its own interpreter from them.
+3. Each worker is pinned to its own share of the CPUs (or to the CPUs
+   listed in WORKER_CPUS), so N workers do not run N full-size thread pools
+   on the same cores. Unless INFERENCE_THREADS is set, a pinned worker's
+   model runtime uses one thread per CPU it is pinned to; an unpinned
+   worker's runtime picks its own thread count.
+4. The master restarts workers that die and logs the RSS and PSS of every
+   worker (PSS counts shared pages once across workers).
+
+Usage:
+    python -m app.server --workers 4
+    WORKERS=4 PIN_WORKER_CPUS=false python -m app.server
+    WORKERS=2 WORKER_CPUS="0-3;4-7" python -m app.server
+"""
+
+import argparse
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Dict, List, Optional
+
+import uvicorn
+
+from app.config import settings
+from app.main import app, predictor
+from app.utils.metrics import memory_rollup
+
+logger = logging.getLogger(__name__)
+
+# Seconds between restarts of a crashing worker slot
+RESTART_DELAY = 1.0
+
+
+def worker_cpus(index: int, workers: int, cpus: List[int]) -> List[int]:
+    """
+    CPUs for a worker: an even, contiguous share of the available CPUs.
+
+    With more workers than CPUs, workers share CPUs round-robin.
+    """
+    if workers >= len(cpus):
+        return [cpus[index % len(cpus)]]
+
+    share, extra = divmod(len(cpus), workers)
+    start = index * share + min(index, extra)
+    return cpus[start:start + share + (1 if index < extra else 0)]
+
+
+def parse_cpu_list(spec: str) -> List[int]:
+    """CPUs of a list like "0-3,6" (the format of taskset and cgroups)."""
+    cpus = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition('-')
+        cpus.extend(range(int(first), int(last or first) + 1))
+    return cpus
+
+
+def parse_worker_cpus(spec: Optional[str]) -> List[List[int]]:
+    """
+    Per-worker CPU lists from WORKER_CPUS ("0-3;4-7": worker 0 gets CPUs 0-3,
+    worker 1 gets 4-7; with more workers than lists, the lists repeat).
+
+    Raises:
+        ValueError: If a list is empty or malformed
+    """
+    if not spec:
+        return []
+    try:
+        lists = [parse_cpu_list(part) for part in spec.split(';')]
+    except ValueError:
+        raise ValueError(f"Malformed WORKER_CPUS={spec!r} (expected e.g. \"0-3;4-7\")") from None
+    if not all(lists):
+        raise ValueError(f"Empty CPU list in WORKER_CPUS={spec!r}")
+    return lists
+
+
+def create_socket(host: str, port: int) -> socket.socket:
+    """Listening socket inherited by all workers."""
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def memory_report(pids: Dict[int, int]) -> str:
+    """One line per worker with RSS and PSS, plus the totals."""
+    lines = [f"{'worker':<8}{'pid':>8}{'rss_mb':>10}{'pss_mb':>10}{'shared_mb':>11}"]
+    total_rss = total_pss = 0
+
+    for index, pid in sorted((index, pid) for pid, index in pids.items()):
+        rollup = memory_rollup(pid)
+        rss, pss = rollup.get('Rss', 0), rollup.get('Pss', 0)
+        shared = rollup.get('Shared_Clean', 0) + rollup.get('Shared_Dirty', 0)
+        total_rss += rss
+        total_pss += pss
+        lines.append(f"{index:<8}{pid:>8}{rss / 2**20:>10.1f}{pss / 2**20:>10.1f}{shared / 2**20:>11.1f}")
+
+    master = memory_rollup()
+    lines.append(f"{'master':<8}{os.getpid():>8}{master.get('Rss', 0) / 2**20:>10.1f}"
+                 f"{master.get('Pss', 0) / 2**20:>10.1f}")
+    lines.append(f"{'total':<8}{'':>8}{total_rss / 2**20:>10.1f}{total_pss / 2**20:>10.1f}"
+                 f"  (workers; PSS is the real footprint)")
+    return '\n'.join(lines)
+
+
+class PreforkServer:
+    """Master process forking and supervising uvicorn workers."""
+
+    def __init__(self, workers: int, host: str, port: int, pin_cpus: bool,
+                 memory_report_interval: float, cpu_lists: Optional[List[List[int]]] = None):
+        self.workers = workers
+        self.host = host
+        self.port = port
+        self.pin_cpus = pin_cpus
+        self.cpu_lists = cpu_lists or []
+        self.memory_report_interval = memory_report_interval
+        self.cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else []
+        self.children: Dict[int, int] = {}  # pid -> worker index
+        self.sock: Optional[socket.socket] = None
+        self.stopping = False
+
+    def pinned_cpus(self, index: int) -> Optional[List[int]]:
+        """CPUs a worker is pinned to (None if it is not pinned)."""
+        if self.cpu_lists:
+            return self.cpu_lists[index % len(self.cpu_lists)]
+        if self.pin_cpus and self.cpus:
+            return worker_cpus(index, self.workers, self.cpus)
+        return None
+
+    def inference_threads(self, index: int) -> Optional[int]:
+        """Model runtime threads of a worker (None: the runtime's own choice)."""
+        if settings.inference_threads is not None:
+            return settings.inference_threads
+        cpus = self.pinned_cpus(index)
+        return len(cpus) if cpus else None
+
+    def run_worker(self, index: int):
+        """Worker process body: pin, then serve the shared socket."""
+        cpus = self.pinned_cpus(index)
+        if cpus:
+            os.sched_setaffinity(0, cpus)
+            logger.info(f"Worker {index} (pid {os.getpid()}) pinned to CPUs {cpus}")
+            # One runtime thread per CPU the worker may use
+            if settings.inference_threads is None:
+                settings.inference_threads = len(cpus)
+
+        config = uvicorn.Config(app, log_level=settings.log_level.lower(), lifespan='on')
+        uvicorn.Server(config).run(sockets=[self.sock])
+
+    def spawn(self, index: int):
+        pid = os.fork()
+        if pid == 0:
+            # Child: default signal handling (uvicorn installs its own)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            exit_code = 0
+            try:
+                self.run_worker(index)
+            except BaseException:
+                logger.exception(f"Worker {index} crashed")
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+        self.children[pid] = index
+
+    def stop(self, signum, frame):
+        logger.info(f"Received signal {signum}, stopping {len(self.children)} workers...")
+        self.stopping = True
+        for pid in self.children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        # Load once in the master so forked workers share the memory
+        single_threaded = all(self.inference_threads(index) == 1 for index in range(self.workers))
+        try:
+            if predictor.preload(single_threaded):
+                logger.info("✓ Model loaded in the master, shared copy-on-write with workers")
+        except Exception as e:
+            logger.error(f"Model preload failed ({e}); workers will load the model themselves")
+
+        self.sock = create_socket(self.host, self.port)
+        logger.info(f"Pre-fork master {os.getpid()} listening on {self.host}:{self.port} "
+                    f"with {self.workers} workers")
+
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        for index in range(self.workers):
+            self.spawn(index)
+
+        next_report = time.monotonic() + min(10.0, self.memory_report_interval or 10.0)
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+
+            if pid:
+                index = self.children.pop(pid)
+                if not self.stopping:
+                    logger.warning(f"Worker {index} (pid {pid}) exited with status {status}, restarting")
+                    time.sleep(RESTART_DELAY)
+                    self.spawn(index)
+                continue
+
+            if self.memory_report_interval and time.monotonic() >= next_report and not self.stopping:
+                logger.info(f"Worker memory:\n{memory_report(self.children)}")
+                next_report = time.monotonic() + self.memory_report_interval
+
+            time.sleep(0.2)
+
+        self.sock.close()
+        logger.info("All workers stopped")
+
+
+def main():
+    """Start the pre-fork server."""
+    parser = argparse.ArgumentParser(description="Run the ML service with pre-forked workers")
+    parser.add_argument('--workers', type=int, default=settings.workers, help='Worker processes')
+    parser.add_argument('--host', type=str, default=settings.host, help='Bind address')
+    parser.add_argument('--port', type=int, default=settings.port, help='Bind port')
+    parser.add_argument('--no-pin', action='store_true', help='Do not pin workers to CPUs')
+    parser.add_argument('--worker-cpus', type=str, default=settings.worker_cpus,
+                        help='Explicit CPUs per worker, e.g. "0-3;4-7" (overrides the even split)')
+    parser.add_argument('--memory-report-interval', type=float, default=300.0,
+                        help='Seconds between worker memory reports (0 disables)')
+    args = parser.parse_args()
+
+    if not hasattr(os, 'fork'):
+        # No fork (Windows): a single in-process worker
+        uvicorn.run(app, host=args.host, port=args.port, log_level=settings.log_level.lower())
+        return
+
+    try:
+        cpu_lists = parse_worker_cpus(args.worker_cpus)
+    except ValueError as e:
+        parser.error(str(e))
+    if cpu_lists:
+        if not hasattr(os, 'sched_setaffinity'):
+            parser.error("--worker-cpus is not supported on this platform")
+        unavailable = {cpu for cpus in cpu_lists for cpu in cpus} - os.sched_getaffinity(0)
+        if unavailable:
+            parser.error(f"CPUs {sorted(unavailable)} in --worker-cpus are not available to this process")
+
+    PreforkServer(
+        workers=max(1, args.workers),
+        host=args.host,
+        port=args.port,
+        pin_cpus=settings.pin_worker_cpus and not args.no_pin,
+        memory_report_interval=args.memory_report_interval,
+        cpu_lists=cpu_lists
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
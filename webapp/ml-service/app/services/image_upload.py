@@ -0,0 +1,326 @@
+"""
+Streaming Image Upload
+
+Reads a multipart image upload from the request stream chunk by chunk
+instead of buffering it first, so bad uploads are rejected as soon as the
+evidence arrives:
+
+1. Content-Length above the byte limit: before reading anything (413)
+2. Byte limit exceeded while streaming: reading stops at once (413)
+3. First bytes are not JPEG or PNG magic: after the first chunk (400)
+4. Width x height above MAX_IMAGE_PIXELS (decompression bomb): as soon as the
+   image header has arrived (413)
+
+The file part is written into one receive buffer and hashed as it streams.
+Pillow cannot decode JPEG or PNG incrementally (ImageFile.Parser buffers
+both formats until the end), so the image is decoded once from that buffer
+without copying it.
+
+The time spent in the checks (3, 4 and the final check) is kept in
+`validate_ns`, so callers can report it as a 'validate' stage separate from
+reading.
+"""
+
+import hashlib
+import logging
+import warnings
+from io import BytesIO
+from time import perf_counter_ns
+from typing import Optional, Tuple, Union
+
+from multipart.multipart import MultipartParser, parse_options_header
+from PIL import Image, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+MAGIC_BYTES = {
+    'JPEG': b'\xff\xd8\xff',
+    'PNG': b'\x89PNG\r\n\x1a\n'
+}
+ALLOWED_CONTENT_TYPES = ('image/jpeg', 'image/jpg', 'image/png')
+
+# Multipart boundaries, part headers and small form fields
+MULTIPART_OVERHEAD = 64 * 1024
+# Give up looking for the dimensions (EXIF and ICC data come first in JPEGs)
+MAX_HEADER_BYTES = 1024 * 1024
+
+
+class UploadRejected(Exception):
+    """An upload was rejected; carries the HTTP status to return."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class ImageUpload:
+    """An uploaded image file, checked while it streams in."""
+
+    def __init__(self, max_bytes: int, max_pixels: int, filename: Optional[str] = None):
+        """
+        Args:
+            max_bytes: Largest accepted file size
+            max_pixels: Largest accepted width x height
+            filename: Client file name
+        """
+        self.max_bytes = max_bytes
+        self.max_pixels = max_pixels
+        self.filename = filename
+        self.size = 0
+        self.format: Optional[str] = None
+        self.dimensions: Optional[Tuple[int, int]] = None
+        self.validate_ns = 0  # Time spent in the format, dimension and final checks
+        self._head = b''
+        self._buffer = BytesIO()
+        self._hash = hashlib.blake2b(digest_size=16)
+
+    @property
+    def digest(self) -> bytes:
+        """BLAKE2b digest of the file (the prediction cache key)."""
+        return self._hash.digest()
+
+    def feed(self, data) -> None:
+        """
+        Append a chunk of the file.
+
+        Raises:
+            UploadRejected: If the file is too large, not JPEG/PNG, or has too many pixels
+        """
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise UploadRejected(
+                413, f"Image size exceeds maximum of {self.max_bytes / 1024 / 1024}MB"
+            )
+
+        if len(self._head) < 8:
+            self._head += bytes(data[:8 - len(self._head)])
+        self._buffer.write(data)
+        self._hash.update(data)
+
+        if self.dimensions is None:
+            start_ns = perf_counter_ns()
+            try:
+                if self.format is None:
+                    self._sniff_format()
+                if self.format is not None:
+                    self._sniff_dimensions()
+            finally:
+                self.validate_ns += perf_counter_ns() - start_ns
+
+    def _sniff_format(self):
+        for image_format, magic in MAGIC_BYTES.items():
+            if self._head.startswith(magic):
+                self.format = image_format
+                return
+            if magic.startswith(self._head):
+                return  # Too few bytes to tell yet
+        raise UploadRejected(400, "Invalid file type. Only JPEG and PNG are supported.")
+
+    def _open(self) -> Image.Image:
+        """Open the buffered bytes (lazily: only the header is parsed)."""
+        self._buffer.seek(0)
+        with warnings.catch_warnings():
+            # Checked against max_pixels instead
+            warnings.simplefilter('ignore', Image.DecompressionBombWarning)
+            return Image.open(self._buffer, formats=[self.format])
+
+    def _sniff_dimensions(self):
+        position = self._buffer.tell()
+        try:
+            self.dimensions = self._open().size
+        except Image.DecompressionBombError as e:
+            raise UploadRejected(413, f"Image dimensions too large: {e}")
+        except (UnidentifiedImageError, OSError, SyntaxError):
+            # Header not complete yet
+            if self.size > MAX_HEADER_BYTES:
+                raise UploadRejected(400, "Invalid image file: no image header found")
+            return
+        finally:
+            self._buffer.seek(position)
+
+        width, height = self.dimensions
+        if width * height > self.max_pixels:
+            raise UploadRejected(
+                413, f"Image dimensions {width}x{height} exceed the maximum of {self.max_pixels} pixels"
+            )
+
+    def finish(self):
+        """
+        Check the complete upload.
+
+        Raises:
+            UploadRejected: If the file is empty or its header never arrived
+        """
+        start_ns = perf_counter_ns()
+        try:
+            if not self.size:
+                raise UploadRejected(400, "Empty file")
+            if self.format is None or self.dimensions is None:
+                raise UploadRejected(400, "Invalid image file: incomplete image header")
+        finally:
+            self.validate_ns += perf_counter_ns() - start_ns
+
+    def decode(self) -> Image.Image:
+        """
+        Decode the image to RGB from the receive buffer.
+
+        Raises:
+            ValueError: If the image data is corrupt or truncated
+        """
+        try:
+            image = self._open()
+            if image.mode != 'RGB':
+                return image.convert('RGB')
+            image.load()
+            return image
+        except Exception as e:
+            raise ValueError(f"Invalid image file: {str(e)}")
+
+
+class DecodedImage:
+    """RGB pixels decoded by the caller (gRPC tensor input), checked on creation."""
+
+    def __init__(self, width: int, height: int, pixels: bytes, max_pixels: int):
+        """
+        Args:
+            width: Image width
+            height: Image height
+            pixels: Row-major RGB bytes (height x width x 3, uint8)
+            max_pixels: Largest accepted width x height
+
+        Raises:
+            UploadRejected: If the shape is empty or too large, or does not match the data
+        """
+        if width <= 0 or height <= 0:
+            raise UploadRejected(400, f"Invalid tensor shape {height}x{width}x3")
+        if width * height > max_pixels:
+            raise UploadRejected(
+                413, f"Image dimensions {width}x{height} exceed the maximum of {max_pixels} pixels"
+            )
+        if len(pixels) != width * height * 3:
+            raise UploadRejected(
+                400, f"Tensor data has {len(pixels)} bytes, expected {height}x{width}x3 = {width * height * 3}"
+            )
+        self.dimensions = (width, height)
+        self.pixels = pixels
+
+    @property
+    def digest(self) -> bytes:
+        """BLAKE2b digest of the shape and pixels (the prediction cache key)."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(b'%dx%d:' % self.dimensions)
+        digest.update(self.pixels)
+        return digest.digest()
+
+    def decode(self) -> Image.Image:
+        """The pixels as an RGB image (shares the buffer, no copy)."""
+        return Image.frombuffer('RGB', self.dimensions, self.pixels, 'raw', 'RGB', 0, 1)
+
+
+# What the predictors accept: raw bytes, an upload checked while streaming,
+# or pixels decoded by the caller
+ImageInput = Union[bytes, ImageUpload, DecodedImage]
+# Inputs already validated, so the predictors only decode them
+CHECKED_INPUTS = (ImageUpload, DecodedImage)
+
+
+class _MultipartImageReader:
+    """python-multipart callbacks routing one file field into an ImageUpload."""
+
+    def __init__(self, field: str, max_bytes: int, max_pixels: int):
+        self.field = field
+        self.max_bytes = max_bytes
+        self.max_pixels = max_pixels
+        self.upload: Optional[ImageUpload] = None
+        self._headers = {}
+        self._header_field = b''
+        self._header_value = b''
+        self._target: Optional[ImageUpload] = None
+
+    def callbacks(self) -> dict:
+        return {
+            'on_part_begin': self.on_part_begin,
+            'on_header_field': self.on_header_field,
+            'on_header_value': self.on_header_value,
+            'on_header_end': self.on_header_end,
+            'on_headers_finished': self.on_headers_finished,
+            'on_part_data': self.on_part_data
+        }
+
+    def on_part_begin(self):
+        self._headers = {}
+        self._target = None
+
+    def on_header_field(self, data, start, end):
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data, start, end):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = self._header_value = b''
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b'content-disposition', b''))
+        if options.get(b'name', b'').decode('latin-1') != self.field or self.upload is not None:
+            return
+
+        content_type = self._headers.get(b'content-type', b'').decode('latin-1').lower()
+        if content_type not in ALLOWED_CONTENT_TYPES:
+            raise UploadRejected(
+                400, f"Invalid file type: {content_type or 'unknown'}. Only JPEG and PNG are supported."
+            )
+
+        filename = options.get(b'filename')
+        self.upload = self._target = ImageUpload(
+            self.max_bytes, self.max_pixels, filename.decode('utf-8', 'replace') if filename else None
+        )
+
+    def on_part_data(self, data, start, end):
+        if self._target is not None:
+            self._target.feed(memoryview(data)[start:end])
+
+
+async def read_image_upload(request, field: str, max_bytes: int, max_pixels: int) -> ImageUpload:
+    """
+    Stream a multipart/form-data upload and return its image file.
+
+    Args:
+        request: Starlette request whose body has not been read
+        field: Form field holding the image
+        max_bytes: Largest accepted file size
+        max_pixels: Largest accepted width x height
+
+    Returns:
+        ImageUpload with the complete, checked file (not decoded yet)
+
+    Raises:
+        UploadRejected: 400 (not multipart, not JPEG/PNG, corrupt header),
+            413 (too many bytes or pixels), 422 (field missing)
+    """
+    content_type, options = parse_options_header(request.headers.get('content-type', ''))
+    if content_type != b'multipart/form-data' or b'boundary' not in options:
+        raise UploadRejected(400, f"Expected a multipart/form-data upload with a '{field}' field")
+
+    max_body = max_bytes + MULTIPART_OVERHEAD
+    content_length = request.headers.get('content-length')
+    if content_length and content_length.isdigit() and int(content_length) > max_body:
+        raise UploadRejected(413, f"Image size exceeds maximum of {max_bytes / 1024 / 1024}MB")
+
+    reader = _MultipartImageReader(field, max_bytes, max_pixels)
+    parser = MultipartParser(options[b'boundary'], reader.callbacks())
+
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > max_body:
+            raise UploadRejected(413, f"Image size exceeds maximum of {max_bytes / 1024 / 1024}MB")
+        parser.write(chunk)
+    parser.finalize()
+
+    if reader.upload is None:
+        raise UploadRejected(422, f"Missing file field '{field}'")
+    reader.upload.finish()
+    return reader.upload
@@ -0,0 +1,134 @@
+"""
+Inference Latency Model
+
+Models the time of one model call as a fixed per-batch cost plus a per-image
+cost, with multiplicative log-normal jitter:
+
+    latency(n) = (batch_overhead_ms + per_item_ms * n) * exp(N(0, jitter))
+
+The mock predictor sleeps for this long instead of running the model, so
+worker counts and batching parameters can be planned without TensorFlow.
+The parameters can be fitted from ml/benchmark.py results: the throughput
+at each batch size gives the time per call, and the spread between the
+single-image p50 and p99 gives the jitter.
+"""
+
+import json
+import logging
+import math
+import random
+from pathlib import Path
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Standard normal quantile of the 99th percentile
+Z_99 = 2.326
+
+
+class LatencyModel:
+    """Seeded latency model for batched model calls."""
+
+    def __init__(self, batch_overhead_ms: float, per_item_ms: float,
+                 jitter: float = 0.0, seed: Optional[int] = None):
+        """
+        Args:
+            batch_overhead_ms: Fixed cost of a model call
+            per_item_ms: Additional cost per image in the batch
+            jitter: Log-normal sigma of the multiplicative noise (0 = none)
+            seed: Random seed (None = not reproducible)
+        """
+        self.batch_overhead_ms = batch_overhead_ms
+        self.per_item_ms = per_item_ms
+        self.jitter = jitter
+        self.rng = random.Random(seed)
+
+    def median_ms(self, batch_size: int) -> float:
+        """Median latency of a call with `batch_size` images."""
+        return self.batch_overhead_ms + self.per_item_ms * batch_size
+
+    def sample(self, batch_size: int) -> float:
+        """Draw the latency of one call in seconds."""
+        latency_ms = self.median_ms(batch_size)
+        if self.jitter:
+            latency_ms *= self.rng.lognormvariate(0.0, self.jitter)
+        return latency_ms / 1000
+
+    def describe(self) -> dict:
+        return {
+            "batch_overhead_ms": round(self.batch_overhead_ms, 3),
+            "per_item_ms": round(self.per_item_ms, 3),
+            "jitter": round(self.jitter, 4)
+        }
+
+    @classmethod
+    def from_benchmark(cls, result: dict, seed: Optional[int] = None) -> 'LatencyModel':
+        """
+        Fit the model to one ml/benchmark.py result.
+
+        Time per call at batch size n is n / throughput(n); the single-image
+        p50 latency is one more point at n = 1. A least-squares line through
+        these points gives the per-batch and per-image costs.
+
+        Args:
+            result: Leaderboard entry with 'latency_ms' and 'throughput_ips'
+            seed: Random seed
+
+        Returns:
+            Fitted LatencyModel
+        """
+        latency = result['latency_ms']
+        points = [(1, latency['p50'])]
+        points += [
+            (int(batch_size), int(batch_size) / ips * 1000)
+            for batch_size, ips in result.get('throughput_ips', {}).items() if ips
+        ]
+
+        n_mean = sum(n for n, _ in points) / len(points)
+        t_mean = sum(t for _, t in points) / len(points)
+        spread = sum((n - n_mean) ** 2 for n, _ in points)
+
+        if spread:
+            per_item_ms = sum((n - n_mean) * (t - t_mean) for n, t in points) / spread
+            per_item_ms = max(0.0, per_item_ms)
+            batch_overhead_ms = max(0.0, t_mean - per_item_ms * n_mean)
+        else:
+            # Only single-image data: no way to split the cost
+            per_item_ms, batch_overhead_ms = latency['p50'], 0.0
+
+        jitter = math.log(latency['p99'] / latency['p50']) / Z_99 if latency.get('p99') else 0.0
+        return cls(batch_overhead_ms, per_item_ms, max(0.0, jitter), seed)
+
+    @classmethod
+    def from_file(cls, path: Path, seed: Optional[int] = None,
+                  model_name: Optional[str] = None,
+                  model_format: Optional[str] = None) -> 'LatencyModel':
+        """
+        Load a latency model from a JSON file.
+
+        The file is either explicit parameters ({"batch_overhead_ms": ...,
+        "per_item_ms": ..., "jitter": ...}) or an ml/benchmark.py
+        leaderboard.json, in which case the most recent result for
+        `model_name` and `model_format` (when present) is fitted.
+
+        Raises:
+            ValueError: If the leaderboard has no results
+        """
+        with open(path, 'r') as f:
+            data = json.load(f)
+
+        if isinstance(data, dict):
+            return cls(data['batch_overhead_ms'], data['per_item_ms'], data.get('jitter', 0.0), seed)
+
+        results: List[dict] = data
+        for key, wanted in (('model', model_name), ('format', model_format)):
+            matching = [result for result in results if result.get(key) == wanted]
+            if matching:
+                results = matching
+        if not results:
+            raise ValueError(f"No benchmark results in {path}")
+
+        result = results[-1]
+        logger.info(f"Fitting latency model to benchmark of {result['model']} "
+                    f"[{result['format']}, {result['threads']} threads]")
+        return cls.from_benchmark(result, seed)
@@ -1,26 +1,47 @@
 """
 Model Loader Service
 
-Handles loading and caching of the TensorFlow model.
+Handles loading and caching of the model.
+
+With MODEL_BUNDLE_DIR set, the model, labels and preprocessing come from the
+bundle manifest written by ml/training.py, and the fastest format the host
+can run is loaded. Otherwise the Keras model at MODEL_PATH is loaded.
 """
 
+import hashlib
 import json
 import logging
 from pathlib import Path
 from typing import List, Optional
 
-import tensorflow as tf
-
 from app.config import settings
+from app.services.model_metadata import model_metadata
+from app.services.model_runtime import create_runtime, select_format
 
 logger = logging.getLogger(__name__)
 
 
+def file_sha256(path: Path) -> str:
+    """Hash a file, or every file of a directory (same scheme as ml/bundle.py)."""
+    files = sorted(p for p in path.rglob('*') if p.is_file()) if path.is_dir() else [path]
+
+    digest = hashlib.sha256()
+    for file_path in files:
+        if path.is_dir():
+            digest.update(file_path.relative_to(path).as_posix().encode())
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
 class ModelLoader:
     """Singleton class for loading and caching the ML model."""
 
     _instance: Optional['ModelLoader'] = None
-    _model: Optional[tf.keras.Model] = None
+    _model = None
+    _model_format: Optional[str] = None
+    _model_content: Optional[bytes] = None
     _class_labels: Optional[List[str]] = None
 
     def __new__(cls):
@@ -29,22 +50,21 @@ class ModelLoader:
             cls._instance = super(ModelLoader, cls).__new__(cls)
         return cls._instance
 
-    def load_model(self) -> tf.keras.Model:
+    def resolve_model_file(self):
         """
-        Load the TensorFlow model from disk.
+        Find the model file to serve.
 
         Returns:
-            Loaded TensorFlow Keras model
+            Tuple of (format, model path)
 
         Raises:
             FileNotFoundError: If model file doesn't exist
-            Exception: If model loading fails
+            ValueError: If the bundle is inconsistent
         """
-        if self._model is not None:
-            logger.info("Model already loaded, returning cached instance")
-            return self._model
-
-        model_path = Path(settings.model_path)
+        if model_metadata.bundle_dir is not None:
+            model_format, model_path = self._resolve_bundle_file()
+        else:
+            model_format, model_path = 'keras', Path(settings.model_path)
 
         if not model_path.exists():
             error_msg = (
@@ -55,19 +75,105 @@ class ModelLoader:
             logger.error(error_msg)
             raise FileNotFoundError(error_msg)
 
-        try:
-            logger.info(f"Loading model from {model_path}")
-            self._model = tf.keras.models.load_model(str(model_path))
-            logger.info(f"Model loaded successfully. Input shape: {self._model.input_shape}")
+        return model_format, model_path
+
+    def read_model_content(self) -> bool:
+        """
+        Read the model file into memory for a later load_model (TFLite only).
+
+        A pre-fork master reads the bytes once; each forked worker then builds
+        its own interpreter from the shared pages with its own thread count.
+
+        Returns:
+            True if the bytes were read
+        """
+        model_format, model_path = self.resolve_model_file()
+        if model_format != 'tflite':
+            return False
+
+        self._model_content = model_path.read_bytes()
+        logger.info(f"Read {len(self._model_content) / 2**20:.1f} MB of {model_path} into memory")
+        return True
+
+    def load_model(self, num_threads: Optional[int] = None, inter_op_threads: Optional[int] = None):
+        """
+        Load the model from disk.
+
+        Args:
+            num_threads: Intra-op threads (optional, see create_runtime)
+            inter_op_threads: Inter-op threads (optional, see create_runtime)
+
+        Returns:
+            Loaded model runtime (see app.services.model_runtime)
+
+        Raises:
+            FileNotFoundError: If model file doesn't exist
+            ValueError: If the bundle is inconsistent or the input size is wrong
+            Exception: If model loading fails
+        """
+        if self._model is not None:
+            logger.info("Model already loaded, returning cached instance")
             return self._model
 
+        model_format, model_path = self.resolve_model_file()
+
+        try:
+            logger.info(f"Loading {model_format} model from {model_path}")
+            model = create_runtime(model_format, model_path, num_threads, inter_op_threads,
+                                   model_content=self._model_content)
+            logger.info(f"Model loaded successfully. Input shape: {model.input_shape}")
         except Exception as e:
             logger.error(f"Failed to load model: {str(e)}")
             raise Exception(f"Model loading error: {str(e)}")
 
+        # Preprocessing must resize to the resolution the model was trained at
+        model_size = list(model.input_shape[0:2])
+        expected_size = [model_metadata.image_size] * 2
+        if model_size != expected_size:
+            raise ValueError(
+                f"Model input size {model_size} does not match the configured image size "
+                f"{expected_size}; check {model_metadata.path} and IMAGE_SIZE"
+            )
+
+        self._model = model
+        self._model_format = model_format
+        return self._model
+
+    def _resolve_bundle_file(self):
+        """
+        Pick the bundle format to serve and check its file against the manifest.
+
+        Returns:
+            Tuple of (format, model path)
+
+        Raises:
+            FileNotFoundError: If the bundle has no manifest
+            ValueError: If no format can run here or a hash does not match
+        """
+        manifest = model_metadata.manifest
+        if manifest is None:
+            raise FileNotFoundError(f"Bundle manifest not found at {model_metadata.path}")
+
+        model_format = select_format(manifest, settings.model_format)
+        entry = manifest['files'][model_format]
+        model_path = model_metadata.bundle_dir / entry['path']
+
+        if settings.verify_model_hash and model_path.exists():
+            if file_sha256(model_path) != entry['sha256']:
+                raise ValueError(
+                    f"{model_path} does not match the bundle manifest hash; "
+                    f"the bundle was modified after export"
+                )
+
+        logger.info(
+            f"Serving {model_format} from bundle {manifest.get('model_name')} "
+            f"({manifest.get('content_hash')})"
+        )
+        return model_format, model_path
+
     def load_class_labels(self) -> List[str]:
         """
-        Load class labels from JSON file.
+        Load class labels from the bundle manifest or the JSON file.
 
         Returns:
             List of class labels
@@ -79,6 +185,11 @@ class ModelLoader:
         if self._class_labels is not None:
             return self._class_labels
 
+        if model_metadata.manifest is not None:
+            self._class_labels = list(model_metadata.manifest['class_names'])
+            logger.info(f"Loaded {len(self._class_labels)} class labels from the bundle manifest")
+            return self._class_labels
+
         labels_path = Path(settings.class_labels_path)
 
         if not labels_path.exists():
@@ -94,8 +205,8 @@ class ModelLoader:
             logger.error(f"Invalid JSON in class labels file: {str(e)}")
             raise
 
-    def get_model(self) -> Optional[tf.keras.Model]:
-        """Get the cached model (if loaded)."""
+    def get_model(self):
+        """Get the cached model runtime (if loaded)."""
         return self._model
 
     def get_class_labels(self) -> Optional[List[str]]:
@@ -119,13 +230,7 @@ class ModelLoader:
         if not self.is_loaded():
             raise RuntimeError("Model not loaded. Call load_model() first.")
 
-        return {
-            "model_name": "MobileNetV2",
-            "model_version": "20251027_200458_final",
-            "num_classes": len(self._class_labels),
-            "classes": self._class_labels,
-            "input_shape": list(self._model.input_shape[1:])  # Exclude batch dimension
-        }
+        return model_metadata.model_info(self._class_labels, self._model_format)
 
 
 # Global model loader instance
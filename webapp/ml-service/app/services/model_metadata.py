@@ -0,0 +1,169 @@
+"""
+Model Metadata Service
+
+Reads the metadata written by ml/training.py so the service serves the model
+at the resolution, and resizes with the interpolation, it was trained with:
+the manifest of a model bundle
+(MODEL_BUNDLE_DIR/manifest.json) or, for a single model file, the
+<model>.metadata.json file next to it.
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import List, Optional
+
+from PIL import Image
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Used only when the model has no metadata file and IMAGE_SIZE is unset
+DEFAULT_IMAGE_SIZE = 224
+DEFAULT_ARCHITECTURE = "MobileNetV2"
+# Interpolation of models whose metadata does not record one (ml/config.yaml)
+DEFAULT_RESIZE_METHOD = "bilinear"
+
+# PIL filters of the interpolation names Keras' flow_from_directory accepts
+RESAMPLING_FILTERS = {
+    'nearest': Image.NEAREST,
+    'bilinear': Image.BILINEAR,
+    'bicubic': Image.BICUBIC,
+    'hamming': Image.HAMMING,
+    'box': Image.BOX,
+    'lanczos': Image.LANCZOS
+}
+
+MANIFEST_NAME = "manifest.json"
+
+
+class ModelMetadata:
+    """Lazily loaded model metadata (no TensorFlow dependency)."""
+
+    def __init__(self):
+        """Initialize metadata holder."""
+        self._metadata: Optional[dict] = None
+        self._loaded = False
+
+    @property
+    def bundle_dir(self) -> Optional[Path]:
+        """Model bundle directory (MODEL_BUNDLE_DIR), if configured."""
+        return Path(settings.model_bundle_dir) if settings.model_bundle_dir else None
+
+    @property
+    def path(self) -> Path:
+        """Metadata file path (bundle manifest, MODEL_METADATA_PATH or next to MODEL_PATH)."""
+        if self.bundle_dir is not None:
+            return self.bundle_dir / MANIFEST_NAME
+        if settings.model_metadata_path:
+            return Path(settings.model_metadata_path)
+        model_path = Path(settings.model_path)
+        return model_path.with_name(f"{model_path.stem}.metadata.json")
+
+    def load(self) -> Optional[dict]:
+        """
+        Load the metadata file (once).
+
+        Returns:
+            Metadata dictionary, or None if the file does not exist
+        """
+        if self._loaded:
+            return self._metadata
+
+        if self.path.exists():
+            with open(self.path, 'r') as f:
+                self._metadata = json.load(f)
+            logger.info(f"Loaded model metadata from {self.path}")
+        else:
+            logger.warning(f"Model metadata not found at {self.path}")
+
+        self._loaded = True
+        return self._metadata
+
+    @property
+    def manifest(self) -> Optional[dict]:
+        """Bundle manifest (None when serving a single model file)."""
+        return self.load() if self.bundle_dir is not None else None
+
+    @property
+    def image_size(self) -> int:
+        """Input resolution: IMAGE_SIZE override, else metadata, else 224."""
+        if settings.image_size:
+            return settings.image_size
+
+        metadata = self.load()
+        if metadata and metadata.get('image_size'):
+            return int(metadata['image_size'])
+
+        return DEFAULT_IMAGE_SIZE
+
+    @property
+    def resize_method(self) -> str:
+        """Interpolation the training images were loaded with (preprocessing.resize_method)."""
+        metadata = self.load()
+        preprocessing = (metadata or {}).get('preprocessing') or {}
+        method = preprocessing.get('resize_method') or DEFAULT_RESIZE_METHOD
+        if method not in RESAMPLING_FILTERS:
+            logger.warning(f"Unknown resize method {method!r} in {self.path}, using {DEFAULT_RESIZE_METHOD}")
+            return DEFAULT_RESIZE_METHOD
+        return method
+
+    @property
+    def resample_filter(self) -> int:
+        """PIL resampling filter of resize_method."""
+        return RESAMPLING_FILTERS[self.resize_method]
+
+    @property
+    def input_shape(self) -> List[int]:
+        """Model input shape without the batch dimension."""
+        return [self.image_size, self.image_size, 3]
+
+    @property
+    def class_names(self) -> Optional[List[str]]:
+        """Class names recorded at training time (if available)."""
+        metadata = self.load()
+        return metadata.get('class_names') if metadata else None
+
+    @property
+    def architecture(self) -> str:
+        """Model architecture recorded at training time."""
+        metadata = self.load()
+        return (metadata or {}).get('architecture') or DEFAULT_ARCHITECTURE
+
+    @property
+    def model_version(self) -> str:
+        """Model version: the bundle or file name without the architecture prefix."""
+        name = self.bundle_dir.name if self.bundle_dir is not None else Path(settings.model_path).stem
+        return name.removeprefix(f"{self.architecture}_")
+
+    @property
+    def content_hash(self) -> Optional[str]:
+        """Content hash of the bundle (if serving a bundle)."""
+        manifest = self.manifest
+        return manifest.get('content_hash') if manifest else None
+
+    def model_info(self, class_labels: List[str], model_format: Optional[str] = None) -> dict:
+        """
+        Describe the served model for the /model-info endpoint.
+
+        Args:
+            class_labels: Class labels in model output order
+            model_format: Format being served (if known)
+
+        Returns:
+            Dictionary matching ModelInfoResponse
+        """
+        return {
+            "model_name": self.architecture,
+            "model_version": self.model_version,
+            "num_classes": len(class_labels),
+            "classes": class_labels,
+            "input_shape": self.input_shape,
+            "format": model_format,
+            "content_hash": self.content_hash
+        }
+
+
+# Global metadata instance
+model_metadata = ModelMetadata()
@@ -0,0 +1,212 @@
+"""
+Model Runtime Service
+
+Gives every model format of a bundle the same interface (predict a batch,
+report the input shape) and picks the fastest format the host can run.
+Runtimes are imported only when a format is loaded.
+"""
+
+import importlib.util
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Python modules that can run each format (any one is enough)
+FORMAT_RUNTIMES = {
+    'tflite': ['tflite_runtime', 'tensorflow'],
+    'onnx': ['onnxruntime'],
+    'saved_model': ['tensorflow'],
+    'keras': ['tensorflow'],
+}
+
+# Formats whose runtime starts no threads when created single-threaded, so
+# a pre-fork master can load them once and share them with its workers (or,
+# for multi-threaded workers, share the model bytes each worker builds from)
+FORK_SAFE_FORMATS = ('tflite',)
+
+# Tie-break order when the manifest has no benchmark numbers
+FORMAT_PREFERENCE = ['tflite', 'onnx', 'saved_model', 'keras']
+
+
+def configure_tensorflow_threads(intra_op: Optional[int], inter_op: Optional[int]):
+    """
+    Size TensorFlow's thread pools (0 or None keeps TensorFlow's default).
+
+    Only possible before TensorFlow runs its first op; afterwards the pools
+    exist and the call is ignored with a warning.
+    """
+    import tensorflow as tf
+
+    try:
+        if intra_op:
+            tf.config.threading.set_intra_op_parallelism_threads(intra_op)
+        if inter_op:
+            tf.config.threading.set_inter_op_parallelism_threads(inter_op)
+    except RuntimeError as e:
+        logger.warning(f"TensorFlow thread pools already created, thread settings ignored: {e}")
+
+
+class KerasRuntime:
+    """Keras model (.h5 file or SavedModel directory)."""
+
+    def __init__(self, path: Path, num_threads: Optional[int] = None,
+                 inter_op_threads: Optional[int] = None):
+        import tensorflow as tf
+
+        configure_tensorflow_threads(num_threads, inter_op_threads)
+        self.model = tf.keras.models.load_model(str(path), compile=False)
+
+    @property
+    def input_shape(self) -> List[int]:
+        return [int(dim) for dim in self.model.input_shape[1:]]
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        return np.asarray(self.model(batch, training=False))
+
+
+class TFLiteRuntime:
+    """TFLite interpreter (tflite_runtime if installed, else TensorFlow)."""
+
+    def __init__(self, path: Path, num_threads: Optional[int] = None, model_content: Optional[bytes] = None):
+        """
+        Args:
+            path: .tflite file
+            num_threads: Interpreter threads (default: TFLite's own choice)
+            model_content: The file's bytes, already in memory (e.g. read by a
+                pre-fork master and shared with its workers); read from `path`
+                if not given
+        """
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+
+        if model_content is not None:
+            self.interpreter = Interpreter(model_content=model_content, num_threads=num_threads)
+        else:
+            self.interpreter = Interpreter(model_path=str(path), num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self._update_details()
+        # One interpreter must not run two requests at once
+        self._lock = threading.Lock()
+
+    def _update_details(self):
+        self.input_details = self.interpreter.get_input_details()[0]
+        self.output_details = self.interpreter.get_output_details()[0]
+
+    @property
+    def input_shape(self) -> List[int]:
+        return [int(dim) for dim in self.input_details['shape'][1:]]
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        with self._lock:
+            if len(batch) != self.input_details['shape'][0]:
+                self.interpreter.resize_tensor_input(self.input_details['index'], batch.shape)
+                self.interpreter.allocate_tensors()
+                self._update_details()
+
+            self.interpreter.set_tensor(self.input_details['index'], batch.astype(np.float32))
+            self.interpreter.invoke()
+            return self.interpreter.get_tensor(self.output_details['index']).copy()
+
+
+class ONNXRuntime:
+    """ONNX model on onnxruntime's CPU provider."""
+
+    def __init__(self, path: Path, num_threads: Optional[int] = None,
+                 inter_op_threads: Optional[int] = None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        if inter_op_threads:
+            # Only used when independent graph branches run in parallel
+            options.inter_op_num_threads = inter_op_threads
+            options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+        self.session = ort.InferenceSession(str(path), options, providers=['CPUExecutionProvider'])
+        self.input = self.session.get_inputs()[0]
+
+    @property
+    def input_shape(self) -> List[int]:
+        return [int(dim) for dim in self.input.shape[1:]]
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        return self.session.run(None, {self.input.name: batch.astype(np.float32)})[0]
+
+
+def runtime_available(model_format: str) -> bool:
+    """Check whether a runtime for a format is installed (without importing it)."""
+    return any(
+        importlib.util.find_spec(module) is not None
+        for module in FORMAT_RUNTIMES.get(model_format, [])
+    )
+
+
+def select_format(manifest: dict, forced: Optional[str] = None) -> str:
+    """
+    Pick the format to serve from a bundle manifest.
+
+    The format with the lowest benchmarked p50 latency among those whose
+    runtime is installed wins; formats without numbers come last.
+
+    Args:
+        manifest: Bundle manifest
+        forced: Format requested by MODEL_FORMAT (optional)
+
+    Returns:
+        Format name
+
+    Raises:
+        ValueError: If no format in the bundle can run on this host
+    """
+    formats = list(manifest.get('files', {}))
+
+    if forced:
+        if forced not in formats:
+            raise ValueError(f"MODEL_FORMAT={forced} is not in the bundle (has: {', '.join(formats)})")
+        return forced
+
+    available = [fmt for fmt in formats if runtime_available(fmt)]
+    if not available:
+        raise ValueError(f"No runtime installed for any bundle format ({', '.join(formats)})")
+
+    latency: Dict[str, dict] = manifest.get('benchmark', {}).get('latency_ms', {})
+
+    def sort_key(fmt):
+        preference = FORMAT_PREFERENCE.index(fmt) if fmt in FORMAT_PREFERENCE else len(FORMAT_PREFERENCE)
+        return (latency.get(fmt, {}).get('p50', float('inf')), preference)
+
+    return min(available, key=sort_key)
+
+
+def create_runtime(model_format: str, path: Path, num_threads: Optional[int] = None,
+                   inter_op_threads: Optional[int] = None, model_content: Optional[bytes] = None):
+    """
+    Load a model file with the runtime for its format.
+
+    Args:
+        model_format: 'keras', 'saved_model', 'tflite' or 'onnx'
+        path: Model file or SavedModel directory
+        num_threads: Threads within one operation (TensorFlow intra-op, TFLite,
+            ONNX intra-op); default: the runtime's own choice
+        inter_op_threads: Threads running independent operations at once
+            (TensorFlow and ONNX; TFLite has none)
+        model_content: Bytes of the model file already in memory (TFLite only)
+
+    Returns:
+        Loaded runtime
+    """
+    if model_format in ('keras', 'saved_model'):
+        return KerasRuntime(path, num_threads, inter_op_threads)
+    if model_format == 'tflite':
+        return TFLiteRuntime(path, num_threads, model_content)
+    if model_format == 'onnx':
+        return ONNXRuntime(path, num_threads, inter_op_threads)
+    raise ValueError(f"Unknown model format: {model_format}")
@@ -0,0 +1,69 @@
+"""
+Prediction Cache Service
+
+Keeps the most recent predictions keyed by a hash of the uploaded bytes, so
+re-uploads of the same photo (retries, double submits) skip decoding and
+inference. The model is fixed for the life of the process, so entries never
+go stale. A cached answer reports an inference time of 0 and `cached: true`,
+so clients and latency reports can tell it did not run the model.
+
+Off by default (PREDICTION_CACHE_SIZE=0): enable it where repeat uploads are
+common.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from app.config import settings
+from app.models.prediction import PredictionResponse
+from app.utils import metrics
+
+
+class PredictionCache:
+    """Thread-safe LRU cache of prediction responses."""
+
+    def __init__(self, max_entries: int):
+        """
+        Args:
+            max_entries: Cached predictions (0 disables the cache)
+        """
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[bytes, PredictionResponse]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(image_bytes: bytes) -> bytes:
+        """Cache key of an upload (BLAKE2b is faster than SHA-256 here)."""
+        return hashlib.blake2b(image_bytes, digest_size=16).digest()
+
+    def get(self, key: bytes) -> Optional[PredictionResponse]:
+        """Look up a prediction, counting the hit or miss; hits are marked cached."""
+        if not self.max_entries:
+            return None
+
+        with self._lock:
+            response = self._entries.get(key)
+            if response is not None:
+                self._entries.move_to_end(key)
+
+        metrics.prediction_cache_requests.inc('hit' if response is not None else 'miss')
+        if response is None:
+            return None
+        return response.model_copy(update={'inference_time': 0.0, 'cached': True})
+
+    def put(self, key: bytes, response: PredictionResponse):
+        """Store a prediction, evicting the least recently used entry."""
+        if not self.max_entries:
+            return
+
+        with self._lock:
+            self._entries[key] = response
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+# Global prediction cache instance
+prediction_cache = PredictionCache(settings.prediction_cache_size)
@@ -5,14 +5,19 @@ Handles ML model inference and prediction generation.
 """
 
 import logging
-import time
-from typing import List, Tuple
+from time import perf_counter_ns
+from typing import List, Optional
 
 import numpy as np
 
+from app.config import settings
 from app.models.prediction import ClassPrediction, PredictionResponse
+from app.services.image_upload import CHECKED_INPUTS, ImageInput
 from app.services.model_loader import model_loader
+from app.services.model_runtime import FORK_SAFE_FORMATS
 from app.services.preprocessor import image_preprocessor
+from app.utils import metrics
+from app.utils.timing import StageTimer, run_in_threadpool_timed
 
 logger = logging.getLogger(__name__)
 
@@ -34,7 +39,10 @@ class Predictor:
         """
         try:
             logger.info("Initializing predictor...")
-            self.model = model_loader.load_model()
+            self.model = model_loader.load_model(
+                num_threads=settings.inference_threads,
+                inter_op_threads=settings.inter_op_threads
+            )
             self.class_labels = model_loader.load_class_labels()
             logger.info("Predictor initialized successfully")
 
@@ -42,12 +50,71 @@ class Predictor:
             logger.error(f"Predictor initialization failed: {str(e)}")
             raise
 
-    def predict(self, image_bytes: bytes) -> PredictionResponse:
+    def preload(self, single_threaded: bool) -> bool:
+        """
+        Load the model in a pre-fork master (app.server) so that workers share
+        its memory copy-on-write instead of loading their own copies.
+
+        Only runtimes that start no threads can be created before fork (a
+        forked child has no copies of the parent's threads). When every worker
+        runs the model on one thread, the TFLite interpreter itself is created
+        here and workers skip initialize(). Otherwise only the model bytes are
+        read here, and each worker's initialize() builds its interpreter from
+        them with its configured thread count. Other formats are loaded by
+        each worker at startup.
+
+        Args:
+            single_threaded: Whether every worker runs the model on one thread
+
+        Returns:
+            True if the model (or its bytes) was loaded
+        """
+        model_format, model_path = model_loader.resolve_model_file()
+        if model_format not in FORK_SAFE_FORMATS:
+            logger.warning(
+                f"{model_format} models cannot be shared between forked workers; "
+                f"each worker loads its own copy of {model_path}"
+            )
+            return False
+
+        if not single_threaded:
+            model_loader.read_model_content()
+            logger.info("Model bytes preloaded; each worker builds its own multi-threaded interpreter")
+            return True
+
+        self.model = model_loader.load_model(num_threads=1)
+        self.class_labels = model_loader.load_class_labels()
+        logger.info("Model preloaded for forked workers (single-threaded TFLite)")
+        return True
+
+    def _preprocess(self, image: ImageInput, timer: StageTimer) -> np.ndarray:
+        """Validate, decode and resize one image to a (1, H, W, C) array."""
+        if isinstance(image, CHECKED_INPUTS):
+            # Already checked while streaming (or on creation)
+            with timer.stage('decode'):
+                decoded = image.decode()
+        else:
+            with timer.stage('validate'):
+                is_valid, error_msg = image_preprocessor.validate_image(image)
+            if not is_valid:
+                raise ValueError(error_msg)
+
+            with timer.stage('decode'):
+                decoded = image_preprocessor.decode_image(image)
+
+        try:
+            with timer.stage('resize'):
+                return image_preprocessor.resize_image(decoded)
+        except Exception as e:
+            raise ValueError(f"Image preprocessing failed: {str(e)}")
+
+    def predict(self, image: ImageInput, timer: Optional[StageTimer] = None) -> PredictionResponse:
         """
         Perform prediction on uploaded image.
 
         Args:
-            image_bytes: Raw bytes of the uploaded image
+            image: Raw image bytes, a streamed ImageUpload or a DecodedImage
+            timer: Per-request stage timer (optional)
 
         Returns:
             PredictionResponse with prediction results
@@ -56,46 +123,97 @@ class Predictor:
             ValueError: If prediction fails
             RuntimeError: If model is not initialized
         """
+        return self.predict_batch([image], [timer or StageTimer()])[0]
+
+    def predict_batch(self, images: List[ImageInput],
+                      timers: Optional[List[StageTimer]] = None) -> List[PredictionResponse]:
+        """
+        Perform prediction on several images with one model call.
+
+        Args:
+            images: Raw image bytes, streamed ImageUploads or DecodedImages
+            timers: Per-image stage timers (optional)
+
+        Returns:
+            PredictionResponse per image, in input order
+
+        Raises:
+            ValueError: If any image fails or inference fails
+            RuntimeError: If model is not initialized
+        """
         if self.model is None or self.class_labels is None:
             raise RuntimeError("Predictor not initialized. Call initialize() first.")
 
-        # Validate image
-        is_valid, error_msg = image_preprocessor.validate_image(image_bytes)
-        if not is_valid:
-            raise ValueError(error_msg)
+        timers = timers or [StageTimer() for _ in images]
 
-        # Preprocess image
-        try:
-            preprocessed_image = image_preprocessor.preprocess_image(image_bytes)
-        except Exception as e:
-            raise ValueError(f"Image preprocessing failed: {str(e)}")
+        # Preprocess images
+        batch = np.concatenate([
+            self._preprocess(image, timer) for image, timer in zip(images, timers)
+        ])
 
         # Perform inference
-        start_time = time.time()
+        metrics.batch_size.observe(len(batch))
 
         try:
-            predictions = self.model.predict(preprocessed_image, verbose=0)
-            inference_time = time.time() - start_time
+            start_ns = perf_counter_ns()
+            predictions = self.model.predict(batch)
+            inference_ns = perf_counter_ns() - start_ns
 
-            logger.info(f"Inference completed in {inference_time:.3f} seconds")
+            logger.info(f"Inference of {len(batch)} image(s) completed in {inference_ns / 1e9:.3f} seconds")
 
         except Exception as e:
             logger.error(f"Model inference failed: {str(e)}")
             raise ValueError(f"Model inference error: {str(e)}")
 
         # Process predictions
-        predictions = predictions[0]  # Remove batch dimension
-        all_predictions = self._process_predictions(predictions)
-
-        # Get top prediction
-        top_prediction = all_predictions[0]
-
-        return PredictionResponse(
-            predicted_class=top_prediction.class_name,
-            confidence=top_prediction.confidence,
-            all_predictions=all_predictions,
-            inference_time=round(inference_time, 3)
-        )
+        responses = []
+        for image_predictions, timer in zip(predictions, timers):
+            timer.add('inference', inference_ns)
+            with timer.stage('postprocess'):
+                all_predictions = self._process_predictions(image_predictions)
+
+                # Get top prediction
+                top_prediction = all_predictions[0]
+
+                responses.append(PredictionResponse(
+                    predicted_class=top_prediction.class_name,
+                    confidence=top_prediction.confidence,
+                    all_predictions=all_predictions,
+                    inference_time=round(inference_ns / 1e9, 3)
+                ))
+        return responses
+
+    async def predict_async(self, image: ImageInput,
+                            timer: Optional[StageTimer] = None) -> PredictionResponse:
+        """
+        Perform prediction in the threadpool so the event loop keeps serving.
+
+        The wait for a free thread is recorded as the 'queue_wait' stage.
+
+        Args:
+            image: Raw image bytes, a streamed ImageUpload or a DecodedImage
+            timer: Per-request stage timer (optional)
+
+        Returns:
+            PredictionResponse with prediction results
+        """
+        timer = timer or StageTimer()
+        return await run_in_threadpool_timed([timer], self.predict, image, timer)
+
+    async def predict_batch_async(self, images: List[ImageInput],
+                                  timers: Optional[List[StageTimer]] = None) -> List[PredictionResponse]:
+        """
+        Perform a batched prediction in the threadpool.
+
+        Args:
+            images: Raw image bytes, streamed ImageUploads or DecodedImages
+            timers: Per-image stage timers (optional)
+
+        Returns:
+            PredictionResponse per image, in input order
+        """
+        timers = timers or [StageTimer() for _ in images]
+        return await run_in_threadpool_timed(timers, self.predict_batch, images, timers)
 
     def _process_predictions(self, predictions: np.ndarray) -> List[ClassPrediction]:
         """
@@ -4,35 +4,50 @@ Mock Predictor Service
 Simulates ML model inference for testing without TensorFlow dependency.
 Returns realistic predictions matching exact production format.
 
+Inference time comes from a latency model (per-batch plus per-image cost,
+optionally fitted from ml/benchmark.py results) and is spent in an asyncio
+sleep, so concurrency, worker counts and batching behave like production
+without the model. Latencies and predictions are seeded (MOCK_SEED).
+
 USAGE:
     This mock allows full application testing without model deployment.
     To revert to production: Import 'predictor' from 'predictor.py' instead.
 """
 
+import asyncio
+import hashlib
 import logging
 import time
 import random
 import json
-from typing import List
+from time import perf_counter_ns
+from typing import List, Optional
 from pathlib import Path
 
+from app.config import settings
 from app.models.prediction import ClassPrediction, PredictionResponse
+from app.services.image_upload import CHECKED_INPUTS, ImageInput
+from app.services.latency_model import LatencyModel
+from app.services.model_metadata import model_metadata
 from app.services.preprocessor_mock import image_preprocessor  # Mock preprocessor (no numpy/tensorflow)
+from app.utils import metrics
+from app.utils.timing import StageTimer, run_in_threadpool_timed
 
 logger = logging.getLogger(__name__)
 
 
 class MockPredictor:
-    """Simulates model inference with realistic random predictions."""
+    """Simulates model inference with a latency model and seeded predictions."""
 
     def __init__(self):
         """Initialize mock predictor."""
         self.class_labels = None
+        self.latency_model = None
         self._is_initialized = False
 
     def initialize(self):
         """
-        Initialize the mock predictor by loading class labels.
+        Initialize the mock predictor by loading class labels and the latency model.
 
         Raises:
             Exception: If initialization fails
@@ -40,6 +55,7 @@ class MockPredictor:
         try:
             logger.info("Initializing MOCK predictor...")
             self.class_labels = self._load_class_labels()
+            self.latency_model = self._load_latency_model()
             self._is_initialized = True
             logger.info("✓ MOCK predictor initialized successfully (simulation mode)")
             logger.warning("⚠ Running in MOCK mode - predictions are simulated")
@@ -48,9 +64,17 @@ class MockPredictor:
             logger.error(f"Mock predictor initialization failed: {str(e)}")
             raise
 
+    def preload(self, single_threaded: bool = True) -> bool:
+        """Initialize in a pre-fork master (app.server); the mock starts no threads."""
+        self.initialize()
+        return True
+
     def _load_class_labels(self) -> List[str]:
-        """Load class labels from JSON file."""
-        labels_path = Path("models/class_labels.json")
+        """Load class labels from the model metadata or JSON file."""
+        if model_metadata.class_names:
+            return list(model_metadata.class_names)
+
+        labels_path = Path(settings.class_labels_path)
 
         if labels_path.exists():
             with open(labels_path, 'r') as f:
@@ -74,12 +98,57 @@ class MockPredictor:
             "Potato___healthy"
         ]
 
-    def predict(self, image_bytes: bytes) -> PredictionResponse:
+    def _load_latency_model(self) -> LatencyModel:
+        """Latency model from MOCK_LATENCY_PROFILE, else from the MOCK_* settings."""
+        if settings.mock_latency_profile:
+            latency_model = LatencyModel.from_file(
+                Path(settings.mock_latency_profile),
+                seed=settings.mock_seed,
+                model_name=f"{model_metadata.architecture}_{model_metadata.model_version}",
+                model_format=settings.model_format
+            )
+        else:
+            latency_model = LatencyModel(
+                settings.mock_batch_overhead_ms,
+                settings.mock_per_item_ms,
+                settings.mock_latency_jitter,
+                settings.mock_seed
+            )
+        logger.info(f"Mock latency model: {latency_model.describe()}")
+        return latency_model
+
+    def _preprocess(self, image: ImageInput, timer: StageTimer):
+        """Validate, decode and resize (same stages as production, PIL only)."""
+        if isinstance(image, CHECKED_INPUTS):
+            # Already checked while streaming (or on creation)
+            with timer.stage('decode'):
+                decoded = image.decode()
+        else:
+            with timer.stage('validate'):
+                is_valid, error_msg = image_preprocessor.validate_image(image)
+            if not is_valid:
+                raise ValueError(error_msg)
+
+            with timer.stage('decode'):
+                decoded = image_preprocessor.decode_image(image)
+        with timer.stage('resize'):
+            return image_preprocessor.resize_image(decoded)
+
+    def _preprocess_batch(self, images: List[ImageInput], timers: List[StageTimer]):
+        for image, timer in zip(images, timers):
+            self._preprocess(image, timer)
+
+    def _check_initialized(self):
+        if not self._is_initialized:
+            raise RuntimeError("Mock predictor not initialized. Call initialize() first.")
+
+    def predict(self, image: ImageInput, timer: Optional[StageTimer] = None) -> PredictionResponse:
         """
-        Simulate prediction on uploaded image.
+        Simulate prediction on uploaded image, blocking the calling thread.
 
         Args:
-            image_bytes: Raw bytes of the uploaded image
+            image: Raw image bytes, a streamed ImageUpload or a DecodedImage
+            timer: Per-request stage timer (optional)
 
         Returns:
             PredictionResponse with simulated prediction results
@@ -88,94 +157,128 @@ class MockPredictor:
             ValueError: If image validation fails
             RuntimeError: If predictor is not initialized
         """
-        if not self._is_initialized:
-            raise RuntimeError("Mock predictor not initialized. Call initialize() first.")
+        self._check_initialized()
+        timer = timer or StageTimer()
+
+        self._preprocess(image, timer)
+        metrics.batch_size.observe(1)
+        with timer.stage('inference'):
+            time.sleep(self.latency_model.sample(1))
 
-        # Validate image (same as production)
-        is_valid, error_msg = image_preprocessor.validate_image(image_bytes)
-        if not is_valid:
-            raise ValueError(error_msg)
+        return self._build_response(image, timer)
 
-        # Simulate inference time (realistic: 0.05 - 0.15 seconds)
-        start_time = time.time()
-        time.sleep(random.uniform(0.05, 0.15))
+    async def predict_async(self, image: ImageInput,
+                            timer: Optional[StageTimer] = None) -> PredictionResponse:
+        """
+        Simulate prediction without blocking the event loop.
+
+        Args:
+            image: Raw image bytes, a streamed ImageUpload or a DecodedImage
+            timer: Per-request stage timer (optional)
 
-        # Generate realistic confidence scores
-        all_predictions = self._generate_mock_predictions()
+        Returns:
+            PredictionResponse with simulated prediction results
 
-        inference_time = time.time() - start_time
+        Raises:
+            ValueError: If image validation fails
+            RuntimeError: If predictor is not initialized
+        """
+        responses = await self.predict_batch_async([image], [timer or StageTimer()])
+        return responses[0]
+
+    async def predict_batch_async(self, images: List[ImageInput],
+                                  timers: Optional[List[StageTimer]] = None) -> List[PredictionResponse]:
+        """
+        Simulate one batched model call.
 
-        # Get top prediction
-        top_prediction = all_predictions[0]
+        Preprocessing really runs (in the threadpool, like production);
+        inference is an asyncio sleep drawn from the latency model for the
+        batch size.
+
+        Args:
+            images: Raw image bytes, streamed ImageUploads or DecodedImages
+            timers: Per-image stage timers (optional)
+
+        Returns:
+            PredictionResponse per image, in input order
+
+        Raises:
+            ValueError: If any image fails validation
+            RuntimeError: If predictor is not initialized
+        """
+        self._check_initialized()
+        timers = timers or [StageTimer() for _ in images]
+
+        await run_in_threadpool_timed(timers, self._preprocess_batch, images, timers)
+
+        metrics.batch_size.observe(len(images))
+        start_ns = perf_counter_ns()
+        await asyncio.sleep(self.latency_model.sample(len(images)))
+        inference_ns = perf_counter_ns() - start_ns
+
+        responses = []
+        for image, timer in zip(images, timers):
+            timer.add('inference', inference_ns)
+            responses.append(self._build_response(image, timer))
+        return responses
+
+    def _build_response(self, image: ImageInput, timer: StageTimer) -> PredictionResponse:
+        inference_time = timer.seconds('inference')
+
+        with timer.stage('postprocess'):
+            all_predictions = self._generate_mock_predictions(image)
+            top_prediction = all_predictions[0]
+
+            response = PredictionResponse(
+                predicted_class=top_prediction.class_name,
+                confidence=top_prediction.confidence,
+                all_predictions=all_predictions,
+                inference_time=round(inference_time, 3)
+            )
 
         logger.info(
             f"✓ Mock prediction: {top_prediction.class_name} "
             f"({top_prediction.confidence:.4f}) in {inference_time:.3f}s"
         )
+        return response
 
-        return PredictionResponse(
-            predicted_class=top_prediction.class_name,
-            confidence=top_prediction.confidence,
-            all_predictions=all_predictions,
-            inference_time=round(inference_time, 3)
-        )
-
-    def _generate_mock_predictions(self) -> List[ClassPrediction]:
+    def _generate_mock_predictions(self, image: ImageInput) -> List[ClassPrediction]:
         """
         Generate realistic mock predictions.
 
+        The random generator is seeded from MOCK_SEED and the image's hash, so
+        the same image always gets the same prediction.
+
         Strategy:
         - Top prediction: High confidence (0.75 - 0.95)
-        - Second prediction: Medium confidence (0.05 - 0.15)
-        - Remaining: Low confidence (distributed remainder)
+        - Remaining: Low confidence (random split of the remainder)
 
         Returns:
             List of ClassPrediction objects sorted by confidence (descending)
         """
-        num_classes = len(self.class_labels)
-
-        # Generate random confidences that sum to 1.0
-        confidences = []
+        if settings.mock_seed is None:
+            rng = random.Random()
+        else:
+            if isinstance(image, CHECKED_INPUTS):
+                digest = image.digest
+            else:
+                digest = hashlib.blake2b(image, digest_size=16).digest()
+            rng = random.Random(settings.mock_seed.to_bytes(8, 'big', signed=True) + digest)
 
-        # Top prediction: 75-95% confidence
-        top_confidence = random.uniform(0.75, 0.95)
-        confidences.append(top_confidence)
+        num_classes = len(self.class_labels)
+        top_confidence = rng.uniform(0.75, 0.95)
+        weights = [rng.random() for _ in range(num_classes - 1)]
+        scale = (1.0 - top_confidence) / (sum(weights) or 1.0)
+        confidences = [top_confidence] + sorted((weight * scale for weight in weights), reverse=True)
 
-        # Second prediction: 5-15% of remaining
-        remaining = 1.0 - top_confidence
-        second_confidence = random.uniform(0.05, 0.15) * remaining
-        confidences.append(second_confidence)
+        # Random class order decides which disease gets the top prediction
+        class_order = rng.sample(range(num_classes), num_classes)
 
-        # Distribute rest randomly across remaining classes
-        final_remaining = remaining - second_confidence
-        for i in range(num_classes - 2):
-            if i == num_classes - 3:
-                # Last one gets whatever is left
-                confidences.append(final_remaining)
-            else:
-                # Random portion of remaining
-                conf = random.uniform(0, final_remaining / (num_classes - i - 2))
-                confidences.append(conf)
-                final_remaining -= conf
-
-        # Shuffle class order to vary which disease gets top prediction
-        indices = list(range(num_classes))
-        random.shuffle(indices)
-
-        # Create predictions
-        class_predictions = [
-            ClassPrediction(
-                class_name=self.class_labels[idx],
-                confidence=float(confidences[i])
-            )
-            for i, idx in enumerate(indices)
+        return [
+            ClassPrediction(class_name=self.class_labels[idx], confidence=confidence)
+            for idx, confidence in zip(class_order, confidences)
         ]
 
-        # Sort by confidence (descending)
-        class_predictions.sort(key=lambda x: x.confidence, reverse=True)
-
-        return class_predictions
-
     def is_initialized(self) -> bool:
         """Check if mock predictor is initialized."""
         return self._is_initialized
@@ -13,9 +13,20 @@ from PIL import Image
 import tensorflow as tf
 
 from app.config import settings
+from app.services.model_metadata import model_metadata
 
 logger = logging.getLogger(__name__)
 
+# tf.image.resize methods of the Keras interpolation names (no hamming in TF)
+TF_RESIZE_METHODS = {
+    'nearest': 'nearest',
+    'bilinear': 'bilinear',
+    'bicubic': 'bicubic',
+    'hamming': 'bilinear',
+    'box': 'area',
+    'lanczos': 'lanczos3'
+}
+
 
 class ImagePreprocessor:
     """Handles image preprocessing for ML inference."""
@@ -38,46 +49,66 @@ class ImagePreprocessor:
         # Try to open as image
         try:
             image = Image.open(BytesIO(file_content))
+            width, height = image.size
             image.verify()  # Verify it's a valid image
         except Exception as e:
             return False, f"Invalid image file: {str(e)}"
 
+        # Decompression bombs: small files that decode to huge images
+        if width * height > settings.max_image_pixels:
+            return False, f"Image dimensions {width}x{height} exceed the maximum of {settings.max_image_pixels} pixels"
+
         return True, ""
 
     @staticmethod
-    def preprocess_image(file_content: bytes) -> np.ndarray:
+    def decode_image(file_content: bytes) -> Image.Image:
         """
-        Preprocess image for model inference.
-
-        Preprocessing steps:
-        1. Load image from bytes
-        2. Convert to RGB (if needed)
-        3. Resize to target size (224x224)
-        4. Convert to numpy array
-        5. Normalize pixel values to [0, 1]
-        6. Add batch dimension
+        Decode an uploaded image to RGB.
 
         Args:
             file_content: Raw bytes of the uploaded image
 
         Returns:
-            Preprocessed image as numpy array with shape (1, 224, 224, 3)
+            Decoded RGB PIL image
 
         Raises:
-            ValueError: If image preprocessing fails
+            ValueError: If the image cannot be decoded
         """
         try:
-            # Load image
             image = Image.open(BytesIO(file_content))
 
             # Convert to RGB if needed (handles RGBA, L, etc.)
             if image.mode != 'RGB':
                 logger.info(f"Converting image from {image.mode} to RGB")
                 image = image.convert('RGB')
+            else:
+                image.load()
 
-            # Resize to target size
-            target_size = (settings.image_size, settings.image_size)
-            image = image.resize(target_size, Image.LANCZOS)
+            return image
+
+        except Exception as e:
+            logger.error(f"Image decoding failed: {str(e)}")
+            raise ValueError(f"Image preprocessing error: {str(e)}")
+
+    @staticmethod
+    def resize_image(image: Image.Image) -> np.ndarray:
+        """
+        Resize a decoded image to the model input and normalize it.
+
+        Args:
+            image: Decoded RGB PIL image
+
+        Returns:
+            Model input batch with shape (1, size, size, 3) in [0, 1]
+
+        Raises:
+            ValueError: If resizing fails
+        """
+        try:
+            # Resize to the model's input size, the way the training images
+            # were loaded (both from the model metadata)
+            target_size = (model_metadata.image_size, model_metadata.image_size)
+            image = image.resize(target_size, model_metadata.resample_filter)
 
             # Convert to numpy array
             image_array = np.array(image, dtype=np.float32)
@@ -90,14 +121,36 @@ class ImagePreprocessor:
             image_array = np.expand_dims(image_array, axis=0)
 
             logger.debug(f"Preprocessed image shape: {image_array.shape}")
-            logger.debug(f"Pixel value range: [{image_array.min():.3f}, {image_array.max():.3f}]")
 
             return image_array
 
         except Exception as e:
-            logger.error(f"Image preprocessing failed: {str(e)}")
+            logger.error(f"Image resizing failed: {str(e)}")
             raise ValueError(f"Image preprocessing error: {str(e)}")
 
+    def preprocess_image(self, file_content: bytes) -> np.ndarray:
+        """
+        Preprocess image for model inference.
+
+        Preprocessing steps:
+        1. Load image from bytes
+        2. Convert to RGB (if needed)
+        3. Resize to the model's input size (from the model metadata)
+        4. Convert to numpy array
+        5. Normalize pixel values to [0, 1]
+        6. Add batch dimension
+
+        Args:
+            file_content: Raw bytes of the uploaded image
+
+        Returns:
+            Preprocessed image as numpy array with shape (1, size, size, 3)
+
+        Raises:
+            ValueError: If image preprocessing fails
+        """
+        return self.resize_image(self.decode_image(file_content))
+
     @staticmethod
     def preprocess_with_tensorflow(file_content: bytes) -> tf.Tensor:
         """
@@ -122,8 +175,9 @@ class ImagePreprocessor:
             # Resize
             image = tf.image.resize(
                 image,
-                [settings.image_size, settings.image_size],
-                method='lanczos3'
+                [model_metadata.image_size, model_metadata.image_size],
+                method=TF_RESIZE_METHODS[model_metadata.resize_method],
+                antialias=True
             )
 
             # Normalize to [0, 1]
@@ -1,8 +1,8 @@
 """
 Mock Image Preprocessor Service
 
-Lightweight validation without numpy/tensorflow dependencies.
-Suitable for mock mode testing.
+Lightweight validation, decoding and resizing with PIL only (no
+numpy/tensorflow), so mock mode exercises the same request stages.
 """
 
 import logging
@@ -12,6 +12,7 @@ from typing import Tuple
 from PIL import Image
 
 from app.config import settings
+from app.services.model_metadata import model_metadata
 
 logger = logging.getLogger(__name__)
 
@@ -37,14 +38,53 @@ class MockImagePreprocessor:
         # Try to open as image
         try:
             image = Image.open(BytesIO(file_content))
+            width, height = image.size
             image.verify()  # Verify it's a valid image
 
             logger.debug(f"✓ Image validated: format={image.format}, size={image.size}")
         except Exception as e:
             return False, f"Invalid image file: {str(e)}"
 
+        # Decompression bombs: small files that decode to huge images
+        if width * height > settings.max_image_pixels:
+            return False, f"Image dimensions {width}x{height} exceed the maximum of {settings.max_image_pixels} pixels"
+
         return True, ""
 
+    @staticmethod
+    def decode_image(file_content: bytes) -> Image.Image:
+        """
+        Decode an uploaded image to RGB.
+
+        Args:
+            file_content: Raw bytes of the uploaded image
+
+        Returns:
+            Decoded RGB PIL image
+
+        Raises:
+            ValueError: If the image cannot be decoded
+        """
+        try:
+            image = Image.open(BytesIO(file_content))
+            return image.convert('RGB') if image.mode != 'RGB' else image.copy()
+        except Exception as e:
+            raise ValueError(f"Image preprocessing error: {str(e)}")
+
+    @staticmethod
+    def resize_image(image: Image.Image) -> Image.Image:
+        """
+        Resize a decoded image to the model input size.
+
+        Args:
+            image: Decoded RGB PIL image
+
+        Returns:
+            Resized PIL image (mock mode never builds the array)
+        """
+        size = model_metadata.image_size
+        return image.resize((size, size), model_metadata.resample_filter)
+
 
 # Global mock preprocessor instance
 image_preprocessor = MockImagePreprocessor()
@@ -0,0 +1,211 @@
+"""
+Admission Control
+
+Limits how many prediction requests a worker processes at once. Requests
+over the limit wait in a bounded FIFO queue; when the queue is full, or a
+request has waited too long, it is rejected with 503 and Retry-After before
+its upload is read, so a burst costs neither memory nor model time.
+
+Callers can send their remaining time budget in milliseconds in a deadline
+header (X-Request-Timeout-Ms by default). A request whose deadline passes
+while queued is dropped with 504, and the handler checks the deadline again
+before inference so no model time is spent on answers nobody will read.
+"""
+
+import asyncio
+import json
+import logging
+from collections import deque
+from time import perf_counter, perf_counter_ns
+from typing import Iterable, Optional
+
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """A request was not admitted."""
+
+    def __init__(self, reason: str, status_code: int, detail: str):
+        super().__init__(detail)
+        self.reason = reason
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _overloaded(reason: str, detail: str) -> AdmissionRejected:
+    return AdmissionRejected(reason, 503, detail)
+
+
+def _deadline_exceeded() -> AdmissionRejected:
+    return AdmissionRejected('deadline', 504, "Request deadline exceeded")
+
+
+class AdmissionController:
+    """
+    Bounded in-flight count with a bounded FIFO wait queue.
+
+    Used from one event loop (one per worker), so no locking is needed.
+    """
+
+    def __init__(self, max_in_flight: int, max_queued: int, max_queue_wait: float):
+        """
+        Args:
+            max_in_flight: Requests processed at once
+            max_queued: Requests waiting for a slot (more are rejected)
+            max_queue_wait: Longest wait for a slot in seconds
+        """
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.max_queue_wait = max_queue_wait
+        self.in_flight = 0
+        self._waiters: deque = deque()
+
+    @property
+    def queued(self) -> int:
+        """Requests waiting for a slot."""
+        return len(self._waiters)
+
+    async def acquire(self, deadline: Optional[float] = None):
+        """
+        Wait for a processing slot.
+
+        Args:
+            deadline: perf_counter() time after which the result is useless
+
+        Raises:
+            AdmissionRejected: If the queue is full, the wait is too long, or
+                the deadline passes while waiting
+        """
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            return
+
+        if len(self._waiters) >= self.max_queued:
+            raise _overloaded('queue_full', "Service overloaded, retry later")
+
+        timeout = self.max_queue_wait
+        deadline_first = deadline is not None and deadline - perf_counter() < timeout
+        if deadline_first:
+            timeout = deadline - perf_counter()
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        metrics.admission_queued.set(len(self._waiters))
+        try:
+            await asyncio.wait_for(waiter, max(0.0, timeout))
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # A slot was handed over just as we gave up: pass it on
+                self.release()
+            else:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            metrics.admission_queued.set(len(self._waiters))
+
+            if isinstance(e, asyncio.TimeoutError):
+                if deadline_first:
+                    raise _deadline_exceeded() from None
+                raise _overloaded('queue_timeout', "Service overloaded, retry later") from None
+            raise
+
+        metrics.admission_queued.set(len(self._waiters))
+
+    def release(self):
+        """Free a slot, handing it to the oldest waiter if any."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # The slot moves to the waiter; in_flight is unchanged
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+
+def parse_deadline(headers: Iterable, header_name: bytes, arrival: float) -> Optional[float]:
+    """
+    Deadline of a request from its timeout header.
+
+    Args:
+        headers: ASGI headers (lower-case byte names)
+        header_name: Lower-case header name
+        arrival: perf_counter() time the request arrived
+
+    Returns:
+        perf_counter() deadline, or None without a valid header
+    """
+    for name, value in headers:
+        if name == header_name:
+            try:
+                return arrival + float(value) / 1000
+            except ValueError:
+                return None
+    return None
+
+
+def deadline_exceeded(request) -> bool:
+    """Whether the request's deadline (set by AdmissionMiddleware) has passed."""
+    deadline = getattr(request.state, 'deadline', None)
+    return deadline is not None and perf_counter() > deadline
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware applying an AdmissionController to `paths`.
+
+    It runs before the request body is read. The deadline is stored in the
+    request state (`request.state.deadline`), and time spent queued is
+    recorded as the 'admission' stage of the request timer.
+    """
+
+    def __init__(self, app, controller: AdmissionController, paths: Iterable[str],
+                 deadline_header: str = 'X-Request-Timeout-Ms', retry_after: int = 1):
+        self.app = app
+        self.controller = controller
+        self.paths = frozenset(paths)
+        self.deadline_header = deadline_header.lower().encode('latin-1')
+        self.retry_after = str(retry_after).encode('latin-1')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['path'] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        state = scope.setdefault('state', {})
+        timer = state.get('timer')
+        arrival = perf_counter()
+        deadline = parse_deadline(scope['headers'], self.deadline_header, arrival)
+        state['deadline'] = deadline
+
+        start_ns = perf_counter_ns()
+        try:
+            if deadline is not None and deadline <= arrival:
+                raise _deadline_exceeded()
+            await self.controller.acquire(deadline)
+        except AdmissionRejected as e:
+            metrics.admission_rejections.inc(e.reason)
+            logger.warning(f"Rejected {scope['path']}: {e.reason} "
+                           f"({self.controller.in_flight} in flight, {self.controller.queued} queued)")
+            await self._reject(e, send)
+            return
+
+        # Only requests that actually queued get an 'admission' stage
+        waited_ns = perf_counter_ns() - start_ns
+        if timer is not None and waited_ns > 100_000:
+            timer.add('admission', waited_ns)
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
+
+    async def _reject(self, rejection: AdmissionRejected, send):
+        headers = [(b'content-type', b'application/json')]
+        if rejection.status_code == 503:
+            headers.append((b'retry-after', self.retry_after))
+
+        await send({'type': 'http.response.start', 'status': rejection.status_code, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': json.dumps({'detail': rejection.detail}).encode()})
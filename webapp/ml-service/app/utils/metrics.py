@@ -0,0 +1,304 @@
+"""
+Prometheus Metrics
+
+Counters, gauges and histograms rendered in the Prometheus text exposition
+format (version 0.0.4) by the /metrics endpoint.
+
+The metric types are implemented here rather than taken from
+prometheus_client so the mock-mode service keeps its small dependency set.
+An update is one lock acquisition and a few integer operations (about a
+microsecond), so instrumenting the request path costs nothing measurable
+next to decoding and inference.
+"""
+
+import os
+import resource
+import threading
+from bisect import bisect_left
+from time import perf_counter_ns
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Seconds; covers cached hits (sub-millisecond) up to slow CPU inference
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+# Starlette appends "; charset=utf-8" to text responses
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """Base class: a named metric with optional labels."""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        """Yield (sample name, formatted labels, value)."""
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines += [f"{name}{labels} {_format_value(value)}" for name, labels, value in self.samples()]
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def get(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, or is computed at scrape time."""
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 function: Optional[Callable[[], float]] = None):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[tuple, float] = {}
+        self._function = function
+
+    def set(self, value: float, *labels: str):
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def samples(self):
+        if self._function is not None:
+            yield self.name, '', self._function()
+            return
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+
+class Histogram(_Metric):
+    """Distribution of observations in fixed buckets."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (last is +Inf), sum]
+        self._values: Dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def samples(self):
+        with self._lock:
+            values = [(labels, list(counts), total) for labels, (counts, total) in self._values.items()]
+        for labels, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = f'le="{_format_value(float(bound))}"'
+                yield f"{self.name}_bucket", _format_labels(self.labelnames, labels, le), cumulative
+            yield f"{self.name}_sum", _format_labels(self.labelnames, labels), total
+            yield f"{self.name}_count", _format_labels(self.labelnames, labels), cumulative
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines += metric.render()
+        return '\n'.join(lines) + '\n'
+
+
+def resident_memory_bytes() -> float:
+    """Current RSS from /proc (Linux), else the peak RSS from getrusage."""
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def memory_rollup(pid='self') -> Dict[str, int]:
+    """
+    Memory totals of a process from /proc/<pid>/smaps_rollup (Linux 4.14+).
+
+    Pss (proportional set size) splits each shared page between the
+    processes mapping it, so summing Pss over pre-forked workers gives their
+    real footprint, unlike Rss.
+
+    Returns:
+        Bytes per field (Rss, Pss, Shared_Clean, Private_Dirty, ...); empty
+        if unavailable
+    """
+    totals = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup', 'r') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == 'kB':
+                    totals[parts[0].rstrip(':')] = int(parts[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return totals
+
+
+def proportional_memory_bytes() -> float:
+    """Current PSS (0 where smaps_rollup is unavailable)."""
+    return memory_rollup().get('Pss', 0)
+
+
+def cache_hit_ratio() -> float:
+    """Fraction of prediction cache lookups that were hits."""
+    hits = prediction_cache_requests.get('hit')
+    total = hits + prediction_cache_requests.get('miss')
+    return hits / total if total else 0.0
+
+
+# Service metrics
+registry = MetricsRegistry()
+
+http_requests = registry.register(Counter(
+    'ml_http_requests_total', 'HTTP requests by endpoint and status code', ['endpoint', 'status']))
+http_request_duration = registry.register(Histogram(
+    'ml_http_request_duration_seconds', 'HTTP request duration', ['endpoint']))
+http_requests_in_flight = registry.register(Gauge(
+    'ml_http_requests_in_flight', 'HTTP requests being processed', ['endpoint']))
+stage_duration = registry.register(Histogram(
+    'ml_predict_stage_duration_seconds', 'Time spent in each stage of a prediction request', ['stage']))
+queue_depth = registry.register(Gauge(
+    'ml_inference_queue_depth', 'Predictions accepted but not yet finished'))
+batch_size = registry.register(Histogram(
+    'ml_inference_batch_size', 'Images per model call', buckets=BATCH_SIZE_BUCKETS))
+admission_queued = registry.register(Gauge(
+    'ml_admission_queue_depth', 'Requests waiting for an admission slot'))
+admission_rejections = registry.register(Counter(
+    'ml_admission_rejections_total', 'Requests rejected by admission control', ['reason']))
+grpc_predictions = registry.register(Counter(
+    'ml_grpc_predictions_total', 'gRPC predictions by method and status code', ['method', 'code']))
+prediction_cache_requests = registry.register(Counter(
+    'ml_prediction_cache_requests_total', 'Prediction cache lookups by result', ['result']))
+registry.register(Gauge(
+    'ml_prediction_cache_hit_ratio', 'Fraction of prediction cache lookups that were hits',
+    function=cache_hit_ratio))
+model_info = registry.register(Gauge(
+    'ml_model_info', 'Served model (value is always 1)', ['name', 'version', 'format', 'content_hash']))
+registry.register(Gauge(
+    'process_resident_memory_bytes', 'Resident memory size in bytes', function=resident_memory_bytes))
+registry.register(Gauge(
+    'process_proportional_memory_bytes', 'Proportional set size (shared pages split between processes)',
+    function=proportional_memory_bytes))
+
+
+def observe_stages(timer) -> None:
+    """Record the stage durations of a finished request (a StageTimer)."""
+    for stage, duration_ns in timer.durations_ns.items():
+        stage_duration.observe(duration_ns / 1e9, stage)
+
+
+def set_model_info(info: dict) -> None:
+    """Publish the served model (from /model-info data) as ml_model_info."""
+    model_info.clear()
+    model_info.set(1, info['model_name'], info['model_version'],
+                   info.get('format') or '', info.get('content_hash') or '')
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting requests by endpoint and status code and
+    timing them. Paths outside `endpoints` are grouped as 'other' so
+    arbitrary URLs cannot create unbounded label values.
+    """
+
+    def __init__(self, app, endpoints: Iterable[str]):
+        self.app = app
+        self.endpoints = frozenset(endpoints)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        endpoint = scope['path'] if scope['path'] in self.endpoints else 'other'
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        start = perf_counter_ns()
+        http_requests_in_flight.inc(endpoint)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_flight.dec(endpoint)
+            http_requests.inc(endpoint, str(status))
+            http_request_duration.observe((perf_counter_ns() - start) / 1e9, endpoint)
@@ -0,0 +1,144 @@
+"""
+Sampling Profiler and Slow Request Log
+
+SamplingProfiler snapshots the Python stack of every thread at a fixed
+interval (sys._current_frames) from a background thread and aggregates the
+samples as collapsed stacks, the input format of flamegraph.pl, speedscope
+and inferno. Nothing is traced between samples, so the overhead is one
+stack walk per interval (well under 1% at the default 5 ms).
+
+SlowRequestLog keeps the stage breakdown of requests slower than a
+threshold, so a p99 spike can be traced to a stage after the fact.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _frame_label(code) -> str:
+    """Flamegraph frame name: function (file:first line)."""
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Wall-clock sampling profiler producing collapsed stacks."""
+
+    def __init__(self, interval: float = 0.005):
+        """
+        Args:
+            interval: Seconds between samples
+        """
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self, own_thread_id: int, thread_names: Dict[int, str]):
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_thread_id:
+                continue
+
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            stack.append(thread_names.get(thread_id, f"thread-{thread_id}"))
+            stack.reverse()
+
+            self.samples[';'.join(stack)] += 1
+        self.sample_count += 1
+
+    def _run(self):
+        own_thread_id = threading.get_ident()
+        thread_names = {}
+        next_sample = time.perf_counter()
+
+        while not self._stop.is_set():
+            # Thread names only change when threads start, so refresh rarely
+            if self.sample_count % 100 == 0:
+                thread_names = {t.ident: t.name for t in threading.enumerate()}
+            self._sample(own_thread_id, thread_names)
+
+            next_sample += self.interval
+            self._stop.wait(max(0.0, next_sample - time.perf_counter()))
+
+    def start(self):
+        """Start sampling in a daemon thread."""
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling and wait for the sampler thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def collapsed(self) -> str:
+        """Samples as collapsed stacks ('frame;frame;frame count' per line)."""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+class SlowRequestLog:
+    """Ring buffer of requests slower than a threshold."""
+
+    def __init__(self, threshold_ms: float, max_entries: int = 100,
+                 exclude_prefixes: Tuple[str, ...] = ('/admin/',)):
+        """
+        Args:
+            threshold_ms: Requests taking longer are recorded (0 disables)
+            max_entries: Most recent slow requests kept
+            exclude_prefixes: Paths that are slow by design (profiling)
+        """
+        self.threshold_ms = threshold_ms
+        self.exclude_prefixes = exclude_prefixes
+        self._entries: deque = deque(maxlen=max_entries)
+
+    def observe(self, scope: dict, status: int, timer) -> None:
+        """
+        Record a finished request if it was slow.
+
+        Args:
+            scope: ASGI scope of the request
+            status: Response status code
+            timer: The request's StageTimer
+        """
+        if not self.threshold_ms:
+            return
+
+        total_ms = timer.elapsed_ns() / 1e6
+        if total_ms < self.threshold_ms or scope.get('path', '').startswith(self.exclude_prefixes):
+            return
+
+        stages = timer.timings_ms()
+        stages.pop('total', None)
+        # Time not covered by any stage (middleware, event loop, waiting)
+        untracked_ms = total_ms - sum(stages.values())
+
+        entry = {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+            "method": scope.get('method'),
+            "path": scope.get('path'),
+            "status": status,
+            "total_ms": round(total_ms, 3),
+            "stages_ms": stages,
+            "untracked_ms": round(max(0.0, untracked_ms), 3),
+            "pid": os.getpid()
+        }
+        self._entries.append(entry)
+        logger.warning(
+            f"Slow request: {entry['method']} {entry['path']} {status} "
+            f"took {total_ms:.1f}ms (stages: {stages})"
+        )
+
+    def entries(self) -> List[dict]:
+        """Slow requests, most recent first."""
+        return list(reversed(self._entries))
@@ -0,0 +1,156 @@
+"""
+Request Stage Timing
+
+Measures how long each stage of a prediction request takes (read, validate,
+decode, resize, inference, ...) with time.perf_counter_ns. A StageTimer is
+created per request by RequestTimerMiddleware, passed down the prediction
+path, and reported in the Server-Timing response header.
+"""
+
+from time import perf_counter_ns
+from typing import Callable, Dict, Sequence, TypeVar
+
+import anyio.to_thread
+from starlette.concurrency import run_in_threadpool
+
+T = TypeVar('T')
+
+# Stages of a /predict request, in request order
+PREDICT_STAGES = ('admission', 'read', 'validate', 'decode', 'resize', 'queue_wait', 'inference',
+                  'postprocess', 'serialise')
+
+
+class _Stage:
+    """Context manager timing one stage (a class: cheaper than @contextmanager)."""
+
+    __slots__ = ('timer', 'name', 'start')
+
+    def __init__(self, timer: 'StageTimer', name: str):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.timer.add(self.name, perf_counter_ns() - self.start)
+        return False
+
+
+class StageTimer:
+    """Collects stage durations of one request in nanoseconds."""
+
+    __slots__ = ('durations_ns', 'start_ns')
+
+    def __init__(self):
+        """Initialize an empty timer (the request starts now)."""
+        self.durations_ns: Dict[str, int] = {}
+        self.start_ns = perf_counter_ns()
+
+    def stage(self, name: str) -> _Stage:
+        """
+        Time a stage: `with timer.stage('decode'): ...`
+
+        Repeated stages are summed.
+        """
+        return _Stage(self, name)
+
+    def add(self, name: str, duration_ns: int):
+        """Record a duration measured elsewhere."""
+        self.durations_ns[name] = self.durations_ns.get(name, 0) + duration_ns
+
+    def split(self, name: str, part: str, duration_ns: int):
+        """Move `duration_ns` of a stage into another stage (work timed inside it)."""
+        self.add(name, -duration_ns)
+        self.add(part, duration_ns)
+
+    def seconds(self, name: str) -> float:
+        """Duration of a stage in seconds (0 if it did not run)."""
+        return self.durations_ns.get(name, 0) / 1e9
+
+    def elapsed_ns(self) -> int:
+        """Time since the request arrived."""
+        return perf_counter_ns() - self.start_ns
+
+    def timings_ms(self) -> Dict[str, float]:
+        """Stage durations and the total so far in milliseconds."""
+        timings = {name: round(ns / 1e6, 3) for name, ns in self.durations_ns.items()}
+        timings['total'] = round(self.elapsed_ns() / 1e6, 3)
+        return timings
+
+    def server_timing(self) -> str:
+        """Server-Timing header value, e.g. 'decode;dur=2.1, total;dur=104.3'."""
+        parts = [f"{name};dur={ns / 1e6:.3f}" for name, ns in self.durations_ns.items()]
+        parts.append(f"total;dur={self.elapsed_ns() / 1e6:.3f}")
+        return ', '.join(parts)
+
+
+async def run_in_threadpool_timed(timers: Sequence[StageTimer], func: Callable[..., T], *args) -> T:
+    """
+    Run `func(*args)` in the threadpool, recording the time spent waiting
+    for a free thread as the 'queue_wait' stage of every timer.
+    """
+    submitted_ns = perf_counter_ns()
+
+    def call():
+        waited_ns = perf_counter_ns() - submitted_ns
+        for timer in timers:
+            timer.add('queue_wait', waited_ns)
+        return func(*args)
+
+    return await run_in_threadpool(call)
+
+
+def set_threadpool_size(threads: int):
+    """
+    Limit the threads run_in_threadpool uses on the running event loop.
+
+    Waiting for one of them shows up as the 'queue_wait' stage.
+    """
+    anyio.to_thread.current_default_thread_limiter().total_tokens = max(1, threads)
+
+
+def request_timer(request) -> StageTimer:
+    """The StageTimer of a request (a new one if the middleware is not installed)."""
+    return getattr(request.state, 'timer', None) or StageTimer()
+
+
+class RequestTimerMiddleware:
+    """
+    ASGI middleware that starts a StageTimer when a request arrives and adds
+    a Server-Timing header with the recorded stages to the response.
+
+    The timer is stored in the request state (`request.state.timer`).
+    Responses without recorded stages get no header. Finished requests are
+    passed to `slow_request_log` (see app.utils.profiler) if one is given.
+    """
+
+    def __init__(self, app, slow_request_log=None):
+        self.app = app
+        self.slow_request_log = slow_request_log
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        timer = StageTimer()
+        scope.setdefault('state', {})['timer'] = timer
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                if timer.durations_ns:
+                    headers = list(message.get('headers', []))
+                    headers.append((b'server-timing', timer.server_timing().encode('latin-1')))
+                    message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            if self.slow_request_log is not None:
+                self.slow_request_log.observe(scope, status, timer)
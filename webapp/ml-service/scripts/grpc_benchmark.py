@@ -0,0 +1,288 @@
+"""
+gRPC vs REST Benchmark for the ML Service
+Author: Peter Maina (136532)
+Project: AI-Based Tomato & Potato Disease Classification
+
+Compares the REST /predict endpoint with the gRPC Inference service on the
+same server, the same images and the same number of closed-loop clients:
+1. rest: multipart upload, JSON response
+2. grpc: unary Predict with the JPEG/PNG bytes
+3. grpc-pixels: unary Predict with pixels decoded and resized by the client
+4. grpc-stream / grpc-stream-pixels: one PredictStream per client with
+   --stream-depth requests in flight, so the server can batch them
+
+For each mode it reports throughput, latency percentiles and the request and
+response sizes on the wire (HTTP body vs protobuf message).
+
+Without --url the script starts `python -m app.server` itself, with the
+gRPC port enabled and the prediction cache off (the same images repeat).
+
+Usage:
+    python scripts/grpc_benchmark.py --concurrency 8 --duration 15
+    python scripts/grpc_benchmark.py --url http://localhost:8000 --grpc-target localhost:50051 --modes rest grpc
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+from collections import deque
+from io import BytesIO
+from pathlib import Path
+
+import grpc
+import httpx
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from load_test import LoadTestStats, LoadTester, load_sample_images  # noqa: E402
+from worker_scaling import free_port, service_root, wait_until_healthy  # noqa: E402
+from app.rpc import inference_pb2, inference_pb2_grpc  # noqa: E402
+
+MODES = ('rest', 'grpc', 'grpc-pixels', 'grpc-stream', 'grpc-stream-pixels')
+
+
+def pixel_payload(content, size):
+    """Decode an image and resize it to the model input, as a caller would."""
+    image = Image.open(BytesIO(content)).convert('RGB').resize(size, Image.BILINEAR)
+    return inference_pb2.Pixels(height=size[1], width=size[0], data=image.tobytes())
+
+
+def build_requests(images, pixels, size, top_k):
+    """PredictRequest per sample image."""
+    requests = []
+    for index, (_, content, _) in enumerate(images):
+        if pixels:
+            requests.append(inference_pb2.PredictRequest(
+                request_id=str(index), pixels=pixel_payload(content, size), top_k=top_k))
+        else:
+            requests.append(inference_pb2.PredictRequest(request_id=str(index), encoded=content, top_k=top_k))
+    return requests
+
+
+class GrpcTester:
+    """Closed-loop gRPC clients recording results after the warm-up period."""
+
+    def __init__(self, stub, requests, seed, timeout):
+        self.stub = stub
+        self.requests = requests
+        self.rng = random.Random(seed)
+        self.timeout = timeout
+        self.stats = LoadTestStats()
+        self.measure_from = None
+        self.measure_until = None
+
+    def _record(self, start, error=None):
+        if self.measure_from <= start < self.measure_until:
+            latency_ms = (time.perf_counter() - start) * 1000
+            if error is None:
+                self.stats.record(latency_ms, 200)
+            else:
+                self.stats.record(latency_ms, error=error)
+
+    def _window(self, warmup, duration):
+        self.measure_from = time.perf_counter() + warmup
+        self.measure_until = self.measure_from + duration
+
+    async def run_unary(self, concurrency, warmup, duration):
+        """`concurrency` clients calling Predict back to back."""
+        self._window(warmup, duration)
+
+        async def client_loop():
+            while time.perf_counter() < self.measure_until:
+                request = self.requests[self.rng.randrange(len(self.requests))]
+                start = time.perf_counter()
+                try:
+                    await self.stub.Predict(request, timeout=self.timeout)
+                    self._record(start)
+                except grpc.aio.AioRpcError as e:
+                    self._record(start, e.code().name)
+
+        await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+
+    async def run_stream(self, concurrency, depth, warmup, duration):
+        """`concurrency` streams, each keeping `depth` requests in flight."""
+        self._window(warmup, duration)
+
+        async def stream_loop():
+            call = self.stub.PredictStream()
+            in_flight = asyncio.Semaphore(depth)
+            sent = deque()
+
+            async def writer():
+                while time.perf_counter() < self.measure_until:
+                    await in_flight.acquire()
+                    sent.append(time.perf_counter())
+                    await call.write(self.requests[self.rng.randrange(len(self.requests))])
+                await call.done_writing()
+
+            writing = asyncio.create_task(writer())
+            try:
+                async for response in call:
+                    # Responses come back in request order
+                    self._record(sent.popleft(), response.error_code or None)
+                    in_flight.release()
+            except grpc.aio.AioRpcError as e:
+                while sent:
+                    self._record(sent.popleft(), e.code().name)
+            finally:
+                writing.cancel()
+
+        await asyncio.gather(*(stream_loop() for _ in range(concurrency)))
+
+
+async def rest_sizes(client, images):
+    """Request and response body sizes of one REST prediction."""
+    filename, content, content_type = images[0]
+    request = client.build_request('POST', '/predict', files={'file': (filename, content, content_type)})
+    request_bytes = len(request.read())
+    response = await client.send(request)
+    return request_bytes, len(response.content)
+
+
+async def grpc_sizes(stub, requests):
+    """Request and response message sizes of one gRPC prediction."""
+    response = await stub.Predict(requests[0], timeout=30)
+    return requests[0].ByteSize(), response.ByteSize()
+
+
+async def run_mode(mode, args, images, grpc_requests):
+    """Measure one mode; returns the load test summary with payload sizes."""
+    if mode == 'rest':
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=args.url, limits=limits) as client:
+            request_bytes, response_bytes = await rest_sizes(client, images)
+            tester = LoadTester(client, '/predict', images, 'file', 30.0, args.seed)
+            await tester.run_closed(args.concurrency, args.warmup, args.duration)
+    else:
+        requests = grpc_requests['pixels' if mode.endswith('pixels') else 'encoded']
+        async with grpc.aio.insecure_channel(args.grpc_target, options=[
+            ('grpc.max_send_message_length', 64 * 1024 * 1024)
+        ]) as channel:
+            stub = inference_pb2_grpc.InferenceStub(channel)
+            request_bytes, response_bytes = await grpc_sizes(stub, requests)
+            tester = GrpcTester(stub, requests, args.seed, 30.0)
+            if mode.startswith('grpc-stream'):
+                await tester.run_stream(args.concurrency, args.stream_depth, args.warmup, args.duration)
+            else:
+                await tester.run_unary(args.concurrency, args.warmup, args.duration)
+
+    summary = tester.stats.summary(args.duration)
+    summary['request_bytes'] = request_bytes
+    summary['response_bytes'] = response_bytes
+    return summary
+
+
+def print_results(results):
+    """Print one row per mode."""
+    print(f"\n{'='*92}")
+    print("REST vs gRPC")
+    print(f"{'='*92}")
+    print(f"{'Mode':<20} {'Req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'Errors':>7} "
+          f"{'Request':>11} {'Response':>10}")
+    print('-' * 92)
+    for mode, summary in results.items():
+        latency = summary['latency_ms']
+        print(f"{mode:<20} {summary['throughput']:>9.1f} {latency['p50'] or 0:>8.1f} "
+              f"{latency['p95'] or 0:>8.1f} {latency['p99'] or 0:>8.1f} {summary['error_rate']:>7.2%} "
+              f"{summary['request_bytes'] / 1024:>9.1f}KB {summary['response_bytes']:>9}B")
+    print(f"{'='*92}")
+    print("Request/Response: HTTP body or protobuf message size of one prediction\n")
+
+
+def start_server(args):
+    """Start app.server with gRPC enabled; sets args.url and args.grpc_target."""
+    http_port, grpc_port = free_port(), free_port()
+    args.url = f"http://127.0.0.1:{http_port}"
+    args.grpc_target = f"127.0.0.1:{grpc_port}"
+
+    env = dict(os.environ, LOG_LEVEL='WARNING', GRPC_PORT=str(grpc_port), PREDICTION_CACHE_SIZE='0')
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'app.server', '--workers', str(args.workers),
+         '--host', '127.0.0.1', '--port', str(http_port), '--memory-report-interval', '0'],
+        cwd=service_root, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_healthy(args.url, args.workers, server)
+    except RuntimeError:
+        stop_server(server)
+        raise
+    return server
+
+
+def stop_server(server):
+    server.send_signal(signal.SIGTERM)
+    try:
+        server.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        server.kill()
+
+
+def main():
+    """Main benchmark function."""
+    parser = argparse.ArgumentParser(description="Compare REST /predict with the gRPC Inference service")
+    parser.add_argument('--url', type=str, default=None,
+                        help='REST base URL of a running service (default: start one)')
+    parser.add_argument('--grpc-target', type=str, default='localhost:50051',
+                        help='gRPC address of a running service (with --url)')
+    parser.add_argument('--workers', type=int, default=1, help='Workers of the started server')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES), help='Modes to measure')
+    parser.add_argument('--concurrency', type=int, default=8, help='Closed-loop clients (or streams)')
+    parser.add_argument('--stream-depth', type=int, default=4, help='Requests in flight per stream')
+    parser.add_argument('--top-k', type=int, default=0, help='Classes per gRPC response (0 = all)')
+    parser.add_argument('--duration', type=float, default=15.0, help='Measured seconds per mode')
+    parser.add_argument('--warmup', type=float, default=3.0, help='Unmeasured seconds per mode')
+    parser.add_argument('--images', type=str,
+                        default=str(service_root.parent.parent / 'data' / 'processed' / 'test'),
+                        help='Directory of sample images')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('--output', type=str, default=None, help='Write the results as JSON')
+    args = parser.parse_args()
+
+    images = load_sample_images(Path(args.images), 100, args.seed)
+    server = start_server(args) if args.url is None else None
+
+    try:
+        # Clients send pixels at the model's input size
+        input_shape = httpx.get(f"{args.url}/model-info", timeout=10).json()['input_shape']
+        size = (input_shape[1], input_shape[0])
+        grpc_requests = {
+            'encoded': build_requests(images, False, size, args.top_k),
+            'pixels': build_requests(images, True, size, args.top_k)
+        }
+
+        print(f"\n{'='*60}")
+        print("ML Service REST vs gRPC Benchmark")
+        print(f"{'='*60}")
+        print(f"REST: {args.url}")
+        print(f"gRPC: {args.grpc_target}")
+        print(f"Clients: {args.concurrency} (stream depth {args.stream_depth})")
+        print(f"Images: {len(images)} (pixels resized to {size[0]}x{size[1]})")
+        print(f"Duration: {args.warmup}s warm-up + {args.duration}s measured per mode")
+        print(f"{'='*60}\n")
+
+        results = {}
+        for mode in args.modes:
+            results[mode] = asyncio.run(run_mode(mode, args, images, grpc_requests))
+            print(f"  ✓ {mode}: {results[mode]['throughput']:.1f} req/s, "
+                  f"p99 {results[mode]['latency_ms']['p99'] or 0:.1f}ms")
+    finally:
+        if server is not None:
+            stop_server(server)
+
+    print_results(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+        print(f"✓ Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
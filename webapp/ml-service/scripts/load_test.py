@@ -0,0 +1,417 @@
+"""
+Load Test for the ML Service
+Author: Peter Maina (136532)
+Project: AI-Based Tomato & Potato Disease Classification
+
+Drives /predict with PlantVillage sample images from an asyncio HTTP client
+and checks the results against latency and error-rate SLOs.
+
+Modes:
+1. closed: a fixed number of concurrent clients, each sending its next
+   request as soon as the previous one returns (measures capacity)
+2. open: requests arrive at a constant (or Poisson) rate regardless of how
+   fast the service answers (measures latency under a given load). Latency
+   is measured from the scheduled send time, so queueing in the client
+   counts against the service (no coordinated omission).
+
+Only httpx and Pillow are needed, so it runs against the mock service
+without TensorFlow. --in-process serves the app through httpx's ASGI
+transport, which needs no running server.
+
+Usage:
+    python scripts/load_test.py --url http://localhost:8000 --mode closed --concurrency 8 --duration 30
+    python scripts/load_test.py --mode open --rate 20 --duration 60 --slo p99=800
+    python scripts/load_test.py --in-process --mode closed --concurrency 4 --duration 10
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from io import BytesIO
+from pathlib import Path
+
+import httpx
+from PIL import Image
+
+service_root = Path(__file__).parent.parent
+project_root = service_root.parent.parent
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+CONTENT_TYPES = {'.jpg': 'image/jpeg', '.jpeg': 'image/jpeg', '.png': 'image/png'}
+
+# Default SLO budgets (latency in milliseconds, error rate as a fraction)
+DEFAULT_SLO = {'p95': 500.0, 'p99': 1000.0, 'error_rate': 0.01}
+SLO_KEYS = ('p50', 'p95', 'p99', 'p99.9', 'error_rate', 'throughput')
+
+
+def load_sample_images(image_dir, max_images, seed):
+    """
+    Load sample images into memory.
+
+    Args:
+        image_dir (Path): Directory searched recursively (e.g. data/processed/test)
+        max_images (int): Maximum number of images to load
+        seed (int): Random seed for the sample
+
+    Returns:
+        list: (filename, bytes, content type) tuples
+    """
+    paths = []
+    if image_dir.exists():
+        for root, _, files in os.walk(image_dir):
+            paths += [Path(root) / name for name in files if name.lower().endswith(IMAGE_EXTENSIONS)]
+    paths.sort()
+    random.Random(seed).shuffle(paths)
+
+    images = [
+        (path.name, path.read_bytes(), CONTENT_TYPES[path.suffix.lower()])
+        for path in paths[:max_images]
+    ]
+    if images:
+        return images
+
+    # No dataset available: synthetic leaf-coloured JPEGs at a typical upload size
+    print(f"⚠ No images found in {image_dir}, using synthetic images")
+    rng = random.Random(seed)
+    for i in range(min(max_images, 16)):
+        image = Image.new('RGB', (256, 256), (rng.randint(40, 120), rng.randint(100, 200), rng.randint(30, 90)))
+        buffer = BytesIO()
+        image.save(buffer, format='JPEG', quality=90)
+        images.append((f"synthetic_{i}.jpg", buffer.getvalue(), 'image/jpeg'))
+    return images
+
+
+def percentile(sorted_values, q):
+    """Linear-interpolated percentile of a sorted list (q in 0-100)."""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * q / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def parse_server_timing(header):
+    """Parse 'name;dur=1.2, other;dur=3.4' into {name: milliseconds}."""
+    timings = {}
+    for metric in (header or '').split(','):
+        name, _, params = metric.strip().partition(';')
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'dur' and name:
+                try:
+                    timings[name] = float(value)
+                except ValueError:
+                    pass
+    return timings
+
+
+class LoadTestStats:
+    """Per-request results collected during the measurement window."""
+
+    def __init__(self):
+        self.latencies_ms = []
+        self.statuses = Counter()
+        self.errors = Counter()
+        self.server_timings = defaultdict(list)
+
+    def record(self, latency_ms, status=None, error=None, server_timing=None):
+        if error is not None:
+            self.errors[error] += 1
+            return
+
+        self.statuses[status] += 1
+        if 200 <= status < 300:
+            self.latencies_ms.append(latency_ms)
+            for name, value in parse_server_timing(server_timing).items():
+                self.server_timings[name].append(value)
+
+    def summary(self, elapsed):
+        """Throughput, latency percentiles and error rate."""
+        latencies = sorted(self.latencies_ms)
+        succeeded = len(latencies)
+        total = sum(self.statuses.values()) + sum(self.errors.values())
+        failed = total - succeeded
+
+        def latency_summary(values):
+            values = sorted(values)
+            return {
+                'p50': percentile(values, 50),
+                'p95': percentile(values, 95),
+                'p99': percentile(values, 99),
+                'p99.9': percentile(values, 99.9),
+                'mean': sum(values) / len(values) if values else None,
+                'max': values[-1] if values else None
+            }
+
+        return {
+            'requests': total,
+            'succeeded': succeeded,
+            'failed': failed,
+            'error_rate': failed / total if total else 0.0,
+            'throughput': succeeded / elapsed if elapsed else 0.0,
+            'duration_s': elapsed,
+            'latency_ms': latency_summary(latencies),
+            'status_codes': {str(code): count for code, count in sorted(self.statuses.items())},
+            'errors': dict(self.errors),
+            'server_timing_ms': {
+                name: {key: latency_summary(values)[key] for key in ('p50', 'p95', 'p99')}
+                for name, values in self.server_timings.items()
+            }
+        }
+
+
+class LoadTester:
+    """Sends requests and records results after the warm-up period."""
+
+    def __init__(self, client, endpoint, images, field, timeout, seed, unique_payloads=False,
+                 deadline_ms=None):
+        self.client = client
+        self.endpoint = endpoint
+        self.images = images
+        self.field = field
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+        self.unique_payloads = unique_payloads
+        self.headers = {'X-Request-Timeout-Ms': str(deadline_ms)} if deadline_ms else {}
+        self.stats = LoadTestStats()
+        self.measure_from = None
+        self.measure_until = None
+
+    async def send(self, scheduled_at=None):
+        """
+        Send one request.
+
+        Args:
+            scheduled_at (float): Intended send time (open loop); latency is
+                measured from it. Defaults to now.
+        """
+        start = scheduled_at if scheduled_at is not None else time.perf_counter()
+        filename, content, content_type = self.images[self.rng.randrange(len(self.images))]
+        if self.unique_payloads:
+            # Decoders ignore bytes after the end of the image; the prediction cache does not
+            content += self.rng.randbytes(16)
+
+        status = server_timing = error = None
+        try:
+            response = await self.client.post(
+                self.endpoint,
+                files={self.field: (filename, content, content_type)},
+                headers=self.headers,
+                timeout=self.timeout
+            )
+            status = response.status_code
+            server_timing = response.headers.get('server-timing')
+        except httpx.TimeoutException:
+            error = 'timeout'
+        except httpx.HTTPError as e:
+            error = type(e).__name__
+
+        end = time.perf_counter()
+        # Count requests that started inside the measurement window
+        if self.measure_from <= start < self.measure_until:
+            self.stats.record((end - start) * 1000, status, error, server_timing)
+
+    async def run_closed(self, concurrency, warmup, duration):
+        """Closed loop: `concurrency` clients back to back."""
+        now = time.perf_counter()
+        self.measure_from = now + warmup
+        self.measure_until = self.measure_from + duration
+
+        async def client_loop():
+            while time.perf_counter() < self.measure_until:
+                await self.send()
+
+        await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+
+    async def run_open(self, rate, warmup, duration, poisson=False):
+        """Open loop: arrivals at `rate` per second, independent of responses."""
+        now = time.perf_counter()
+        self.measure_from = now + warmup
+        self.measure_until = self.measure_from + duration
+
+        tasks = []
+        next_arrival = now
+        while next_arrival < self.measure_until:
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(self.send(scheduled_at=next_arrival)))
+            next_arrival += self.rng.expovariate(rate) if poisson else 1 / rate
+
+        await asyncio.gather(*tasks)
+
+
+def parse_slo(values):
+    """Parse --slo KEY=VALUE arguments on top of the defaults."""
+    slo = dict(DEFAULT_SLO)
+    for item in values or []:
+        key, _, value = item.partition('=')
+        if key not in SLO_KEYS or not value:
+            raise argparse.ArgumentTypeError(f"Invalid SLO '{item}', use KEY=VALUE with KEY in {SLO_KEYS}")
+        slo[key] = float(value)
+    return slo
+
+
+def check_slo(summary, slo):
+    """
+    Compare results with SLO budgets.
+
+    Latency and error rate must be at most the budget; throughput at least.
+
+    Returns:
+        list: One dict per budget with the measured value and pass/fail
+    """
+    checks = []
+    for key, budget in slo.items():
+        if key == 'throughput':
+            measured = summary['throughput']
+            passed = measured >= budget
+        elif key == 'error_rate':
+            measured = summary['error_rate']
+            passed = measured <= budget
+        else:
+            measured = summary['latency_ms'][key]
+            passed = measured is not None and measured <= budget
+        checks.append({'metric': key, 'budget': budget, 'measured': measured, 'passed': passed})
+    return checks
+
+
+def print_report(summary, checks, args):
+    """Print the load test summary."""
+    latency = summary['latency_ms']
+
+    def ms(value):
+        return f"{value:.1f} ms" if value is not None else "n/a"
+
+    print(f"\n{'='*60}")
+    print("Load Test Results")
+    print(f"{'='*60}")
+    print(f"Requests: {summary['requests']} ({summary['succeeded']} ok, {summary['failed']} failed)")
+    print(f"Throughput: {summary['throughput']:.1f} req/s")
+    print(f"Error Rate: {summary['error_rate']*100:.2f}%")
+    print(f"Latency: p50 {ms(latency['p50'])} | p95 {ms(latency['p95'])} | "
+          f"p99 {ms(latency['p99'])} | p99.9 {ms(latency['p99.9'])} | max {ms(latency['max'])}")
+    print(f"Status Codes: {summary['status_codes']}")
+    if summary['errors']:
+        print(f"Client Errors: {summary['errors']}")
+
+    if summary['server_timing_ms']:
+        print("\nServer stages (Server-Timing, p50 / p95 ms):")
+        for name, values in summary['server_timing_ms'].items():
+            print(f"  {name:<12} {values['p50']:>8.2f} {values['p95']:>8.2f}")
+
+    print("\nSLO:")
+    for check in checks:
+        unit = '' if check['metric'] in ('error_rate', 'throughput') else ' ms'
+        comparison = '>=' if check['metric'] == 'throughput' else '<='
+        measured = check['measured']
+        measured_text = f"{measured:.4g}{unit}" if measured is not None else "n/a"
+        print(f"  {'✓' if check['passed'] else '✗'} {check['metric']}: {measured_text} "
+              f"({comparison} {check['budget']:g}{unit})")
+    print(f"{'='*60}\n")
+
+
+async def run_load_test(args, images):
+    """Create the client, run the selected mode and return the summary."""
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+
+    if args.in_process:
+        # Serve the app in this process (mock predictor unless main.py says otherwise)
+        sys.path.insert(0, str(service_root))
+        from app.main import app, lifespan
+
+        transport = httpx.ASGITransport(app=app)
+        async with lifespan(app):
+            async with httpx.AsyncClient(transport=transport, base_url='http://ml-service', limits=limits) as client:
+                return await run_mode(client, args, images)
+
+    async with httpx.AsyncClient(base_url=args.url, limits=limits) as client:
+        return await run_mode(client, args, images)
+
+
+async def run_mode(client, args, images):
+    tester = LoadTester(client, args.endpoint, images, args.field, args.timeout, args.seed,
+                        unique_payloads=args.unique_payloads, deadline_ms=args.deadline_ms)
+    if args.mode == 'closed':
+        await tester.run_closed(args.concurrency, args.warmup, args.duration)
+    else:
+        await tester.run_open(args.rate, args.warmup, args.duration, poisson=args.poisson)
+    return tester.stats.summary(args.duration)
+
+
+def main():
+    """Main load test function."""
+    parser = argparse.ArgumentParser(description="Load test the ML service /predict endpoint")
+    parser.add_argument('--url', type=str, default='http://localhost:8000', help='Service base URL')
+    parser.add_argument('--in-process', action='store_true',
+                        help='Serve app.main in this process instead of calling --url')
+    parser.add_argument('--endpoint', type=str, default='/predict', help='Endpoint to load')
+    parser.add_argument('--field', type=str, default='file', help='Multipart field name of the image')
+    parser.add_argument('--mode', type=str, default='closed', choices=['closed', 'open'],
+                        help='closed: fixed concurrency; open: fixed arrival rate')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent clients (closed loop)')
+    parser.add_argument('--rate', type=float, default=10.0, help='Requests per second (open loop)')
+    parser.add_argument('--poisson', action='store_true', help='Poisson arrivals instead of evenly spaced (open loop)')
+    parser.add_argument('--duration', type=float, default=30.0, help='Measured seconds')
+    parser.add_argument('--warmup', type=float, default=5.0, help='Unmeasured seconds before the measurement')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Per-request timeout in seconds')
+    parser.add_argument('--deadline-ms', type=float, default=None,
+                        help='Send X-Request-Timeout-Ms so the service drops requests past this budget')
+    parser.add_argument('--max-connections', type=int, default=100, help='HTTP connection pool size')
+    parser.add_argument('--images', type=str, default=str(project_root / 'data' / 'processed' / 'test'),
+                        help='Directory of sample images (searched recursively)')
+    parser.add_argument('--max-images', type=int, default=200, help='Sample images loaded into memory')
+    parser.add_argument('--unique-payloads', action='store_true',
+                        help='Append random trailing bytes to every upload to bypass the prediction cache')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for image choice and arrivals')
+    parser.add_argument('--slo', type=str, action='append', metavar='KEY=VALUE',
+                        help=f"SLO budget, repeatable (keys: {', '.join(SLO_KEYS)}; latency in ms). "
+                             f"Defaults: {DEFAULT_SLO}")
+    parser.add_argument('--output', type=str, default=None, help='Write the results as JSON')
+
+    args = parser.parse_args()
+    try:
+        slo = parse_slo(args.slo)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    images = load_sample_images(Path(args.images), args.max_images, args.seed)
+
+    print(f"\n{'='*60}")
+    print("ML Service Load Test")
+    print(f"{'='*60}")
+    print(f"Target: {'in-process app' if args.in_process else args.url}{args.endpoint}")
+    if args.mode == 'closed':
+        print(f"Mode: closed loop, {args.concurrency} concurrent clients")
+    else:
+        print(f"Mode: open loop, {args.rate} req/s ({'Poisson' if args.poisson else 'constant'} arrivals)")
+    print(f"Duration: {args.warmup}s warm-up + {args.duration}s measured")
+    print(f"Sample Images: {len(images)}")
+    print(f"{'='*60}\n")
+
+    summary = asyncio.run(run_load_test(args, images))
+    checks = check_slo(summary, slo)
+    print_report(summary, checks, args)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'config': {key: value for key, value in vars(args).items() if key != 'slo'},
+                'results': summary,
+                'slo': checks
+            }, f, indent=4)
+        print(f"✓ Results saved to: {args.output}")
+
+    # Non-zero exit when an SLO is missed (for CI)
+    sys.exit(0 if all(check['passed'] for check in checks) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Threading Tuner for the ML Service
+Author: Peter Maina (136532)
+Project: AI-Based Tomato & Potato Disease Classification
+
+Searches the threading settings of the pre-fork server on the current host:
+1. WORKERS: worker processes (each pinned to its share of the CPUs)
+2. INFERENCE_THREADS: intra-op threads of the model runtime per worker
+3. INTER_OP_THREADS: TensorFlow/ONNX inter-op threads per worker
+4. DECODE_THREADS: threadpool for decoding, preprocessing and model calls
+
+Every combination (or a random sample of --max-trials) is started with
+app.server and loaded by the same number of closed-loop clients. The best
+configuration maximises the objective among those meeting --max-p99-ms:
+- throughput: requests per second
+- p99: lowest 99th percentile latency
+- goodput: requests per second answered within --max-p99-ms
+
+Combinations with more runtime threads than CPUs per worker are skipped,
+since oversubscribed cores are what this tuning avoids. Serve the real
+model (app.services.predictor in app/main.py, TensorFlow installed) for
+meaningful inference numbers; the mock predictor only exercises
+DECODE_THREADS.
+
+Usage:
+    python scripts/tune_threading.py --duration 15 --max-p99-ms 800 --output tuning.json
+    python scripts/tune_threading.py --workers 1 2 --decode-threads 4 16 --max-trials 6
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from load_test import load_sample_images  # noqa: E402
+from worker_scaling import measure, service_root  # noqa: E402
+
+OBJECTIVES = ('throughput', 'p99', 'goodput')
+
+
+def powers_of_two(limit):
+    """1, 2, 4, ... up to and including `limit`."""
+    values = [1]
+    while values[-1] * 2 <= limit:
+        values.append(values[-1] * 2)
+    if values[-1] != limit:
+        values.append(limit)
+    return values
+
+
+def candidate_configs(cpus, workers_list, inference_threads, inter_op_threads, decode_threads):
+    """
+    Threading configurations to try.
+
+    Args:
+        cpus: CPUs available to the service
+        workers_list: Worker counts (default: powers of two up to `cpus`)
+        inference_threads: Intra-op threads (default: powers of two up to CPUs per worker)
+        inter_op_threads: Inter-op thread counts
+        decode_threads: Threadpool sizes
+
+    Returns:
+        List of configuration dicts
+    """
+    configs = []
+    for workers in workers_list or powers_of_two(cpus):
+        per_worker = max(1, cpus // workers)
+        for threads, inter_op, decode in itertools.product(
+                inference_threads or powers_of_two(per_worker), inter_op_threads, decode_threads):
+            if threads + inter_op - 1 > per_worker:
+                continue  # Oversubscribed
+            configs.append({
+                'workers': workers,
+                'inference_threads': threads,
+                'inter_op_threads': inter_op,
+                'decode_threads': decode
+            })
+    return configs
+
+
+def environment(config):
+    """Settings environment variables for a configuration."""
+    return {
+        'INFERENCE_THREADS': str(config['inference_threads']),
+        'INTER_OP_THREADS': str(config['inter_op_threads']),
+        'DECODE_THREADS': str(config['decode_threads'])
+    }
+
+
+def score(result, objective):
+    """Objective value of a trial (higher is better)."""
+    if objective == 'p99':
+        return -(result['latency_ms']['p99'] or float('inf'))
+    if objective == 'goodput':
+        return result['goodput']
+    return result['throughput']
+
+
+def meets_slo(result, max_p99_ms, max_error_rate):
+    """Whether a trial meets the latency and error constraints."""
+    p99 = result['latency_ms']['p99']
+    return (p99 is not None and (max_p99_ms is None or p99 <= max_p99_ms)
+            and result['error_rate'] <= max_error_rate)
+
+
+def print_trials(trials, objective):
+    """Print all trials, best first."""
+    print(f"\n{'='*92}")
+    print(f"Threading Trials (objective: {objective})")
+    print(f"{'='*92}")
+    print(f"{'Workers':>8} {'Intra':>6} {'Inter':>6} {'Decode':>7} {'Req/s':>9} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'Errors':>7} {'SLO':>5}")
+    print('-' * 92)
+    for trial in trials:
+        config, result = trial['config'], trial['result']
+        latency = result['latency_ms']
+        print(f"{config['workers']:>8} {config['inference_threads']:>6} {config['inter_op_threads']:>6} "
+              f"{config['decode_threads']:>7} {result['throughput']:>9.1f} "
+              f"{latency['p50'] or 0:>8.1f} {latency['p95'] or 0:>8.1f} {latency['p99'] or 0:>8.1f} "
+              f"{result['error_rate']:>7.2%} {'✓' if trial['meets_slo'] else '⚠':>5}")
+    print(f"{'='*92}\n")
+
+
+def main():
+    """Main threading tuning function."""
+    parser = argparse.ArgumentParser(description="Search the ML service threading settings on this host")
+    parser.add_argument('--workers', type=int, nargs='+', default=None,
+                        help='Worker counts (default: powers of two up to the CPU count)')
+    parser.add_argument('--inference-threads', type=int, nargs='+', default=None,
+                        help='Intra-op threads per worker (default: powers of two up to CPUs per worker)')
+    parser.add_argument('--inter-op-threads', type=int, nargs='+', default=[1, 2],
+                        help='Inter-op threads per worker')
+    parser.add_argument('--decode-threads', type=int, nargs='+', default=[4, 16, 40],
+                        help='Threadpool sizes per worker')
+    parser.add_argument('--objective', choices=OBJECTIVES, default='throughput', help='What to maximise')
+    parser.add_argument('--max-p99-ms', type=float, default=1000.0,
+                        help='Latency constraint for the best configuration (and goodput)')
+    parser.add_argument('--max-error-rate', type=float, default=0.01, help='Error constraint')
+    parser.add_argument('--concurrency', type=int, default=None,
+                        help='Closed-loop clients, the same for every trial (default: 4 per CPU)')
+    parser.add_argument('--max-trials', type=int, default=None,
+                        help='Try a random sample of this many configurations')
+    parser.add_argument('--duration', type=float, default=15.0, help='Measured seconds per trial')
+    parser.add_argument('--warmup', type=float, default=3.0, help='Unmeasured seconds per trial')
+    parser.add_argument('--images', type=str,
+                        default=str(service_root.parent.parent / 'data' / 'processed' / 'test'),
+                        help='Directory of sample images')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('--output', type=str, default=None, help='Write all trials as JSON')
+    args = parser.parse_args()
+    # Read by worker_scaling.measure
+    args.no_pin = False
+    args.concurrency_per_worker = None
+
+    if not hasattr(os, 'sched_getaffinity'):
+        parser.error("Requires Linux (fork and CPU affinity)")
+
+    cpus = len(os.sched_getaffinity(0))
+    concurrency = args.concurrency or 4 * cpus
+    configs = candidate_configs(cpus, args.workers, args.inference_threads,
+                                args.inter_op_threads, args.decode_threads)
+    if not configs:
+        parser.error("No configuration fits the available CPUs")
+    if args.max_trials and args.max_trials < len(configs):
+        configs = random.Random(args.seed).sample(configs, args.max_trials)
+
+    images = load_sample_images(Path(args.images), 200, args.seed)
+    trial_seconds = len(configs) * (args.duration + args.warmup)
+
+    print(f"\n{'='*60}")
+    print("ML Service Threading Tuner")
+    print(f"{'='*60}")
+    print(f"CPUs Available: {cpus}")
+    print(f"Configurations: {len(configs)} (~{trial_seconds / 60:.1f} minutes)")
+    print(f"Clients: {concurrency} (closed loop)")
+    print(f"Objective: {args.objective}, p99 <= {args.max_p99_ms}ms, errors <= {args.max_error_rate:.1%}")
+    print(f"{'='*60}\n")
+
+    trials = []
+    for number, config in enumerate(configs, 1):
+        try:
+            result = measure(config['workers'], args, images, concurrency, environment(config),
+                             latency_budget_ms=args.max_p99_ms)
+        except RuntimeError as e:
+            print(f"  ⚠ [{number}/{len(configs)}] {config}: {e}")
+            continue
+
+        latencies = result['latency_ms']
+        trial = {
+            'config': config,
+            'result': result,
+            'meets_slo': meets_slo(result, args.max_p99_ms, args.max_error_rate),
+            'score': score(result, args.objective)
+        }
+        trials.append(trial)
+        print(f"  {'✓' if trial['meets_slo'] else '⚠'} [{number}/{len(configs)}] "
+              f"workers={config['workers']} intra={config['inference_threads']} "
+              f"inter={config['inter_op_threads']} decode={config['decode_threads']}: "
+              f"{result['throughput']:.1f} req/s, p99 {latencies['p99'] or 0:.1f}ms")
+
+    if not trials:
+        print("⚠ No trial completed")
+        sys.exit(1)
+
+    # Configurations meeting the constraints first, then by objective
+    trials.sort(key=lambda t: (t['meets_slo'], t['score']), reverse=True)
+    print_trials(trials, args.objective)
+
+    best = trials[0]
+    if not best['meets_slo']:
+        print(f"⚠ No configuration met p99 <= {args.max_p99_ms}ms and errors <= {args.max_error_rate:.1%}; "
+              f"best effort:")
+    else:
+        print("✓ Best configuration:")
+    print(f"    WORKERS={best['config']['workers']}")
+    for name, value in environment(best['config']).items():
+        print(f"    {name}={value}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'cpus': cpus, 'concurrency': concurrency, 'objective': args.objective,
+                       'max_p99_ms': args.max_p99_ms, 'trials': trials}, f, indent=4)
+        print(f"\n✓ Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Worker Scaling Benchmark for the ML Service
+Author: Peter Maina (136532)
+Project: AI-Based Tomato & Potato Disease Classification
+
+Starts the pre-fork server (app.server) with each worker count in turn and
+loads it with the closed-loop client from load_test.py. For every count it
+reports:
+1. Aggregate throughput and latency percentiles
+2. RSS and PSS of every worker (from /proc/<pid>/smaps_rollup). RSS counts
+   shared pages in every worker; PSS splits them, so the PSS total shows
+   what preloading in the master saves.
+
+Runs against the mock predictor without TensorFlow (the default app mode).
+
+Usage:
+    python scripts/worker_scaling.py --workers 1 2 4 --concurrency-per-worker 8 --duration 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+service_root = Path(__file__).parent.parent
+sys.path.insert(0, str(service_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.utils.metrics import memory_rollup  # noqa: E402
+from load_test import LoadTester, load_sample_images  # noqa: E402
+
+
+def free_port():
+    """An unused local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def child_pids(parent_pid):
+    """PIDs of the direct children of a process (Linux /proc)."""
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'r') as f:
+                # The command name may contain spaces; fields after ')' are fixed
+                fields = f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == parent_pid:
+            children.append(int(entry))
+    return sorted(children)
+
+
+def wait_until_healthy(base_url, workers, server, timeout=60.0):
+    """Wait until /health answers and all workers have started."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(
+                f"Server exited with status {server.returncode} (run python -m app.server to see why)"
+            )
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1.0).status_code == 200 \
+                    and len(child_pids(server.pid)) >= workers:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server not healthy after {timeout}s")
+
+
+async def drive(base_url, images, concurrency, warmup, duration, seed, latency_budget_ms=None):
+    """
+    Closed-loop load; returns the load test summary, plus the goodput
+    (successful requests per second within `latency_budget_ms`) if given.
+    """
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+        tester = LoadTester(client, '/predict', images, 'file', 30.0, seed)
+        await tester.run_closed(concurrency, warmup, duration)
+
+    summary = tester.stats.summary(duration)
+    if latency_budget_ms is not None:
+        within = sum(1 for latency in tester.stats.latencies_ms if latency <= latency_budget_ms)
+        summary['goodput'] = within / duration
+    return summary
+
+
+def measure(workers, args, images, concurrency=None, env_overrides=None, latency_budget_ms=None):
+    """
+    Run the server with `workers` workers and measure it.
+
+    Args:
+        workers: Worker processes
+        args: Parsed arguments (duration, warmup, seed, concurrency_per_worker, no_pin)
+        images: Request payloads
+        concurrency: Closed-loop clients (default: concurrency_per_worker per worker)
+        env_overrides: Extra environment variables (settings) for the server
+        latency_budget_ms: Also report the goodput within this latency
+
+    Returns:
+        Throughput, latency and memory results
+    """
+    concurrency = concurrency or workers * args.concurrency_per_worker
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    command = [sys.executable, '-m', 'app.server', '--workers', str(workers),
+               '--host', '127.0.0.1', '--port', str(port), '--memory-report-interval', '0']
+    if args.no_pin:
+        command.append('--no-pin')
+
+    # Every request runs the model, although the same images repeat
+    env = dict(os.environ, LOG_LEVEL='WARNING', PREDICTION_CACHE_SIZE='0', **(env_overrides or {}))
+    server = subprocess.Popen(command, cwd=service_root, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_healthy(base_url, workers, server)
+        summary = asyncio.run(drive(base_url, images, concurrency, args.warmup, args.duration, args.seed,
+                                    latency_budget_ms))
+
+        memory = []
+        for pid in child_pids(server.pid):
+            rollup = memory_rollup(pid)
+            memory.append({
+                'pid': pid,
+                'rss_mb': rollup.get('Rss', 0) / 2**20,
+                'pss_mb': rollup.get('Pss', 0) / 2**20
+            })
+        master = memory_rollup(server.pid)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    return {
+        'workers': workers,
+        'concurrency': concurrency,
+        'throughput': summary['throughput'],
+        'goodput': summary.get('goodput'),
+        'latency_ms': summary['latency_ms'],
+        'error_rate': summary['error_rate'],
+        'worker_memory': memory,
+        'master_pss_mb': master.get('Pss', 0) / 2**20,
+        'total_rss_mb': sum(m['rss_mb'] for m in memory),
+        'total_pss_mb': sum(m['pss_mb'] for m in memory) + master.get('Pss', 0) / 2**20
+    }
+
+
+def print_results(results):
+    """Print throughput and memory per worker count."""
+    baseline = results[0]['throughput'] / results[0]['workers'] if results[0]['throughput'] else 0
+
+    print(f"\n{'='*90}")
+    print("Worker Scaling")
+    print(f"{'='*90}")
+    print(f"{'Workers':>8} {'Req/s':>9} {'Scaling':>8} {'p50 ms':>8} {'p99 ms':>8} {'Errors':>7} "
+          f"{'RSS/worker':>11} {'PSS/worker':>11} {'PSS total':>10}")
+    print('-' * 90)
+    for result in results:
+        workers = result['workers']
+        memory = result['worker_memory']
+        scaling = result['throughput'] / (baseline * workers) if baseline else 0
+        latency = result['latency_ms']
+        print(f"{workers:>8} {result['throughput']:>9.1f} {scaling:>7.0%} "
+              f"{latency['p50'] or 0:>8.1f} {latency['p99'] or 0:>8.1f} {result['error_rate']:>7.2%} "
+              f"{result['total_rss_mb'] / max(1, len(memory)):>9.1f}MB "
+              f"{sum(m['pss_mb'] for m in memory) / max(1, len(memory)):>9.1f}MB "
+              f"{result['total_pss_mb']:>8.1f}MB")
+    print(f"{'='*90}")
+    print("Scaling: throughput per worker relative to 1 worker (100% = linear)")
+    print("PSS total includes the master\n")
+
+
+def main():
+    """Main worker scaling function."""
+    parser = argparse.ArgumentParser(description="Throughput and memory of the ML service by worker count")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help='Worker counts to test')
+    parser.add_argument('--concurrency-per-worker', type=int, default=8, help='Closed-loop clients per worker')
+    parser.add_argument('--duration', type=float, default=20.0, help='Measured seconds per worker count')
+    parser.add_argument('--warmup', type=float, default=3.0, help='Unmeasured seconds first')
+    parser.add_argument('--no-pin', action='store_true', help='Do not pin workers to CPUs')
+    parser.add_argument('--images', type=str,
+                        default=str(service_root.parent.parent / 'data' / 'processed' / 'test'),
+                        help='Directory of sample images')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('--output', type=str, default=None, help='Write the results as JSON')
+    args = parser.parse_args()
+
+    if not hasattr(os, 'fork') or not Path('/proc/self/smaps_rollup').exists():
+        parser.error("Requires Linux (fork and /proc/<pid>/smaps_rollup)")
+
+    images = load_sample_images(Path(args.images), 200, args.seed)
+
+    print(f"\n{'='*60}")
+    print("ML Service Worker Scaling")
+    print(f"{'='*60}")
+    print(f"Worker Counts: {args.workers}")
+    print(f"CPUs Available: {len(os.sched_getaffinity(0))}")
+    print(f"Clients per Worker: {args.concurrency_per_worker}")
+    print(f"Duration: {args.warmup}s warm-up + {args.duration}s measured")
+    print(f"{'='*60}\n")
+
+    results = []
+    for workers in args.workers:
+        result = measure(workers, args, images)
+        results.append(result)
+        print(f"  ✓ {workers} worker(s): {result['throughput']:.1f} req/s, "
+              f"PSS total {result['total_pss_mb']:.1f} MB")
+
+    print_results(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+        print(f"✓ Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()